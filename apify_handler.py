@@ -1,20 +1,162 @@
 """
 Apify handler module for the Discord bot.
 Handles scraping Twitter/X.com content using the Apify API.
+
+Actor runs are started and polled with the async Apify client, so no thread is held
+for the length of a run. Tweets requested close together are fetched in one run with
+several startUrls, the tweet and its replies are fetched concurrently, and results are
+cached per tweet ID.
 """
 
 import asyncio
-from apify_client import ApifyClient
+import time
+from collections import OrderedDict
+from apify_client import ApifyClientAsync
 import logging
-from typing import Optional, Dict, List, Any, Union
+from typing import Optional, Dict, List, Any, Sequence, Tuple, Union
 import re
 
 # Import config for API token
 import config
+from http_clients import get_sdk_client
+from micro_batch import MicroBatcher
 
 # Set up logging
 logger = logging.getLogger('discord_bot.apify_handler')
 
+TWEET_ACTOR_ID = "u6ppkMWAx2E2MpEuF"
+REPLIES_ACTOR_ID = "qhybbvlFivx7AP0Oh"
+
+# Seconds between status checks of a running actor
+RUN_POLL_INTERVAL_SECONDS = 2
+TERMINAL_RUN_STATUSES = {'SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT'}
+
+# Tweets and replies fetched in the last week are reused (matches the scrape cache TTL)
+TWEET_CACHE_TTL_SECONDS = 7 * 24 * 3600
+TWEET_CACHE_MAX_ENTRIES = 512
+
+# (kind, tweet ID) -> (expiry time, data)
+_tweet_cache: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+
+def get_apify_client() -> ApifyClientAsync:
+    """
+    Get the shared Apify client for the configured API token.
+
+    Returns:
+        ApifyClientAsync: The shared client
+    """
+    return get_sdk_client('apify', (ApifyClientAsync, config.apify_api_token), lambda: ApifyClientAsync(token=config.apify_api_token))
+
+def _cache_get(kind: str, tweet_id: Optional[str]) -> Optional[Any]:
+    if not tweet_id:
+        return None
+    entry = _tweet_cache.get((kind, tweet_id))
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _tweet_cache[(kind, tweet_id)]
+        return None
+    _tweet_cache.move_to_end((kind, tweet_id))
+    return entry[1]
+
+def _cache_put(kind: str, tweet_id: Optional[str], data: Any) -> None:
+    if not tweet_id or data is None:
+        return
+    _tweet_cache[(kind, tweet_id)] = (time.monotonic() + TWEET_CACHE_TTL_SECONDS, data)
+    _tweet_cache.move_to_end((kind, tweet_id))
+    while len(_tweet_cache) > TWEET_CACHE_MAX_ENTRIES:
+        _tweet_cache.popitem(last=False)
+
+def _run_field(run: Any, camel_name: str, snake_name: str) -> Any:
+    """Read a field of an actor run, which older clients return as a dict and newer ones as a model."""
+    if isinstance(run, dict):
+        return run.get(camel_name)
+    return getattr(run, snake_name, None)
+
+def _run_status(run: Any) -> str:
+    status = _run_field(run, 'status', 'status')
+    return str(getattr(status, 'value', status) or '')
+
+async def _run_actor(actor_id: str, run_input: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Start an actor run, poll it until it finishes and return its dataset items.
+
+    Args:
+        actor_id (str): The Apify actor to run
+        run_input (Dict[str, Any]): The actor input
+
+    Returns:
+        List[Dict[str, Any]]: The items in the run's default dataset
+
+    Raises:
+        TimeoutError: If the run didn't finish within APIFY_RUN_TIMEOUT_SECONDS (it is aborted)
+        RuntimeError: If the run failed
+    """
+    client = get_apify_client()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.APIFY_RUN_TIMEOUT_SECONDS
+
+    run = await client.actor(actor_id).start(run_input=run_input)
+    run_id = _run_field(run, 'id', 'id')
+    while _run_status(run) not in TERMINAL_RUN_STATUSES:
+        if loop.time() >= deadline:
+            try:
+                await client.run(run_id).abort()
+            except Exception as e:
+                logger.warning(f"Error aborting Apify run {run_id}: {str(e)}")
+            raise TimeoutError(f"Apify actor {actor_id} run {run_id} did not finish in {config.APIFY_RUN_TIMEOUT_SECONDS}s")
+        await asyncio.sleep(RUN_POLL_INTERVAL_SECONDS)
+        run = await client.run(run_id).get() or run
+
+    status = _run_status(run)
+    if status != 'SUCCEEDED':
+        raise RuntimeError(f"Apify actor {actor_id} run {run_id} finished with status {status}")
+
+    page = await client.dataset(_run_field(run, 'defaultDatasetId', 'default_dataset_id')).list_items()
+    return list(page.items)
+
+def _format_url(url: str) -> str:
+    return url if url.startswith('http') else f"https://{url}"
+
+def _item_tweet_id(item: Dict[str, Any]) -> Optional[str]:
+    for key in ('id_str', 'id'):
+        if item.get(key):
+            return str(item[key])
+    return extract_tweet_id(item.get('url') or item.get('twitterUrl') or '')
+
+async def _fetch_tweets_batch(group: Any, urls: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Fetch several tweets with one actor run and map each URL to its tweet."""
+    logger.info(f"Fetching {len(urls)} tweet(s) in one Apify run")
+    input_data = {
+        "startUrls": [{"url": url} for url in urls],
+        "tweetsDesired": len(urls),
+        "addUserInfo": True,
+        "proxyConfig": {
+            "useApifyProxy": True
+        }
+    }
+    items = await _run_actor(TWEET_ACTOR_ID, input_data)
+
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        tweet_id = _item_tweet_id(item)
+        if tweet_id:
+            by_id.setdefault(tweet_id, item)
+    results = {url: by_id.get(extract_tweet_id(url) or '') for url in urls}
+
+    # A single-URL run can only be for that tweet, whatever ID fields the item has
+    if len(urls) == 1 and results[urls[0]] is None and items:
+        results[urls[0]] = items[0]
+    return results
+
+# Tweet URLs requested within APIFY_BATCH_WINDOW_MS of each other share one actor run
+tweet_batcher = MicroBatcher(
+    'apify_tweets',
+    _fetch_tweets_batch,
+    window=config.APIFY_BATCH_WINDOW_MS / 1000,
+    max_size=config.APIFY_BATCH_MAX_URLS
+)
+
 async def fetch_tweet(url: str) -> Optional[Dict[str, Any]]:
     """
     Fetch a tweet using Apify's Twitter Scraper.
@@ -33,53 +175,29 @@ async def fetch_tweet(url: str) -> Optional[Dict[str, Any]]:
             logger.error("Apify API token not found in config.py or is empty")
             return None
 
-        # Initialize the Apify client
-        client = ApifyClient(token=config.apify_api_token)
-
         # Extract tweet ID from URL
         tweet_id = extract_tweet_id(url)
         if not tweet_id:
             logger.error(f"Could not extract tweet ID from URL: {url}")
             return None
 
+        cached = _cache_get('tweet', tweet_id)
+        if cached is not None:
+            logger.info(f"Using cached tweet {tweet_id}")
+            return cached
+
         # Ensure URL is properly formatted
-        if not url.startswith('http'):
-            formatted_url = f"https://{url}"
-        else:
-            formatted_url = url
-            
+        formatted_url = _format_url(url)
         logger.info(f"Using formatted URL: {formatted_url}")
-            
-        # Prepare the input for the Twitter Scraper actor
-        input_data = {
-            "startUrls": [{"url": formatted_url}],
-            "tweetsDesired": 1,
-            "addUserInfo": True,
-            "proxyConfig": {
-                "useApifyProxy": True
-            }
-        }
-
-        # Use a separate thread for the blocking API call
-        loop = asyncio.get_event_loop()
-        run = await loop.run_in_executor(
-            None,
-            lambda: client.actor("u6ppkMWAx2E2MpEuF").call(run_input=input_data)
-        )
 
-        # Get the dataset items
-        dataset_items = await loop.run_in_executor(
-            None,
-            lambda: client.dataset(run["defaultDatasetId"]).list_items().items
-        )
+        tweet_data = await tweet_batcher.submit(None, formatted_url)
 
-        if not dataset_items:
+        if not tweet_data:
             logger.warning(f"No tweet data found for URL: {url}")
             return None
 
-        # Get the first (and should be only) item
-        tweet_data = dataset_items[0]
-        
+        _cache_put('tweet', tweet_id, tweet_data)
+
         # Log success
         logger.info(f"Successfully fetched tweet from URL: {url}")
         
@@ -107,15 +225,14 @@ async def fetch_tweet_replies(url: str) -> Optional[List[Dict[str, Any]]]:
             logger.error("Apify API token not found in config.py or is empty")
             return None
 
-        # Initialize the Apify client
-        client = ApifyClient(token=config.apify_api_token)
+        tweet_id = extract_tweet_id(url)
+        cached = _cache_get('replies', tweet_id)
+        if cached is not None:
+            logger.info(f"Using cached replies for tweet {tweet_id}")
+            return cached
 
         # Ensure URL is properly formatted
-        if not url.startswith('http'):
-            formatted_url = f"https://{url}"
-        else:
-            formatted_url = url
-            
+        formatted_url = _format_url(url)
         logger.info(f"Using formatted URL for replies: {formatted_url}")
             
         # Prepare the input for the Twitter Replies Scraper actor
@@ -124,23 +241,14 @@ async def fetch_tweet_replies(url: str) -> Optional[List[Dict[str, Any]]]:
             "resultsLimit": 10
         }
 
-        # Use a separate thread for the blocking API call
-        loop = asyncio.get_event_loop()
-        run = await loop.run_in_executor(
-            None,
-            lambda: client.actor("qhybbvlFivx7AP0Oh").call(run_input=input_data)
-        )
-
-        # Get the dataset items
-        dataset_items = await loop.run_in_executor(
-            None,
-            lambda: client.dataset(run["defaultDatasetId"]).list_items().items
-        )
+        dataset_items = await _run_actor(REPLIES_ACTOR_ID, input_data)
 
         if not dataset_items:
             logger.warning(f"No reply data found for URL: {url}")
             return []
 
+        _cache_put('replies', tweet_id, dataset_items)
+
         # Log success
         logger.info(f"Successfully fetched {len(dataset_items)} replies from URL: {url}")
         
@@ -244,8 +352,8 @@ async def scrape_twitter_content(url: str) -> Optional[Dict[str, Any]]:
     try:
         logger.info(f"Scraping Twitter/X.com URL: {url}")
 
-        # Fetch the original tweet
-        tweet_data = await fetch_tweet(url)
+        # Fetch the original tweet and its replies concurrently
+        tweet_data, replies_data = await asyncio.gather(fetch_tweet(url), fetch_tweet_replies(url))
         if not tweet_data:
             logger.warning(f"Failed to fetch tweet from URL: {url}")
             return None
@@ -261,9 +369,6 @@ async def scrape_twitter_content(url: str) -> Optional[Dict[str, Any]]:
         author_name = author.get('name', '')
         author_screen_name = author.get('screen_name', '')
         
-        # Fetch the tweet replies
-        replies_data = await fetch_tweet_replies(url)
-        
         # Extract reply information
         replies = []
         if replies_data:
@@ -11,23 +11,32 @@ from urllib.parse import urlparse
 
 import os
 import json
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from datetime import datetime, timedelta, timezone
 import database
 from logging_config import logger  # Import the logger from the new module
 from rate_limiter import check_rate_limit, update_rate_limit_config  # Import rate limiting functions
-from llm_handler import call_llm_api, call_llm_for_summary, summarize_scraped_content, summarize_url_with_llm, call_llm_with_database_context  # Import LLM functions
+from llm_handler import call_llm_api, call_llm_for_summary, scrape_and_summarize_url, summarize_url_with_llm, call_llm_with_database_context, exa_contents_batcher  # Import LLM functions
 from message_utils import split_long_message, fetch_referenced_message, is_discord_message_link  # Import message utility functions
-from youtube_handler import is_youtube_url, scrape_youtube_content  # Import YouTube functions
 from summarization_tasks import daily_channel_summarization, set_discord_client, before_daily_summarization, daily_role_color_charging  # Import summarization tasks
 from config_validator import validate_config  # Import config validator
 from command_handler import handle_bot_command, handle_sum_day_command, handle_sum_hr_command  # Import command handlers
-from firecrawl_handler import scrape_url_content  # Import Firecrawl handler
-from apify_handler import scrape_twitter_content, is_twitter_url  # Import Apify handler
 from gif_limiter import check_and_record_gif_post, check_gif_rate_limit, record_gif_bypass
 import config
-from image_analyzer import analyze_message_images  # Import image analysis functions
+from image_analyzer import get_image_attachments, get_image_batch_stats, get_image_transfer_stats  # Import image analysis functions
+from image_cache import image_description_cache
+from llm_cache import llm_response_cache
+from discord_streaming import StreamingMessageWriter, get_streaming_stats
+from image_jobs import start_image_analysis, stop_image_analysis, submit_image_analysis
 from gif_utils import is_gif_url, is_discord_emoji_url
+from single_flight import url_summary_flight
+from url_utils import canonicalize_url
+from scraper_router import classify_url, get_provider_stats
+from url_pipeline import collect_stragglers, summarize_urls
+from http_clients import close_http_clients, get_http_stats
+from firecrawl_handler import shutdown_sdk_executor as shutdown_firecrawl_sdk_executor
+from apify_handler import tweet_batcher as apify_tweet_batcher
+from semantic_index import retrieve_question_context, start_semantic_indexer, stop_semantic_indexer
 
 GIF_WARNING_DELETE_DELAY = 30  # seconds before deleting warning messages
 
@@ -36,6 +45,9 @@ _gif_warned_users = {}
 
 _instance_lock_file = None
 
+# Background tasks (e.g. late link summaries) kept alive until they finish
+_background_tasks = set()
+
 
 def acquire_single_instance_lock(lock_path: str = "/tmp/techfren-discord-bot.lock") -> bool:
     """Return True after acquiring the bot process lock, False if another copy is running."""
@@ -126,8 +138,39 @@ intents = discord.Intents.default()
 intents.message_content = True  # This is required to read message content in guild channels
 intents.reactions = True  # Required for on_raw_reaction_add to detect reactions for link summarization
 
+class TechFrenBot(commands.Bot):
+    """commands.Bot that flushes pending background work before disconnecting."""
+
+    async def close(self):
+        try:
+            await stop_image_analysis()
+        except Exception as e:
+            logger.error(f"Error stopping image analysis workers on shutdown: {str(e)}", exc_info=True)
+        try:
+            await stop_semantic_indexer()
+        except Exception as e:
+            logger.error(f"Error stopping semantic indexer on shutdown: {str(e)}", exc_info=True)
+        try:
+            await database.stop_message_ingestion()
+        except Exception as e:
+            logger.error(f"Error flushing message ingestion queue on shutdown: {str(e)}", exc_info=True)
+        logger.info(f"URL summary deduplication: {url_summary_flight.get_metrics()}")
+        logger.info(f"Scraper provider stats: {get_provider_stats()}")
+        logger.info(f"Exa /contents batching: {exa_contents_batcher.get_metrics()}")
+        logger.info(f"Apify tweet batching: {apify_tweet_batcher.get_metrics()}")
+        logger.info(f"Image description cache: {image_description_cache.get_metrics()}")
+        logger.info(f"Image transfers: {get_image_transfer_stats()}")
+        logger.info(f"Image batching: {get_image_batch_stats()}")
+        logger.info(f"LLM response cache: {llm_response_cache.get_metrics()}")
+        logger.info(f"Streamed responses: {get_streaming_stats()}")
+        await super().close()
+        logger.info(f"HTTP connection reuse: {get_http_stats()}")
+        await close_http_clients()
+        shutdown_firecrawl_sdk_executor()
+        database.close_connection_pool()
+
 # Use commands.Bot instead of discord.Client to support slash commands
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = TechFrenBot(command_prefix='!', intents=intents)
 
 # Keep client reference for backward compatibility
 client = bot
@@ -144,94 +187,25 @@ async def process_url(message_id: str, url: str):
     try:
         logger.info(f"Processing URL {url} from message {message_id}")
 
-        # Check if the URL is from YouTube
-        if await is_youtube_url(url):
-            logger.info(f"Detected YouTube URL: {url}")
-
-            # Use YouTube handler to scrape content
-            scraped_result = await scrape_youtube_content(url)
-
-            # If YouTube scraping fails, fall back to Firecrawl
-            if not scraped_result:
-                logger.warning(f"Failed to scrape YouTube content, falling back to Firecrawl: {url}")
-                scraped_result = await scrape_url_content(url)
-            else:
-                logger.info(f"Successfully scraped YouTube content: {url}")
-                # Extract markdown content from the scraped result
-                markdown_content = scraped_result.get('markdown')
-        # Check if the URL is from Twitter/X.com
-        elif await is_twitter_url(url):
-            logger.info(f"Detected Twitter/X.com URL: {url}")
-
-            # Validate if the URL contains a tweet ID (status)
-            from apify_handler import extract_tweet_id
-            tweet_id = extract_tweet_id(url)
-            if not tweet_id:
-                logger.warning(f"URL appears to be Twitter/X.com but doesn't contain a valid tweet ID: {url}")
-
-                # For base Twitter/X.com URLs without a tweet ID, create a simple markdown response
-                if url.lower() in ["https://x.com", "https://twitter.com", "http://x.com", "http://twitter.com"]:
-                    logger.info(f"Handling base Twitter/X.com URL with custom response: {url}")
-                    scraped_result = {
-                        "markdown": f"# Twitter/X.com\n\nThis is the main page of Twitter/X.com: {url}"
-                    }
-                else:
-                    # For other Twitter/X.com URLs without a tweet ID, try Firecrawl
-                    scraped_result = await scrape_url_content(url)
-            else:
-                # Check if Apify API token is configured
-                if not hasattr(config, 'apify_api_token') or not config.apify_api_token:
-                    logger.warning("Apify API token not found in config.py or is empty, falling back to Firecrawl")
-                    scraped_result = await scrape_url_content(url)
-                else:
-                    # Use Apify to scrape Twitter/X.com content
-                    scraped_result = await scrape_twitter_content(url)
-
-                    # If Apify scraping fails, fall back to Firecrawl
-                    if not scraped_result:
-                        logger.warning(f"Failed to scrape Twitter/X.com content with Apify, falling back to Firecrawl: {url}")
-                        scraped_result = await scrape_url_content(url)
-                    else:
-                        logger.info(f"Successfully scraped Twitter/X.com content with Apify: {url}")
-                        # Extract markdown content from the scraped result
-                        markdown_content = scraped_result.get('markdown')
-        else:
-            # For non-Twitter/X.com and non-YouTube URLs, use Firecrawl
-            scraped_result = await scrape_url_content(url)
-            markdown_content = scraped_result  # Firecrawl returns markdown directly
-
-        # Check if scraping was successful
-        if not scraped_result:
-            logger.warning(f"Failed to scrape content from URL: {url}")
+        # Reuse a fresh cached scrape of the same (canonical) URL if there is one
+        cached = await asyncio.to_thread(database.get_scraped_content_by_url, url)
+        if cached:
+            logger.info(f"Using cached {cached['provider']} scrape for URL {url}")
+            success = await database.update_message_with_scraped_data(
+                message_id,
+                url,
+                cached['summary'],
+                json.dumps(cached['key_points'])
+            )
+            if not success:
+                logger.warning(f"Failed to update message {message_id} with cached scraped data")
             return
 
-        # Handle different types of scraped results
-        if await is_youtube_url(url):
-            # YouTube handler returns a dict with 'markdown' key
-            if isinstance(scraped_result, dict) and 'markdown' in scraped_result:
-                markdown_content = scraped_result.get("markdown", "")
-            else:
-                logger.warning(f"Invalid scraped result structure for YouTube URL {url}: expected dict with 'markdown' key")
-                return
-        elif await is_twitter_url(url) and hasattr(config, 'apify_api_token') and config.apify_api_token:
-            # Twitter/X.com URLs scraped with Apify return a dict with 'markdown' key
-            if isinstance(scraped_result, dict) and 'markdown' in scraped_result:
-                markdown_content = scraped_result.get("markdown", "")
-            else:
-                logger.warning(f"Invalid scraped result structure for Twitter URL {url}: expected dict with 'markdown' key")
-                return
-        else:
-            # Firecrawl returns markdown directly as a string
-            if isinstance(scraped_result, str):
-                markdown_content = scraped_result
-            else:
-                logger.warning(f"Invalid scraped result for URL {url}: expected string, got {type(scraped_result)}")
-                return
-
-        # Step 2: Summarize the scraped content
-        summary_text = await summarize_scraped_content(markdown_content, url)
+        # Scrape and summarize, sharing the work with any concurrent request for the same URL
+        summary_text = await url_summary_flight.do(
+            canonicalize_url(url), lambda: scrape_and_summarize_url(url)
+        )
         if not summary_text:
-            logger.warning(f"Failed to summarize content from URL: {url}")
             return
 
         # Step 3: Store the summary (no separate key points since it's now plain text)
@@ -350,6 +324,31 @@ async def create_or_get_summary_thread(message: discord.Message, thread_name: st
 
     return thread, header_already_sent
 
+async def _get_url_summary(url: str, produce: Callable[[str], Awaitable[Optional[str]]]) -> Optional[str]:
+    """
+    Get the summary for a URL from the scrape cache, or produce it once for all concurrent callers.
+
+    Args:
+        url (str): The URL to summarize
+        produce (Callable): Scrapes and summarizes the URL on a cache miss (and caches the result)
+
+    Returns:
+        Optional[str]: The summary, or None if it could not be produced
+    """
+    cached = await asyncio.to_thread(database.get_scraped_content_by_url, url)
+    if cached:
+        logger.info(f"Using cached summary for URL: {url}")
+        return cached['summary']
+
+    # Share the work with any concurrent request for the same canonical URL
+    return await url_summary_flight.do(canonicalize_url(url), lambda: produce(url))
+
+def _run_in_background(coro) -> None:
+    """Start a fire-and-forget task, keeping a reference so it isn't garbage collected mid-flight."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
 async def handle_x_post_summary(message: discord.Message) -> bool:
     """
     Automatically detect X/Twitter links in messages, scrape and summarize them,
@@ -379,7 +378,7 @@ async def handle_x_post_summary(message: discord.Message) -> bool:
         # Check each URL to find X/Twitter links
         x_urls = []
         for url in urls:
-            if await is_twitter_url(url):
+            if classify_url(url) == 'twitter':
                 from apify_handler import extract_tweet_id
                 tweet_id = extract_tweet_id(url)
                 if tweet_id:  # Only process URLs with valid tweet IDs
@@ -396,47 +395,30 @@ async def handle_x_post_summary(message: discord.Message) -> bool:
             logger.warning("Apify API token not configured, skipping X post summarization")
             return False
 
-        # Collect all summaries first before creating the thread
-        # This avoids creating a thread if all URLs fail to summarize
-        url_summaries = []
-        for url in x_urls:
-            try:
-                # Scrape the X/Twitter content
-                logger.info(f"Starting to scrape X post: {url}")
-                scraped_result = await scrape_twitter_content(url)
-
-                if not scraped_result or 'markdown' not in scraped_result:
-                    logger.warning(f"Failed to scrape X post: {url}")
-                    continue
-
-                markdown_content = scraped_result.get('markdown', '')
+        from apify_handler import extract_tweet_id
 
-                # Summarize the content
-                logger.info(f"Summarizing scraped content for: {url}")
-                summary_text = await summarize_scraped_content(markdown_content, url)
-
-                if summary_text:
-                    from apify_handler import extract_tweet_id
-                    tweet_id = extract_tweet_id(url)
-                    url_summaries.append((url, summary_text, tweet_id))
-                else:
-                    logger.warning(f"Failed to summarize X post: {url}")
-
-            except Exception as e:
-                logger.error(f"Error processing X URL {url}: {str(e)}", exc_info=True)
+        # Summarize all posts concurrently; collect what is ready by the deadline before creating
+        # the thread (this avoids creating a thread if all URLs fail to summarize)
+        url_summaries, stragglers = await summarize_urls(
+            x_urls,
+            lambda url: _get_url_summary(url, scrape_and_summarize_url),
+            config.URL_SUMMARY_CONCURRENCY,
+            config.URL_SUMMARY_DEADLINE_SECONDS
+        )
 
         if not url_summaries:
             logger.warning(f"No X posts could be summarized for message {message.id}")
             return False
 
         # Create thread name based on number of posts
-        if len(url_summaries) == 1:
-            tweet_id = url_summaries[0][2]
+        multiple = len(url_summaries) + len(stragglers) > 1
+        if not multiple:
+            tweet_id = extract_tweet_id(url_summaries[0][0])
             thread_name = f"X Post Summary: {tweet_id[:20]}" if tweet_id else "X Post Summary"
             header_text = "📊 **X Post Summary:**"
         else:
-            thread_name = f"X Post Summaries ({len(url_summaries)} posts)"
-            header_text = f"📊 **X Post Summaries ({len(url_summaries)} posts):**"
+            thread_name = f"X Post Summaries ({len(x_urls)} posts)"
+            header_text = f"📊 **X Post Summaries ({len(x_urls)} posts):**"
 
         # Create the thread once for all summaries
         thread, header_already_sent = await create_or_get_summary_thread(
@@ -446,11 +428,16 @@ async def handle_x_post_summary(message: discord.Message) -> bool:
             logger.error(f"Failed to create thread for message {message.id}")
             return False
 
-        # Post each summary to the thread
-        for i, (url, summary_text, tweet_id) in enumerate(url_summaries, 1):
+        posted = 0
+
+        async def post_summary(url: str, summary_text: str) -> None:
+            nonlocal posted
+            posted += 1
+            i = posted
+            tweet_id = extract_tweet_id(url)
             try:
                 # For multiple posts, add a separator and URL header for each summary
-                if len(url_summaries) > 1:
+                if multiple:
                     if i > 1:
                         # Add separator between summaries (not before the first one)
                         await thread.send("─" * 30)
@@ -498,12 +485,37 @@ async def handle_x_post_summary(message: discord.Message) -> bool:
                 except:
                     pass
 
-        return len(url_summaries) > 0
+        # Post each summary to the thread, in the order the links appear
+        for url, summary_text in url_summaries:
+            await post_summary(url, summary_text)
+
+        # Posts that missed the deadline are appended to the thread when they finish
+        _run_in_background(
+            collect_stragglers(stragglers, post_summary, config.URL_SUMMARY_STRAGGLER_SECONDS)
+        )
+
+        return True
 
     except Exception as e:
         logger.error(f"Error in handle_x_post_summary: {str(e)}", exc_info=True)
         return False
 
+async def _summarize_link(url: str) -> Optional[str]:
+    """
+    Summarize a URL with the configured LLM and cache the summary.
+
+    Args:
+        url (str): The URL to summarize
+
+    Returns:
+        Optional[str]: The summary, or None if summarization failed
+    """
+    logger.info(f"Starting to summarize URL with configured LLM: {url}")
+    summary_text = await summarize_url_with_llm(url)
+    if summary_text:
+        await asyncio.to_thread(database.store_scraped_content, url, 'exa', summary_text)
+    return summary_text
+
 async def handle_link_summary(message: discord.Message) -> bool:
     """
     Automatically detect non-X/Twitter URLs in messages, summarize them using the configured LLM,
@@ -549,10 +561,8 @@ async def handle_link_summary(message: discord.Message) -> bool:
                 logger.info(f"Skipping Discord message link from link summary: {url}")
                 continue
 
-            is_x_url = await is_twitter_url(url)
-            is_yt_url = await is_youtube_url(url)
-
-            if not is_x_url and not is_yt_url:
+            # X posts and YouTube videos have their own handling
+            if classify_url(url) == 'web':
                 regular_urls.append(url)
 
         if not regular_urls:
@@ -560,35 +570,29 @@ async def handle_link_summary(message: discord.Message) -> bool:
 
         logger.info(f"Found {len(regular_urls)} regular URL(s) in message {message.id}")
 
-        # Collect all summaries first before creating the thread
-        # This avoids creating a thread if all URLs fail to summarize
-        url_summaries = []
-        for url in regular_urls:
-            try:
-                # Summarize the URL using the configured LLM
-                logger.info(f"Starting to summarize URL with configured LLM: {url}")
-                summary_text = await summarize_url_with_llm(url)
-
-                if summary_text:
-                    url_summaries.append((url, summary_text))
-                else:
-                    logger.warning(f"Failed to summarize URL: {url}")
-            except Exception as e:
-                logger.error(f"Error summarizing URL {url}: {str(e)}", exc_info=True)
+        # Summarize all links concurrently; collect what is ready by the deadline before creating
+        # the thread (this avoids creating a thread if all URLs fail to summarize)
+        url_summaries, stragglers = await summarize_urls(
+            regular_urls,
+            lambda url: _get_url_summary(url, _summarize_link),
+            config.URL_SUMMARY_CONCURRENCY,
+            config.URL_SUMMARY_DEADLINE_SECONDS
+        )
 
         if not url_summaries:
             logger.warning(f"No URLs could be summarized for message {message.id}")
             return False
 
         # Create thread name based on number of links
-        if len(url_summaries) == 1:
+        multiple = len(url_summaries) + len(stragglers) > 1
+        if not multiple:
             parsed_url = urlparse(url_summaries[0][0])
             domain = parsed_url.netloc or "Link"
             thread_name = f"Link Summary: {domain[:40]}"
             header_text = "🔗 **Link Summary:**"
         else:
-            thread_name = f"Link Summaries ({len(url_summaries)} links)"
-            header_text = f"🔗 **Link Summaries ({len(url_summaries)} links):**"
+            thread_name = f"Link Summaries ({len(regular_urls)} links)"
+            header_text = f"🔗 **Link Summaries ({len(regular_urls)} links):**"
 
         # Create the thread once for all summaries
         thread, header_already_sent = await create_or_get_summary_thread(
@@ -598,11 +602,15 @@ async def handle_link_summary(message: discord.Message) -> bool:
             logger.error(f"Failed to create thread for message {message.id}")
             return False
 
-        # Post each summary to the thread
-        for i, (url, summary_text) in enumerate(url_summaries, 1):
+        posted = 0
+
+        async def post_summary(url: str, summary_text: str) -> None:
+            nonlocal posted
+            posted += 1
+            i = posted
             try:
                 # For multiple links, add a separator and URL header for each summary
-                if len(url_summaries) > 1:
+                if multiple:
                     parsed_url = urlparse(url)
                     domain = parsed_url.netloc or "Link"
                     if i > 1:
@@ -652,7 +660,16 @@ async def handle_link_summary(message: discord.Message) -> bool:
                 except:
                     pass
 
-        return len(url_summaries) > 0
+        # Post each summary to the thread, in the order the links appear
+        for url, summary_text in url_summaries:
+            await post_summary(url, summary_text)
+
+        # Links that missed the deadline are appended to the thread when they finish
+        _run_in_background(
+            collect_stragglers(stragglers, post_summary, config.URL_SUMMARY_STRAGGLER_SECONDS)
+        )
+
+        return True
 
     except Exception as e:
         logger.error(f"Error in handle_link_summary: {str(e)}", exc_info=True)
@@ -810,6 +827,15 @@ async def on_ready():
         message_count = database.get_message_count()
         logger.info(f'Database initialized successfully. Current message count: {message_count}')
 
+        # Start the write-behind queue used by on_message to store messages
+        database.start_message_ingestion()
+
+        # Start the image analysis workers and resume jobs left from the last run
+        await start_image_analysis(config.IMAGE_ANALYSIS_CONCURRENCY)
+
+        # Embed new messages, and any stored while the bot was offline, in the background
+        start_semantic_indexer()
+
         # Log database file information
         db_file_path = os.path.join(os.getcwd(), database.DB_FILE)
         if os.path.exists(db_file_path):
@@ -927,6 +953,20 @@ async def on_message(message):
 
         return False, depth, False
 
+    async def check_stored_reference_chain_for_gif(msg):
+        """
+        Answer the reference chain GIF check from the stored reply graph without fetching from Discord.
+        Returns (has_gif, chain_depth, is_external), or None if the chain isn't fully stored.
+        """
+        node = await asyncio.to_thread(database.get_thread_node, str(msg.reference.message_id))
+        if node is None or node['chain_has_gif'] is None:
+            # Not stored, or some message up to the root is unstored or predates GIF tracking
+            return None
+        return node['chain_has_gif'], node['depth'], False
+
+    # Set when the reference chain contains a GIF; stored so replies to this message can skip the chain walk
+    reference_chain_has_gif = False
+
     # Check if this message references another message (reply or forward)
     # This must happen BEFORE the GIF check because forwards might not have GIF content loaded yet
     if not message.author.bot and message.reference and message.reference.message_id:
@@ -945,8 +985,12 @@ async def on_message(message):
             # Check if the CURRENT message (the forward) contains a GIF
             current_has_gif = message_contains_gif(message)
 
-            # Check the entire reference chain for GIFs
-            chain_has_gif, chain_depth, is_external = await check_reference_chain_for_gif(message)
+            # Check the entire reference chain for GIFs, from the reply graph when possible
+            chain_result = await check_stored_reference_chain_for_gif(message)
+            if chain_result is None:
+                chain_result = await check_reference_chain_for_gif(message)
+            chain_has_gif, chain_depth, is_external = chain_result
+            reference_chain_has_gif = chain_has_gif
             logger.info(
                 f"Chain check complete - GIF: {chain_has_gif} | "
                 f"Depth: {chain_depth} | External: {is_external}"
@@ -1075,21 +1119,19 @@ async def on_message(message):
         except Exception as ref_error:
             logger.error(f"Error fetching referenced message: {ref_error}", exc_info=True)
 
-    # Check if message contains GIF (for all non-bot messages)
-    has_gif = False
-    if not message.author.bot:
-        has_gif = message_contains_gif(message)
-        if has_gif:
-            logger.info(f"Direct GIF detected - User: {message.author.id} | Embeds: {len(message.embeds)}")
+    # Check if message contains GIF; stored for every author so replies to bot GIFs are caught too
+    has_gif = message_contains_gif(message)
+    if not message.author.bot and has_gif:
+        logger.info(f"Direct GIF detected - User: {message.author.id} | Embeds: {len(message.embeds)}")
 
-            # Log embed details
-            if message.embeds:
-                for i, embed in enumerate(message.embeds):
-                    logger.info(
-                        f"GIF embed {i}: "
-                        f"type={getattr(embed, 'type', None)} | "
-                        f"url={getattr(embed, 'url', None)}"
-                    )
+        # Log embed details
+        if message.embeds:
+            for i, embed in enumerate(message.embeds):
+                logger.info(
+                    f"GIF embed {i}: "
+                    f"type={getattr(embed, 'type', None)} | "
+                    f"url={getattr(embed, 'url', None)}"
+                )
 
     # Enforce GIF posting limits for regular users (rate limiting only, forwards already handled above)
     if not message.author.bot and has_gif:
@@ -1198,18 +1240,6 @@ async def on_message(message):
     author_display = message.author.display_name if isinstance(message.author, discord.Member) else str(message.author)
     logger.info(f"Message received - Guild: {guild_name} | Channel: {channel_name} | Author: {author_display} | Content: {message.content[:50]}{'...' if len(message.content) > 50 else ''}")
 
-    # Analyze images if present
-    image_descriptions_json = None
-    try:
-        if message.attachments:
-            image_analyses = await analyze_message_images(message)
-            if image_analyses:
-                # Convert to JSON for database storage
-                image_descriptions_json = json.dumps(image_analyses)
-                logger.info(f"Analyzed {len(image_analyses)} image(s) in message {message.id}")
-    except Exception:
-        logger.exception("Error analyzing images in message %s", message.id)
-
     # Store message in database
     try:
         # Determine if this is a command and what type
@@ -1245,26 +1275,32 @@ async def on_message(message):
         if message.reference and message.reference.message_id:
             reply_to_message_id = str(message.reference.message_id)
 
-        success = database.store_message(
-            message_id=str(message.id),
-            author_id=str(message.author.id),
-            author_name=str(message.author),
-            channel_id=channel_id,
-            channel_name=channel_name,
-            content=message.content,
-            created_at=message.created_at,
-            guild_id=guild_id,
-            guild_name=guild_name,
-            is_bot=message.author.bot,
-            is_command=is_command,
-            command_type=command_type,
-            image_descriptions=image_descriptions_json,
-            reply_to_message_id=reply_to_message_id
-        )
+        # Hand off to the write-behind queue so SQLite writes don't block the event loop
+        success = await database.enqueue_message({
+            'message_id': str(message.id),
+            'author_id': str(message.author.id),
+            'author_name': str(message.author),
+            'channel_id': channel_id,
+            'channel_name': channel_name,
+            'content': message.content,
+            'created_at': message.created_at,
+            'guild_id': guild_id,
+            'guild_name': guild_name,
+            'is_bot': message.author.bot,
+            'is_command': is_command,
+            'command_type': command_type,
+            'image_descriptions': None,  # Filled in by the image analysis workers
+            'reply_to_message_id': reply_to_message_id,
+            'has_gif': has_gif or reference_chain_has_gif
+        })
 
         if not success:
-            # This is usually because the message already exists (common when bot restarts)
-            logger.debug(f"Failed to store message {message.id} in database (likely duplicate)")
+            logger.debug(f"Failed to queue message {message.id} for storage")
+
+        # Describe images in the background; the description is written back when ready
+        image_attachments = get_image_attachments(message)
+        if image_attachments:
+            await submit_image_analysis(str(message.id), image_attachments)
 
         # Note: Link summarization is reaction-based, not automatic.
         # See on_raw_reaction_add handler - links are summarized when:
@@ -1315,6 +1351,8 @@ async def on_message_edit(before: discord.Message, after: discord.Message):
 
     if after_has_gif and not before_has_gif:
         logger.info(f"New GIF detected in edited message - User: {after.author.id}")
+        # Keep the reply graph's GIF flags current for replies to this message
+        await asyncio.to_thread(database.mark_message_has_gif, str(after.id))
         # Reuse the same enforcement logic by treating it as a new message check
         await on_message(after)
 
@@ -1762,10 +1800,13 @@ async def ask_slash(interaction: discord.Interaction, question: str, hours: int
     """
     Slash command to ask questions based on database conversation history.
 
+    Context is picked by hybrid retrieval: FTS keyword matches and semantic matches
+    are fused by rank, then padded with recent messages when fewer than 10 match.
+
     Args:
         interaction: The Discord interaction
         question: The question to ask
-        hours: Optional number of hours to filter history (if not set, uses last 100 messages)
+        hours: Optional number of hours to search back (if not set, searches all stored history)
     """
     try:
         # Validate hours if provided
@@ -1796,51 +1837,10 @@ async def ask_slash(interaction: discord.Interaction, question: str, hours: int
         await interaction.response.send_message(f"❓ **Question:** {question}\n\n🔍 *Processing, please wait...*")
         initial_message = await interaction.original_response()
 
-        # Extract keywords from the question for search
-        # Simple keyword extraction: split by spaces, filter short words
-        words = question.lower().split()
-        keywords = [w.strip('?.,!:;') for w in words if len(w) > 3]
-
-        # Remove common stop words
-        stop_words = {'what', 'when', 'where', 'which', 'that', 'this', 'with', 'from', 'have', 'been', 'were', 'they', 'their', 'about', 'could', 'would', 'should', 'there', 'here', 'does', 'more', 'some', 'into', 'just', 'also', 'than', 'then', 'only'}
-        keywords = [w for w in keywords if w not in stop_words]
-
-        # Get messages - either by keyword search or recent messages
-        # Default: fetch last 100 messages (no time filter unless hours is specified)
-        messages = []
-        if keywords:
-            # Search by keywords
-            messages = await asyncio.to_thread(
-                database.search_messages_by_keywords,
-                keywords=keywords[:5],  # Limit to 5 keywords
-                guild_id=guild_id,
-                hours=hours,  # None means no time filter
-                limit=75
-            )
-
-        # If keyword search found few results, supplement with recent messages
-        if len(messages) < 20:
-            recent_messages = await asyncio.to_thread(
-                database.get_recent_messages_for_context,
-                guild_id=guild_id,
-                hours=hours,  # None means no time filter, just get last N messages
-                limit=100 - len(messages)
-            )
-            # Merge, avoiding duplicates
-            existing_ids = {m['id'] for m in messages}
-            for msg in recent_messages:
-                if msg['id'] not in existing_ids:
-                    messages.append(msg)
-
-        # Sort by time (oldest first for conversation flow)
-        messages.sort(key=lambda x: x.get('created_at', datetime.min))
-
-        # Call the LLM with database context
-        response = await call_llm_with_database_context(
-            query=question,
-            messages=messages,
-            channel_name=channel_name
-        )
+        # Pick the most relevant messages by fusing full-text and semantic search,
+        # padded with recent messages when little matches
+        # Default: no time filter unless hours is specified
+        messages = await retrieve_question_context(question, guild_id, hours=hours)
 
         # Create a thread attached to the initial message
         thread_name = f"Q: {question[:50]}{'...' if len(question) > 50 else ''}"
@@ -1858,10 +1858,15 @@ async def ask_slash(interaction: discord.Interaction, question: str, hours: int
                 auto_archive_duration=1440
             )
 
-        # Send response in the thread
-        response_parts = await split_long_message(response, max_length=1900)
-        for part in response_parts:
-            await thread.send(part)
+        # Call the LLM with database context, streaming the answer into the thread
+        writer = StreamingMessageWriter(thread.send)
+        response = await call_llm_with_database_context(
+            query=question,
+            messages=messages,
+            channel_name=channel_name,
+            on_delta=writer.feed
+        )
+        await writer.finish(fallback=response)
 
         # Edit the initial message to show the question
         time_desc = "24 hours" if hours == 24 else f"{hours} hours"
@@ -272,8 +272,9 @@ async def handle_summary_command(
     from datetime import datetime, timezone
     from rate_limiter import check_rate_limit
     from database import check_database_connection
-    from llm_handler import call_llm_for_summary
-    from message_utils import split_long_message
+    from incremental_summary import summarize_channel_hours
+    from discord_streaming import StreamingMessageWriter
+    from llm_handler import format_summary
     import database
     import logging
     
@@ -337,61 +338,51 @@ async def handle_summary_command(
             await response_sender.send(error_msg, ephemeral=True)
             return
 
-        # Generate summary
-        summary = await call_llm_for_summary(messages_for_summary, channel_name_str, today, hours)
-        summary_parts = await split_long_message(summary)
-
-        # Send summary efficiently with thread creation
+        # Pick where the summary goes before generating it, so it can be streamed there
+        summary_sender = response_sender
         if context.guild_id:
             # For guild channels: Create thread and put summary content in it
             thread_name = f"Summary - {channel_name_str} - {today.strftime('%Y-%m-%d')}"
+            thread = None
 
             if initial_message:
                 try:
                     # Create thread from the initial message (will fetch with guild info if needed)
                     thread = await thread_manager.create_thread_from_message(initial_message, thread_name)
-
-                    if thread:
-                        # Send all summary content in the thread
-                        thread_sender = MessageResponseSender(thread)
-                        await thread_sender.send_in_parts(summary_parts)
-
-                        # Edit the initial message to just indicate the summary is in the thread
-                        await initial_message.edit(content=f"📊 **Summary of #{channel_name_str} for the past {hours} hour{'s' if hours != 1 else ''}**")
-                    else:
+                    if not thread:
                         # Fallback: if thread creation failed, send summary in main channel
                         logger.warning("Thread creation failed, sending summary in main channel")
-                        await initial_message.edit(content=f"📊 **Summary of #{channel_name_str} for the past {hours} hour{'s' if hours != 1 else ''}**")
-                        await response_sender.send_in_parts(summary_parts)
+
+                    # Edit the initial message to just indicate the summary is in the thread
+                    await initial_message.edit(content=f"📊 **Summary of #{channel_name_str} for the past {hours} hour{'s' if hours != 1 else ''}**")
 
                 except discord.HTTPException as e:
                     logger.warning(f"Failed to edit initial message: {e}")
-                    # Fallback: send summary in thread as before
-                    thread = await thread_manager.create_thread(thread_name)
-                    if thread:
-                        thread_sender = MessageResponseSender(thread)
-                        await thread_sender.send_in_parts(summary_parts)
-                        await response_sender.send(f"Summary posted in thread: {thread.mention}")
-                    else:
-                        # Ultimate fallback: send summary parts directly
-                        await response_sender.send_in_parts(summary_parts)
+                    # Fallback: post the summary in a thread of its own
+                    if not thread:
+                        thread = await thread_manager.create_thread(thread_name)
+                        if thread:
+                            await response_sender.send(f"Summary posted in thread: {thread.mention}")
             else:
                 # No initial message, create thread and send summary
                 thread = await thread_manager.create_thread(thread_name)
                 if thread:
-                    thread_sender = MessageResponseSender(thread)
-                    await thread_sender.send_in_parts(summary_parts)
                     await response_sender.send(f"📊 Summary generated - see thread: {thread.mention}")
-                else:
-                    # Fallback: send summary parts directly
-                    await response_sender.send_in_parts(summary_parts)
-        else:
-            # For DMs: send summary parts directly
-            await response_sender.send_in_parts(summary_parts)
 
-            # Store bot responses in database for DMs
-            if context.source_type == 'message' and not context.guild_id:
-                await _store_dm_responses(summary_parts, context, bot_user)
+            if thread:
+                summary_sender = MessageResponseSender(thread)
+
+        # Generate summary, reusing stored notes for hours that were already summarized,
+        # and post it as it is written
+        writer = StreamingMessageWriter(summary_sender.send, formatter=format_summary)
+        summary = await summarize_channel_hours(
+            channel_id_str, channel_name_str, today, hours, messages_for_summary, on_delta=writer.feed
+        )
+        await writer.finish(fallback=summary)
+
+        # Store bot responses in database for DMs
+        if not context.guild_id and context.source_type == 'message':
+            await _store_dm_responses(writer.contents, context, bot_user)
         
         # Store summary in database
         try:
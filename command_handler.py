@@ -3,7 +3,8 @@ import database
 from logging_config import logger
 from rate_limiter import check_rate_limit
 from llm_handler import call_llm_api
-from message_utils import split_long_message, get_message_context
+from message_utils import get_message_context
+from discord_streaming import StreamingMessageWriter
 import re
 from typing import Optional
 
@@ -47,6 +48,7 @@ async def handle_bot_command(message: discord.Message, client_user: discord.Clie
             thread_sender = MessageResponseSender(thread)
             processing_msg = await thread_sender.send("Processing your request, please wait...")
 
+            writer = None
             try:
                 # Get message context (referenced messages and linked messages)
                 message_context = None
@@ -57,28 +59,17 @@ async def handle_bot_command(message: discord.Message, client_user: discord.Clie
                     except Exception as e:
                         logger.warning(f"Failed to get message context: {e}")
 
-                response = await call_llm_api(query, message_context)
+                # Stream the answer into the thread, replacing the processing message
+                writer = StreamingMessageWriter(thread_sender.send, placeholder=processing_msg)
+                response = await call_llm_api(query, message_context, on_delta=writer.feed)
                 logger.debug(f"Raw response length: {len(response)} characters")
                 logger.debug(f"Response ends with: ...{response[-100:] if len(response) > 100 else response}")
-                
-                # Force split if response is over 900 chars to ensure it doesn't get cut off
-                # Discord has issues with messages near the 2000 char limit
-                if len(response) > 900:
-                    logger.info(f"Splitting response of {len(response)} chars into multiple parts")
-                    message_parts = await split_long_message(response, max_length=900)
-                else:
-                    message_parts = [response]
-
-                # Send all response parts in the thread
-                for part in message_parts:
-                    bot_response = await thread_sender.send(part)
+
+                message_parts = await writer.finish(fallback=response)
+                for bot_response, part in zip(message_parts, writer.contents):
                     if bot_response:
                         await store_bot_response_db(bot_response, client_user, message.guild, thread, part)
 
-                # Delete processing message
-                if processing_msg:
-                    await processing_msg.delete()
-
                 logger.info(f"Command executed successfully: mention - Response length: {len(response)} - Split into {len(message_parts)} parts - Posted in thread")
             except Exception as e:
                 logger.error(f"Error processing mention command: {str(e)}", exc_info=True)
@@ -86,7 +77,7 @@ async def handle_bot_command(message: discord.Message, client_user: discord.Clie
                 error_msg = config.ERROR_MESSAGES['processing_error']
                 await thread_sender.send(error_msg)
                 try:
-                    if processing_msg:
+                    if processing_msg and (writer is None or not writer.messages):
                         await processing_msg.delete()
                 except discord.NotFound:
                     pass
@@ -132,6 +123,7 @@ async def _send_error_response_thread(message: discord.Message, client_user: dis
 async def _handle_bot_command_fallback(message: discord.Message, client_user: discord.ClientUser, query: str, bot_client: discord.Client = None) -> None:
     """Fallback handler for bot commands when thread creation fails."""
     processing_msg = await message.channel.send("Processing your request, please wait...")
+    writer = None
     try:
         # Get message context (referenced messages and linked messages)
         message_context = None
@@ -142,19 +134,16 @@ async def _handle_bot_command_fallback(message: discord.Message, client_user: di
             except Exception as e:
                 logger.warning(f"Failed to get message context in fallback: {e}")
 
-        response = await call_llm_api(query, message_context)
-        # Always split if response is over 1900 chars to ensure it doesn't get cut off
-        if len(response) > 1900:
-            message_parts = await split_long_message(response, max_length=1900)
-        else:
-            message_parts = [response]
+        # Stream the answer into the channel, replacing the processing message
+        from command_abstraction import MessageResponseSender
+        channel_sender = MessageResponseSender(message.channel)
+        writer = StreamingMessageWriter(channel_sender.send, placeholder=processing_msg)
+        response = await call_llm_api(query, message_context, on_delta=writer.feed)
 
-        for part in message_parts:
-            allowed_mentions = discord.AllowedMentions(everyone=False, roles=False, users=True)
-            bot_response = await message.channel.send(part, allowed_mentions=allowed_mentions, suppress_embeds=True)
+        message_parts = await writer.finish(fallback=response)
+        for bot_response, part in zip(message_parts, writer.contents):
             await store_bot_response_db(bot_response, client_user, message.guild, message.channel, part)
 
-        await processing_msg.delete()
         logger.info(f"Command executed successfully (fallback): mention - Response length: {len(response)} - Split into {len(message_parts)} parts")
     except Exception as e:
         logger.error(f"Error processing mention command (fallback): {str(e)}", exc_info=True)
@@ -164,7 +153,8 @@ async def _handle_bot_command_fallback(message: discord.Message, client_user: di
         bot_response = await message.channel.send(error_msg, allowed_mentions=allowed_mentions, suppress_embeds=True)
         await store_bot_response_db(bot_response, client_user, message.guild, message.channel, error_msg)
         try:
-            await processing_msg.delete()
+            if writer is None or not writer.messages:
+                await processing_msg.delete()
         except discord.NotFound:
             pass
 
@@ -69,11 +69,49 @@ if not firecrawl_api_key:
 # Default: 900000ms (15 minutes) - maximum practical value
 firecrawl_timeout_ms = int(os.getenv('FIRECRAWL_TIMEOUT_MS', '900000'))
 
+# Firecrawl API Base URL
+# Environment variable: FIRECRAWL_BASE_URL
+firecrawl_base_url = os.getenv('FIRECRAWL_BASE_URL', 'https://api.firecrawl.dev')
+
+# Firecrawl response limits (optional)
+# Environment variables: FIRECRAWL_MAX_RESPONSE_BYTES, FIRECRAWL_SDK_WORKERS
+# Scrape responses larger than FIRECRAWL_MAX_RESPONSE_BYTES are abandoned while streaming.
+# The SDK fallback (used only if the REST endpoint is unreachable) runs on its own pool of
+# FIRECRAWL_SDK_WORKERS threads so slow scrapes can't starve database calls.
+try:
+    FIRECRAWL_MAX_RESPONSE_BYTES = max(1024, int(os.getenv('FIRECRAWL_MAX_RESPONSE_BYTES', str(10 * 1024 * 1024))))
+except (ValueError, TypeError):
+    FIRECRAWL_MAX_RESPONSE_BYTES = 10 * 1024 * 1024
+
+try:
+    FIRECRAWL_SDK_WORKERS = max(1, int(os.getenv('FIRECRAWL_SDK_WORKERS', '2')))
+except (ValueError, TypeError):
+    FIRECRAWL_SDK_WORKERS = 2
+
 # Apify API Token (optional, for x.com/twitter.com link scraping)
 # Environment variable: APIFY_API_TOKEN
 # If not provided, Twitter/X.com links will be processed using Firecrawl
 apify_api_token = os.getenv('APIFY_API_TOKEN')
 
+# Apify run batching (optional)
+# Environment variables: APIFY_BATCH_WINDOW_MS, APIFY_BATCH_MAX_URLS, APIFY_RUN_TIMEOUT_SECONDS
+# Tweet URLs requested within APIFY_BATCH_WINDOW_MS of each other are fetched in one actor run
+# of up to APIFY_BATCH_MAX_URLS URLs. Runs still going after APIFY_RUN_TIMEOUT_SECONDS are aborted.
+try:
+    APIFY_BATCH_WINDOW_MS = max(0, int(os.getenv('APIFY_BATCH_WINDOW_MS', '200')))
+except (ValueError, TypeError):
+    APIFY_BATCH_WINDOW_MS = 200
+
+try:
+    APIFY_BATCH_MAX_URLS = max(1, int(os.getenv('APIFY_BATCH_MAX_URLS', '10')))
+except (ValueError, TypeError):
+    APIFY_BATCH_MAX_URLS = 10
+
+try:
+    APIFY_RUN_TIMEOUT_SECONDS = max(10, int(os.getenv('APIFY_RUN_TIMEOUT_SECONDS', '300')))
+except (ValueError, TypeError):
+    APIFY_RUN_TIMEOUT_SECONDS = 300
+
 # NOTE: xai_api_key is optional and only used by xAI-specific features
 
 
@@ -104,12 +142,214 @@ links_dump_channel_id = os.getenv('LINKS_DUMP_CHANNEL_ID')
 http_referer = os.getenv('HTTP_REFERER', 'https://techfren.net')
 x_title = os.getenv('X_TITLE', 'TechFren Discord Bot')
 
+# Semantic Search Configuration (optional)
+# Environment variable: EMBEDDING_MODEL
+# sentence-transformers model used to embed messages for /ask retrieval (e.g. all-MiniLM-L6-v2).
+# If unset, or if sentence-transformers isn't installed, a built-in hashing embedder is used.
+embedding_model = os.getenv('EMBEDDING_MODEL')
+
 # Summary Command Limits
 # Maximum hours that can be requested in summary commands (7 days)
 MAX_SUMMARY_HOURS = 168
 # Performance threshold for large summaries (24 hours)
 LARGE_SUMMARY_THRESHOLD = 24
 
+# Map-reduce summarization (optional)
+# Environment variables: SUMMARY_CHUNK_TOKENS, SUMMARY_MAP_CONCURRENCY
+# Message windows larger than SUMMARY_CHUNK_TOKENS are split into chunks that are summarized
+# in parallel (at most SUMMARY_MAP_CONCURRENCY LLM calls at once) and then combined.
+try:
+    SUMMARY_CHUNK_TOKENS = max(4000, int(os.getenv('SUMMARY_CHUNK_TOKENS', '12000')))
+except (ValueError, TypeError):
+    SUMMARY_CHUNK_TOKENS = 12000
+
+try:
+    SUMMARY_MAP_CONCURRENCY = max(1, int(os.getenv('SUMMARY_MAP_CONCURRENCY', '4')))
+except (ValueError, TypeError):
+    SUMMARY_MAP_CONCURRENCY = 4
+
+# Incremental summaries (optional)
+# Environment variable: SUMMARY_BUCKET_MIN_MESSAGES
+# /sum-hr and /sum-day reuse stored notes for each completed hour of the channel. Hours with
+# fewer human messages than this are passed to the final summary as-is instead of being noted.
+try:
+    SUMMARY_BUCKET_MIN_MESSAGES = max(1, int(os.getenv('SUMMARY_BUCKET_MIN_MESSAGES', '15')))
+except (ValueError, TypeError):
+    SUMMARY_BUCKET_MIN_MESSAGES = 15
+
+# Video summarization (optional)
+# Environment variables: YOUTUBE_SECTION_TOKENS, YOUTUBE_MAX_SECTIONS
+# Transcripts are split into sections of about YOUTUBE_SECTION_TOKENS tokens that are summarized
+# in parallel, each linked by timestamp. Longer videos are split into YOUTUBE_MAX_SECTIONS
+# evenly sampled sections, so the cost of a summary doesn't grow with video length.
+try:
+    YOUTUBE_SECTION_TOKENS = max(500, int(os.getenv('YOUTUBE_SECTION_TOKENS', '3000')))
+except (ValueError, TypeError):
+    YOUTUBE_SECTION_TOKENS = 3000
+
+try:
+    YOUTUBE_MAX_SECTIONS = max(1, int(os.getenv('YOUTUBE_MAX_SECTIONS', '12')))
+except (ValueError, TypeError):
+    YOUTUBE_MAX_SECTIONS = 12
+
+# Image analysis (optional)
+# Environment variable: IMAGE_ANALYSIS_CONCURRENCY
+# Image attachments are described by background workers after the message is stored;
+# at most this many messages' images are downloaded and analyzed at once.
+try:
+    IMAGE_ANALYSIS_CONCURRENCY = max(1, int(os.getenv('IMAGE_ANALYSIS_CONCURRENCY', '4')))
+except (ValueError, TypeError):
+    IMAGE_ANALYSIS_CONCURRENCY = 4
+
+# Image description cache (optional)
+# Environment variables: IMAGE_CACHE_MEMORY_ENTRIES, IMAGE_DHASH_MAX_DISTANCE
+# Descriptions are cached per image in SQLite, with the most recently used IMAGE_CACHE_MEMORY_ENTRIES
+# kept in memory. With Pillow installed, images whose difference hashes differ in at most
+# IMAGE_DHASH_MAX_DISTANCE of 64 bits count as the same image. Off (0, exact bytes only) by
+# default: distinct screenshots that share a layout (code, terminals) often hash within a few bits.
+try:
+    IMAGE_CACHE_MEMORY_ENTRIES = max(0, int(os.getenv('IMAGE_CACHE_MEMORY_ENTRIES', '512')))
+except (ValueError, TypeError):
+    IMAGE_CACHE_MEMORY_ENTRIES = 512
+
+try:
+    IMAGE_DHASH_MAX_DISTANCE = max(0, int(os.getenv('IMAGE_DHASH_MAX_DISTANCE', '0')))
+except (ValueError, TypeError):
+    IMAGE_DHASH_MAX_DISTANCE = 0
+
+# Environment variable: IMAGE_CACHE_TTL_DAYS
+# Cached descriptions not reused for this many days are pruned by the daily job (0 keeps them forever).
+try:
+    IMAGE_CACHE_TTL_DAYS = max(0, int(os.getenv('IMAGE_CACHE_TTL_DAYS', '90')))
+except (ValueError, TypeError):
+    IMAGE_CACHE_TTL_DAYS = 90
+
+# Image upload size (optional)
+# Environment variables: IMAGE_MAX_EDGE_PX, IMAGE_UPLOAD_QUALITY
+# Larger images are fetched resized from Discord's media proxy and, with Pillow installed,
+# downscaled to this longest edge and recompressed at IMAGE_UPLOAD_QUALITY before the vision
+# call (0 sends images at full size).
+try:
+    IMAGE_MAX_EDGE_PX = max(0, int(os.getenv('IMAGE_MAX_EDGE_PX', '1536')))
+except (ValueError, TypeError):
+    IMAGE_MAX_EDGE_PX = 1536
+
+try:
+    IMAGE_UPLOAD_QUALITY = min(95, max(30, int(os.getenv('IMAGE_UPLOAD_QUALITY', '85'))))
+except (ValueError, TypeError):
+    IMAGE_UPLOAD_QUALITY = 85
+
+# Multi-image vision requests (optional)
+# Environment variables: IMAGE_BATCH_MAX_IMAGES, IMAGE_BATCH_MAX_BYTES
+# A message's uncached images are described in one request of up to IMAGE_BATCH_MAX_IMAGES
+# images and IMAGE_BATCH_MAX_BYTES upload bytes (1 sends one request per image).
+try:
+    IMAGE_BATCH_MAX_IMAGES = max(1, int(os.getenv('IMAGE_BATCH_MAX_IMAGES', '6')))
+except (ValueError, TypeError):
+    IMAGE_BATCH_MAX_IMAGES = 6
+
+try:
+    IMAGE_BATCH_MAX_BYTES = max(1, int(os.getenv('IMAGE_BATCH_MAX_BYTES', str(8 * 1024 * 1024))))
+except (ValueError, TypeError):
+    IMAGE_BATCH_MAX_BYTES = 8 * 1024 * 1024
+
+# LLM response cache (optional)
+# Environment variables: LLM_CACHE_ENABLED, LLM_CACHE_MEMORY_ENTRIES
+# Responses to byte-identical summary, /ask and Exa /answer requests are reused for a TTL set per
+# call site. They are stored in SQLite, with the most recently used LLM_CACHE_MEMORY_ENTRIES in memory.
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
+
+try:
+    LLM_CACHE_MEMORY_ENTRIES = max(0, int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', '256')))
+except (ValueError, TypeError):
+    LLM_CACHE_MEMORY_ENTRIES = 256
+
+# Streamed responses (optional)
+# Environment variable: STREAM_EDIT_INTERVAL_MS
+# Mention, /ask and /sum-hr answers are posted as soon as the first tokens arrive and the message
+# is then edited at most every STREAM_EDIT_INTERVAL_MS, which keeps well inside Discord's edit rate limit.
+try:
+    STREAM_EDIT_INTERVAL_MS = max(500, int(os.getenv('STREAM_EDIT_INTERVAL_MS', '1200')))
+except (ValueError, TypeError):
+    STREAM_EDIT_INTERVAL_MS = 1200
+
+# Link summarization (optional)
+# Environment variables: URL_SUMMARY_CONCURRENCY, URL_SUMMARY_DEADLINE_SECONDS, URL_SUMMARY_STRAGGLER_SECONDS
+# The links in a message are summarized concurrently (at most URL_SUMMARY_CONCURRENCY at once).
+# Summaries ready after URL_SUMMARY_DEADLINE_SECONDS are posted; later ones are appended to the
+# thread if they finish within URL_SUMMARY_STRAGGLER_SECONDS more (0 drops them).
+try:
+    URL_SUMMARY_CONCURRENCY = max(1, int(os.getenv('URL_SUMMARY_CONCURRENCY', '4')))
+except (ValueError, TypeError):
+    URL_SUMMARY_CONCURRENCY = 4
+
+try:
+    URL_SUMMARY_DEADLINE_SECONDS = max(1, int(os.getenv('URL_SUMMARY_DEADLINE_SECONDS', '30')))
+except (ValueError, TypeError):
+    URL_SUMMARY_DEADLINE_SECONDS = 30
+
+try:
+    URL_SUMMARY_STRAGGLER_SECONDS = max(0, int(os.getenv('URL_SUMMARY_STRAGGLER_SECONDS', '120')))
+except (ValueError, TypeError):
+    URL_SUMMARY_STRAGGLER_SECONDS = 120
+
+# Shared HTTP clients (optional)
+# Environment variables: HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS,
+# HTTP_KEEPALIVE_EXPIRY_SECONDS, HTTP_TIMEOUT_SECONDS
+# Exa, image downloads, Firecrawl and Apify each reuse one pooled keep-alive client.
+try:
+    HTTP_MAX_CONNECTIONS = max(1, int(os.getenv('HTTP_MAX_CONNECTIONS', '20')))
+except (ValueError, TypeError):
+    HTTP_MAX_CONNECTIONS = 20
+
+try:
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = max(0, int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '10')))
+except (ValueError, TypeError):
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+
+try:
+    HTTP_KEEPALIVE_EXPIRY_SECONDS = max(1, int(os.getenv('HTTP_KEEPALIVE_EXPIRY_SECONDS', '30')))
+except (ValueError, TypeError):
+    HTTP_KEEPALIVE_EXPIRY_SECONDS = 30
+
+try:
+    HTTP_TIMEOUT_SECONDS = max(1, int(os.getenv('HTTP_TIMEOUT_SECONDS', '60')))
+except (ValueError, TypeError):
+    HTTP_TIMEOUT_SECONDS = 60
+
+# Exa /contents batching (optional)
+# Environment variables: EXA_BATCH_WINDOW_MS, EXA_BATCH_MAX_SIZE
+# Single-URL /contents requests made within EXA_BATCH_WINDOW_MS of each other are sent as one
+# call of up to EXA_BATCH_MAX_SIZE URLs.
+try:
+    EXA_BATCH_WINDOW_MS = max(0, int(os.getenv('EXA_BATCH_WINDOW_MS', '50')))
+except (ValueError, TypeError):
+    EXA_BATCH_WINDOW_MS = 50
+
+try:
+    EXA_BATCH_MAX_SIZE = max(1, int(os.getenv('EXA_BATCH_MAX_SIZE', '10')))
+except (ValueError, TypeError):
+    EXA_BATCH_MAX_SIZE = 10
+
+# Daily summarization scheduling (optional)
+# Environment variables: DAILY_SUMMARY_CONCURRENCY, DAILY_SUMMARY_TIMEOUT_SECONDS, DAILY_SUMMARY_RETRIES
+# Channels are summarized concurrently (at most DAILY_SUMMARY_CONCURRENCY at once); each attempt
+# is abandoned after DAILY_SUMMARY_TIMEOUT_SECONDS and retried up to DAILY_SUMMARY_RETRIES times.
+try:
+    DAILY_SUMMARY_CONCURRENCY = max(1, int(os.getenv('DAILY_SUMMARY_CONCURRENCY', '4')))
+except (ValueError, TypeError):
+    DAILY_SUMMARY_CONCURRENCY = 4
+
+try:
+    DAILY_SUMMARY_TIMEOUT_SECONDS = max(10, int(os.getenv('DAILY_SUMMARY_TIMEOUT_SECONDS', '300')))
+except (ValueError, TypeError):
+    DAILY_SUMMARY_TIMEOUT_SECONDS = 300
+
+try:
+    DAILY_SUMMARY_RETRIES = max(0, int(os.getenv('DAILY_SUMMARY_RETRIES', '2')))
+except (ValueError, TypeError):
+    DAILY_SUMMARY_RETRIES = 2
+
 # Error Messages
 ERROR_MESSAGES = {
     'invalid_hours_range': f"Number of hours must be between 1 and {MAX_SUMMARY_HOURS} (7 days).",
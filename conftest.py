@@ -0,0 +1,31 @@
+import sys
+
+import pytest
+
+import database
+
+
+@pytest.fixture(autouse=True)
+def no_llm_response_cache(monkeypatch):
+    """Keep tests that fake LLM responses from seeing each other's cached answers."""
+    # Only touch the cache when a test has imported it; importing llm_cache pulls in config,
+    # which requires the full set of API keys.
+    llm_cache = sys.modules.get("llm_cache")
+    if llm_cache is None:
+        yield
+        return
+    cache = llm_cache.llm_response_cache
+    monkeypatch.setattr(cache, "enabled", False)
+    cache.clear_memory()
+    yield
+    cache.clear_memory()
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the database module at a fresh, initialized SQLite file for the test."""
+    monkeypatch.setattr(database, "DB_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "test.db"))
+    database.init_database()
+    yield database.DB_FILE
+    database.close_connection_pool()
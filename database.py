@@ -7,9 +7,17 @@ import sqlite3
 import os
 import logging
 import json
+import hashlib
+import re
 import asyncio
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Callable, Optional, Dict, Any, List, Tuple
+
+from url_utils import canonicalize_url
 
 # Set up logging
 logger = logging.getLogger('discord_bot.database')
@@ -18,6 +26,17 @@ logger = logging.getLogger('discord_bot.database')
 DB_DIRECTORY = "data"
 DB_FILE = os.path.join(DB_DIRECTORY, "discord_messages.db")
 
+# Connection pool settings
+POOL_MAX_CONNECTIONS = 16  # Thread-local pooled connections; extra threads get unpooled connections
+STATEMENT_CACHE_SIZE = 256  # Prepared statements cached per connection
+SQLITE_CACHE_SIZE_KIB = 16384  # Page cache per connection (PRAGMA cache_size is negative for KiB)
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # Memory-map up to 256 MiB of the database file
+
+# Write-behind ingestion settings: flush after this many rows or this many seconds
+INGEST_BATCH_SIZE = 200
+INGEST_FLUSH_INTERVAL_SECONDS = 0.25
+INGEST_QUEUE_MAX_SIZE = 10000
+
 # SQL statements
 CREATE_MESSAGES_TABLE = """
 CREATE TABLE IF NOT EXISTS messages (
@@ -37,7 +56,10 @@ CREATE TABLE IF NOT EXISTS messages (
     scraped_content_summary TEXT,
     scraped_content_key_points TEXT,
     image_descriptions TEXT,
-    reply_to_message_id TEXT
+    reply_to_message_id TEXT,
+    created_at_ms INTEGER,
+    has_gif INTEGER,
+    mention_ids TEXT
 );
 """
 
@@ -127,16 +149,374 @@ CREATE_INDEX_DAILY_AWARDS_AUTHOR = "CREATE INDEX IF NOT EXISTS idx_daily_awards_
 CREATE_INDEX_ROLE_COLORS_AUTHOR = "CREATE INDEX IF NOT EXISTS idx_role_colors_author_id ON user_role_colors (author_id);"
 CREATE_INDEX_ROLE_COLORS_GUILD = "CREATE INDEX IF NOT EXISTS idx_role_colors_guild_id ON user_role_colors (guild_id);"
 CREATE_INDEX_REPLY_TO = "CREATE INDEX IF NOT EXISTS idx_reply_to_message_id ON messages (reply_to_message_id);"
+CREATE_INDEX_CREATED_MS = "CREATE INDEX IF NOT EXISTS idx_created_at_ms ON messages (created_at_ms);"
+CREATE_INDEX_CHANNEL_CREATED_MS = "CREATE INDEX IF NOT EXISTS idx_channel_created_at_ms ON messages (channel_id, created_at_ms);"
+CREATE_INDEX_GUILD_CREATED_MS = "CREATE INDEX IF NOT EXISTS idx_guild_created_at_ms ON messages (guild_id, created_at_ms);"
+
+# Backfill created_at_ms from the ISO text timestamp (handles both naive and offset-suffixed values)
+BACKFILL_CREATED_AT_MS = """
+UPDATE messages
+SET created_at_ms = CAST(ROUND((julianday(created_at) - 2440587.5) * 86400000) AS INTEGER)
+WHERE created_at_ms IS NULL;
+"""
+
+# Full-text index over message text, scraped summaries and image descriptions.
+# External-content table keyed on messages.rowid and kept in sync by triggers.
+CREATE_MESSAGES_FTS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content,
+    scraped_content_summary,
+    image_descriptions,
+    content='messages',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+CREATE_MESSAGES_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts (rowid, content, scraped_content_summary, image_descriptions)
+        VALUES (new.rowid, new.content, new.scraped_content_summary, new.image_descriptions);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, content, scraped_content_summary, image_descriptions)
+        VALUES ('delete', old.rowid, old.content, old.scraped_content_summary, old.image_descriptions);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update
+    AFTER UPDATE OF content, scraped_content_summary, image_descriptions ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, content, scraped_content_summary, image_descriptions)
+        VALUES ('delete', old.rowid, old.content, old.scraped_content_summary, old.image_descriptions);
+        INSERT INTO messages_fts (rowid, content, scraped_content_summary, image_descriptions)
+        VALUES (new.rowid, new.content, new.scraped_content_summary, new.image_descriptions);
+    END;
+    """,
+]
+
+# Reply graph: one node per stored message with its parent, conversation root and depth.
+# chain_has_gif is 1 when the message or any stored ancestor contains a GIF, 0 when every
+# message up to the root is stored and known to be GIF-free, and NULL otherwise (a parent
+# isn't stored, or a message predates GIF tracking and has has_gif NULL).
+# Kept up to date by triggers on messages; a parent that isn't stored becomes the root.
+CREATE_MESSAGE_THREADS_TABLE = """
+CREATE TABLE IF NOT EXISTS message_threads (
+    message_id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    root_id TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    author_id TEXT NOT NULL,
+    guild_id TEXT,
+    channel_id TEXT NOT NULL,
+    created_at_ms INTEGER,
+    is_bot INTEGER NOT NULL,
+    is_command INTEGER NOT NULL,
+    chain_has_gif INTEGER
+);
+"""
+
+# Human participants per conversation root
+CREATE_THREAD_PARTICIPANTS_TABLE = """
+CREATE TABLE IF NOT EXISTS thread_participants (
+    root_id TEXT NOT NULL,
+    author_id TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (root_id, author_id)
+);
+"""
+
+CREATE_INDEX_THREADS_ROOT = "CREATE INDEX IF NOT EXISTS idx_threads_root_id ON message_threads (root_id);"
+CREATE_INDEX_THREADS_PARENT = "CREATE INDEX IF NOT EXISTS idx_threads_parent_id ON message_threads (parent_id);"
+CREATE_INDEX_THREADS_GUILD_CREATED_MS = "CREATE INDEX IF NOT EXISTS idx_threads_guild_created_at_ms ON message_threads (guild_id, created_at_ms);"
+
+CREATE_MESSAGE_THREADS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS message_threads_insert AFTER INSERT ON messages BEGIN
+        INSERT OR REPLACE INTO message_threads (
+            message_id, parent_id, root_id, depth, author_id, guild_id, channel_id,
+            created_at_ms, is_bot, is_command, chain_has_gif
+        )
+        SELECT
+            new.id,
+            new.reply_to_message_id,
+            COALESCE(p.root_id, new.reply_to_message_id, new.id),
+            CASE WHEN new.reply_to_message_id IS NULL THEN 0 ELSE COALESCE(p.depth, 0) + 1 END,
+            new.author_id, new.guild_id, new.channel_id, new.created_at_ms,
+            new.is_bot, new.is_command,
+            CASE
+                WHEN new.has_gif = 1 OR p.chain_has_gif = 1 THEN 1
+                WHEN new.has_gif IS NULL THEN NULL
+                WHEN new.reply_to_message_id IS NULL THEN 0
+                ELSE p.chain_has_gif
+            END
+        FROM (SELECT 1)
+        LEFT JOIN message_threads p ON p.message_id = new.reply_to_message_id;
+
+        INSERT INTO thread_participants (root_id, author_id, message_count)
+        SELECT root_id, new.author_id, 1 FROM message_threads
+        WHERE message_id = new.id AND new.is_bot = 0
+        ON CONFLICT (root_id, author_id) DO UPDATE SET message_count = message_count + 1;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS message_threads_delete AFTER DELETE ON messages BEGIN
+        UPDATE thread_participants SET message_count = message_count - 1
+        WHERE author_id = old.author_id
+        AND root_id = (SELECT root_id FROM message_threads WHERE message_id = old.id);
+
+        DELETE FROM thread_participants WHERE message_count <= 0
+        AND root_id = (SELECT root_id FROM message_threads WHERE message_id = old.id);
+
+        DELETE FROM message_threads WHERE message_id = old.id;
+    END;
+    """,
+]
+
+# Engagement rollups: per-(guild, hour bucket) counters for human, non-command messages,
+# maintained by a trigger at insert time so engagement over a window is a SUM over buckets.
+# hour_bucket is created_at_ms // ENGAGEMENT_BUCKET_MS.
+ENGAGEMENT_BUCKET_MS = 3600 * 1000
+
+CREATE_ENGAGEMENT_ROLLUP_TABLE = """
+CREATE TABLE IF NOT EXISTS engagement_rollup (
+    guild_id TEXT NOT NULL,
+    hour_bucket INTEGER NOT NULL,
+    author_id TEXT NOT NULL,
+    author_name TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, hour_bucket, author_id)
+);
+"""
+
+# Exact reply edges; parent_hour_bucket lets a window exclude replies to messages sent before it
+CREATE_ENGAGEMENT_REPLY_EDGES_TABLE = """
+CREATE TABLE IF NOT EXISTS engagement_reply_edges (
+    guild_id TEXT NOT NULL,
+    hour_bucket INTEGER NOT NULL,
+    original_author_id TEXT NOT NULL,
+    replier_id TEXT NOT NULL,
+    parent_hour_bucket INTEGER NOT NULL,
+    reply_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, hour_bucket, original_author_id, replier_id, parent_hour_bucket)
+);
+"""
+
+# Exact @mention edges (self-mentions excluded)
+CREATE_ENGAGEMENT_MENTION_EDGES_TABLE = """
+CREATE TABLE IF NOT EXISTS engagement_mention_edges (
+    guild_id TEXT NOT NULL,
+    hour_bucket INTEGER NOT NULL,
+    author_id TEXT NOT NULL,
+    mentioned_id TEXT NOT NULL,
+    mention_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, hour_bucket, author_id, mentioned_id)
+);
+"""
+
+CREATE_ENGAGEMENT_ROLLUP_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS engagement_rollup_insert AFTER INSERT ON messages
+WHEN new.is_bot = 0 AND new.is_command = 0 AND new.guild_id IS NOT NULL AND new.created_at_ms IS NOT NULL
+BEGIN
+    INSERT INTO engagement_rollup (guild_id, hour_bucket, author_id, author_name, message_count)
+    VALUES (new.guild_id, new.created_at_ms / {ENGAGEMENT_BUCKET_MS}, new.author_id, new.author_name, 1)
+    ON CONFLICT (guild_id, hour_bucket, author_id) DO UPDATE SET
+        message_count = message_count + 1,
+        author_name = excluded.author_name;
+
+    INSERT INTO engagement_reply_edges (
+        guild_id, hour_bucket, original_author_id, replier_id, parent_hour_bucket, reply_count
+    )
+    SELECT new.guild_id, new.created_at_ms / {ENGAGEMENT_BUCKET_MS}, p.author_id, new.author_id,
+           p.created_at_ms / {ENGAGEMENT_BUCKET_MS}, 1
+    FROM messages p
+    WHERE p.id = new.reply_to_message_id
+    AND p.guild_id = new.guild_id AND p.created_at_ms IS NOT NULL
+    AND p.is_bot = 0 AND p.is_command = 0
+    AND p.author_id != new.author_id
+    ON CONFLICT (guild_id, hour_bucket, original_author_id, replier_id, parent_hour_bucket)
+    DO UPDATE SET reply_count = reply_count + 1;
+
+    INSERT INTO engagement_mention_edges (guild_id, hour_bucket, author_id, mentioned_id, mention_count)
+    SELECT new.guild_id, new.created_at_ms / {ENGAGEMENT_BUCKET_MS}, new.author_id, value, 1
+    FROM json_each(COALESCE(new.mention_ids, '[]'))
+    WHERE value != new.author_id
+    ON CONFLICT (guild_id, hour_bucket, author_id, mentioned_id)
+    DO UPDATE SET mention_count = mention_count + 1;
+END;
+"""
+
+# Discord user mentions: <@user_id> or <@!user_id>
+MENTION_PATTERN = re.compile(r'<@!?(\d+)>')
+
+# Incremental summaries: per-(channel, hour bucket) notes extracted once and reused by
+# /sum-hr and /sum-day (see incremental_summary.py). A bucket's notes are dropped as soon
+# as a message lands in it late or one of its messages changes, so they are never stale.
+# hour_bucket is created_at_ms // SUMMARY_BUCKET_MS.
+SUMMARY_BUCKET_MS = 3600 * 1000
+
+CREATE_CHANNEL_SUMMARY_BUCKETS_TABLE = """
+CREATE TABLE IF NOT EXISTS channel_summary_buckets (
+    channel_id TEXT NOT NULL,
+    hour_bucket INTEGER NOT NULL,
+    summary_text TEXT NOT NULL,
+    message_count INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (channel_id, hour_bucket)
+);
+"""
+
+CREATE_CHANNEL_SUMMARY_BUCKETS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS summary_buckets_invalidate_insert AFTER INSERT ON messages
+    WHEN new.created_at_ms IS NOT NULL
+    BEGIN
+        DELETE FROM channel_summary_buckets
+        WHERE channel_id = new.channel_id AND hour_bucket = new.created_at_ms / {SUMMARY_BUCKET_MS};
+    END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS summary_buckets_invalidate_update
+    AFTER UPDATE OF content, scraped_content_summary, scraped_content_key_points, image_descriptions ON messages
+    WHEN new.created_at_ms IS NOT NULL
+    BEGIN
+        DELETE FROM channel_summary_buckets
+        WHERE channel_id = new.channel_id AND hour_bucket = new.created_at_ms / {SUMMARY_BUCKET_MS};
+    END;
+    """,
+]
+
+# Scrape cache: one summary per canonical URL (see url_utils.canonicalize_url), independent of
+# the messages that shared it, so it survives message retention and is shared across posts.
+CREATE_SCRAPED_CONTENT_TABLE = """
+CREATE TABLE IF NOT EXISTS scraped_content (
+    canonical_url TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    content_hash TEXT,
+    summary TEXT NOT NULL,
+    key_points TEXT,
+    fetched_at_ms INTEGER NOT NULL,
+    expires_at_ms INTEGER NOT NULL
+);
+"""
+
+CREATE_INDEX_SCRAPED_CONTENT_EXPIRES = "CREATE INDEX IF NOT EXISTS idx_scraped_content_expires_at_ms ON scraped_content (expires_at_ms);"
+
+INSERT_SCRAPED_CONTENT = """
+INSERT OR REPLACE INTO scraped_content (
+    canonical_url, url, provider, content_hash, summary, key_points, fetched_at_ms, expires_at_ms
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# How long a scrape stays fresh, per provider. Tweets and videos rarely change once posted;
+# general web pages are re-fetched daily.
+SCRAPE_CACHE_TTL_SECONDS = {
+    'youtube': 30 * 24 * 3600,
+    'apify': 7 * 24 * 3600,
+}
+SCRAPE_CACHE_DEFAULT_TTL_SECONDS = 24 * 3600
+
+# Image description cache (see image_cache.py): one vision-model description per distinct image,
+# keyed by the SHA-256 of its bytes, with a difference hash to match resized or recompressed copies.
+CREATE_IMAGE_DESCRIPTION_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS image_description_cache (
+    sha256 TEXT PRIMARY KEY,
+    dhash INTEGER,
+    description TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at_ms INTEGER NOT NULL,
+    last_used_ms INTEGER NOT NULL
+);
+"""
+
+# LLM response cache (see llm_cache.py): one response per hashed request (endpoint, model, messages
+# and sampling options), kept until its call site's TTL runs out.
+CREATE_LLM_RESPONSE_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    model TEXT,
+    response TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at_ms INTEGER NOT NULL,
+    expires_at_ms INTEGER NOT NULL
+);
+"""
+
+CREATE_INDEX_LLM_RESPONSE_CACHE_EXPIRES = "CREATE INDEX IF NOT EXISTS idx_llm_response_cache_expires_at_ms ON llm_response_cache (expires_at_ms);"
+
+# Background image analysis: one row per stored message whose image attachments still need
+# describing (see image_jobs.py), so queued work survives restarts.
+CREATE_IMAGE_ANALYSIS_JOBS_TABLE = """
+CREATE TABLE IF NOT EXISTS image_analysis_jobs (
+    message_id TEXT PRIMARY KEY,
+    attachments TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at_ms INTEGER NOT NULL
+);
+"""
+
+# Embedding vectors for semantic /ask retrieval (see semantic_index.py). Triggers keep one row
+# per human, non-command message; a NULL vector marks the row as pending (re-)embedding.
+CREATE_MESSAGE_EMBEDDINGS_TABLE = """
+CREATE TABLE IF NOT EXISTS message_embeddings (
+    message_id TEXT PRIMARY KEY,
+    guild_id TEXT,
+    channel_id TEXT NOT NULL,
+    created_at_ms INTEGER,
+    embedder TEXT,
+    dim INTEGER,
+    vector BLOB
+);
+"""
+
+CREATE_INDEX_EMBEDDINGS_GUILD_CREATED_MS = "CREATE INDEX IF NOT EXISTS idx_embeddings_guild_created_at_ms ON message_embeddings (guild_id, created_at_ms);"
+
+# Partial index so finding pending rows doesn't scan the embedded ones
+CREATE_INDEX_EMBEDDINGS_PENDING = "CREATE INDEX IF NOT EXISTS idx_embeddings_pending ON message_embeddings (created_at_ms) WHERE vector IS NULL;"
+
+CREATE_MESSAGE_EMBEDDINGS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS message_embeddings_insert AFTER INSERT ON messages
+    WHEN new.is_bot = 0 AND new.is_command = 0 BEGIN
+        INSERT OR REPLACE INTO message_embeddings (message_id, guild_id, channel_id, created_at_ms)
+        VALUES (new.id, new.guild_id, new.channel_id, new.created_at_ms);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS message_embeddings_update
+    AFTER UPDATE OF content, scraped_content_summary ON messages BEGIN
+        UPDATE message_embeddings SET vector = NULL WHERE message_id = new.id;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS message_embeddings_delete AFTER DELETE ON messages BEGIN
+        DELETE FROM message_embeddings WHERE message_id = old.id;
+    END;
+    """,
+]
+
+# bm25 column weights for content, scraped_content_summary, image_descriptions
+FTS_BM25_WEIGHTS = (1.0, 0.5, 0.5)
 
 INSERT_MESSAGE = """
 INSERT INTO messages (
     id, author_id, author_name, channel_id, channel_name,
     guild_id, guild_name, content, created_at, is_bot, is_command, command_type,
     scraped_url, scraped_content_summary, scraped_content_key_points, image_descriptions,
-    reply_to_message_id
-) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+    reply_to_message_id, created_at_ms, has_gif, mention_ids
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
 """
 
+INSERT_MESSAGE_OR_IGNORE = INSERT_MESSAGE.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+
 INSERT_CHANNEL_SUMMARY = """
 INSERT INTO channel_summaries (
     channel_id, channel_name, guild_id, guild_name, date,
@@ -145,6 +525,197 @@ INSERT INTO channel_summaries (
 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
 """
 
+def _to_epoch_ms(value: datetime) -> int:
+    """
+    Convert a datetime to integer milliseconds since the Unix epoch.
+    Naive datetimes are treated as UTC, matching how created_at is stored.
+
+    Args:
+        value (datetime): The datetime to convert
+
+    Returns:
+        int: Milliseconds since the epoch
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+def _mention_ids(content: Optional[str]) -> Optional[str]:
+    """
+    Extract user mentions from message content as a JSON array for the mention_ids column.
+
+    Args:
+        content (Optional[str]): The message content
+
+    Returns:
+        Optional[str]: JSON array of mentioned user IDs (one entry per mention), or None if there are none
+    """
+    mentioned = MENTION_PATTERN.findall(content or '')
+    return json.dumps(mentioned) if mentioned else None
+
+def _backfill_engagement_rollup(conn: sqlite3.Connection) -> None:
+    """
+    Populate the engagement rollup tables from existing messages.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the database
+    """
+    cursor = conn.cursor()
+
+    # Parse mentions for rows stored before mention_ids existed
+    cursor.execute("SELECT id, content FROM messages WHERE mention_ids IS NULL AND content LIKE '%<@%'")
+    updates = [(_mention_ids(row[1]), row[0]) for row in cursor.fetchall()]
+    cursor.executemany("UPDATE messages SET mention_ids = ? WHERE id = ?", updates)
+
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO engagement_rollup (guild_id, hour_bucket, author_id, author_name, message_count)
+        SELECT guild_id, created_at_ms / {ENGAGEMENT_BUCKET_MS}, author_id, MAX(author_name), COUNT(*)
+        FROM messages
+        WHERE is_bot = 0 AND is_command = 0 AND guild_id IS NOT NULL AND created_at_ms IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO engagement_reply_edges (
+            guild_id, hour_bucket, original_author_id, replier_id, parent_hour_bucket, reply_count
+        )
+        SELECT c.guild_id, c.created_at_ms / {ENGAGEMENT_BUCKET_MS}, p.author_id, c.author_id,
+               p.created_at_ms / {ENGAGEMENT_BUCKET_MS}, COUNT(*)
+        FROM messages c
+        JOIN messages p ON p.id = c.reply_to_message_id
+        WHERE c.is_bot = 0 AND c.is_command = 0 AND c.guild_id IS NOT NULL AND c.created_at_ms IS NOT NULL
+        AND p.guild_id = c.guild_id AND p.created_at_ms IS NOT NULL
+        AND p.is_bot = 0 AND p.is_command = 0
+        AND p.author_id != c.author_id
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO engagement_mention_edges (guild_id, hour_bucket, author_id, mentioned_id, mention_count)
+        SELECT m.guild_id, m.created_at_ms / {ENGAGEMENT_BUCKET_MS}, m.author_id, j.value, COUNT(*)
+        FROM messages m, json_each(m.mention_ids) j
+        WHERE m.is_bot = 0 AND m.is_command = 0 AND m.guild_id IS NOT NULL AND m.created_at_ms IS NOT NULL
+        AND m.mention_ids IS NOT NULL
+        AND j.value != m.author_id
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+    logger.info("Backfilled engagement rollups from existing messages")
+
+def _backfill_scraped_content(conn: sqlite3.Connection) -> None:
+    """
+    Seed the scrape cache from summaries already stored on messages (newest per canonical URL).
+    Entries keep their original fetch time, so stale ones expire on schedule.
+
+    Args:
+        conn (sqlite3.Connection): Connection to write with; the caller commits
+    """
+    cursor = conn.execute(
+        """
+        SELECT scraped_url, scraped_content_summary, scraped_content_key_points, created_at_ms
+        FROM messages
+        WHERE scraped_url IS NOT NULL AND scraped_content_summary IS NOT NULL AND created_at_ms IS NOT NULL
+        ORDER BY created_at_ms ASC
+        """
+    )
+    rows = {}
+    for url, summary, key_points, created_at_ms in cursor.fetchall():
+        canonical_url = canonicalize_url(url)
+        provider = _provider_for_canonical_url(canonical_url)
+        expires_at_ms = created_at_ms + _scrape_ttl_seconds(provider) * 1000
+        rows[canonical_url] = (canonical_url, url, provider, None, summary, key_points, created_at_ms, expires_at_ms)
+    conn.executemany(
+        INSERT_SCRAPED_CONTENT,
+        list(rows.values())
+    )
+    logger.info(f"Backfilled scrape cache with {len(rows)} URLs")
+
+def _backfill_message_threads(conn: sqlite3.Connection) -> None:
+    """
+    Build message_threads and thread_participants from existing messages, oldest first,
+    so each parent is resolved before its replies.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the database
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT id, reply_to_message_id, author_id, guild_id, channel_id, created_at_ms,
+               is_bot, is_command, has_gif
+        FROM messages
+        ORDER BY created_at_ms
+        """
+    )
+
+    # message_id -> (root_id, depth, chain_has_gif); chain_has_gif follows the insert trigger
+    nodes: Dict[str, Tuple[str, int, Optional[int]]] = {}
+    thread_rows = []
+    participants: Dict[Tuple[str, str], int] = {}
+    for row in cursor.fetchall():
+        parent_id = row[1]
+        parent = nodes.get(parent_id) if parent_id else None
+        if parent:
+            root_id, depth, parent_chain_has_gif = parent[0], parent[1] + 1, parent[2]
+        else:
+            root_id = parent_id or row[0]
+            depth = 1 if parent_id else 0
+            parent_chain_has_gif = None if parent_id else 0
+        if row[8] == 1 or parent_chain_has_gif == 1:
+            chain_has_gif = 1
+        elif row[8] is None:
+            chain_has_gif = None
+        else:
+            chain_has_gif = parent_chain_has_gif
+        nodes[row[0]] = (root_id, depth, chain_has_gif)
+        thread_rows.append((row[0], parent_id, root_id, depth, row[2], row[3], row[4], row[5], row[6], row[7], chain_has_gif))
+        if not row[6]:
+            participants[(root_id, row[2])] = participants.get((root_id, row[2]), 0) + 1
+
+    cursor.executemany(
+        """
+        INSERT OR REPLACE INTO message_threads (
+            message_id, parent_id, root_id, depth, author_id, guild_id, channel_id,
+            created_at_ms, is_bot, is_command, chain_has_gif
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        thread_rows
+    )
+    cursor.executemany(
+        "INSERT OR REPLACE INTO thread_participants (root_id, author_id, message_count) VALUES (?, ?, ?)",
+        [(root_id, author_id, count) for (root_id, author_id), count in participants.items()]
+    )
+    if thread_rows:
+        logger.info(f"Backfilled reply graph for {len(thread_rows)} messages")
+
+def _ensure_messages_fts(conn: sqlite3.Connection) -> None:
+    """
+    Create the messages_fts index and its sync triggers if missing, rebuilding the
+    index from existing messages when it is first created.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the database
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+        fts_exists = cursor.fetchone() is not None
+
+        cursor.execute(CREATE_MESSAGES_FTS_TABLE)
+        for trigger in CREATE_MESSAGES_FTS_TRIGGERS:
+            cursor.execute(trigger)
+
+        if not fts_exists:
+            logger.info("Building messages_fts full-text index from existing messages")
+            cursor.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 fall back to LIKE search in search_messages_by_keywords
+        logger.warning(f"Full-text search unavailable, keyword search will use LIKE: {str(e)}")
+
 def migrate_database() -> None:
     """
     Run database migrations to update schema for existing databases.
@@ -171,9 +742,40 @@ def migrate_database() -> None:
                 conn.commit()
                 logger.info("Successfully added reply_to_message_id column")
 
+            # Check if created_at_ms column exists
+            if 'created_at_ms' not in columns:
+                logger.info("Adding created_at_ms column to messages table")
+                cursor.execute("ALTER TABLE messages ADD COLUMN created_at_ms INTEGER")
+                conn.commit()
+                logger.info("Successfully added created_at_ms column")
+
+            # Check if has_gif column exists
+            if 'has_gif' not in columns:
+                logger.info("Adding has_gif column to messages table")
+                # Existing rows stay NULL: whether they contain a GIF is unknown
+                cursor.execute("ALTER TABLE messages ADD COLUMN has_gif INTEGER")
+                conn.commit()
+                logger.info("Successfully added has_gif column")
+
+            # Check if mention_ids column exists
+            if 'mention_ids' not in columns:
+                logger.info("Adding mention_ids column to messages table")
+                cursor.execute("ALTER TABLE messages ADD COLUMN mention_ids TEXT")
+                conn.commit()
+                logger.info("Successfully added mention_ids column")
+
+            # Backfill any rows written before created_at_ms existed (no-op once complete)
+            cursor.execute(BACKFILL_CREATED_AT_MS)
+            if cursor.rowcount > 0:
+                logger.info(f"Backfilled created_at_ms for {cursor.rowcount} messages")
+            conn.commit()
+
             # Always ensure the reply_to index exists (handles both new DBs and migrated DBs)
             # CREATE INDEX IF NOT EXISTS is idempotent, so this is safe to run always
             cursor.execute(CREATE_INDEX_REPLY_TO)
+            cursor.execute(CREATE_INDEX_CREATED_MS)
+            cursor.execute(CREATE_INDEX_CHANNEL_CREATED_MS)
+            cursor.execute(CREATE_INDEX_GUILD_CREATED_MS)
             cursor.execute(CREATE_ROLE_COLOR_FREE_CHANGE_TABLE)
 
             # Ensure free_change_started_at column exists on user_role_colors
@@ -188,6 +790,81 @@ def migrate_database() -> None:
             conn.commit()
             logger.debug("Ensured migration tables/indexes exist")
 
+            # Reply graph tables; backfill from existing messages the first time
+            cursor.execute("PRAGMA table_info(message_threads)")
+            thread_columns = {column[1]: column for column in cursor.fetchall()}
+            threads_exist = bool(thread_columns)
+            if threads_exist and thread_columns['chain_has_gif'][3]:
+                # Built when chain_has_gif couldn't be NULL, so unknown chains read as GIF-free
+                logger.info("Rebuilding message_threads with a nullable chain_has_gif")
+                cursor.execute("DROP TABLE message_threads")
+                cursor.execute("DROP TABLE thread_participants")
+                cursor.execute("DROP TRIGGER IF EXISTS message_threads_insert")
+                threads_exist = False
+            cursor.execute(CREATE_MESSAGE_THREADS_TABLE)
+            cursor.execute(CREATE_THREAD_PARTICIPANTS_TABLE)
+            cursor.execute(CREATE_INDEX_THREADS_ROOT)
+            cursor.execute(CREATE_INDEX_THREADS_PARENT)
+            cursor.execute(CREATE_INDEX_THREADS_GUILD_CREATED_MS)
+            for trigger in CREATE_MESSAGE_THREADS_TRIGGERS:
+                cursor.execute(trigger)
+            if not threads_exist:
+                _backfill_message_threads(conn)
+            conn.commit()
+
+            # Engagement rollups; backfill from existing messages the first time
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'engagement_rollup'")
+            rollup_exists = cursor.fetchone() is not None
+            cursor.execute(CREATE_ENGAGEMENT_ROLLUP_TABLE)
+            cursor.execute(CREATE_ENGAGEMENT_REPLY_EDGES_TABLE)
+            cursor.execute(CREATE_ENGAGEMENT_MENTION_EDGES_TABLE)
+            cursor.execute(CREATE_ENGAGEMENT_ROLLUP_TRIGGER)
+            if not rollup_exists:
+                _backfill_engagement_rollup(conn)
+            conn.commit()
+
+            # Scrape cache; seed it from summaries stored on messages the first time
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scraped_content'")
+            scrape_cache_exists = cursor.fetchone() is not None
+            cursor.execute(CREATE_SCRAPED_CONTENT_TABLE)
+            cursor.execute(CREATE_INDEX_SCRAPED_CONTENT_EXPIRES)
+            if not scrape_cache_exists:
+                _backfill_scraped_content(conn)
+            conn.commit()
+
+            # LLM responses reused for identical requests
+            cursor.execute(CREATE_LLM_RESPONSE_CACHE_TABLE)
+            cursor.execute(CREATE_INDEX_LLM_RESPONSE_CACHE_EXPIRES)
+            conn.commit()
+
+            # Image analysis jobs queued by on_message, and the descriptions they produce
+            cursor.execute(CREATE_IMAGE_ANALYSIS_JOBS_TABLE)
+            cursor.execute(CREATE_IMAGE_DESCRIPTION_CACHE_TABLE)
+            conn.commit()
+
+            # Incremental summary buckets start empty and fill lazily
+            cursor.execute(CREATE_CHANNEL_SUMMARY_BUCKETS_TABLE)
+            for trigger in CREATE_CHANNEL_SUMMARY_BUCKETS_TRIGGERS:
+                cursor.execute(trigger)
+            conn.commit()
+
+            # Embedding table for semantic search; queue every existing message for embedding
+            cursor.execute(CREATE_MESSAGE_EMBEDDINGS_TABLE)
+            cursor.execute(CREATE_INDEX_EMBEDDINGS_GUILD_CREATED_MS)
+            cursor.execute(CREATE_INDEX_EMBEDDINGS_PENDING)
+            for trigger in CREATE_MESSAGE_EMBEDDINGS_TRIGGERS:
+                cursor.execute(trigger)
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO message_embeddings (message_id, guild_id, channel_id, created_at_ms)
+                SELECT id, guild_id, channel_id, created_at_ms FROM messages
+                WHERE is_bot = 0 AND is_command = 0
+                """
+            )
+            conn.commit()
+
+            _ensure_messages_fts(conn)
+
     except Exception as e:
         logger.error(f"Error running database migrations: {str(e)}", exc_info=True)
 
@@ -209,6 +886,9 @@ def init_database() -> None:
             # Set a shorter timeout for better error reporting
             conn.execute("PRAGMA busy_timeout = 5000")  # 5 seconds
 
+            # WAL lets readers run concurrently with the writer; the setting persists in the file
+            conn.execute("PRAGMA journal_mode = WAL")
+
             cursor = conn.cursor()
 
             # Create tables and indexes
@@ -242,12 +922,18 @@ def init_database() -> None:
             cursor.execute(CREATE_INDEX_ROLE_COLORS_AUTHOR)
             cursor.execute(CREATE_INDEX_ROLE_COLORS_GUILD)
 
-            # NOTE: CREATE_INDEX_REPLY_TO is created in migrate_database() to ensure
-            # the column exists first (handles both new DBs and existing DBs)
+            # NOTE: CREATE_INDEX_REPLY_TO and the created_at_ms indexes are created in
+            # migrate_database() to ensure the columns exist first (handles both new DBs and existing DBs)
+            conn.commit()
+
+            # Run migrations for existing databases before the test insert, which
+            # needs the current messages schema
+            migrate_database()
 
             # Insert a test message to ensure the database is working
             try:
                 test_message_id = f"test-init-{datetime.now().timestamp()}"
+                init_time = datetime.now()
                 cursor.execute(
                     INSERT_MESSAGE,
                     (
@@ -259,7 +945,7 @@ def init_database() -> None:
                         None,
                         None,
                         "Database initialization test message",
-                        datetime.now().isoformat(),
+                        init_time.isoformat(),
                         1,  # is_bot
                         0,  # is_command
                         None,
@@ -267,7 +953,10 @@ def init_database() -> None:
                         None,
                         None,
                         None,  # image_descriptions
-                        None   # reply_to_message_id
+                        None,  # reply_to_message_id
+                        _to_epoch_ms(init_time),
+                        0,  # has_gif
+                        None  # mention_ids
                     )
                 )
                 logger.info("Successfully inserted test message during database initialization")
@@ -279,37 +968,155 @@ def init_database() -> None:
 
             conn.commit()
 
-        # Run migrations for existing databases
-        migrate_database()
-
         logger.info(f"Database initialized successfully at {DB_FILE}")
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}", exc_info=True)
         raise
 
+class PooledConnection(sqlite3.Connection):
+    """
+    Connection owned by the connection pool. close() is a no-op so callers using
+    the existing get_connection() patterns can't tear down a shared connection.
+    """
+
+    def close(self) -> None:
+        pass
+
+    def close_pooled(self) -> None:
+        """Actually close the connection; only the pool should call this."""
+        super().close()
+
+# Thread-local reader connections, plus one long-lived writer connection for the hot write paths
+_pool_lock = threading.Lock()
+_pool_local = threading.local()
+_pooled_connections: List[PooledConnection] = []
+_pool_generation = 0  # Bumped by close_connection_pool so every thread reopens afterwards
+_writer_lock = threading.Lock()
+_writer_conn: Optional[PooledConnection] = None
+_writer_db_file: Optional[str] = None
+
+def _open_connection(factory: type = sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Open a new connection with the row factory and performance pragmas applied.
+
+    Args:
+        factory (type): sqlite3.Connection subclass to instantiate
+
+    Returns:
+        sqlite3.Connection: A configured connection to DB_FILE
+    """
+    conn = sqlite3.connect(
+        DB_FILE,
+        factory=factory,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row  # This enables column access by name
+
+    # Set a shorter timeout for better error reporting
+    conn.execute("PRAGMA busy_timeout = 5000")  # 5 seconds
+
+    # Enable foreign keys
+    conn.execute("PRAGMA foreign_keys = ON")
+
+    # WAL (set in init_database) makes NORMAL durable across application crashes
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+    return conn
+
 def get_connection() -> sqlite3.Connection:
     """
     Get a connection to the SQLite database.
     The connection supports context managers (with statements).
 
+    Connections are pooled per thread and reused across calls, so pragmas and the
+    prepared-statement cache survive between queries. Once POOL_MAX_CONNECTIONS
+    threads hold a pooled connection, further threads get a fresh unpooled one.
+
     Returns:
         sqlite3.Connection: A connection to the database.
     """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-
-        # Set a shorter timeout for better error reporting
-        conn.execute("PRAGMA busy_timeout = 5000")  # 5 seconds
-
-        # Enable foreign keys
-        conn.execute("PRAGMA foreign_keys = ON")
-
+        conn = getattr(_pool_local, 'connection', None)
+        if (conn is not None and _pool_local.db_file == DB_FILE
+                and _pool_local.generation == _pool_generation):
+            return conn
+
+        with _pool_lock:
+            if conn is not None:
+                # DB_FILE changed or the pool was closed since this thread's connection was opened
+                _discard_pooled_connection(conn)
+                _pool_local.connection = None
+
+            _evict_dead_thread_connections()
+            if len(_pooled_connections) >= POOL_MAX_CONNECTIONS:
+                logger.debug("Connection pool exhausted, opening an unpooled connection")
+                return _open_connection()
+
+            conn = _open_connection(PooledConnection)
+            conn.owner_thread = threading.current_thread()
+            _pooled_connections.append(conn)
+            generation = _pool_generation
+
+        _pool_local.connection = conn
+        _pool_local.db_file = DB_FILE
+        _pool_local.generation = generation
         return conn
     except Exception as e:
         logger.error(f"Error connecting to database: {str(e)}", exc_info=True)
         raise
 
+def _discard_pooled_connection(conn: PooledConnection) -> None:
+    """Remove a connection from the pool if it is still there, and close it. Call with _pool_lock held."""
+    if conn in _pooled_connections:
+        _pooled_connections.remove(conn)
+    try:
+        conn.close_pooled()
+    except Exception as e:
+        logger.warning(f"Error closing pooled connection: {str(e)}")
+
+def _evict_dead_thread_connections() -> None:
+    """Close pooled connections whose owning thread has exited. Call with _pool_lock held."""
+    for conn in list(_pooled_connections):
+        owner = getattr(conn, 'owner_thread', None)
+        if owner is None or not owner.is_alive():
+            _discard_pooled_connection(conn)
+
+@contextmanager
+def _writer_connection():
+    """
+    Context manager yielding the shared long-lived writer connection.
+    Writes are serialized on a lock and committed (or rolled back) on exit.
+    """
+    global _writer_conn, _writer_db_file
+    with _writer_lock:
+        if _writer_conn is None or _writer_db_file != DB_FILE:
+            if _writer_conn is not None:
+                _writer_conn.close_pooled()
+            _writer_conn = _open_connection(PooledConnection)
+            _writer_db_file = DB_FILE
+        with _writer_conn:
+            yield _writer_conn
+
+def close_connection_pool() -> None:
+    """Close every pooled connection and the writer connection (used on shutdown)."""
+    global _writer_conn, _writer_db_file, _pool_generation
+    with _pool_lock:
+        for conn in list(_pooled_connections):
+            _discard_pooled_connection(conn)
+        _pool_generation += 1
+    _pool_local.connection = None
+
+    with _writer_lock:
+        if _writer_conn is not None:
+            _writer_conn.close_pooled()
+            _writer_conn = None
+            _writer_db_file = None
+    logger.info("Closed database connection pool")
+
 def check_database_connection() -> bool:
     """
     Check if the database connection is working properly.
@@ -371,7 +1178,8 @@ def store_message(
     scraped_content_summary: Optional[str] = None,
     scraped_content_key_points: Optional[str] = None,
     image_descriptions: Optional[str] = None,
-    reply_to_message_id: Optional[str] = None
+    reply_to_message_id: Optional[str] = None,
+    has_gif: bool = False
 ) -> bool:
     """
     Store a message in the database.
@@ -394,13 +1202,14 @@ def store_message(
         scraped_content_key_points (Optional[str]): JSON string of key points from scraped content (if any)
         image_descriptions (Optional[str]): JSON string of image analysis results (if any)
         reply_to_message_id (Optional[str]): The ID of the message this is replying to (if any)
+        has_gif (bool): Whether the message contains or forwards a GIF
 
     Returns:
         bool: True if the message was stored successfully, False otherwise
     """
     try:
-        # Use context manager to ensure connection is properly closed
-        with get_connection() as conn:
+        # Use the shared writer connection; the context manager commits on exit
+        with _writer_connection() as conn:
             cursor = conn.cursor()
 
 # Ensure consistent datetime format for storage (always UTC, no timezone info for SQLite compatibility)
@@ -425,7 +1234,10 @@ def store_message(
                     scraped_content_summary,
                     scraped_content_key_points,
                     image_descriptions,
-                    reply_to_message_id
+                    reply_to_message_id,
+                    _to_epoch_ms(created_at),
+                    1 if has_gif else 0,
+                    _mention_ids(content)
                 )
             )
 
@@ -442,6 +1254,60 @@ def store_message(
         logger.error(f"Error storing message {message_id}: {str(e)}", exc_info=True)
         return False
 
+def _message_row(msg: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    Convert a message dictionary into the parameter tuple used by INSERT_MESSAGE.
+
+    Args:
+        msg (Dict[str, Any]): Message dictionary using the store_messages_batch keys
+
+    Returns:
+        Tuple[Any, ...]: Positional parameters for INSERT_MESSAGE
+    """
+    # Ensure consistent datetime format for storage (always UTC, no timezone info for SQLite compatibility)
+    created_at_str = msg['created_at'].replace(tzinfo=None).isoformat()
+
+    return (
+        msg['message_id'],
+        msg['author_id'],
+        msg['author_name'],
+        msg['channel_id'],
+        msg['channel_name'],
+        msg.get('guild_id'),
+        msg.get('guild_name'),
+        msg['content'],
+        created_at_str,
+        int(msg.get('is_bot', False)),
+        int(msg.get('is_command', False)),
+        msg.get('command_type'),
+        msg.get('scraped_url'),
+        msg.get('scraped_content_summary'),
+        msg.get('scraped_content_key_points'),
+        msg.get('image_descriptions'),
+        msg.get('reply_to_message_id'),
+        _to_epoch_ms(msg['created_at']),
+        int(msg.get('has_gif', False)),
+        _mention_ids(msg['content'])
+    )
+
+def _write_messages_batch(messages: List[Dict[str, Any]], ignore_duplicates: bool = False) -> int:
+    """
+    Insert a batch of messages in a single transaction using executemany.
+
+    Args:
+        messages (List[Dict[str, Any]]): List of message dictionaries with required fields
+        ignore_duplicates (bool): Skip rows whose message ID already exists instead of
+            failing the whole transaction
+
+    Returns:
+        int: Number of rows actually inserted
+    """
+    statement = INSERT_MESSAGE_OR_IGNORE if ignore_duplicates else INSERT_MESSAGE
+    with _writer_connection() as conn:
+        # rowcount excludes rows written by triggers (e.g. the messages_fts index)
+        cursor = conn.executemany(statement, [_message_row(msg) for msg in messages])
+        return cursor.rowcount
+
 async def store_messages_batch(messages: List[Dict[str, Any]]) -> bool:
     """
     Store multiple messages in a single transaction for better performance and consistency.
@@ -454,46 +1320,11 @@ async def store_messages_batch(messages: List[Dict[str, Any]]) -> bool:
     """
     if not messages:
         return True
-        
-    try:
-        def _store_batch():
-            with get_connection() as conn:
-                cursor = conn.cursor()
-                
-                for msg in messages:
-                    # Ensure consistent datetime format for storage (always UTC, no timezone info for SQLite compatibility)
-                    created_at = msg['created_at']
-                    created_at_str = created_at.replace(tzinfo=None).isoformat()
-                    
-                    cursor.execute(
-                        INSERT_MESSAGE,
-                        (
-                            msg['message_id'],
-                            msg['author_id'],
-                            msg['author_name'],
-                            msg['channel_id'],
-                            msg['channel_name'],
-                            msg.get('guild_id'),
-                            msg.get('guild_name'),
-                            msg['content'],
-                            created_at_str,
-                            int(msg.get('is_bot', False)),
-                            int(msg.get('is_command', False)),
-                            msg.get('command_type'),
-                            msg.get('scraped_url'),
-                            msg.get('scraped_content_summary'),
-                            msg.get('scraped_content_key_points'),
-                            msg.get('image_descriptions'),
-                            msg.get('reply_to_message_id')
-                        )
-                    )
-                
-                conn.commit()
-                return True
 
-        result = await asyncio.to_thread(_store_batch)
+    try:
+        await asyncio.to_thread(_write_messages_batch, messages)
         logger.info(f"Stored {len(messages)} messages in batch transaction")
-        return result
+        return True
     except sqlite3.IntegrityError as e:
         logger.warning(f"Integrity error in batch message storage: {str(e)}")
         return False
@@ -501,6 +1332,257 @@ async def store_messages_batch(messages: List[Dict[str, Any]]) -> bool:
         logger.error(f"Error storing message batch: {str(e)}", exc_info=True)
         return False
 
+class MessageIngestQueue:
+    """
+    Write-behind queue for live message ingestion.
+
+    Producers (on_message) await put() on a bounded asyncio queue, which applies
+    backpressure once the queue is full. A drain task collects up to batch_size
+    rows or whatever arrives within flush_interval seconds and hands each batch to
+    a dedicated writer thread, which inserts it in a single executemany transaction.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL_SECONDS,
+        max_queue_size: int = INGEST_QUEUE_MAX_SIZE
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, Any] = {
+            'enqueued': 0,
+            'written': 0,
+            'duplicates': 0,
+            'failed': 0,
+            'batches': 0,
+            'backpressure_waits': 0,
+            'max_queue_depth': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        """Whether the drain task is active."""
+        return self._drain_task is not None and not self._drain_task.done()
+
+    def start(self) -> None:
+        """Start the writer thread and drain task on the running event loop."""
+        if self.running:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._drain_task = asyncio.create_task(self._drain_loop(), name="message-ingest-drain")
+        logger.info(
+            f"Message ingestion queue started (batch_size={self.batch_size}, "
+            f"flush_interval={self.flush_interval}s, max_queue_size={self._queue.maxsize})"
+        )
+
+    async def put(self, message: Dict[str, Any]) -> None:
+        """
+        Enqueue a message for writing, waiting if the queue is full.
+
+        Args:
+            message (Dict[str, Any]): Message dictionary using the store_messages_batch keys
+        """
+        if self._queue.full():
+            self.metrics['backpressure_waits'] += 1
+            logger.warning(f"Message ingestion queue full ({self._queue.qsize()} pending), applying backpressure")
+        await self._queue.put(message)
+        self.metrics['enqueued'] += 1
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self._queue.qsize())
+
+    async def flush(self) -> None:
+        """Wait until every message enqueued so far has been written."""
+        if self.running:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Flush all pending messages, then stop the drain task and writer thread."""
+        if self.running:
+            await self._queue.put(None)
+            await self._drain_task
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        logger.info(f"Message ingestion queue stopped: {self.get_metrics()}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the ingestion metrics.
+
+        Returns:
+            Dict[str, Any]: Counters plus current queue depth and average flush latency
+        """
+        snapshot = dict(self.metrics)
+        snapshot['queue_depth'] = self._queue.qsize()
+        snapshot['avg_flush_ms'] = (
+            snapshot['total_flush_ms'] / snapshot['batches'] if snapshot['batches'] else 0.0
+        )
+        return snapshot
+
+    async def _drain_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await self._write_batch(loop, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_batch(self, loop: asyncio.AbstractEventLoop, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        failed_before = self.metrics['failed']
+        try:
+            inserted = await loop.run_in_executor(self._executor, _write_messages_batch, batch, True)
+        except Exception as e:
+            # Fall back to row-by-row inserts so one bad row doesn't drop the whole batch
+            logger.error(f"Error writing message batch of {len(batch)}, retrying row by row: {str(e)}", exc_info=True)
+            inserted = await loop.run_in_executor(self._executor, self._write_rows_individually, batch)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.metrics['batches'] += 1
+        self.metrics['written'] += inserted
+        # INSERT OR IGNORE skips rows whose message ID is already stored
+        self.metrics['duplicates'] += len(batch) - inserted - (self.metrics['failed'] - failed_before)
+        self.metrics['last_flush_ms'] = elapsed_ms
+        self.metrics['max_flush_ms'] = max(self.metrics['max_flush_ms'], elapsed_ms)
+        self.metrics['total_flush_ms'] += elapsed_ms
+        logger.debug(f"Flushed {inserted}/{len(batch)} messages in {elapsed_ms:.1f}ms (queue depth {self._queue.qsize()})")
+        if inserted:
+            _notify_write_listeners()
+
+    def _write_rows_individually(self, batch: List[Dict[str, Any]]) -> int:
+        inserted = 0
+        for msg in batch:
+            try:
+                inserted += _write_messages_batch([msg], ignore_duplicates=True)
+            except Exception as e:
+                self.metrics['failed'] += 1
+                logger.error(f"Error storing message {msg.get('message_id')}: {str(e)}")
+        return inserted
+
+# Live ingestion queue, created by start_message_ingestion()
+_ingest_queue: Optional[MessageIngestQueue] = None
+
+# Callbacks run on the event loop after live messages are stored or re-scraped
+_write_listeners: List[Callable[[], None]] = []
+
+def add_write_listener(callback: Callable[[], None]) -> None:
+    """
+    Register a callback run on the event loop whenever the ingestion queue stores
+    new messages or a message is updated with scraped data.
+
+    Args:
+        callback (Callable[[], None]): Cheap, non-blocking callback (e.g. setting an asyncio.Event)
+    """
+    if callback not in _write_listeners:
+        _write_listeners.append(callback)
+
+def remove_write_listener(callback: Callable[[], None]) -> None:
+    """
+    Unregister a callback added with add_write_listener().
+
+    Args:
+        callback (Callable[[], None]): The callback to remove
+    """
+    if callback in _write_listeners:
+        _write_listeners.remove(callback)
+
+def _notify_write_listeners() -> None:
+    for callback in list(_write_listeners):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in database write listener: {str(e)}", exc_info=True)
+
+def start_message_ingestion() -> MessageIngestQueue:
+    """
+    Start the write-behind ingestion queue. Must be called from a running event loop;
+    calling it again while the queue is running is a no-op.
+
+    Returns:
+        MessageIngestQueue: The active ingestion queue
+    """
+    global _ingest_queue
+    if _ingest_queue is None or not _ingest_queue.running:
+        _ingest_queue = MessageIngestQueue()
+        _ingest_queue.start()
+    return _ingest_queue
+
+async def enqueue_message(message: Dict[str, Any]) -> bool:
+    """
+    Hand a message to the write-behind queue. Falls back to a direct batch write
+    when the queue has not been started (e.g. before on_ready).
+
+    Args:
+        message (Dict[str, Any]): Message dictionary using the store_messages_batch keys
+
+    Returns:
+        bool: True if the message was queued or stored, False otherwise
+    """
+    if _ingest_queue is None or not _ingest_queue.running:
+        return await store_messages_batch([message])
+
+    try:
+        await _ingest_queue.put(message)
+        return True
+    except Exception as e:
+        logger.error(f"Error enqueueing message {message.get('message_id')}: {str(e)}", exc_info=True)
+        return False
+
+async def flush_message_ingestion() -> None:
+    """Wait until all queued messages have been written to the database."""
+    if _ingest_queue is not None:
+        await _ingest_queue.flush()
+
+async def stop_message_ingestion() -> None:
+    """Flush pending messages and shut down the ingestion queue."""
+    global _ingest_queue
+    if _ingest_queue is not None:
+        await _ingest_queue.stop()
+        _ingest_queue = None
+
+def get_ingestion_metrics() -> Dict[str, Any]:
+    """
+    Get metrics for the write-behind ingestion queue.
+
+    Returns:
+        Dict[str, Any]: Queue depth, throughput counters and flush latency, or an empty dict if not started
+    """
+    if _ingest_queue is None:
+        return {}
+    return _ingest_queue.get_metrics()
+
 async def update_message_with_scraped_data(
     message_id: str,
     scraped_url: str,
@@ -555,26 +1637,123 @@ async def update_message_with_scraped_data(
             return False
 
         logger.info(f"Message {message_id} updated with scraped data from URL: {scraped_url}")
+        _notify_write_listeners()
         return True
     except Exception as e:
         logger.error(f"Error updating message {message_id} with scraped data: {str(e)}", exc_info=True)
         return False
 
-def get_message_count() -> int:
+def enqueue_image_analysis_job(message_id: str, attachments: List[Dict[str, Any]]) -> bool:
     """
-    Get the total number of messages in the database.
+    Persist an image analysis job for a message.
+
+    Args:
+        message_id (str): The Discord message ID
+        attachments (List[Dict[str, Any]]): Image attachments with 'filename', 'url' and 'content_type'
 
     Returns:
-        int: The number of messages
+        bool: True if the job was stored (or already existed), False otherwise
     """
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
+        with _writer_connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO image_analysis_jobs (message_id, attachments, created_at_ms) VALUES (?, ?, ?)",
+                (message_id, json.dumps(attachments), _to_epoch_ms(datetime.now(timezone.utc)))
+            )
+        return True
+    except Exception as e:
+        logger.error(f"Error queueing image analysis for message {message_id}: {str(e)}", exc_info=True)
+        return False
 
-            cursor.execute("SELECT COUNT(*) FROM messages")
-            count = cursor.fetchone()[0]
+def get_pending_image_analysis_jobs(max_attempts: int) -> List[Dict[str, Any]]:
+    """
+    Get the image analysis jobs that haven't run out of attempts, oldest first.
 
-        return count
+    Args:
+        max_attempts (int): Jobs that already failed this many times are skipped
+
+    Returns:
+        List[Dict[str, Any]]: Jobs with 'message_id', 'attachments' and 'attempts'
+    """
+    try:
+        with get_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT message_id, attachments, attempts FROM image_analysis_jobs
+                WHERE attempts < ? ORDER BY created_at_ms
+                """,
+                (max_attempts,)
+            ).fetchall()
+        return [
+            {'message_id': row[0], 'attachments': json.loads(row[1]), 'attempts': row[2]}
+            for row in rows
+        ]
+    except Exception as e:
+        logger.error(f"Error loading pending image analysis jobs: {str(e)}", exc_info=True)
+        return []
+
+def record_image_analysis_failure(message_id: str, error: str) -> bool:
+    """
+    Count a failed attempt at an image analysis job.
+
+    Args:
+        message_id (str): The Discord message ID
+        error (str): What went wrong
+
+    Returns:
+        bool: True if the job was updated, False otherwise
+    """
+    try:
+        with _writer_connection() as conn:
+            conn.execute(
+                "UPDATE image_analysis_jobs SET attempts = attempts + 1, last_error = ? WHERE message_id = ?",
+                (error[:500], message_id)
+            )
+        return True
+    except Exception as e:
+        logger.error(f"Error recording image analysis failure for message {message_id}: {str(e)}", exc_info=True)
+        return False
+
+def complete_image_analysis_job(message_id: str, image_descriptions: str) -> bool:
+    """
+    Write a message's image descriptions and remove its analysis job, in one transaction.
+
+    Args:
+        message_id (str): The Discord message ID
+        image_descriptions (str): JSON list of image analyses
+
+    Returns:
+        bool: True if the message was updated, False if it doesn't exist (the job is removed either way)
+    """
+    try:
+        with _writer_connection() as conn:
+            updated = conn.execute(
+                "UPDATE messages SET image_descriptions = ? WHERE id = ?",
+                (image_descriptions, message_id)
+            ).rowcount
+            conn.execute("DELETE FROM image_analysis_jobs WHERE message_id = ?", (message_id,))
+        if not updated:
+            logger.warning(f"No message found with ID {message_id} to update with image descriptions")
+        return bool(updated)
+    except Exception as e:
+        logger.error(f"Error storing image descriptions for message {message_id}: {str(e)}", exc_info=True)
+        return False
+
+def get_message_count() -> int:
+    """
+    Get the total number of messages in the database.
+
+    Returns:
+        int: The number of messages
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT COUNT(*) FROM messages")
+            count = cursor.fetchone()[0]
+
+        return count
     except Exception as e:
         logger.error(f"Error getting message count: {str(e)}", exc_info=True)
         # Return 0 instead of -1 for consistency with other error cases
@@ -625,7 +1804,7 @@ def get_all_channel_messages(channel_id: str, limit: int = 100) -> List[Dict[str
                        scraped_url, scraped_content_summary, scraped_content_key_points, image_descriptions
                 FROM messages
                 WHERE channel_id = ?
-                ORDER BY created_at DESC
+                ORDER BY created_at_ms DESC
                 LIMIT ?
                 """,
                 (channel_id, limit)
@@ -691,31 +1870,26 @@ def get_channel_messages_for_hours(channel_id: str, date: datetime, hours: int)
         end_date = date + timedelta(minutes=1)
         start_date = date - timedelta(hours=hours)
 
-        # Convert to ISO format for database query (remove timezone info for SQLite compatibility)
-        # For SQLite, we need to handle timezone-aware datetime strings properly
-        start_date_str = start_date.replace(tzinfo=None).isoformat()
-        end_date_str = end_date.replace(tzinfo=None).isoformat()
-
         with get_connection() as conn:
             cursor = conn.cursor()
 
             # Query messages for the channel within the time range
-            # Use datetime comparison that works with SQLite's text storage
-            # Handle both timezone-aware and naive datetime strings in the database
+            # Range scan on idx_channel_created_at_ms
             cursor.execute(
                 """
-                SELECT id, author_name, content, created_at, is_bot, is_command,
-                       scraped_url, scraped_content_summary, scraped_content_key_points,
-                       image_descriptions, guild_id
-                FROM messages
-                WHERE channel_id = ?
-                AND (
-                    datetime(created_at) BETWEEN datetime(?) AND datetime(?)
-                    OR datetime(substr(created_at, 1, 19)) BETWEEN datetime(?) AND datetime(?)
-                )
-                ORDER BY created_at ASC
+                SELECT m.id, m.author_name, m.content, m.created_at, m.is_bot, m.is_command,
+                       m.scraped_url, m.scraped_content_summary, m.scraped_content_key_points,
+                       m.image_descriptions, m.guild_id,
+                       t.root_id AS thread_root_id, t.depth AS thread_depth,
+                       parent.author_name AS reply_to_author
+                FROM messages m
+                LEFT JOIN message_threads t ON t.message_id = m.id
+                LEFT JOIN messages parent ON parent.id = m.reply_to_message_id
+                WHERE m.channel_id = ?
+                AND m.created_at_ms BETWEEN ? AND ?
+                ORDER BY m.created_at_ms ASC
                 """,
-                (channel_id, start_date_str, end_date_str, start_date_str, end_date_str)
+                (channel_id, _to_epoch_ms(start_date), _to_epoch_ms(end_date))
             )
 
             # Convert rows to dictionaries
@@ -733,7 +1907,10 @@ def get_channel_messages_for_hours(channel_id: str, date: datetime, hours: int)
                     'scraped_content_key_points': row['scraped_content_key_points'],
                     'image_descriptions': row['image_descriptions'],
                     'guild_id': row['guild_id'],
-                    'channel_id': channel_id
+                    'channel_id': channel_id,
+                    'thread_root_id': row['thread_root_id'],
+                    'thread_depth': row['thread_depth'] or 0,
+                    'reply_to_author': row['reply_to_author']
                 })
 
         logger.info(f"Retrieved {len(messages)} messages from channel {channel_id} for the past {hours} hours from {start_date.isoformat()} to {end_date.isoformat()}")
@@ -754,9 +1931,6 @@ def get_messages_for_time_range(start_time: datetime, end_time: datetime) -> Dic
         Dict[str, List[Dict[str, Any]]]: A dictionary mapping channel_id to a list of messages
     """
     try:
-        start_date_str = start_time.isoformat()
-        end_date_str = end_time.isoformat()
-
         with get_connection() as conn:
             cursor = conn.cursor()
 
@@ -764,14 +1938,18 @@ def get_messages_for_time_range(start_time: datetime, end_time: datetime) -> Dic
             cursor.execute(
                 """
                 SELECT
-                    id, author_id, author_name, channel_id, channel_name,
-                    guild_id, guild_name, content, created_at, is_bot, is_command,
-                    scraped_url, scraped_content_summary, scraped_content_key_points, image_descriptions
-                FROM messages
-                WHERE created_at BETWEEN ? AND ?
-                ORDER BY channel_id, created_at ASC
+                    m.id, m.author_id, m.author_name, m.channel_id, m.channel_name,
+                    m.guild_id, m.guild_name, m.content, m.created_at, m.is_bot, m.is_command,
+                    m.scraped_url, m.scraped_content_summary, m.scraped_content_key_points, m.image_descriptions,
+                    t.root_id AS thread_root_id, t.depth AS thread_depth,
+                    parent.author_name AS reply_to_author
+                FROM messages m
+                LEFT JOIN message_threads t ON t.message_id = m.id
+                LEFT JOIN messages parent ON parent.id = m.reply_to_message_id
+                WHERE m.created_at_ms BETWEEN ? AND ?
+                ORDER BY m.channel_id, m.created_at_ms ASC
                 """,
-                (start_date_str, end_date_str)
+                (_to_epoch_ms(start_time), _to_epoch_ms(end_time))
             )
 
             # Group messages by channel
@@ -799,7 +1977,10 @@ def get_messages_for_time_range(start_time: datetime, end_time: datetime) -> Dic
                     'scraped_url': row['scraped_url'],
                     'scraped_content_summary': row['scraped_content_summary'],
                     'scraped_content_key_points': row['scraped_content_key_points'],
-                    'image_descriptions': row['image_descriptions']
+                    'image_descriptions': row['image_descriptions'],
+                    'thread_root_id': row['thread_root_id'],
+                    'thread_depth': row['thread_depth'] or 0,
+                    'reply_to_author': row['reply_to_author']
                 })
 
         total_messages = sum(len(channel_data['messages']) for channel_data in messages_by_channel.values())
@@ -821,209 +2002,937 @@ def store_channel_summary(
     metadata: Optional[Dict[str, Any]] = None
 ) -> bool:
     """
-    Store a channel summary in the database.
+    Store a channel summary in the database.
+
+    Args:
+        channel_id (str): The Discord channel ID
+        channel_name (str): The name of the channel
+        date (datetime): The date of the summary
+        summary_text (str): The summary text
+        message_count (int): The number of messages summarized
+        active_users (List[str]): List of active user names
+        guild_id (Optional[str]): The Discord guild ID (if applicable)
+        guild_name (Optional[str]): The name of the guild (if applicable)
+        metadata (Optional[Dict[str, Any]]): Additional metadata for the summary
+
+    Returns:
+        bool: True if the summary was stored successfully, False otherwise
+    """
+    try:
+        # Convert active_users list to JSON string
+        active_users_json = json.dumps(active_users)
+
+        # Convert metadata to JSON string if provided
+        metadata_json = json.dumps(metadata) if metadata else None
+
+        # Format date as YYYY-MM-DD
+        date_str = date.strftime('%Y-%m-%d')
+
+        # Current timestamp
+        created_at = datetime.now().isoformat()
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                INSERT_CHANNEL_SUMMARY,
+                (
+                    channel_id,
+                    channel_name,
+                    guild_id,
+                    guild_name,
+                    date_str,
+                    summary_text,
+                    message_count,
+                    len(active_users),
+                    active_users_json,
+                    created_at,
+                    metadata_json
+                )
+            )
+
+            conn.commit()
+
+        logger.info(f"Stored summary for channel {channel_name} ({channel_id}) for {date_str}")
+        return True
+    except Exception as e:
+        logger.error(f"Error storing summary for channel {channel_id} on {date.strftime('%Y-%m-%d')}: {str(e)}", exc_info=True)
+        return False
+
+def get_summary_buckets(channel_id: str, start_bucket: int, end_bucket: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Get stored hourly summary notes for a channel.
+
+    Args:
+        channel_id (str): The Discord channel ID
+        start_bucket (int): First hour bucket (inclusive)
+        end_bucket (int): Last hour bucket (inclusive)
+
+    Returns:
+        Dict[int, Dict[str, Any]]: hour_bucket -> {'summary_text', 'message_count'}
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT hour_bucket, summary_text, message_count
+                FROM channel_summary_buckets
+                WHERE channel_id = ? AND hour_bucket BETWEEN ? AND ?
+                """,
+                (channel_id, start_bucket, end_bucket)
+            )
+            return {
+                row['hour_bucket']: {
+                    'summary_text': row['summary_text'],
+                    'message_count': row['message_count']
+                }
+                for row in cursor.fetchall()
+            }
+    except Exception as e:
+        logger.error(f"Error getting summary buckets for channel {channel_id}: {str(e)}", exc_info=True)
+        return {}
+
+def store_summary_bucket(channel_id: str, hour_bucket: int, summary_text: str, message_count: int) -> bool:
+    """
+    Store the summary notes for one channel hour.
+
+    The notes are only stored if the bucket still holds exactly message_count messages,
+    checked in the same statement, so a message that arrived while the notes were being
+    generated can't be silently left out of them.
+
+    Args:
+        channel_id (str): The Discord channel ID
+        hour_bucket (int): created_at_ms // SUMMARY_BUCKET_MS
+        summary_text (str): The notes
+        message_count (int): Number of messages the notes were generated from
+
+    Returns:
+        bool: True if stored, False if the bucket changed in the meantime or on error
+    """
+    try:
+        start_ms = hour_bucket * SUMMARY_BUCKET_MS
+        with _writer_connection() as conn:
+            cursor = conn.execute(
+                """
+                INSERT OR REPLACE INTO channel_summary_buckets
+                    (channel_id, hour_bucket, summary_text, message_count, created_at)
+                SELECT ?, ?, ?, ?, ?
+                WHERE (
+                    SELECT COUNT(*) FROM messages
+                    WHERE channel_id = ? AND created_at_ms >= ? AND created_at_ms < ?
+                ) = ?
+                """,
+                (
+                    channel_id, hour_bucket, summary_text, message_count, datetime.now().isoformat(),
+                    channel_id, start_ms, start_ms + SUMMARY_BUCKET_MS, message_count
+                )
+            )
+            stored = cursor.rowcount > 0
+        if not stored:
+            logger.debug(f"Summary bucket {hour_bucket} for channel {channel_id} changed while summarizing; not stored")
+        return stored
+    except Exception as e:
+        logger.error(f"Error storing summary bucket {hour_bucket} for channel {channel_id}: {str(e)}", exc_info=True)
+        return False
+
+def delete_messages_older_than(cutoff_time: datetime) -> int:
+    """
+    Delete messages older than the specified cutoff time.
+
+    Args:
+        cutoff_time (datetime): Messages older than this time will be deleted
+
+    Returns:
+        int: The number of messages deleted
+    """
+    try:
+        cutoff_ms = _to_epoch_ms(cutoff_time)
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            # First, count how many messages will be deleted
+            cursor.execute(
+                "SELECT COUNT(*) FROM messages WHERE created_at_ms < ?",
+                (cutoff_ms,)
+            )
+            count = cursor.fetchone()[0]
+
+            # Then delete them
+            cursor.execute(
+                "DELETE FROM messages WHERE created_at_ms < ?",
+                (cutoff_ms,)
+            )
+
+            # Expired scrapes would never be served again either
+            cursor.execute(
+                "DELETE FROM scraped_content WHERE expires_at_ms < ?",
+                (_to_epoch_ms(datetime.now(timezone.utc)),)
+            )
+
+            # Expired LLM responses
+            cursor.execute(
+                "DELETE FROM llm_response_cache WHERE expires_at_ms < ?",
+                (_to_epoch_ms(datetime.now(timezone.utc)),)
+            )
+
+            # Image jobs for deleted messages have nothing left to update
+            cursor.execute(
+                "DELETE FROM image_analysis_jobs WHERE created_at_ms < ?",
+                (cutoff_ms,)
+            )
+
+            # Summary buckets for hours that are gone can never be served again
+            cursor.execute(
+                "DELETE FROM channel_summary_buckets WHERE hour_bucket < ?",
+                (cutoff_ms // SUMMARY_BUCKET_MS,)
+            )
+
+            conn.commit()
+
+        logger.info(f"Deleted {count} messages older than {cutoff_time}")
+        return count
+    except Exception as e:
+        logger.error(f"Error deleting messages older than {cutoff_time}: {str(e)}", exc_info=True)
+        return 0
+
+def get_active_channels(hours: int = 24) -> List[Dict[str, Any]]:
+    """
+    Get channels with non-bot, non-command activity in the last specified hours.
+
+    Args:
+        hours (int): Number of hours to look back for activity
+
+    Returns:
+        List[Dict[str, Any]]: A list of active channels with their details
+    """
+    try:
+        # Calculate the cutoff time
+        cutoff_ms = _to_epoch_ms(datetime.now(timezone.utc) - timedelta(hours=hours))
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            # Query for active channels
+            cursor.execute(
+                """
+                SELECT
+                    channel_id,
+                    channel_name,
+                    guild_id,
+                    guild_name,
+                    COUNT(*) as message_count
+                FROM messages
+                WHERE created_at_ms >= ?
+                AND is_bot = 0
+                AND is_command = 0
+                GROUP BY channel_id
+                ORDER BY message_count DESC
+                """,
+                (cutoff_ms,)
+            )
+
+            # Convert rows to dictionaries
+            channels = []
+            for row in cursor.fetchall():
+                channels.append({
+                    'channel_id': row['channel_id'],
+                    'channel_name': row['channel_name'],
+                    'guild_id': row['guild_id'],
+                    'guild_name': row['guild_name'],
+                    'message_count': row['message_count']
+                })
+
+        logger.info(f"Found {len(channels)} active channels in the last {hours} hours")
+        return channels
+    except Exception as e:
+        logger.error(f"Error getting active channels for the last {hours} hours: {str(e)}", exc_info=True)
+        return []
+
+def _scrape_ttl_seconds(provider: str) -> int:
+    """Freshness window for a scrape from the given provider."""
+    return SCRAPE_CACHE_TTL_SECONDS.get(provider, SCRAPE_CACHE_DEFAULT_TTL_SECONDS)
+
+def _provider_for_canonical_url(canonical_url: str) -> str:
+    """Best guess at which scraper handled a URL, for entries stored without one."""
+    if canonical_url.startswith('https://www.youtube.com/watch?v='):
+        return 'youtube'
+    if canonical_url.startswith('https://x.com/i/status/'):
+        return 'apify'
+    return 'web'
+
+def get_scraped_content_by_url(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve a fresh cached scrape for a URL.
+
+    The URL is canonicalized first, so tracking parameters, host case and
+    x.com/twitter.com or youtu.be/youtube.com spellings all hit the same entry.
+
+    Args:
+        url (str): The URL to look up
+
+    Returns:
+        Optional[Dict[str, Any]]: Dictionary with url, summary, key_points, provider,
+        content_hash and created_at (fetch time) if a fresh entry exists, None otherwise
+    """
+    try:
+        canonical_url = canonicalize_url(url)
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT url, provider, content_hash, summary, key_points, fetched_at_ms
+                FROM scraped_content
+                WHERE canonical_url = ? AND expires_at_ms > ?
+                """,
+                (canonical_url, _to_epoch_ms(datetime.now(timezone.utc)))
+            )
+            row = cursor.fetchone()
+
+        if not row:
+            logger.debug(f"No cached scrape for URL: {url}")
+            return None
+
+        # Parse key points JSON
+        key_points = []
+        if row['key_points']:
+            try:
+                key_points = json.loads(row['key_points'])
+            except json.JSONDecodeError:
+                logger.warning(f"Invalid JSON in cached key points for URL {url}")
+
+        logger.debug(f"Retrieved cached scrape for URL: {url} ({canonical_url})")
+        return {
+            'url': row['url'],
+            'summary': row['summary'],
+            'key_points': key_points,
+            'provider': row['provider'],
+            'content_hash': row['content_hash'],
+            'created_at': datetime.fromtimestamp(row['fetched_at_ms'] / 1000, tz=timezone.utc).isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Error retrieving scraped content for URL {url}: {str(e)}", exc_info=True)
+        return None
+
+def store_scraped_content(
+    url: str,
+    provider: str,
+    summary: str,
+    key_points: Optional[List[str]] = None,
+    content: Optional[str] = None
+) -> bool:
+    """
+    Cache the summary of a scraped URL under its canonical form.
+
+    Args:
+        url (str): The URL as shared
+        provider (str): Scraper that produced the content ('youtube', 'apify', 'firecrawl', 'exa', ...);
+            selects the TTL from SCRAPE_CACHE_TTL_SECONDS
+        summary (str): The summary text
+        key_points (Optional[List[str]]): Key points, if any
+        content (Optional[str]): The raw scraped content, hashed to detect changes on re-fetch
+
+    Returns:
+        bool: True if the entry was stored, False otherwise
+    """
+    try:
+        now_ms = _to_epoch_ms(datetime.now(timezone.utc))
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest() if content else None
+        with _writer_connection() as conn:
+            conn.execute(
+                INSERT_SCRAPED_CONTENT,
+                (
+                    canonicalize_url(url), url, provider, content_hash, summary,
+                    json.dumps(key_points or []), now_ms, now_ms + _scrape_ttl_seconds(provider) * 1000
+                )
+            )
+        logger.debug(f"Cached {provider} scrape for URL: {url}")
+        return True
+    except Exception as e:
+        logger.error(f"Error caching scraped content for URL {url}: {str(e)}", exc_info=True)
+        return False
+
+def get_cached_llm_response(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve an unexpired cached LLM response.
+
+    Args:
+        cache_key (str): Hash of the request (see llm_cache.make_cache_key)
+
+    Returns:
+        Optional[Dict[str, Any]]: Dictionary with response (JSON text), tokens and expires_at_ms, or None
+    """
+    try:
+        with get_connection() as conn:
+            row = conn.execute(
+                """
+                SELECT response, tokens, expires_at_ms FROM llm_response_cache
+                WHERE cache_key = ? AND expires_at_ms > ?
+                """,
+                (cache_key, _to_epoch_ms(datetime.now(timezone.utc)))
+            ).fetchone()
+        if not row:
+            return None
+        return {'response': row['response'], 'tokens': row['tokens'], 'expires_at_ms': row['expires_at_ms']}
+    except Exception as e:
+        logger.error(f"Error retrieving cached LLM response {cache_key}: {str(e)}", exc_info=True)
+        return None
+
+def store_llm_response(
+    cache_key: str,
+    endpoint: str,
+    model: Optional[str],
+    response: str,
+    tokens: int,
+    expires_at_ms: int
+) -> bool:
+    """
+    Cache an LLM response.
+
+    Args:
+        cache_key (str): Hash of the request
+        endpoint (str): The API called (e.g. 'openrouter.chat', 'exa.answer')
+        model (Optional[str]): The model that answered, if any
+        response (str): The response as JSON text
+        tokens (int): Tokens the call used, reported as saved on later hits
+        expires_at_ms (int): When the entry stops being served (epoch milliseconds)
+
+    Returns:
+        bool: True if the entry was stored, False otherwise
+    """
+    try:
+        with _writer_connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_response_cache
+                    (cache_key, endpoint, model, response, tokens, hits, created_at_ms, expires_at_ms)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+                """,
+                (cache_key, endpoint, model, response, tokens, _to_epoch_ms(datetime.now(timezone.utc)), expires_at_ms)
+            )
+        return True
+    except Exception as e:
+        logger.error(f"Error caching LLM response {cache_key}: {str(e)}", exc_info=True)
+        return False
+
+def record_llm_response_hit(cache_key: str) -> bool:
+    """
+    Count a cache hit on an LLM response.
+
+    Args:
+        cache_key (str): Hash of the request
+
+    Returns:
+        bool: True if the entry was updated, False otherwise
+    """
+    try:
+        with _writer_connection() as conn:
+            conn.execute("UPDATE llm_response_cache SET hits = hits + 1 WHERE cache_key = ?", (cache_key,))
+        return True
+    except Exception as e:
+        logger.error(f"Error recording hit on LLM response {cache_key}: {str(e)}", exc_info=True)
+        return False
+
+def get_cached_image_description(sha256: str) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve the cached description of an image.
+
+    Args:
+        sha256 (str): Hex SHA-256 of the image bytes
+
+    Returns:
+        Optional[Dict[str, Any]]: Dictionary with sha256, dhash, description and tokens, or None
+    """
+    try:
+        with get_connection() as conn:
+            row = conn.execute(
+                "SELECT sha256, dhash, description, tokens FROM image_description_cache WHERE sha256 = ?",
+                (sha256,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            'sha256': row['sha256'],
+            'dhash': row['dhash'],
+            'description': row['description'],
+            'tokens': row['tokens']
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving cached image description {sha256}: {str(e)}", exc_info=True)
+        return None
+
+def get_image_description_hashes() -> List[Tuple[str, int]]:
+    """
+    Get the difference hash of every cached image description that has one.
+
+    Returns:
+        List[Tuple[str, int]]: (sha256, dhash) pairs; dhash as stored (signed 64-bit)
+    """
+    try:
+        with get_connection() as conn:
+            rows = conn.execute(
+                "SELECT sha256, dhash FROM image_description_cache WHERE dhash IS NOT NULL"
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+    except Exception as e:
+        logger.error(f"Error loading image description hashes: {str(e)}", exc_info=True)
+        return []
+
+def store_image_description(sha256: str, dhash: Optional[int], description: str, tokens: int = 0) -> bool:
+    """
+    Cache the description of an image.
+
+    Args:
+        sha256 (str): Hex SHA-256 of the image bytes
+        dhash (Optional[int]): Difference hash as a signed 64-bit integer, if one was computed
+        description (str): The vision model's description
+        tokens (int): Tokens the vision call used, reported as saved on later hits
+
+    Returns:
+        bool: True if the entry was stored, False otherwise
+    """
+    try:
+        now_ms = _to_epoch_ms(datetime.now(timezone.utc))
+        with _writer_connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO image_description_cache
+                    (sha256, dhash, description, tokens, hits, created_at_ms, last_used_ms)
+                VALUES (?, ?, ?, ?, 0, ?, ?)
+                """,
+                (sha256, dhash, description, tokens, now_ms, now_ms)
+            )
+        return True
+    except Exception as e:
+        logger.error(f"Error caching image description {sha256}: {str(e)}", exc_info=True)
+        return False
+
+def record_image_description_hit(sha256: str) -> bool:
+    """
+    Count a cache hit on an image description and mark it as recently used.
+
+    Args:
+        sha256 (str): Hex SHA-256 of the cached image
+
+    Returns:
+        bool: True if the entry was updated, False otherwise
+    """
+    try:
+        with _writer_connection() as conn:
+            conn.execute(
+                "UPDATE image_description_cache SET hits = hits + 1, last_used_ms = ? WHERE sha256 = ?",
+                (_to_epoch_ms(datetime.now(timezone.utc)), sha256)
+            )
+        return True
+    except Exception as e:
+        logger.error(f"Error recording hit on image description {sha256}: {str(e)}", exc_info=True)
+        return False
+
+def delete_image_descriptions_unused_since(cutoff_time: datetime) -> int:
+    """
+    Delete cached image descriptions that haven't been stored or hit since the cutoff.
+
+    Args:
+        cutoff_time (datetime): Entries last used before this time will be deleted
+
+    Returns:
+        int: The number of entries deleted
+    """
+    try:
+        with _writer_connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM image_description_cache WHERE last_used_ms < ?",
+                (_to_epoch_ms(cutoff_time),)
+            )
+            count = cursor.rowcount
+        logger.info(f"Deleted {count} cached image descriptions unused since {cutoff_time}")
+        return count
+    except Exception as e:
+        logger.error(f"Error deleting cached image descriptions unused since {cutoff_time}: {str(e)}", exc_info=True)
+        return 0
+
+def reset_stale_embeddings(embedder: str) -> int:
+    """
+    Mark embeddings produced by a different embedder as pending, so they are
+    re-embedded after EMBEDDING_MODEL changes.
+
+    Args:
+        embedder (str): Name of the active embedder
+
+    Returns:
+        int: Number of embeddings marked pending
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE message_embeddings SET vector = NULL WHERE vector IS NOT NULL AND embedder IS NOT ?",
+                (embedder,)
+            )
+            conn.commit()
+            return cursor.rowcount
+    except Exception as e:
+        logger.error(f"Error resetting stale embeddings: {str(e)}", exc_info=True)
+        return 0
+
+def get_messages_pending_embedding(limit: int = 256) -> List[Dict[str, Any]]:
+    """
+    Get messages whose embedding is missing or stale, newest first. Embeddings
+    from a different embedder are only included after reset_stale_embeddings().
+
+    Args:
+        limit (int): Maximum number of messages to return
+
+    Returns:
+        List[Dict[str, Any]]: Messages with 'id', 'content' and 'scraped_content_summary'
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT m.id, m.content, m.scraped_content_summary
+                FROM message_embeddings e
+                JOIN messages m ON m.id = e.message_id
+                WHERE e.vector IS NULL
+                ORDER BY e.created_at_ms DESC
+                LIMIT ?
+                """,
+                (limit,)
+            )
+            return [
+                {
+                    'id': row['id'],
+                    'content': row['content'],
+                    'scraped_content_summary': row['scraped_content_summary']
+                }
+                for row in cursor.fetchall()
+            ]
+    except Exception as e:
+        logger.error(f"Error getting messages pending embedding: {str(e)}", exc_info=True)
+        return []
+
+def store_message_embeddings(embeddings: List[Tuple[str, str, int, bytes]]) -> bool:
+    """
+    Store embedding vectors for messages already present in message_embeddings.
+
+    Args:
+        embeddings (List[Tuple[str, str, int, bytes]]): (message_id, embedder, dim, float32 vector blob) tuples
+
+    Returns:
+        bool: True if the vectors were stored successfully, False otherwise
+    """
+    if not embeddings:
+        return True
+
+    try:
+        with get_connection() as conn:
+            conn.executemany(
+                "UPDATE message_embeddings SET embedder = ?, dim = ?, vector = ? WHERE message_id = ?",
+                [(embedder, dim, vector, message_id) for message_id, embedder, dim, vector in embeddings]
+            )
+            conn.commit()
+        logger.debug(f"Stored {len(embeddings)} message embeddings")
+        return True
+    except Exception as e:
+        logger.error(f"Error storing message embeddings: {str(e)}", exc_info=True)
+        return False
+
+def get_message_embeddings(
+    guild_id: str,
+    embedder: str,
+    channel_id: Optional[str] = None,
+    hours: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Tuple[str, bytes]]:
+    """
+    Get stored embedding vectors for a guild, optionally limited to a channel and time window.
+
+    Args:
+        guild_id (str): The Discord guild ID
+        embedder (str): Only return vectors produced by this embedder
+        channel_id (Optional[str]): Optional channel ID to filter by
+        hours (Optional[int]): Optional number of hours to look back
+        limit (Optional[int]): Optional maximum number of vectors, newest messages first
+
+    Returns:
+        List[Tuple[str, bytes]]: (message_id, float32 vector blob) pairs
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            query = """
+                SELECT message_id, vector
+                FROM message_embeddings
+                WHERE guild_id = ?
+                AND embedder = ?
+                AND vector IS NOT NULL
+            """
+            params: List[Any] = [guild_id, embedder]
+
+            if hours is not None:
+                query += " AND created_at_ms >= ?"
+                params.append(_to_epoch_ms(datetime.now(timezone.utc) - timedelta(hours=hours)))
+
+            if channel_id:
+                query += " AND channel_id = ?"
+                params.append(channel_id)
+
+            if limit is not None:
+                query += " ORDER BY created_at_ms DESC LIMIT ?"
+                params.append(limit)
+
+            cursor.execute(query, params)
+            return [(row['message_id'], row['vector']) for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Error getting message embeddings for guild {guild_id}: {str(e)}", exc_info=True)
+        return []
+
+def get_messages_by_ids(message_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Get full message records for a list of message IDs.
+
+    Args:
+        message_ids (List[str]): The Discord message IDs to fetch
+
+    Returns:
+        List[Dict[str, Any]]: Messages as dictionaries, in no particular order
+    """
+    if not message_ids:
+        return []
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ", ".join("?" for _ in message_ids)
+            cursor.execute(
+                f"""
+                SELECT
+                    id, author_id, author_name, channel_id, channel_name,
+                    guild_id, guild_name, content, created_at, is_bot, is_command,
+                    scraped_url, scraped_content_summary, scraped_content_key_points,
+                    image_descriptions
+                FROM messages
+                WHERE id IN ({placeholders})
+                """,
+                list(message_ids)
+            )
+
+            messages = []
+            for row in cursor.fetchall():
+                messages.append({
+                    'id': row['id'],
+                    'author_id': row['author_id'],
+                    'author_name': row['author_name'],
+                    'channel_id': row['channel_id'],
+                    'channel_name': row['channel_name'],
+                    'guild_id': row['guild_id'],
+                    'guild_name': row['guild_name'],
+                    'content': row['content'],
+                    'created_at': datetime.fromisoformat(row['created_at']),
+                    'is_bot': bool(row['is_bot']),
+                    'is_command': bool(row['is_command']),
+                    'scraped_url': row['scraped_url'],
+                    'scraped_content_summary': row['scraped_content_summary'],
+                    'scraped_content_key_points': row['scraped_content_key_points'],
+                    'image_descriptions': row['image_descriptions']
+                })
+            return messages
+    except Exception as e:
+        logger.error(f"Error getting messages by IDs: {str(e)}", exc_info=True)
+        return []
+
+def _thread_node(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        'message_id': row['message_id'],
+        'parent_id': row['parent_id'],
+        'root_id': row['root_id'],
+        'depth': row['depth'],
+        'author_id': row['author_id'],
+        'guild_id': row['guild_id'],
+        'channel_id': row['channel_id'],
+        'created_at_ms': row['created_at_ms'],
+        'is_bot': bool(row['is_bot']),
+        'is_command': bool(row['is_command']),
+        'chain_has_gif': None if row['chain_has_gif'] is None else bool(row['chain_has_gif'])
+    }
+
+_THREAD_NODE_COLUMNS = """
+    message_id, parent_id, root_id, depth, author_id, guild_id, channel_id,
+    created_at_ms, is_bot, is_command, chain_has_gif
+"""
+
+def get_thread_node(message_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a message's position in the reply graph.
 
     Args:
-        channel_id (str): The Discord channel ID
-        channel_name (str): The name of the channel
-        date (datetime): The date of the summary
-        summary_text (str): The summary text
-        message_count (int): The number of messages summarized
-        active_users (List[str]): List of active user names
-        guild_id (Optional[str]): The Discord guild ID (if applicable)
-        guild_name (Optional[str]): The name of the guild (if applicable)
-        metadata (Optional[Dict[str, Any]]): Additional metadata for the summary
+        message_id (str): The Discord message ID
 
     Returns:
-        bool: True if the summary was stored successfully, False otherwise
+        Optional[Dict[str, Any]]: The node (parent_id, root_id, depth, chain_has_gif, ...),
+            or None if the message isn't stored
     """
     try:
-        # Convert active_users list to JSON string
-        active_users_json = json.dumps(active_users)
-
-        # Convert metadata to JSON string if provided
-        metadata_json = json.dumps(metadata) if metadata else None
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {_THREAD_NODE_COLUMNS} FROM message_threads WHERE message_id = ?",
+                (message_id,)
+            )
+            row = cursor.fetchone()
+            return _thread_node(row) if row else None
+    except Exception as e:
+        logger.error(f"Error getting thread node for message {message_id}: {str(e)}", exc_info=True)
+        return None
 
-        # Format date as YYYY-MM-DD
-        date_str = date.strftime('%Y-%m-%d')
+def get_thread_ancestors(message_id: str, max_depth: int = 25) -> List[Dict[str, Any]]:
+    """
+    Walk a message's reply chain upwards.
 
-        # Current timestamp
-        created_at = datetime.now().isoformat()
+    Args:
+        message_id (str): The Discord message ID to start from (not included in the result)
+        max_depth (int): Maximum number of ancestors to return
 
+    Returns:
+        List[Dict[str, Any]]: Stored ancestors, nearest parent first
+    """
+    try:
         with get_connection() as conn:
             cursor = conn.cursor()
-
             cursor.execute(
-                INSERT_CHANNEL_SUMMARY,
-                (
-                    channel_id,
-                    channel_name,
-                    guild_id,
-                    guild_name,
-                    date_str,
-                    summary_text,
-                    message_count,
-                    len(active_users),
-                    active_users_json,
-                    created_at,
-                    metadata_json
+                """
+                WITH RECURSIVE ancestors(id, level) AS (
+                    SELECT parent_id, 1 FROM message_threads WHERE message_id = ?
+                    UNION ALL
+                    SELECT t.parent_id, a.level + 1
+                    FROM message_threads t JOIN ancestors a ON t.message_id = a.id
+                    WHERE a.level < ?
                 )
+                SELECT t.*
+                FROM ancestors a JOIN message_threads t ON t.message_id = a.id
+                ORDER BY a.level
+                """,
+                (message_id, max_depth)
             )
-
-            conn.commit()
-
-        logger.info(f"Stored summary for channel {channel_name} ({channel_id}) for {date_str}")
-        return True
+            return [_thread_node(row) for row in cursor.fetchall()]
     except Exception as e:
-        logger.error(f"Error storing summary for channel {channel_id} on {date.strftime('%Y-%m-%d')}: {str(e)}", exc_info=True)
-        return False
+        logger.error(f"Error getting ancestors for message {message_id}: {str(e)}", exc_info=True)
+        return []
 
-def delete_messages_older_than(cutoff_time: datetime) -> int:
+def get_conversation_tree(message_id: str) -> List[Dict[str, Any]]:
     """
-    Delete messages older than the specified cutoff time.
+    Get every stored message in the conversation a message belongs to.
 
     Args:
-        cutoff_time (datetime): Messages older than this time will be deleted
+        message_id (str): Any message ID in the conversation
 
     Returns:
-        int: The number of messages deleted
+        List[Dict[str, Any]]: Nodes of the conversation ordered by depth then time
     """
     try:
-        cutoff_time_str = cutoff_time.isoformat()
-
         with get_connection() as conn:
             cursor = conn.cursor()
-
-            # First, count how many messages will be deleted
-            cursor.execute(
-                "SELECT COUNT(*) FROM messages WHERE created_at < ?",
-                (cutoff_time_str,)
-            )
-            count = cursor.fetchone()[0]
-
-            # Then delete them
             cursor.execute(
-                "DELETE FROM messages WHERE created_at < ?",
-                (cutoff_time_str,)
+                f"""
+                SELECT {_THREAD_NODE_COLUMNS}
+                FROM message_threads
+                WHERE root_id = COALESCE(
+                    (SELECT root_id FROM message_threads WHERE message_id = ?), ?
+                )
+                ORDER BY depth, created_at_ms
+                """,
+                (message_id, message_id)
             )
-
-            conn.commit()
-
-        logger.info(f"Deleted {count} messages older than {cutoff_time}")
-        return count
+            return [_thread_node(row) for row in cursor.fetchall()]
     except Exception as e:
-        logger.error(f"Error deleting messages older than {cutoff_time}: {str(e)}", exc_info=True)
-        return 0
+        logger.error(f"Error getting conversation tree for message {message_id}: {str(e)}", exc_info=True)
+        return []
 
-def get_active_channels(hours: int = 24) -> List[Dict[str, Any]]:
+def get_reply_fan_in(message_id: str) -> Dict[str, Any]:
     """
-    Get channels with non-bot, non-command activity in the last specified hours.
+    Count the direct replies a message received.
 
     Args:
-        hours (int): Number of hours to look back for activity
+        message_id (str): The Discord message ID
 
     Returns:
-        List[Dict[str, Any]]: A list of active channels with their details
+        Dict[str, Any]: reply_count, unique_repliers and reply_ids (oldest first)
     """
     try:
-        # Calculate the cutoff time
-        cutoff_time = (datetime.now() - timedelta(hours=hours)).isoformat()
-
         with get_connection() as conn:
             cursor = conn.cursor()
-
-            # Query for active channels
             cursor.execute(
                 """
-                SELECT
-                    channel_id,
-                    channel_name,
-                    guild_id,
-                    guild_name,
-                    COUNT(*) as message_count
-                FROM messages
-                WHERE created_at >= ?
-                AND is_bot = 0
-                AND is_command = 0
-                GROUP BY channel_id
-                ORDER BY message_count DESC
+                SELECT message_id, author_id FROM message_threads
+                WHERE parent_id = ?
+                ORDER BY created_at_ms
                 """,
-                (cutoff_time,)
+                (message_id,)
             )
-
-            # Convert rows to dictionaries
-            channels = []
-            for row in cursor.fetchall():
-                channels.append({
-                    'channel_id': row['channel_id'],
-                    'channel_name': row['channel_name'],
-                    'guild_id': row['guild_id'],
-                    'guild_name': row['guild_name'],
-                    'message_count': row['message_count']
-                })
-
-        logger.info(f"Found {len(channels)} active channels in the last {hours} hours")
-        return channels
+            rows = cursor.fetchall()
+            return {
+                'reply_count': len(rows),
+                'unique_repliers': len({row['author_id'] for row in rows}),
+                'reply_ids': [row['message_id'] for row in rows]
+            }
     except Exception as e:
-        logger.error(f"Error getting active channels for the last {hours} hours: {str(e)}", exc_info=True)
-        return []
+        logger.error(f"Error getting reply fan-in for message {message_id}: {str(e)}", exc_info=True)
+        return {'reply_count': 0, 'unique_repliers': 0, 'reply_ids': []}
 
-def get_scraped_content_by_url(url: str) -> Optional[Dict[str, Any]]:
+def get_thread_participants(root_id: str) -> Dict[str, int]:
     """
-    Retrieve scraped content for a specific URL from the database.
+    Get the human participants of a conversation.
 
     Args:
-        url (str): The URL to search for
+        root_id (str): The conversation's root message ID
 
     Returns:
-        Optional[Dict[str, Any]]: Dictionary containing scraped content if found, None otherwise
+        Dict[str, int]: Mapping of author_id to number of messages in the conversation
     """
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-
-            # Query for messages with scraped content for this URL
             cursor.execute(
-                """
-                SELECT
-                    scraped_url,
-                    scraped_content_summary,
-                    scraped_content_key_points,
-                    created_at
-                FROM messages
-                WHERE scraped_url = ? AND scraped_content_summary IS NOT NULL
-                ORDER BY created_at DESC
-                LIMIT 1
-                """,
-                (url,)
+                "SELECT author_id, message_count FROM thread_participants WHERE root_id = ?",
+                (root_id,)
             )
+            return {row['author_id']: row['message_count'] for row in cursor.fetchall()}
+    except Exception as e:
+        logger.error(f"Error getting participants for thread {root_id}: {str(e)}", exc_info=True)
+        return {}
 
-            row = cursor.fetchone()
-            if not row:
-                logger.debug(f"No scraped content found for URL: {url}")
-                return None
-
-            # Parse key points JSON
-            key_points = []
-            if row['scraped_content_key_points']:
-                try:
-                    key_points = json.loads(row['scraped_content_key_points'])
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in scraped_content_key_points for URL {url}")
-
-            result = {
-                'url': row['scraped_url'],
-                'summary': row['scraped_content_summary'],
-                'key_points': key_points,
-                'created_at': row['created_at']
-            }
+def mark_message_has_gif(message_id: str) -> bool:
+    """
+    Flag a stored message as containing a GIF and propagate chain_has_gif to its replies.
 
-            logger.debug(f"Retrieved scraped content for URL: {url}")
-            return result
+    Args:
+        message_id (str): The Discord message ID
 
+    Returns:
+        bool: True if the update succeeded, False otherwise
+    """
+    try:
+        with _writer_connection() as conn:
+            conn.execute("UPDATE messages SET has_gif = 1 WHERE id = ?", (message_id,))
+            conn.execute(
+                """
+                WITH RECURSIVE descendants(id) AS (
+                    SELECT ?
+                    UNION
+                    SELECT t.message_id FROM message_threads t JOIN descendants d ON t.parent_id = d.id
+                )
+                UPDATE message_threads SET chain_has_gif = 1
+                WHERE message_id IN (SELECT id FROM descendants)
+                """,
+                (message_id,)
+            )
+        return True
     except Exception as e:
-        logger.error(f"Error retrieving scraped content for URL {url}: {str(e)}", exc_info=True)
-        return None
+        logger.error(f"Error marking message {message_id} as GIF: {str(e)}", exc_info=True)
+        return False
 
 def award_points_to_user(
     author_id: str,
@@ -1173,6 +3082,12 @@ def get_user_engagement_metrics(
     This helps identify users whose messages sparked discussions, even if they
     didn't post many messages themselves.
 
+    Reads the hourly engagement rollups maintained at ingest time for the whole
+    hours inside the window, so the cost is proportional to the number of hour
+    buckets rather than messages. The partial hours at either end are counted from
+    the messages themselves. The window is half-open ([start_time, end_time)), so
+    back-to-back windows never count a message twice.
+
     Args:
         guild_id (str): The Discord guild ID
         start_time (datetime): Start of the time range
@@ -1190,46 +3105,56 @@ def get_user_engagement_metrics(
             - engagement_score: Calculated engagement score (replies weighted more than messages)
     """
     try:
-        start_time_str = start_time.replace(tzinfo=None).isoformat()
-        end_time_str = end_time.replace(tzinfo=None).isoformat()
+        start_ms = _to_epoch_ms(start_time)
+        end_ms = _to_epoch_ms(end_time)
+
+        # Whole hour buckets in [full_start_ms, full_end_ms) come from the rollups;
+        # the partial hours [start_ms, full_start_ms) and [full_end_ms, end_ms) from messages
+        full_start_ms = -(-start_ms // ENGAGEMENT_BUCKET_MS) * ENGAGEMENT_BUCKET_MS
+        full_end_ms = end_ms // ENGAGEMENT_BUCKET_MS * ENGAGEMENT_BUCKET_MS
+        if full_end_ms < full_start_ms:
+            # The window lies inside a single hour bucket
+            full_start_ms = full_end_ms = end_ms
+        first_bucket = full_start_ms // ENGAGEMENT_BUCKET_MS
+        end_bucket = full_end_ms // ENGAGEMENT_BUCKET_MS  # Exclusive
+        edge_ranges = (start_ms, full_start_ms, full_end_ms, end_ms)
+        has_partial_hours = start_ms < full_start_ms or full_end_ms < end_ms
+        edge_filter = "(({col} >= ? AND {col} < ?) OR ({col} >= ? AND {col} < ?))"
 
         with get_connection() as conn:
             cursor = conn.cursor()
 
-            # Get all messages in the time range for this guild
-            cursor.execute(
-                """
-                SELECT id, author_id, author_name, reply_to_message_id, content
+            # Message counts per author; the bare author_name column comes from the
+            # latest bucket (SQLite's MAX() bare-column rule)
+            counts_sql = """
+                SELECT author_id, author_name, hour_bucket, message_count
+                FROM engagement_rollup
+                WHERE guild_id = ? AND hour_bucket >= ? AND hour_bucket < ?
+            """
+            counts_params = [guild_id, first_bucket, end_bucket]
+            if has_partial_hours:
+                counts_sql += f"""
+                UNION ALL
+                SELECT author_id, author_name, created_at_ms / {ENGAGEMENT_BUCKET_MS}, 1
                 FROM messages
-                WHERE guild_id = ?
-                AND is_bot = 0
-                AND is_command = 0
-                AND (
-                    datetime(created_at) BETWEEN datetime(?) AND datetime(?)
-                    OR datetime(substr(created_at, 1, 19)) BETWEEN datetime(?) AND datetime(?)
-                )
+                WHERE guild_id = ? AND is_bot = 0 AND is_command = 0 AND {edge_filter.format(col='created_at_ms')}
+                """
+                counts_params += [guild_id, *edge_ranges]
+            cursor.execute(
+                f"""
+                SELECT author_id, author_name, MAX(hour_bucket), SUM(message_count) AS message_count
+                FROM ({counts_sql})
+                GROUP BY author_id
                 """,
-                (guild_id, start_time_str, end_time_str, start_time_str, end_time_str)
+                counts_params
             )
 
-            messages = cursor.fetchall()
-
-            # Build a map of message_id -> author_id for messages in this time range
-            # Also build author_id -> author_id map for mention detection
-            message_authors = {}
             user_message_counts = {}
             user_names = {}
-            author_id_set = set()  # All author IDs in this time range
-
-            for row in messages:
-                msg_id = row['id']
-                author_id = row['author_id']
-                author_name = row['author_name']
-
-                message_authors[msg_id] = author_id
-                user_message_counts[author_id] = user_message_counts.get(author_id, 0) + 1
-                user_names[author_id] = author_name
-                author_id_set.add(author_id)
+            for row in cursor.fetchall():
+                user_message_counts[row['author_id']] = row['message_count']
+                user_names[row['author_id']] = row['author_name']
+            author_id_set = set(user_message_counts)  # All author IDs in this time range
 
             # Count replies to each user's messages
             # Also count @mentions as a form of engagement (when someone mentions another user)
@@ -1239,48 +3164,104 @@ def get_user_engagement_metrics(
             user_mentions_received = {} # author_id -> count of @mentions they received
             user_mentions_given = {}    # author_id -> count of @mentions they gave
 
-            # Regex to find Discord user mentions: <@user_id> or <@!user_id>
-            import re
-            mention_pattern = re.compile(r'<@!?(\d+)>')
-
-            for row in messages:
-                reply_to_id = row['reply_to_message_id']
-                replier_id = row['author_id']
-                content = row['content'] or ''
-
-                # Track explicit replies
-                # NOTE: We intentionally only count replies to messages that are also within
-                # the current analysis time window (i.e., reply_to_id exists in message_authors).
-                # This ensures engagement scoring focuses on conversations happening together
-                # within the same period. Replies to very old messages (sent before the window)
-                # don't represent ongoing engagement within the analysis period being scored.
-                if reply_to_id and reply_to_id in message_authors:
-                    original_author_id = message_authors[reply_to_id]
-
-                    # Don't count self-replies
-                    if original_author_id != replier_id:
-                        user_replies_received[original_author_id] = \
-                            user_replies_received.get(original_author_id, 0) + 1
-
-                        if original_author_id not in user_unique_repliers:
-                            user_unique_repliers[original_author_id] = set()
-                        user_unique_repliers[original_author_id].add(replier_id)
-
-                        # Track that this user gave a reply to someone else
-                        user_replies_given[replier_id] = \
-                            user_replies_given.get(replier_id, 0) + 1
-
-                # Track @mentions as an additional engagement signal
-                # This catches responses written without using the reply button
-                mentioned_ids = mention_pattern.findall(content)
-                for mentioned_id in mentioned_ids:
-                    # Only count mentions of users who are active in this time period
-                    # and don't count self-mentions
-                    if mentioned_id in author_id_set and mentioned_id != replier_id:
-                        user_mentions_received[mentioned_id] = \
-                            user_mentions_received.get(mentioned_id, 0) + 1
-                        user_mentions_given[replier_id] = \
-                            user_mentions_given.get(replier_id, 0) + 1
+            # NOTE: We intentionally only count replies to messages that are also within
+            # the current analysis time window.
+            # This ensures engagement scoring focuses on conversations happening together
+            # within the same period. Replies to very old messages (sent before the window)
+            # don't represent ongoing engagement within the analysis period being scored.
+            # Self-replies are never recorded as edges.
+            # Rollup edges cover replies in whole hours to parents in whole hours; replies in
+            # the partial hours, and replies to parents in the leading partial hour, are
+            # read from messages.
+            replies_sql = """
+                SELECT original_author_id, replier_id, reply_count
+                FROM engagement_reply_edges
+                WHERE guild_id = ? AND hour_bucket >= ? AND hour_bucket < ?
+                AND parent_hour_bucket >= ?
+            """
+            replies_params = [guild_id, first_bucket, end_bucket, first_bucket]
+            if has_partial_hours:
+                reply_filter = """
+                    c.guild_id = ? AND c.is_bot = 0 AND c.is_command = 0
+                    AND p.guild_id = c.guild_id AND p.is_bot = 0 AND p.is_command = 0
+                    AND p.author_id != c.author_id
+                """
+                replies_sql += f"""
+                UNION ALL
+                SELECT p.author_id, c.author_id, 1
+                FROM messages c
+                JOIN messages p ON p.id = c.reply_to_message_id
+                WHERE {reply_filter} AND {edge_filter.format(col='c.created_at_ms')}
+                AND p.created_at_ms >= ?
+                UNION ALL
+                SELECT p.author_id, c.author_id, 1
+                FROM messages p
+                JOIN messages c ON c.reply_to_message_id = p.id
+                WHERE {reply_filter}
+                AND p.created_at_ms >= ? AND p.created_at_ms < ?
+                AND c.created_at_ms >= ? AND c.created_at_ms < ?
+                """
+                replies_params += [
+                    guild_id, *edge_ranges, start_ms,
+                    guild_id, start_ms, full_start_ms, full_start_ms, full_end_ms,
+                ]
+            cursor.execute(
+                f"""
+                SELECT original_author_id, replier_id, SUM(reply_count) AS reply_count
+                FROM ({replies_sql})
+                GROUP BY original_author_id, replier_id
+                """,
+                replies_params
+            )
+
+            for row in cursor.fetchall():
+                original_author_id = row['original_author_id']
+                replier_id = row['replier_id']
+                reply_count = row['reply_count']
+
+                user_replies_received[original_author_id] = \
+                    user_replies_received.get(original_author_id, 0) + reply_count
+                user_unique_repliers.setdefault(original_author_id, set()).add(replier_id)
+
+                # Track that this user gave a reply to someone else
+                user_replies_given[replier_id] = \
+                    user_replies_given.get(replier_id, 0) + reply_count
+
+            # Track @mentions as an additional engagement signal
+            # This catches responses written without using the reply button
+            mentions_sql = """
+                SELECT author_id, mentioned_id, mention_count
+                FROM engagement_mention_edges
+                WHERE guild_id = ? AND hour_bucket >= ? AND hour_bucket < ?
+            """
+            mentions_params = [guild_id, first_bucket, end_bucket]
+            if has_partial_hours:
+                mentions_sql += f"""
+                UNION ALL
+                SELECT m.author_id, j.value, 1
+                FROM messages m, json_each(COALESCE(m.mention_ids, '[]')) j
+                WHERE m.guild_id = ? AND m.is_bot = 0 AND m.is_command = 0
+                AND {edge_filter.format(col='m.created_at_ms')}
+                AND j.value != m.author_id
+                """
+                mentions_params += [guild_id, *edge_ranges]
+            cursor.execute(
+                f"""
+                SELECT author_id, mentioned_id, SUM(mention_count) AS mention_count
+                FROM ({mentions_sql})
+                GROUP BY author_id, mentioned_id
+                """,
+                mentions_params
+            )
+
+            for row in cursor.fetchall():
+                mentioned_id = row['mentioned_id']
+                # Only count mentions of users who are active in this time period
+                if mentioned_id in author_id_set:
+                    user_mentions_received[mentioned_id] = \
+                        user_mentions_received.get(mentioned_id, 0) + row['mention_count']
+                    user_mentions_given[row['author_id']] = \
+                        user_mentions_given.get(row['author_id'], 0) + row['mention_count']
 
             # Build the result with engagement scores
             result = {}
@@ -1459,6 +3440,25 @@ def get_daily_point_awards(guild_id: str, date: datetime) -> List[Dict[str, Any]
         return []
 
 
+def _build_fts_query(keywords: List[str]) -> Optional[str]:
+    """
+    Build an FTS5 MATCH expression that ORs prefix matches for each keyword.
+    Keywords are reduced to word tokens and quoted, so user input can't inject FTS syntax.
+
+    Args:
+        keywords: List of keywords to search for
+
+    Returns:
+        Optional[str]: The MATCH expression, or None if no usable tokens remain
+    """
+    terms = []
+    for keyword in keywords:
+        tokens = re.findall(r'\w+', keyword.lower())
+        if tokens:
+            # Multi-token keywords (e.g. "gpt-4") become a phrase with a prefix match on the last token
+            terms.append(f'"{" ".join(tokens)}"*')
+    return " OR ".join(terms) if terms else None
+
 def search_messages_by_keywords(
     keywords: List[str],
     guild_id: Optional[str] = None,
@@ -1467,7 +3467,106 @@ def search_messages_by_keywords(
     limit: int = 50
 ) -> List[Dict[str, Any]]:
     """
-    Search messages by keywords, optionally within a time range.
+    Search messages by keywords using the messages_fts index, ranked by bm25 relevance.
+    Matches message content, scraped link summaries and image descriptions, with prefix
+    matching on each keyword. Falls back to LIKE matching if FTS5 is unavailable.
+
+    Args:
+        keywords: List of keywords to search for (uses OR matching)
+        guild_id: Optional guild ID to filter by
+        channel_id: Optional channel ID to filter by
+        hours: Optional number of hours to look back (if None, no time filter applied)
+        limit: Maximum number of messages to return (default: 50)
+
+    Returns:
+        List of messages matching the search criteria, most relevant first. Each message
+        includes a 'relevance' score (higher is better).
+    """
+    match_query = _build_fts_query(keywords)
+    if not match_query:
+        return []
+
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+
+            weights = ", ".join(str(weight) for weight in FTS_BM25_WEIGHTS)
+            query = f"""
+                SELECT
+                    m.id, m.author_id, m.author_name, m.channel_id, m.channel_name,
+                    m.guild_id, m.guild_name, m.content, m.created_at, m.is_bot, m.is_command,
+                    m.scraped_url, m.scraped_content_summary, m.scraped_content_key_points,
+                    m.image_descriptions,
+                    bm25(messages_fts, {weights}) AS rank
+                FROM messages_fts
+                JOIN messages m ON m.rowid = messages_fts.rowid
+                WHERE messages_fts MATCH ?
+                AND m.is_command = 0
+                AND m.is_bot = 0
+            """
+            params: List[Any] = [match_query]
+
+            if hours is not None:
+                end_time = datetime.now(timezone.utc)
+                start_time = end_time - timedelta(hours=hours)
+                query += " AND m.created_at_ms BETWEEN ? AND ?"
+                params.extend([_to_epoch_ms(start_time), _to_epoch_ms(end_time)])
+
+            if guild_id:
+                query += " AND m.guild_id = ?"
+                params.append(guild_id)
+
+            if channel_id:
+                query += " AND m.channel_id = ?"
+                params.append(channel_id)
+
+            # bm25() is lower for better matches
+            query += " ORDER BY rank LIMIT ?"
+            params.append(limit)
+
+            cursor.execute(query, params)
+
+            messages = []
+            for row in cursor.fetchall():
+                messages.append({
+                    'id': row['id'],
+                    'author_id': row['author_id'],
+                    'author_name': row['author_name'],
+                    'channel_id': row['channel_id'],
+                    'channel_name': row['channel_name'],
+                    'guild_id': row['guild_id'],
+                    'guild_name': row['guild_name'],
+                    'content': row['content'],
+                    'created_at': datetime.fromisoformat(row['created_at']),
+                    'is_bot': bool(row['is_bot']),
+                    'is_command': bool(row['is_command']),
+                    'scraped_url': row['scraped_url'],
+                    'scraped_content_summary': row['scraped_content_summary'],
+                    'scraped_content_key_points': row['scraped_content_key_points'],
+                    'image_descriptions': row['image_descriptions'],
+                    'relevance': -row['rank']
+                })
+
+        logger.info(f"Found {len(messages)} messages matching keywords: {keywords}")
+        return messages
+
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Full-text search failed, falling back to LIKE search: {str(e)}")
+        return _search_messages_by_keywords_like(keywords, guild_id, channel_id, hours, limit)
+    except Exception as e:
+        logger.error(f"Error searching messages by keywords: {str(e)}", exc_info=True)
+        return []
+
+def _search_messages_by_keywords_like(
+    keywords: List[str],
+    guild_id: Optional[str] = None,
+    channel_id: Optional[str] = None,
+    hours: Optional[int] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Search messages with LOWER(content) LIKE matching, newest first.
+    Fallback for SQLite builds without FTS5.
 
     Args:
         keywords: List of keywords to search for (uses OR matching)
@@ -1511,15 +3610,8 @@ def search_messages_by_keywords(
             if hours is not None:
                 end_time = datetime.now(timezone.utc)
                 start_time = end_time - timedelta(hours=hours)
-                start_time_str = start_time.replace(tzinfo=None).isoformat()
-                end_time_str = end_time.replace(tzinfo=None).isoformat()
-                query += """
-                AND (
-                    datetime(created_at) BETWEEN datetime(?) AND datetime(?)
-                    OR datetime(substr(created_at, 1, 19)) BETWEEN datetime(?) AND datetime(?)
-                )
-                """
-                params.extend([start_time_str, end_time_str, start_time_str, end_time_str])
+                query += " AND created_at_ms BETWEEN ? AND ?"
+                params.extend([_to_epoch_ms(start_time), _to_epoch_ms(end_time)])
 
             # Add keyword filter
             query += f" AND ({keyword_clause})"
@@ -1535,7 +3627,7 @@ def search_messages_by_keywords(
                 params.append(channel_id)
 
             # Order by relevance (more recent first) and limit
-            query += " ORDER BY created_at DESC LIMIT ?"
+            query += " ORDER BY created_at_ms DESC LIMIT ?"
             params.append(limit)
 
             cursor.execute(query, params)
@@ -1606,21 +3698,14 @@ def get_recent_messages_for_context(
             if hours is not None:
                 end_time = datetime.now(timezone.utc)
                 start_time = end_time - timedelta(hours=hours)
-                start_time_str = start_time.replace(tzinfo=None).isoformat()
-                end_time_str = end_time.replace(tzinfo=None).isoformat()
-                query += """
-                AND (
-                    datetime(created_at) BETWEEN datetime(?) AND datetime(?)
-                    OR datetime(substr(created_at, 1, 19)) BETWEEN datetime(?) AND datetime(?)
-                )
-                """
-                params.extend([start_time_str, end_time_str, start_time_str, end_time_str])
+                query += " AND created_at_ms BETWEEN ? AND ?"
+                params.extend([_to_epoch_ms(start_time), _to_epoch_ms(end_time)])
 
             if channel_id:
                 query += " AND channel_id = ?"
                 params.append(channel_id)
 
-            query += " ORDER BY created_at DESC LIMIT ?"
+            query += " ORDER BY created_at_ms DESC LIMIT ?"
             params.append(limit)
 
             cursor.execute(query, params)
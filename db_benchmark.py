@@ -0,0 +1,184 @@
+"""
+Benchmark script for the Discord bot database layer.
+
+connections: per-call latency of opening a fresh connection per call (the old
+             get_connection() behaviour) against the pooled get_connection().
+time-range:  the old datetime(created_at) window filter against the indexed
+             created_at_ms range scan used by the time-window queries.
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from tabulate import tabulate
+
+import database
+
+def legacy_connection() -> sqlite3.Connection:
+    """Open a connection the way get_connection() did before pooling."""
+    conn = sqlite3.connect(database.DB_FILE)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout = 5000")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+# Time-window filter used before created_at_ms existed
+LEGACY_CHANNEL_WINDOW_QUERY = """
+SELECT id, author_name, content, created_at
+FROM messages
+WHERE channel_id = ?
+AND (
+    datetime(created_at) BETWEEN datetime(?) AND datetime(?)
+    OR datetime(substr(created_at, 1, 19)) BETWEEN datetime(?) AND datetime(?)
+)
+ORDER BY created_at ASC
+"""
+
+def seed_messages(count: int, channels: int = 5, span_hours: int = 0, batch_size: int = 10000) -> None:
+    """Insert count synthetic messages spread across channels, authors and span_hours of history."""
+    now = datetime.now(timezone.utc)
+    for start in range(0, count, batch_size):
+        messages = [
+            {
+                'message_id': f"bench-{i}",
+                'author_id': str(i % 50),
+                'author_name': f"user{i % 50}",
+                'channel_id': str(i % channels),
+                'channel_name': f"channel{i % channels}",
+                'guild_id': "bench-guild",
+                'guild_name': "Bench Guild",
+                'content': f"benchmark message {i}",
+                'created_at': now - timedelta(seconds=(i * span_hours * 3600 // count) if span_hours else 0),
+            }
+            for i in range(start, min(start + batch_size, count))
+        ]
+        database._write_messages_batch(messages, ignore_duplicates=True)
+
+def time_calls(fn: Callable[[int], None], iterations: int) -> List[float]:
+    """Run fn iterations times and return per-call latencies in microseconds."""
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+def summarize(name: str, samples: List[float]) -> Dict[str, str]:
+    """Summarize latency samples (microseconds) into a results row."""
+    samples = sorted(samples)
+    return {
+        "Workload": name,
+        "Mean (us)": f"{statistics.mean(samples):.1f}",
+        "p50 (us)": f"{samples[len(samples) // 2]:.1f}",
+        "p99 (us)": f"{samples[max(int(len(samples) * 0.99) - 1, 0)]:.1f}",
+    }
+
+def run_connection_benchmark(iterations: int, rows: int) -> List[Dict[str, str]]:
+    """Run read and write workloads with legacy and pooled connections."""
+    seed_messages(rows)
+
+    def read_with(get_conn: Callable[[], sqlite3.Connection]) -> Callable[[int], None]:
+        def _read(i: int) -> None:
+            conn = get_conn()
+            with conn:
+                conn.execute(
+                    "SELECT COUNT(*) FROM messages WHERE author_id = ?", (str(i % 50),)
+                ).fetchone()
+            if get_conn is legacy_connection:
+                conn.close()
+        return _read
+
+    def write_with(get_conn: Callable[[], sqlite3.Connection], prefix: str) -> Callable[[int], None]:
+        def _write(i: int) -> None:
+            conn = get_conn()
+            with conn:
+                conn.execute(
+                    database.INSERT_MESSAGE,
+                    database._message_row({
+                        'message_id': f"{prefix}-{i}",
+                        'author_id': "1",
+                        'author_name': "bench",
+                        'channel_id': "0",
+                        'channel_name': "channel0",
+                        'content': "write benchmark",
+                        'created_at': datetime.now(timezone.utc),
+                    })
+                )
+            if get_conn is legacy_connection:
+                conn.close()
+        return _write
+
+    workloads = [
+        ("read (legacy)", read_with(legacy_connection)),
+        ("read (pooled)", read_with(database.get_connection)),
+        ("write (legacy)", write_with(legacy_connection, "legacy")),
+        ("write (pooled)", write_with(database.get_connection, "pooled")),
+    ]
+
+    return [summarize(name, time_calls(fn, iterations)) for name, fn in workloads]
+
+def run_time_range_benchmark(iterations: int, rows: int) -> List[Dict[str, str]]:
+    """Compare the legacy datetime() window filter with the created_at_ms range scan."""
+    # 20 channels over 30 days of history; each query asks for one channel's last 24 hours
+    seed_messages(rows, channels=20, span_hours=30 * 24)
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(hours=24)
+    start_str = start.replace(tzinfo=None).isoformat()
+    end_str = now.replace(tzinfo=None).isoformat()
+
+    def legacy(i: int) -> None:
+        conn = database.get_connection()
+        conn.execute(
+            LEGACY_CHANNEL_WINDOW_QUERY,
+            (str(i % 20), start_str, end_str, start_str, end_str)
+        ).fetchall()
+
+    def indexed(i: int) -> None:
+        database.get_channel_messages_for_hours(str(i % 20), now, 24)
+
+    return [
+        summarize("channel 24h window (datetime filter)", time_calls(legacy, iterations)),
+        summarize("channel 24h window (created_at_ms)", time_calls(indexed, iterations)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Discord Bot Database Benchmark")
+    subparsers = parser.add_subparsers(dest="command", help="Benchmark to run")
+
+    connections_parser = subparsers.add_parser("connections", help="Pooled vs per-call connections")
+    connections_parser.add_argument("-n", "--iterations", type=int, default=2000, help="Calls per workload")
+    connections_parser.add_argument("-r", "--rows", type=int, default=10000, help="Messages to seed before reading")
+
+    time_range_parser = subparsers.add_parser("time-range", help="datetime() filter vs created_at_ms range scan")
+    time_range_parser.add_argument("-n", "--iterations", type=int, default=20, help="Calls per workload")
+    time_range_parser.add_argument("-r", "--rows", type=int, default=1000000, help="Messages to seed before reading")
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Never benchmark against the live database
+        database.DB_DIRECTORY = tmp_dir
+        database.DB_FILE = os.path.join(tmp_dir, "benchmark.db")
+        database.init_database()
+        try:
+            if args.command == "connections":
+                results = run_connection_benchmark(args.iterations, args.rows)
+            else:
+                results = run_time_range_benchmark(args.iterations, args.rows)
+        finally:
+            database.close_connection_pool()
+
+    print(tabulate(results, headers="keys", tablefmt="grid"))
+
+if __name__ == "__main__":
+    main()
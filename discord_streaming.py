@@ -0,0 +1,194 @@
+"""
+Progressive posting of streamed LLM responses.
+
+Mentions, /ask and /sum-hr used to show a "please wait" message until the whole
+completion had arrived. StreamingMessageWriter posts the first tokens as soon as
+they arrive, then edits the message as more come in (at most every
+STREAM_EDIT_INTERVAL_MS, inside Discord's edit rate limit) and continues in a new
+message once the current one is full. Each message is formatted on its own, so
+headers, bullets and tables render as they did when the response was posted whole.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+import config
+from discord_formatter import DiscordFormatter
+from message_utils import split_long_message
+
+# Set up logging
+logger = logging.getLogger('discord_bot.discord_streaming')
+
+# Leaves headroom under Discord's 2000-character limit, as split_long_message does
+STREAM_MESSAGE_MAX_LENGTH = 1900
+
+_stream_stats: Dict[str, int] = {
+    'responses': 0,
+    'messages': 0,
+    'edits': 0,
+    'failed_edits': 0,
+    'first_message_ms_total': 0,
+}
+
+
+class StreamingMessageWriter:
+    """
+    Posts a response to Discord while it is being generated.
+
+    Pass `feed` as the `on_delta` callback of the llm_handler functions, then call
+    `finish` with their return value once they are done.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[Optional[discord.Message]]],
+        formatter: Callable[[str], str] = DiscordFormatter.format_llm_response,
+        placeholder: Optional[discord.Message] = None,
+        max_length: int = STREAM_MESSAGE_MAX_LENGTH,
+        edit_interval_ms: Optional[int] = None
+    ):
+        """
+        Args:
+            send: Posts a new message with the given content (e.g. thread.send)
+            formatter: Turns the raw text of one message into what is posted
+            placeholder: A "please wait" message to replace with the first text instead of posting a new one
+            max_length: Longest message posted; longer responses continue in a new message
+            edit_interval_ms: Least time between edits (default: config.STREAM_EDIT_INTERVAL_MS)
+        """
+        self._send = send
+        self.formatter = formatter
+        self.max_length = max_length
+        interval_ms = config.STREAM_EDIT_INTERVAL_MS if edit_interval_ms is None else edit_interval_ms
+        self.edit_interval = interval_ms / 1000
+        self.messages: List[discord.Message] = []
+        self.contents: List[str] = []
+        self._placeholder = placeholder
+        # The message being written, and the raw text it should show
+        self._current: Optional[discord.Message] = None
+        self._raw = ""
+        self._started = time.monotonic()
+        self._last_flush = 0.0
+        self._flushing: Optional[asyncio.Task] = None
+
+    async def feed(self, delta: str) -> None:
+        """
+        Add generated text, posting or editing when the edit interval allows.
+
+        The Discord requests run in the background so the stream keeps being read
+        while they are in flight.
+
+        Args:
+            delta: The next piece of the response
+        """
+        if not delta:
+            return
+        self._raw += delta
+        if self._flushing is not None:
+            if not self._flushing.done():
+                return
+            # Surfaces a failure to post, which ends the stream
+            self._flushing.result()
+            self._flushing = None
+        if self.messages and time.monotonic() - self._last_flush < self.edit_interval:
+            return
+        if self._raw.strip():
+            self._flushing = asyncio.create_task(self._flush())
+
+    async def finish(self, fallback: Optional[str] = None) -> List[discord.Message]:
+        """
+        Post the rest of the response.
+
+        Args:
+            fallback: Posted as is (split if long) when nothing was streamed,
+                e.g. the error message or early answer an llm_handler function returned
+
+        Returns:
+            List[discord.Message]: The messages the response was posted in; `contents` holds their text
+        """
+        if self._flushing is not None:
+            await self._flushing
+            self._flushing = None
+        if self._raw.strip():
+            await self._flush()
+        elif not self.messages and fallback:
+            for part in await split_long_message(fallback, max_length=self.max_length):
+                await self._show(part)
+                self._current = None
+        return self.messages
+
+    async def _flush(self) -> None:
+        """Show the text received so far, starting new messages for whatever doesn't fit."""
+        self._last_flush = time.monotonic()
+        while len(self.formatter(self._raw)) > self.max_length:
+            cut = self._split_point(self._raw)
+            # Taken before awaiting so text fed meanwhile stays with the remainder
+            head, self._raw = self._raw[:cut].rstrip(), self._raw[cut:].lstrip()
+            if head:
+                await self._show(self.formatter(head))
+            self._current = None
+        if self._raw.strip():
+            await self._show(self.formatter(self._raw))
+
+    def _split_point(self, raw: str) -> int:
+        """Find where to end the current message: the last paragraph, line or word break that fits."""
+        cut = min(len(raw), self.max_length)
+        while cut > 1:
+            excess = len(self.formatter(raw[:cut])) - self.max_length
+            if excess <= 0:
+                break
+            cut -= excess
+        cut = max(cut, 1)
+        for separator in ('\n\n', '\n', ' '):
+            boundary = raw.rfind(separator, 0, cut)
+            if boundary > cut // 2:
+                return boundary
+        return cut
+
+    async def _show(self, content: str) -> None:
+        """Edit the current message to `content`, posting a new message if there is none."""
+        if self._current is None:
+            if self._placeholder is not None:
+                message, self._placeholder = self._placeholder, None
+                await message.edit(content=content)
+            else:
+                message = await self._send(content)
+            self._current = message
+            self.messages.append(message)
+            self.contents.append(content)
+            _stream_stats['messages'] += 1
+            if len(self.messages) == 1:
+                _stream_stats['responses'] += 1
+                elapsed_ms = int((time.monotonic() - self._started) * 1000)
+                _stream_stats['first_message_ms_total'] += elapsed_ms
+                logger.debug(f"First response text posted after {elapsed_ms}ms")
+            return
+
+        if content == self.contents[-1]:
+            return
+        try:
+            await self._current.edit(content=content)
+        except discord.HTTPException as e:
+            # The next flush shows the text again
+            _stream_stats['failed_edits'] += 1
+            logger.warning(f"Failed to edit streamed message: {e}")
+            return
+        _stream_stats['edits'] += 1
+        self.contents[-1] = content
+
+
+def get_streaming_stats() -> Dict[str, Any]:
+    """
+    Get counters for streamed responses.
+
+    Returns:
+        Dict[str, Any]: Responses, messages posted, edits (and failed edits), and the
+        average time from the request to the first posted text
+    """
+    stats: Dict[str, Any] = dict(_stream_stats)
+    first_message_ms_total = stats.pop('first_message_ms_total')
+    stats['avg_first_message_ms'] = round(first_message_ms_total / stats['responses']) if stats['responses'] else 0
+    return stats
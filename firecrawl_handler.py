@@ -1,11 +1,20 @@
 """
 Firecrawl handler module for the Discord bot.
 Handles scraping URL content using the Firecrawl API.
+
+Scrapes call the REST API directly over the shared async HTTP client, so they can
+be cancelled and never tie up a thread. The blocking SDK is only a fallback when
+the REST endpoint can't be reached, and runs on its own small thread pool rather
+than the default executor used by database calls.
 """
 
 import asyncio
+import json
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import httpx
 
 try:
     from firecrawl import Firecrawl  # type: ignore
@@ -19,10 +28,180 @@ except Exception:
 
 # Import config for API key
 import config
+from http_clients import get_httpx_client, get_sdk_client
 
 # Set up logging
 logger = logging.getLogger('discord_bot.firecrawl_handler')
 
+# Extra seconds allowed on top of Firecrawl's own scrape timeout for the HTTP round trip
+REQUEST_TIMEOUT_SLACK_SECONDS = 15
+
+# REST status codes that suggest the API version isn't available (e.g. an older self-hosted
+# instance), in which case the SDK is tried instead
+SDK_FALLBACK_STATUS_CODES = {404, 405}
+
+_sdk_executor: Optional[ThreadPoolExecutor] = None
+
+
+class FirecrawlResponseTooLarge(Exception):
+    """Raised when a scrape response exceeds FIRECRAWL_MAX_RESPONSE_BYTES."""
+
+
+def _get_sdk_executor() -> ThreadPoolExecutor:
+    global _sdk_executor
+    if _sdk_executor is None:
+        _sdk_executor = ThreadPoolExecutor(max_workers=config.FIRECRAWL_SDK_WORKERS, thread_name_prefix='firecrawl')
+    return _sdk_executor
+
+
+def shutdown_sdk_executor() -> None:
+    """Stop the SDK fallback threads without waiting for running scrapes."""
+    global _sdk_executor
+    if _sdk_executor is not None:
+        _sdk_executor.shutdown(wait=False, cancel_futures=True)
+        _sdk_executor = None
+
+
+async def _read_capped(response: httpx.Response, max_bytes: int) -> bytes:
+    """Read a streamed response body, giving up as soon as it exceeds max_bytes."""
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise FirecrawlResponseTooLarge(f"response of {content_length} bytes exceeds {max_bytes}")
+
+    chunks = []
+    size = 0
+    async for chunk in response.aiter_bytes():
+        size += len(chunk)
+        if size > max_bytes:
+            raise FirecrawlResponseTooLarge(f"response exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _scrape_via_rest(url: str) -> Any:
+    """
+    Scrape a URL with the Firecrawl v2 REST API.
+
+    Args:
+        url (str): The URL to scrape
+
+    Returns:
+        Any: The decoded JSON response
+
+    Raises:
+        httpx.HTTPStatusError: If Firecrawl returned an error status
+        FirecrawlResponseTooLarge: If the response exceeded the size cap
+    """
+    client = get_httpx_client('firecrawl')
+    timeout_seconds = config.firecrawl_timeout_ms / 1000 + REQUEST_TIMEOUT_SLACK_SECONDS
+    async with client.stream(
+        'POST',
+        f"{config.firecrawl_base_url.rstrip('/')}/v2/scrape",
+        headers={
+            "Authorization": f"Bearer {config.firecrawl_api_key}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "url": url,
+            "formats": ["markdown"],
+            "timeout": config.firecrawl_timeout_ms
+        },
+        timeout=httpx.Timeout(timeout_seconds, connect=10.0)
+    ) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            response.raise_for_status()
+        body = await _read_capped(response, config.FIRECRAWL_MAX_RESPONSE_BYTES)
+    return json.loads(body)
+
+
+async def _scrape_via_sdk(url: str) -> Any:
+    """
+    Scrape a URL with the blocking Firecrawl SDK on the dedicated executor.
+
+    Args:
+        url (str): The URL to scrape
+
+    Returns:
+        Any: The SDK's response, or None if no SDK is installed
+    """
+    # The client is shared so its connection pool is reused across scrapes
+    client = None
+    if 'Firecrawl' in globals() and Firecrawl is not None:  # type: ignore[name-defined]
+        client = get_sdk_client('firecrawl_sdk', (Firecrawl, config.firecrawl_api_key), lambda: Firecrawl(api_key=config.firecrawl_api_key))  # type: ignore[call-arg]
+    elif 'FirecrawlApp' in globals() and FirecrawlApp is not None:  # type: ignore[name-defined]
+        client = get_sdk_client('firecrawl_sdk', (FirecrawlApp, config.firecrawl_api_key), lambda: FirecrawlApp(api_key=config.firecrawl_api_key))  # type: ignore[call-arg]
+    else:
+        logger.error("Firecrawl SDK is not installed or incompatible")
+        return None
+
+    def _do_scrape():
+        # Preferred: new Firecrawl client with .scrape (v2)
+        if hasattr(client, "scrape"):
+            return client.scrape(url, formats=["markdown"], timeout=config.firecrawl_timeout_ms)  # type: ignore[call-arg]
+        # Legacy clients: use .scrape_url (v1)
+        if hasattr(client, "scrape_url"):
+            return client.scrape_url(url, formats=["markdown"], timeout=config.firecrawl_timeout_ms)  # type: ignore[call-arg]
+        # v1 compatibility shim on newer client
+        v1_client = getattr(client, "v1", None)
+        if v1_client is not None and hasattr(v1_client, "scrape_url"):
+            return v1_client.scrape_url(url, formats=["markdown"], timeout=config.firecrawl_timeout_ms)  # type: ignore[call-arg]
+        raise RuntimeError("Firecrawl client does not support scrape APIs")
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_sdk_executor(), _do_scrape)
+
+
+def extract_markdown(scrape_result: Any) -> Optional[str]:
+    """
+    Extract markdown-like content from a Firecrawl response (REST or SDK, any version).
+
+    Args:
+        scrape_result (Any): The response
+
+    Returns:
+        Optional[str]: The markdown, or None if the response has none
+    """
+    markdown_content: Optional[str] = None
+
+    # Case 1: dict responses (REST API, older SDKs)
+    if isinstance(scrape_result, dict):
+        # Newer SDKs: markdown at the top level
+        if isinstance(scrape_result.get("markdown"), str):
+            markdown_content = scrape_result["markdown"]
+        # The REST API and some SDK versions nest content under 'data'
+        elif isinstance(scrape_result.get("data"), dict):
+            data = scrape_result["data"]
+            if isinstance(data.get("markdown"), str):
+                markdown_content = data["markdown"]
+            elif isinstance(data.get("content"), str):
+                markdown_content = data["content"]
+        # Older responses may use 'content' at the top level
+        elif isinstance(scrape_result.get("content"), str):
+            markdown_content = scrape_result["content"]
+
+    # Case 2: object-style responses (e.g. Pydantic models from Firecrawl SDK)
+    if markdown_content is None and hasattr(scrape_result, "markdown"):
+        attr_markdown = getattr(scrape_result, "markdown", None)
+        if isinstance(attr_markdown, str):
+            markdown_content = attr_markdown
+
+    # Case 3: list/sequence responses – use the first element if present
+    if markdown_content is None and isinstance(scrape_result, (list, tuple)) and scrape_result:
+        first = scrape_result[0]
+        if isinstance(first, dict):
+            if isinstance(first.get("markdown"), str):
+                markdown_content = first["markdown"]
+            elif isinstance(first.get("content"), str):
+                markdown_content = first["content"]
+        elif hasattr(first, "markdown"):
+            first_markdown = getattr(first, "markdown", None)
+            if isinstance(first_markdown, str):
+                markdown_content = first_markdown
+
+    return markdown_content
+
+
 async def scrape_url_content(url: str) -> Optional[str]:
     """
     Scrape content from a URL using Firecrawl API.
@@ -41,33 +220,16 @@ async def scrape_url_content(url: str) -> Optional[str]:
             logger.error("Firecrawl API key not found in config.py or is empty")
             return None
 
-        # Initialize the Firecrawl client (supporting both new and legacy SDKs)
-        client = None
-        if 'Firecrawl' in globals() and Firecrawl is not None:  # type: ignore[name-defined]
-            client = Firecrawl(api_key=config.firecrawl_api_key)  # type: ignore[call-arg]
-        elif 'FirecrawlApp' in globals() and FirecrawlApp is not None:  # type: ignore[name-defined]
-            client = FirecrawlApp(api_key=config.firecrawl_api_key)  # type: ignore[call-arg]
-        else:
-            logger.error("Firecrawl SDK is not installed or incompatible")
-            return None
-
-        # Use a separate thread for the blocking API call
-        loop = asyncio.get_event_loop()
-
-        def _do_scrape():
-            # Preferred: new Firecrawl client with .scrape (v2)
-            if hasattr(client, "scrape"):
-                return client.scrape(url, formats=["markdown"], timeout=config.firecrawl_timeout_ms)  # type: ignore[call-arg]
-            # Legacy clients: use .scrape_url (v1)
-            if hasattr(client, "scrape_url"):
-                return client.scrape_url(url, formats=["markdown"], timeout=config.firecrawl_timeout_ms)  # type: ignore[call-arg]
-            # v1 compatibility shim on newer client
-            v1_client = getattr(client, "v1", None)
-            if v1_client is not None and hasattr(v1_client, "scrape_url"):
-                return v1_client.scrape_url(url, formats=["markdown"], timeout=config.firecrawl_timeout_ms)  # type: ignore[call-arg]
-            raise RuntimeError("Firecrawl client does not support scrape APIs")
-
-        scrape_result = await loop.run_in_executor(None, _do_scrape)
+        try:
+            scrape_result = await _scrape_via_rest(url)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in SDK_FALLBACK_STATUS_CODES:
+                raise
+            logger.warning(f"Firecrawl REST endpoint returned {e.response.status_code}; falling back to the SDK for {url}")
+            scrape_result = await _scrape_via_sdk(url)
+        except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+            logger.warning(f"Firecrawl REST endpoint unreachable ({str(e)}); falling back to the SDK for {url}")
+            scrape_result = await _scrape_via_sdk(url)
 
         # Extract markdown-like content from the response
         if not scrape_result:
@@ -75,42 +237,8 @@ async def scrape_url_content(url: str) -> Optional[str]:
             return None
 
         markdown_content: Optional[str] = None
-
         try:
-            # Case 1: dict responses (common for older SDKs and some HTTP clients)
-            if isinstance(scrape_result, dict):
-                # Newer SDKs: markdown at the top level
-                if isinstance(scrape_result.get("markdown"), str):
-                    markdown_content = scrape_result["markdown"]
-                # Some versions nest content under 'data'
-                elif isinstance(scrape_result.get("data"), dict):
-                    data = scrape_result["data"]
-                    if isinstance(data.get("markdown"), str):
-                        markdown_content = data["markdown"]
-                    elif isinstance(data.get("content"), str):
-                        markdown_content = data["content"]
-                # Older responses may use 'content' at the top level
-                elif isinstance(scrape_result.get("content"), str):
-                    markdown_content = scrape_result["content"]
-
-            # Case 2: object-style responses (e.g. Pydantic models from Firecrawl SDK)
-            if markdown_content is None and hasattr(scrape_result, "markdown"):
-                attr_markdown = getattr(scrape_result, "markdown", None)
-                if isinstance(attr_markdown, str):
-                    markdown_content = attr_markdown
-
-            # Case 3: list/sequence responses – use the first element if present
-            if markdown_content is None and isinstance(scrape_result, (list, tuple)) and scrape_result:
-                first = scrape_result[0]
-                if isinstance(first, dict):
-                    if isinstance(first.get("markdown"), str):
-                        markdown_content = first["markdown"]
-                    elif isinstance(first.get("content"), str):
-                        markdown_content = first["content"]
-                elif hasattr(first, "markdown"):
-                    first_markdown = getattr(first, "markdown", None)
-                    if isinstance(first_markdown, str):
-                        markdown_content = first_markdown
+            markdown_content = extract_markdown(scrape_result)
         except Exception as parse_error:
             logger.warning(f"Error parsing Firecrawl response for URL {url}: {parse_error}")
 
@@ -130,6 +258,12 @@ async def scrape_url_content(url: str) -> Optional[str]:
 
         return markdown_content
 
+    except httpx.TimeoutException:
+        logger.error(f"Firecrawl scrape timed out for URL {url}")
+        return None
+    except FirecrawlResponseTooLarge as e:
+        logger.warning(f"Abandoned Firecrawl scrape of {url}: {str(e)}")
+        return None
     except Exception as e:
         # Provide more detailed error information
         error_message = str(e)
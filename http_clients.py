@@ -0,0 +1,202 @@
+"""
+Process-wide HTTP clients for the Discord bot.
+
+Exa calls used to open a new httpx.AsyncClient per request, image downloads a new
+aiohttp.ClientSession per image, and Firecrawl/Apify a new SDK client per URL, so
+every call paid for DNS, TCP and TLS again. This module keeps one pooled,
+keep-alive client per upstream (HTTP/2 where the h2 package is installed), counts
+how many requests reused a pooled connection, and closes everything on shutdown.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+import aiohttp
+import httpx
+
+import config
+
+try:
+    import h2  # type: ignore  # noqa: F401
+    HTTP2_AVAILABLE = True
+except Exception:
+    HTTP2_AVAILABLE = False
+
+# Set up logging
+logger = logging.getLogger('discord_bot.http_clients')
+
+T = TypeVar('T')
+
+# upstream name -> (client, event loop it was created on)
+_httpx_clients: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+_aiohttp_sessions: Dict[str, Tuple[aiohttp.ClientSession, asyncio.AbstractEventLoop]] = {}
+# (upstream name, key) -> SDK client
+_sdk_clients: Dict[Tuple[str, Hashable], Any] = {}
+
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _record(upstream: str, counter: str) -> None:
+    counters = _stats.setdefault(upstream, {'requests': 0, 'new_connections': 0})
+    counters[counter] = counters.get(counter, 0) + 1
+
+
+def _httpx_event_hooks(upstream: str) -> Dict[str, Any]:
+    async def on_trace(event_name: str, info: Dict[str, Any]) -> None:
+        if event_name in ('connection.connect_tcp.complete', 'connection.connect_unix_socket.complete'):
+            _record(upstream, 'new_connections')
+
+    async def on_request(request: httpx.Request) -> None:
+        _record(upstream, 'requests')
+        request.extensions['trace'] = on_trace
+
+    return {'request': [on_request]}
+
+
+def get_httpx_client(upstream: str) -> httpx.AsyncClient:
+    """
+    Get the shared httpx client for an upstream API, creating it on first use.
+
+    Args:
+        upstream (str): Name of the upstream (e.g. 'exa'); each gets its own connection pool
+
+    Returns:
+        httpx.AsyncClient: A pooled client; callers must not close it
+    """
+    loop = asyncio.get_running_loop()
+    entry = _httpx_clients.get(upstream)
+    if entry and entry[1] is loop and not entry[0].is_closed:
+        return entry[0]
+
+    client = httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(config.HTTP_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        event_hooks=_httpx_event_hooks(upstream),
+    )
+    _httpx_clients[upstream] = (client, loop)
+    logger.info(f"Created shared HTTP client for {upstream} (HTTP/2: {HTTP2_AVAILABLE})")
+    return client
+
+
+def _aiohttp_trace_config(upstream: str) -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params) -> None:
+        _record(upstream, 'requests')
+
+    async def on_connection_create_end(session, context, params) -> None:
+        _record(upstream, 'new_connections')
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
+
+
+def get_aiohttp_session(upstream: str) -> aiohttp.ClientSession:
+    """
+    Get the shared aiohttp session for an upstream, creating it on first use.
+
+    Args:
+        upstream (str): Name of the upstream (e.g. 'images')
+
+    Returns:
+        aiohttp.ClientSession: A pooled session; callers must not close it
+    """
+    loop = asyncio.get_running_loop()
+    entry = _aiohttp_sessions.get(upstream)
+    if entry and entry[1] is loop and not entry[0].closed:
+        return entry[0]
+
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=config.HTTP_MAX_CONNECTIONS,
+            keepalive_timeout=config.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT_SECONDS),
+        trace_configs=[_aiohttp_trace_config(upstream)],
+    )
+    _aiohttp_sessions[upstream] = (session, loop)
+    logger.info(f"Created shared HTTP session for {upstream}")
+    return session
+
+
+def get_sdk_client(upstream: str, key: Hashable, factory: Callable[[], T]) -> T:
+    """
+    Get a shared instance of a (synchronous) SDK client, such as Firecrawl or Apify.
+
+    The SDKs pool connections inside the client, so reusing one instance per API key
+    keeps those connections alive between calls.
+
+    Args:
+        upstream (str): Name of the upstream (e.g. 'firecrawl')
+        key (Hashable): What distinguishes instances, usually the client class and API key
+        factory (Callable[[], T]): Creates the client on first use
+
+    Returns:
+        T: The shared client
+    """
+    _record(upstream, 'requests')
+    client = _sdk_clients.get((upstream, key))
+    if client is None:
+        client = factory()
+        _sdk_clients[(upstream, key)] = client
+        _record(upstream, 'new_connections')
+    return client
+
+
+def get_http_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get per-upstream connection reuse statistics.
+
+    For SDK clients, 'new_connections' counts client instances created.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: upstream -> requests, new_connections, reused and reuse_rate
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    for upstream, counters in _stats.items():
+        requests = counters.get('requests', 0)
+        reused = max(0, requests - counters.get('new_connections', 0))
+        stats[upstream] = {
+            **counters,
+            'reused': reused,
+            'reuse_rate': round(reused / requests, 3) if requests else 0.0,
+        }
+    return stats
+
+
+async def close_http_clients() -> None:
+    """Close every shared client. Clients are recreated on demand if used afterwards."""
+    loop = asyncio.get_running_loop()
+    for upstream, (client, client_loop) in list(_httpx_clients.items()):
+        try:
+            if client_loop is loop:
+                await client.aclose()
+        except Exception as e:
+            logger.error(f"Error closing HTTP client for {upstream}: {str(e)}", exc_info=True)
+    _httpx_clients.clear()
+
+    for upstream, (session, session_loop) in list(_aiohttp_sessions.items()):
+        try:
+            if session_loop is loop:
+                await session.close()
+        except Exception as e:
+            logger.error(f"Error closing HTTP session for {upstream}: {str(e)}", exc_info=True)
+    _aiohttp_sessions.clear()
+
+    for (upstream, _), client in list(_sdk_clients.items()):
+        close = getattr(client, 'close', None)
+        if callable(close):
+            try:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error closing {upstream} client: {str(e)}", exc_info=True)
+    _sdk_clients.clear()
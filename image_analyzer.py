@@ -5,13 +5,25 @@ This module analyzes images from Discord attachments using a vision-capable
 model to generate descriptive text that can be included in message summaries.
 """
 
+import asyncio
 import base64
+import io
+import json
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import urlencode
 
 import aiohttp
 from openai import AsyncOpenAI
 import config
+from http_clients import get_aiohttp_session
+from image_cache import ImageFingerprint, fingerprint_image, image_description_cache
+from single_flight import SingleFlight
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:
+    Image = None
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -40,6 +52,32 @@ SUPPORTED_IMAGE_TYPES = {
 # Maximum image size (bytes) to control cost and latency for image analysis
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
 
+# Downloads are read in chunks of this size so oversized images can be abandoned early
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Images within IMAGE_MAX_EDGE_PX are only recompressed if they are larger than this
+RECOMPRESS_MIN_BYTES = 512 * 1024
+
+# Bytes moved per image, to show what streaming and downscaling save
+_transfer_stats: Dict[str, int] = {
+    'downloads': 0,
+    'downloads_aborted': 0,
+    'bytes_downloaded': 0,
+    'images_downscaled': 0,
+    'bytes_uploaded': 0,
+}
+
+# Multi-image requests made by analyze_images
+_batch_stats: Dict[str, int] = {
+    'batched_requests': 0,
+    'batched_images': 0,
+    'batch_failures': 0,
+    'fallback_images': 0,
+}
+
+# The same image posted in several places at once is described once
+image_description_flight = SingleFlight('image_description')
+
 
 async def download_image(url: str) -> Optional[bytes]:
     """
@@ -52,32 +90,117 @@ async def download_image(url: str) -> Optional[bytes]:
         Image bytes if successful, None if failed
     """
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                if response.status != 200:
-                    logger.error(f"Failed to download image from {url}: HTTP {response.status}")
-                    return None
-
-                # Check content length
-                content_length = response.headers.get('Content-Length')
-                if content_length and int(content_length) > MAX_IMAGE_SIZE:
-                    logger.warning(f"Image too large: {content_length} bytes (max {MAX_IMAGE_SIZE})")
-                    return None
-
-                image_bytes = await response.read()
-
-                # Double-check actual size
+        session = get_aiohttp_session('images')
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status != 200:
+                logger.error(f"Failed to download image from {url}: HTTP {response.status}")
+                return None
+
+            # Check content length
+            content_length = response.headers.get('Content-Length')
+            if content_length and int(content_length) > MAX_IMAGE_SIZE:
+                logger.warning(f"Image too large: {content_length} bytes (max {MAX_IMAGE_SIZE})")
+                return None
+
+            # Stream the body, giving up as soon as it crosses the cap (Content-Length may be missing)
+            image_bytes = bytearray()
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                image_bytes.extend(chunk)
                 if len(image_bytes) > MAX_IMAGE_SIZE:
-                    logger.warning(f"Image too large: {len(image_bytes)} bytes (max {MAX_IMAGE_SIZE})")
+                    _transfer_stats['downloads_aborted'] += 1
+                    logger.warning(f"Image too large: over {MAX_IMAGE_SIZE} bytes, download aborted")
                     return None
 
-                return image_bytes
+            _transfer_stats['downloads'] += 1
+            _transfer_stats['bytes_downloaded'] += len(image_bytes)
+            return bytes(image_bytes)
 
     except Exception as e:
         logger.exception(f"Error downloading image from {url}: {e}")
         return None
 
 
+def get_download_url(url: str, proxy_url: Optional[str], width: Optional[int], height: Optional[int]) -> str:
+    """
+    Pick the URL to download an attachment from.
+
+    Discord's media proxy resizes images on request, so images larger than
+    IMAGE_MAX_EDGE_PX are fetched from proxy_url with width/height parameters.
+
+    Args:
+        url: The attachment's CDN URL
+        proxy_url: The attachment's media proxy URL, if any
+        width: The image width in pixels, if known
+        height: The image height in pixels, if known
+
+    Returns:
+        The proxy URL with a bounded size, or the original URL
+    """
+    max_edge = config.IMAGE_MAX_EDGE_PX
+    if not max_edge or not proxy_url or not width or not height or max(width, height) <= max_edge:
+        return url
+    scale = max_edge / max(width, height)
+    params = urlencode({'width': max(1, round(width * scale)), 'height': max(1, round(height * scale))})
+    return f"{proxy_url}{'&' if '?' in proxy_url else '?'}{params}"
+
+
+def prepare_image_for_upload(image_bytes: bytes, content_type: str) -> Tuple[bytes, str]:
+    """
+    Downscale and recompress an image before it is sent to the vision model.
+
+    Images whose longest edge exceeds IMAGE_MAX_EDGE_PX are resized to fit it and, like
+    other images over RECOMPRESS_MIN_BYTES, re-encoded as JPEG (or WebP when they have
+    transparency) at IMAGE_UPLOAD_QUALITY. The re-encoded image is only used if it is
+    smaller. Without Pillow, or for animated images, the bytes are returned unchanged.
+
+    Args:
+        image_bytes: The downloaded image
+        content_type: The MIME type of the image
+
+    Returns:
+        (bytes, content type) to upload
+    """
+    max_edge = config.IMAGE_MAX_EDGE_PX
+    if Image is None or not max_edge:
+        return image_bytes, content_type
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            if getattr(image, 'is_animated', False):
+                return image_bytes, content_type
+            if max(image.size) <= max_edge and len(image_bytes) <= RECOMPRESS_MIN_BYTES:
+                return image_bytes, content_type
+            image.draft('RGB', (max_edge, max_edge))  # Let JPEG decode straight to a smaller size
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            converted = image.convert('RGBA' if has_alpha else 'RGB')
+            converted.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            output = io.BytesIO()
+            if has_alpha:
+                converted.save(output, 'WEBP', quality=config.IMAGE_UPLOAD_QUALITY)
+                new_type = 'image/webp'
+            else:
+                converted.save(output, 'JPEG', quality=config.IMAGE_UPLOAD_QUALITY, optimize=True)
+                new_type = 'image/jpeg'
+    except Exception as e:
+        logger.debug(f"Could not downscale image, uploading it as is: {str(e)}")
+        return image_bytes, content_type
+
+    recompressed = output.getvalue()
+    if len(recompressed) >= len(image_bytes):
+        return image_bytes, content_type
+    _transfer_stats['images_downscaled'] += 1
+    return recompressed, new_type
+
+
+def get_image_transfer_stats() -> Dict[str, int]:
+    """
+    Get counters for image downloads and vision uploads.
+
+    Returns:
+        Dict[str, int]: Downloads, aborted downloads, images downscaled, and bytes downloaded and uploaded
+    """
+    return dict(_transfer_stats)
+
+
 def is_supported_image(content_type: str) -> bool:
     """
     Check if the content type is a supported image format.
@@ -103,21 +226,24 @@ async def analyze_image(image_bytes: bytes, content_type: str, filename: str = "
     Returns:
         Descriptive text about the image, or None if analysis failed
     """
+    description, _ = await _describe_image(image_bytes, content_type, filename)
+    return description
+
+
+async def _describe_image(image_bytes: bytes, content_type: str, filename: str) -> Tuple[Optional[str], int]:
+    """Run the vision call for analyze_image, also returning the tokens it used."""
     if not xai_client:
         logger.warning("Cannot analyze image: xAI API client not initialized")
-        return None
+        return None, 0
 
     if not is_supported_image(content_type):
         logger.warning(f"Unsupported image type: {content_type}")
-        return None
+        return None, 0
 
     try:
-        # Convert to base64 and build a data URI for the xAI API
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        mime_type = content_type.lower()
-        if mime_type == "image/jpg":
-            mime_type = "image/jpeg"
-        data_uri = f"data:{mime_type};base64,{image_base64}"
+        # Shrink large images first: fewer bytes to encode and upload, and fewer image tokens
+        image_bytes, content_type = await asyncio.to_thread(prepare_image_for_upload, image_bytes, content_type)
+        _transfer_stats['bytes_uploaded'] += len(image_bytes)
 
         prompt = (
             "Please provide a clear, concise description of this image. "
@@ -125,11 +251,8 @@ async def analyze_image(image_bytes: bytes, content_type: str, filename: str = "
             "Keep it informative but brief (2-3 sentences)."
         )
 
-        # Use the configured xAI vision model for image analysis (supports vision/multimodal)
-        model = getattr(config, "grok_model", "grok-4-1-fast-non-reasoning")
-
         completion = await xai_client.chat.completions.create(
-            model=model,
+            model=_vision_model(),
             messages=[
                 {
                     "role": "user",
@@ -137,7 +260,7 @@ async def analyze_image(image_bytes: bytes, content_type: str, filename: str = "
                         {"type": "text", "text": prompt},
                         {
                             "type": "image_url",
-                            "image_url": {"url": data_uri},
+                            "image_url": {"url": _data_uri(image_bytes, content_type)},
                         },
                     ],
                 }
@@ -146,29 +269,134 @@ async def analyze_image(image_bytes: bytes, content_type: str, filename: str = "
             temperature=0.2,
         )
 
-        description = completion.choices[0].message.content
-
-        # xAI responses are typically plain text, but handle list-of-parts just in case
-        if isinstance(description, list):
-            parts = []
-            for part in description:
-                part_type = getattr(part, "type", None) if not isinstance(part, dict) else part.get("type")
-                if part_type == "text":
-                    text_val = part.get("text") if isinstance(part, dict) else getattr(part, "text", "")
-                    if text_val:
-                        parts.append(text_val)
-            description = " ".join(parts)
-
+        description = _completion_text(completion)
         if not description:
             logger.warning(f"No content in xAI response for {filename}")
-            return None
+            return None, 0
 
         logger.info(f"Successfully analyzed image with xAI: {filename}")
-        return str(description).strip()
+        return description, _completion_tokens(completion)
 
     except Exception as e:
         logger.exception(f"Error analyzing image {filename} with xAI: {e}")
-        return None
+        return None, 0
+
+
+def _image_batch_response_format(count: int) -> Dict[str, Any]:
+    """Return the strict JSON schema expected from a multi-image request."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "image_descriptions",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "images": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "index": {
+                                    "type": "integer",
+                                    "minimum": 1,
+                                    "maximum": count,
+                                },
+                                "description": {"type": "string"},
+                            },
+                            "required": ["index", "description"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["images"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+async def _describe_images_batch(images: List[Tuple[bytes, str, str]]) -> Tuple[List[Optional[str]], int]:
+    """
+    Describe several images in one vision request.
+
+    Args:
+        images: (image bytes, content type, filename) for each image, already prepared for upload
+
+    Returns:
+        The description of each image in order (None where the response had none), and the tokens used
+
+    Raises:
+        Exception: If the request fails or the response is not the expected JSON
+    """
+    content: List[Dict[str, Any]] = [{
+        "type": "text",
+        "text": (
+            f"You are given {len(images)} images from one Discord message, numbered 1 to {len(images)}. "
+            "For each image, provide a clear, concise description. "
+            "Focus on the main subject, key details, any visible text, and relevant context. "
+            "Keep each informative but brief (2-3 sentences) and describe every image on its own."
+        ),
+    }]
+    for index, (image_bytes, content_type, filename) in enumerate(images, 1):
+        content.append({"type": "text", "text": f"Image {index} ({filename}):"})
+        content.append({"type": "image_url", "image_url": {"url": _data_uri(image_bytes, content_type)}})
+        _transfer_stats['bytes_uploaded'] += len(image_bytes)
+
+    completion = await xai_client.chat.completions.create(
+        model=_vision_model(),
+        messages=[{"role": "user", "content": content}],
+        response_format=_image_batch_response_format(len(images)),
+        max_tokens=300 * len(images),
+        temperature=0.2,
+    )
+
+    parsed = json.loads(_completion_text(completion) or "")
+    descriptions: List[Optional[str]] = [None] * len(images)
+    for item in parsed["images"]:
+        index = item.get("index")
+        description = str(item.get("description") or "").strip()
+        if isinstance(index, int) and 1 <= index <= len(images) and description:
+            descriptions[index - 1] = description
+    return descriptions, _completion_tokens(completion)
+
+
+def _vision_model() -> str:
+    """The configured xAI vision model (supports vision/multimodal)."""
+    return getattr(config, "grok_model", "grok-4-1-fast-non-reasoning")
+
+
+def _data_uri(image_bytes: bytes, content_type: str) -> str:
+    """Encode an image as a base64 data URI for the xAI API."""
+    mime_type = content_type.lower()
+    if mime_type == "image/jpg":
+        mime_type = "image/jpeg"
+    return f"data:{mime_type};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+
+
+def _completion_text(completion) -> Optional[str]:
+    """Extract the text of a chat completion."""
+    text = completion.choices[0].message.content
+
+    # xAI responses are typically plain text, but handle list-of-parts just in case
+    if isinstance(text, list):
+        parts = []
+        for part in text:
+            part_type = getattr(part, "type", None) if not isinstance(part, dict) else part.get("type")
+            if part_type == "text":
+                text_val = part.get("text") if isinstance(part, dict) else getattr(part, "text", "")
+                if text_val:
+                    parts.append(text_val)
+        text = " ".join(parts)
+
+    return str(text).strip() if text else None
+
+
+def _completion_tokens(completion) -> int:
+    """Total tokens a chat completion used, or 0 if not reported."""
+    usage = getattr(completion, "usage", None)
+    tokens = getattr(usage, "total_tokens", None)
+    return tokens if isinstance(tokens, int) else 0
 
 
 async def analyze_discord_attachment(attachment) -> Optional[Dict[str, Any]]:
@@ -195,26 +423,232 @@ async def analyze_discord_attachment(attachment) -> Optional[Dict[str, Any]]:
         logger.debug(f"Skipping non-image attachment: {attachment.filename}")
         return None
 
-    # Download the image
-    image_bytes = await download_image(attachment.url)
+    return await analyze_image_url(attachment.url, content_type, attachment.filename, _attachment_download_url(attachment))
+
+
+async def analyze_image_url(
+    url: str,
+    content_type: str,
+    filename: str,
+    download_url: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Download and analyze one image.
+
+    Args:
+        url: The image URL
+        content_type: The MIME type of the image
+        filename: The attachment filename
+        download_url: Where to fetch the image from instead, e.g. a resized media proxy URL
+
+    Returns:
+        Dictionary with analysis results (see analyze_discord_attachment), or None if it failed
+    """
+    image_bytes = await _download_attachment(url, download_url)
     if not image_bytes:
-        logger.warning(f"Failed to download image: {attachment.filename}")
+        logger.warning(f"Failed to download image: {filename}")
         return None
 
-    # Analyze the image
-    description = await analyze_image(image_bytes, content_type, attachment.filename)
+    # Reuse the description of an identical or near-identical image, or analyze it once
+    fingerprint = await asyncio.to_thread(fingerprint_image, image_bytes)
+    description = await image_description_flight.do(
+        fingerprint.sha256, lambda: _describe_cached(fingerprint, image_bytes, content_type, filename)
+    )
     if not description:
-        logger.warning(f"Failed to analyze image: {attachment.filename}")
+        logger.warning(f"Failed to analyze image: {filename}")
         return None
 
     return {
-        'filename': attachment.filename,
-        'url': attachment.url,
+        'filename': filename,
+        'url': url,
         'content_type': content_type,
         'description': description
     }
 
 
+async def _download_attachment(url: str, download_url: Optional[str]) -> Optional[bytes]:
+    """Download an image, falling back to the original URL if the resized copy is unavailable."""
+    image_bytes = None
+    if download_url and download_url != url:
+        image_bytes = await download_image(download_url)
+    if not image_bytes:
+        image_bytes = await download_image(url)
+    return image_bytes
+
+
+async def analyze_images(attachments: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Analyze the images of one message, describing cache misses in as few vision requests as possible.
+
+    Images not in the description cache are sent together, up to IMAGE_BATCH_MAX_IMAGES images
+    and IMAGE_BATCH_MAX_BYTES upload bytes per request, with a JSON schema mapping each image
+    to its description. Images the batched response misses, or all of a failed batch, are
+    retried with one request each.
+
+    Args:
+        attachments: Images as listed by get_image_attachments
+
+    Returns:
+        The analysis of each attachment in order (see analyze_discord_attachment), None where it failed
+    """
+    if len(attachments) < 2 or config.IMAGE_BATCH_MAX_IMAGES < 2:
+        return list(await asyncio.gather(*(
+            analyze_image_url(a['url'], a['content_type'], a['filename'], a.get('download_url'))
+            for a in attachments
+        )))
+
+    downloads = await asyncio.gather(*(_download_attachment(a['url'], a.get('download_url')) for a in attachments))
+    descriptions: List[Optional[str]] = [None] * len(attachments)
+    # sha256 -> (fingerprint, original bytes, prepared bytes, prepared type, filename, attachment indexes)
+    misses: Dict[str, Tuple[ImageFingerprint, bytes, bytes, str, str, List[int]]] = {}
+
+    for index, (attachment, image_bytes) in enumerate(zip(attachments, downloads)):
+        if not image_bytes:
+            logger.warning(f"Failed to download image: {attachment['filename']}")
+            continue
+        fingerprint = await asyncio.to_thread(fingerprint_image, image_bytes)
+        if fingerprint.sha256 in misses:
+            misses[fingerprint.sha256][5].append(index)  # Same image twice in one message
+            continue
+        cached = await asyncio.to_thread(image_description_cache.get, fingerprint)
+        if cached:
+            logger.info(f"Reused cached description for image: {attachment['filename']}")
+            descriptions[index] = cached
+            continue
+        upload_bytes, upload_type = await asyncio.to_thread(
+            prepare_image_for_upload, image_bytes, attachment['content_type']
+        )
+        misses[fingerprint.sha256] = (
+            fingerprint, image_bytes, upload_bytes, upload_type, attachment['filename'], [index]
+        )
+
+    for batch in _plan_image_batches(list(misses.values())):
+        batch_descriptions: List[Optional[str]] = [None] * len(batch)
+        tokens = 0
+        batched = False
+        if len(batch) > 1:
+            try:
+                batch_descriptions, tokens = await _describe_images_batch(
+                    [(upload_bytes, upload_type, filename) for _, _, upload_bytes, upload_type, filename, _ in batch]
+                )
+                batched = True
+                _batch_stats['batched_requests'] += 1
+                _batch_stats['batched_images'] += len(batch)
+                logger.info(f"Analyzed {sum(1 for d in batch_descriptions if d)} of {len(batch)} image(s) in one request")
+            except Exception as e:
+                _batch_stats['batch_failures'] += 1
+                logger.warning(f"Batched image analysis failed, analyzing images one by one: {str(e)}")
+
+        described = sum(1 for d in batch_descriptions if d)
+        for (fingerprint, image_bytes, _, _, filename, indexes), description in zip(batch, batch_descriptions):
+            image_tokens = tokens // described if description else 0
+            if not description:
+                description, image_tokens = await _describe_image(
+                    image_bytes, attachments[indexes[0]]['content_type'], filename
+                )
+                if batched:
+                    _batch_stats['fallback_images'] += 1
+            if not description:
+                continue
+            await asyncio.to_thread(image_description_cache.put, fingerprint, description, image_tokens)
+            for index in indexes:
+                descriptions[index] = description
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for attachment, description in zip(attachments, descriptions):
+        if not description:
+            logger.warning(f"Failed to analyze image: {attachment['filename']}")
+            results.append(None)
+            continue
+        results.append({
+            'filename': attachment['filename'],
+            'url': attachment['url'],
+            'content_type': attachment['content_type'],
+            'description': description
+        })
+    return results
+
+
+def _plan_image_batches(images: List[Tuple[Any, ...]]) -> List[List[Tuple[Any, ...]]]:
+    """Group images (prepared bytes at index 2) into batches within the count and byte budgets."""
+    batches: List[List[Tuple[Any, ...]]] = []
+    batch_bytes = 0
+    for image in images:
+        size = len(image[2])
+        if (
+            not batches
+            or len(batches[-1]) >= config.IMAGE_BATCH_MAX_IMAGES
+            or batch_bytes + size > config.IMAGE_BATCH_MAX_BYTES
+        ):
+            batches.append([])
+            batch_bytes = 0
+        batches[-1].append(image)
+        batch_bytes += size
+    return batches
+
+
+def get_image_batch_stats() -> Dict[str, int]:
+    """
+    Get counters for multi-image vision requests.
+
+    Returns:
+        Dict[str, int]: Batched requests, images they covered, failed batches, images a batched
+        response missed (retried alone), and vision requests saved
+    """
+    stats = dict(_batch_stats)
+    stats['requests_saved'] = max(0, stats['batched_images'] - stats['batched_requests'] - stats['fallback_images'])
+    return stats
+
+
+async def _describe_cached(fingerprint: ImageFingerprint, image_bytes: bytes, content_type: str, filename: str) -> Optional[str]:
+    """Look an image up in the description cache, analyzing and caching it on a miss."""
+    description = await asyncio.to_thread(image_description_cache.get, fingerprint)
+    if description:
+        logger.info(f"Reused cached description for image: {filename}")
+        return description
+
+    description, tokens = await _describe_image(image_bytes, content_type, filename)
+    if description:
+        await asyncio.to_thread(image_description_cache.put, fingerprint, description, tokens)
+    return description
+
+
+def _attachment_download_url(attachment) -> str:
+    """The resized media proxy URL for a large image attachment, or its CDN URL."""
+    if (getattr(attachment, 'content_type', None) or '').lower() == 'image/gif':
+        return attachment.url  # Keep GIFs as they are; the proxy may return a still frame
+    return get_download_url(
+        attachment.url,
+        getattr(attachment, 'proxy_url', None),
+        getattr(attachment, 'width', None),
+        getattr(attachment, 'height', None),
+    )
+
+
+def get_image_attachments(message) -> List[Dict[str, Any]]:
+    """
+    List the image attachments of a Discord message that can be analyzed.
+
+    Args:
+        message: Discord Message object
+
+    Returns:
+        List of {'filename', 'url', 'download_url', 'content_type'} dicts; empty if image analysis is disabled
+    """
+    if xai_client is None or not getattr(message, 'attachments', None):
+        return []
+    return [
+        {
+            'filename': attachment.filename,
+            'url': attachment.url,
+            'download_url': _attachment_download_url(attachment),
+            'content_type': attachment.content_type,
+        }
+        for attachment in message.attachments
+        if getattr(attachment, 'content_type', None) and is_supported_image(attachment.content_type)
+    ]
+
+
 async def analyze_message_images(message) -> List[Dict[str, Any]]:
     """
     Analyze all image attachments in a Discord message.
@@ -232,13 +666,8 @@ async def analyze_message_images(message) -> List[Dict[str, Any]]:
     if not hasattr(message, 'attachments') or not message.attachments:
         return []
 
-    results = []
-    for attachment in message.attachments:
-        analysis = await analyze_discord_attachment(attachment)
-        if analysis:
-            results.append(analysis)
-
-    return results
+    analyses = await analyze_images(get_image_attachments(message))
+    return [analysis for analysis in analyses if analysis]
 
 
 def format_image_descriptions(analyses: List[Dict[str, Any]]) -> str:
@@ -0,0 +1,263 @@
+"""
+Cache of vision-model image descriptions.
+
+The same memes and screenshots get posted again and again, and each copy used
+to cost a download plus a vision call. Descriptions are cached per image, keyed
+by the SHA-256 of its bytes, in SQLite (image_description_cache) with the most
+recently used entries kept in memory. Where Pillow is installed, each image also
+gets a 64-bit difference hash (dHash). With a non-zero IMAGE_DHASH_MAX_DISTANCE,
+resized or recompressed copies of a cached image reuse its description as well;
+it is off by default because screenshots sharing a layout hash alike.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+import config
+import database
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:
+    Image = None
+
+# Set up logging
+logger = logging.getLogger('discord_bot.image_cache')
+
+# The dHash compares each pixel with its right neighbour on a (DHASH_SIZE + 1) x DHASH_SIZE grayscale thumbnail
+DHASH_SIZE = 8
+_DHASH_BITS = DHASH_SIZE * DHASH_SIZE
+_DHASH_MASK = (1 << _DHASH_BITS) - 1
+
+
+@dataclass(frozen=True)
+class ImageFingerprint:
+    """Exact and perceptual identity of an image."""
+    sha256: str
+    dhash: Optional[int] = None
+
+
+def dhash_from_pixels(rows: Sequence[Sequence[int]]) -> int:
+    """
+    Compute a difference hash from a grayscale thumbnail.
+
+    Args:
+        rows: DHASH_SIZE rows of DHASH_SIZE + 1 brightness values
+
+    Returns:
+        int: 64-bit hash with one bit per horizontally adjacent pixel pair (1 where brightness drops)
+    """
+    value = 0
+    for row in rows:
+        for left, right in zip(row, row[1:]):
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def compute_dhash(image_bytes: bytes) -> Optional[int]:
+    """
+    Compute the difference hash of an image.
+
+    Args:
+        image_bytes: The encoded image
+
+    Returns:
+        Optional[int]: The hash, or None if Pillow is not installed, the image can't be decoded,
+        it is animated, or it is too flat to be told apart from other flat images
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            if getattr(image, 'is_animated', False):
+                return None
+            image.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))  # Cheap JPEG downscale while decoding
+            thumbnail = image.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.LANCZOS)
+            pixels = thumbnail.tobytes()
+    except Exception as e:
+        logger.debug(f"Could not compute image hash: {str(e)}")
+        return None
+
+    width = DHASH_SIZE + 1
+    value = dhash_from_pixels([pixels[i:i + width] for i in range(0, len(pixels), width)])
+    if value in (0, _DHASH_MASK):
+        return None
+    return value
+
+
+def fingerprint_image(image_bytes: bytes) -> ImageFingerprint:
+    """
+    Fingerprint an image for the description cache.
+
+    Args:
+        image_bytes: The encoded image
+
+    Returns:
+        ImageFingerprint: SHA-256 of the bytes, plus the dHash where it can be computed
+    """
+    return ImageFingerprint(hashlib.sha256(image_bytes).hexdigest(), compute_dhash(image_bytes))
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return value - (1 << _DHASH_BITS) if value >= 1 << (_DHASH_BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value & _DHASH_MASK
+
+
+class ImageDescriptionCache:
+    """
+    Two-level (memory LRU over SQLite) cache of image descriptions.
+
+    Lookups try the exact SHA-256 first, then the closest cached dHash within
+    max_distance differing bits. The dHash index is loaded from SQLite on first use
+    and searched linearly. Methods block on SQLite, so call them via asyncio.to_thread.
+    """
+
+    def __init__(self, memory_entries: int, max_distance: int):
+        self.memory_entries = max(0, memory_entries)
+        self.max_distance = max(0, max_distance)
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._dhash_index: Optional[Dict[str, int]] = None
+        self.metrics: Dict[str, int] = {
+            'lookups': 0,
+            'exact_hits': 0,
+            'perceptual_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'tokens_saved': 0,
+        }
+
+    def _remember(self, sha256: str, entry: Dict[str, Any]) -> None:
+        if not self.memory_entries:
+            return
+        self._entries[sha256] = entry
+        self._entries.move_to_end(sha256)
+        while len(self._entries) > self.memory_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, sha256: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(sha256)
+        if entry is not None:
+            self._entries.move_to_end(sha256)
+            return entry
+        row = database.get_cached_image_description(sha256)
+        if row is None:
+            return None
+        entry = {'description': row['description'], 'tokens': row['tokens']}
+        self._remember(sha256, entry)
+        return entry
+
+    def _nearest(self, dhash: int) -> Optional[str]:
+        if self._dhash_index is None:
+            self._dhash_index = {
+                sha256: _to_unsigned(value) for sha256, value in database.get_image_description_hashes()
+            }
+        best_sha, best_distance = None, self.max_distance + 1
+        for sha256, value in self._dhash_index.items():
+            distance = bin(value ^ dhash).count('1')  # int.bit_count() needs Python 3.10
+            if distance < best_distance:
+                best_sha, best_distance = sha256, distance
+        return best_sha
+
+    def get(self, fingerprint: ImageFingerprint) -> Optional[str]:
+        """
+        Look up the description of an image or a near-identical copy.
+
+        Args:
+            fingerprint: The image's fingerprint
+
+        Returns:
+            Optional[str]: The cached description, or None on a miss
+        """
+        with self._lock:
+            self.metrics['lookups'] += 1
+            hit_kind = 'exact_hits'
+            sha256 = fingerprint.sha256
+            entry = self._load(sha256)
+            if entry is None and fingerprint.dhash is not None and self.max_distance:
+                while entry is None:
+                    near = self._nearest(fingerprint.dhash)
+                    if near is None:
+                        break
+                    sha256, hit_kind = near, 'perceptual_hits'
+                    entry = self._load(near)
+                    if entry is None:
+                        # Deleted since the index was loaded; try the next closest hash
+                        del self._dhash_index[near]
+            if entry is None:
+                self.metrics['misses'] += 1
+                return None
+            self.metrics[hit_kind] += 1
+            self.metrics['tokens_saved'] += entry['tokens']
+
+        database.record_image_description_hit(sha256)
+        logger.debug(f"Image description cache {hit_kind[:-5]} hit for {fingerprint.sha256[:12]}")
+        return entry['description']
+
+    def put(self, fingerprint: ImageFingerprint, description: str, tokens: int = 0) -> None:
+        """
+        Cache the description of an image.
+
+        Args:
+            fingerprint: The image's fingerprint
+            description: The vision model's description
+            tokens: Tokens the vision call used
+        """
+        dhash = _to_signed(fingerprint.dhash) if fingerprint.dhash is not None else None
+        if not database.store_image_description(fingerprint.sha256, dhash, description, tokens):
+            return
+        with self._lock:
+            self.metrics['stores'] += 1
+            self._remember(fingerprint.sha256, {'description': description, 'tokens': tokens})
+            if self._dhash_index is not None and fingerprint.dhash is not None:
+                self._dhash_index[fingerprint.sha256] = fingerprint.dhash
+
+    def prune(self, cutoff_time: datetime) -> int:
+        """
+        Delete entries not stored or hit since the cutoff.
+
+        Args:
+            cutoff_time: Entries last used before this time are deleted
+
+        Returns:
+            int: The number of entries deleted
+        """
+        deleted = database.delete_image_descriptions_unused_since(cutoff_time)
+        if deleted:
+            # The dHash index would otherwise keep pointing at deleted rows
+            self.clear_memory()
+        return deleted
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory entries and dHash index; SQLite is untouched."""
+        with self._lock:
+            self._entries.clear()
+            self._dhash_index = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the cache metrics.
+
+        Returns:
+            Dict[str, Any]: Counters plus the hit rate, vision calls saved and entries in memory
+        """
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self.metrics)
+            snapshot['memory_entries'] = len(self._entries)
+        hits = snapshot['exact_hits'] + snapshot['perceptual_hits']
+        snapshot['vision_calls_saved'] = hits
+        snapshot['hit_rate'] = round(hits / snapshot['lookups'], 3) if snapshot['lookups'] else 0.0
+        return snapshot
+
+
+image_description_cache = ImageDescriptionCache(config.IMAGE_CACHE_MEMORY_ENTRIES, config.IMAGE_DHASH_MAX_DISTANCE)
@@ -0,0 +1,233 @@
+"""
+Background image analysis for stored messages.
+
+Describing a message's images (download plus one vision call per image) used to
+happen in on_message before the message was stored, holding up storage and
+command handling for seconds. Now the message is stored straight away and a job
+is persisted in image_analysis_jobs; a pool of workers analyzes the attachments
+(together in one vision request where possible) under a global concurrency cap
+and writes image_descriptions back. A job whose images all fail is requeued
+with exponential backoff until it runs out of attempts.
+Jobs left over from a previous run are picked up again on start.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import database
+from image_analyzer import analyze_images
+
+# Set up logging
+logger = logging.getLogger('discord_bot.image_jobs')
+
+# A job whose images all fail to analyze this many times is given up on
+MAX_JOB_ATTEMPTS = 3
+
+# Delay before a failed job is requeued; doubles with each further attempt
+JOB_RETRY_BASE_DELAY_SECONDS = 30.0
+
+
+class ImageAnalysisQueue:
+    """
+    Worker pool for persisted image analysis jobs.
+
+    Each job is one message, whose images are analyzed together (see
+    image_analyzer.analyze_images). At most `concurrency` jobs run at once.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._workers: List[asyncio.Task] = []
+        self._retries: Set[asyncio.Task] = set()
+        self.metrics: Dict[str, int] = {
+            'jobs_queued': 0,
+            'jobs_completed': 0,
+            'jobs_failed': 0,
+            'jobs_retried': 0,
+            'images_analyzed': 0,
+            'images_failed': 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        """Whether the workers are active."""
+        return any(not worker.done() for worker in self._workers)
+
+    async def start(self) -> None:
+        """Start the workers on the running event loop and requeue jobs left from a previous run."""
+        if self.running:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"image-analysis-{i}")
+            for i in range(self.concurrency)
+        ]
+        pending = await asyncio.to_thread(database.get_pending_image_analysis_jobs, MAX_JOB_ATTEMPTS)
+        for job in pending:
+            self._put(job)
+        logger.info(f"Image analysis workers started (concurrency={self.concurrency}, resumed {len(pending)} job(s))")
+
+    def _put(self, job: Dict[str, Any]) -> None:
+        self._queue.put_nowait(job)
+        self.metrics['jobs_queued'] += 1
+
+    async def submit(self, message_id: str, attachments: List[Dict[str, Any]]) -> bool:
+        """
+        Persist a job for a message's image attachments and queue it.
+
+        Args:
+            message_id (str): The Discord message ID
+            attachments (List[Dict[str, Any]]): Images as listed by image_analyzer.get_image_attachments
+
+        Returns:
+            bool: True if the job was persisted
+        """
+        if not attachments:
+            return False
+        stored = await asyncio.to_thread(database.enqueue_image_analysis_job, message_id, attachments)
+        if stored:
+            self._put({'message_id': message_id, 'attachments': attachments, 'attempts': 0})
+        return stored
+
+    async def join(self) -> None:
+        """Wait until every queued job, including scheduled retries, has been processed."""
+        await self._queue.join()
+        while self._retries:
+            await asyncio.gather(*self._retries, return_exceptions=True)
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Stop the workers. Unfinished jobs stay persisted and resume on the next start."""
+        tasks = self._workers + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._retries.clear()
+        logger.info(f"Image analysis workers stopped: {self.get_metrics()}")
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Error processing image job for message {job.get('message_id')}: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _schedule_retry(self, job: Dict[str, Any]) -> None:
+        delay = JOB_RETRY_BASE_DELAY_SECONDS * 2 ** (job['attempts'] - 1)
+        task = asyncio.create_task(self._requeue_after(job, delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _requeue_after(self, job: Dict[str, Any], delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._put(job)
+        self.metrics['jobs_retried'] += 1
+
+    async def _analyze(self, message_id: str, attachments: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        async with self._semaphore:
+            try:
+                return await analyze_images(attachments)
+            except Exception as e:
+                logger.error(f"Error analyzing images in message {message_id}: {str(e)}", exc_info=True)
+                return [None] * len(attachments)
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        message_id = job['message_id']
+        attachments = job['attachments']
+        results = await self._analyze(message_id, attachments)
+        analyses = [result for result in results if result]
+        self.metrics['images_analyzed'] += len(analyses)
+        self.metrics['images_failed'] += len(results) - len(analyses)
+
+        if not analyses:
+            self.metrics['jobs_failed'] += 1
+            await asyncio.to_thread(
+                database.record_image_analysis_failure, message_id, f"all {len(attachments)} image(s) failed"
+            )
+            job['attempts'] = job.get('attempts', 0) + 1
+            logger.warning(
+                f"Image analysis failed for message {message_id} "
+                f"(attempt {job['attempts']}/{MAX_JOB_ATTEMPTS})"
+            )
+            if job['attempts'] < MAX_JOB_ATTEMPTS:
+                self._schedule_retry(job)
+            return
+
+        # The message may still be in the write-behind queue
+        await database.flush_message_ingestion()
+        await asyncio.to_thread(database.complete_image_analysis_job, message_id, json.dumps(analyses))
+        self.metrics['jobs_completed'] += 1
+        logger.info(f"Analyzed {len(analyses)} of {len(attachments)} image(s) in message {message_id}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the image analysis metrics.
+
+        Returns:
+            Dict[str, Any]: Counters plus the number of jobs waiting
+        """
+        snapshot: Dict[str, Any] = dict(self.metrics)
+        snapshot['queued'] = self._queue.qsize()
+        return snapshot
+
+
+_image_queue: Optional[ImageAnalysisQueue] = None
+
+
+async def start_image_analysis(concurrency: int) -> ImageAnalysisQueue:
+    """
+    Start the image analysis workers; calling it again while they are running is a no-op.
+
+    Args:
+        concurrency (int): Maximum messages whose images are analyzed at once
+
+    Returns:
+        ImageAnalysisQueue: The active queue
+    """
+    global _image_queue
+    if _image_queue is None or not _image_queue.running:
+        _image_queue = ImageAnalysisQueue(concurrency)
+        await _image_queue.start()
+    return _image_queue
+
+
+async def submit_image_analysis(message_id: str, attachments: List[Dict[str, Any]]) -> bool:
+    """
+    Queue a message's images for background analysis. Without running workers the job is
+    only persisted, and is picked up when they start.
+
+    Args:
+        message_id (str): The Discord message ID
+        attachments (List[Dict[str, Any]]): Images as listed by image_analyzer.get_image_attachments
+
+    Returns:
+        bool: True if the job was persisted
+    """
+    if _image_queue is None or not _image_queue.running:
+        return await asyncio.to_thread(database.enqueue_image_analysis_job, message_id, attachments)
+    return await _image_queue.submit(message_id, attachments)
+
+
+def get_image_analysis_metrics() -> Dict[str, Any]:
+    """
+    Get the image analysis metrics of the active queue.
+
+    Returns:
+        Dict[str, Any]: The queue's metrics, or {} if the workers were never started
+    """
+    return _image_queue.get_metrics() if _image_queue is not None else {}
+
+
+async def stop_image_analysis() -> None:
+    """Stop the workers, leaving unfinished jobs persisted."""
+    global _image_queue
+    if _image_queue is not None:
+        await _image_queue.stop()
+        _image_queue = None
@@ -0,0 +1,138 @@
+"""
+Incremental channel summaries for /sum-hr and /sum-day.
+
+A summary window is split into hour buckets. Each completed hour with enough activity
+is condensed into notes once and stored in the channel_summary_buckets table, so a later
+request over an overlapping window only pays for the hours it hasn't seen yet. The hour
+that is still in progress (and the partial hour at the start of the window) is always
+summarized live from its raw messages.
+
+Stored notes are invalidated by database triggers when a late message lands in their
+hour or one of its messages changes, and regenerated on the next request.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+import database
+from llm_handler import call_llm_for_summary, format_messages_for_summary, summarize_messages_to_notes
+from logging_config import logger
+
+
+def _bucket_of(created_at: datetime) -> int:
+    """Hour bucket of a message timestamp (naive timestamps are UTC, as stored)."""
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return int(created_at.timestamp() * 1000) // database.SUMMARY_BUCKET_MS
+
+
+def _bucket_label(hour_bucket: int) -> str:
+    """Human-readable label for an hour bucket, e.g. '2025-05-30 14:00–15:00 UTC'."""
+    start = datetime.fromtimestamp(hour_bucket * database.SUMMARY_BUCKET_MS / 1000, tz=timezone.utc)
+    end = start + timedelta(hours=1)
+    return f"{start:%Y-%m-%d %H:00}–{end:%H:00} UTC"
+
+
+async def _bucket_notes(
+    channel_id: str,
+    channel_name: str,
+    hour_bucket: int,
+    messages: List[Dict[str, Any]],
+    cached: Optional[Dict[str, Any]],
+    semaphore: asyncio.Semaphore
+) -> Tuple[str, bool]:
+    """
+    Get the section text for one completed hour: stored notes when they are still valid,
+    freshly generated (and stored) notes for busy hours, or the raw messages for quiet ones.
+
+    Returns:
+        Tuple[str, bool]: The section text and whether it came from the store
+    """
+    if cached is not None and cached['message_count'] == len(messages):
+        return cached['summary_text'], True
+
+    formatted = format_messages_for_summary(messages, channel_name)
+    if len(formatted) < config.SUMMARY_BUCKET_MIN_MESSAGES:
+        return "\n".join(formatted) or "No messages.", False
+
+    async with semaphore:
+        notes = await summarize_messages_to_notes(messages, channel_name, "1 hour")
+    if notes is None:
+        # Don't store a failure; fall back to the raw messages for this request only
+        return "\n".join(formatted), False
+
+    await asyncio.to_thread(database.store_summary_bucket, channel_id, hour_bucket, notes, len(messages))
+    return notes, False
+
+
+async def summarize_channel_hours(
+    channel_id: str,
+    channel_name: str,
+    end_time: datetime,
+    hours: int,
+    messages: List[Dict[str, Any]],
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None
+) -> str:
+    """
+    Summarize the past `hours` of a channel, reusing stored notes for completed hours.
+
+    Args:
+        channel_id (str): The Discord channel ID
+        channel_name (str): Name of the channel
+        end_time (datetime): End of the window (usually now, UTC)
+        hours (int): Length of the window in hours
+        messages (List[Dict[str, Any]]): The window's messages, as returned by
+            database.get_channel_messages_for_hours(channel_id, end_time, hours)
+        on_delta (Callable, optional): Streams the raw summary as it is generated (see call_llm_for_summary)
+
+    Returns:
+        str: The summary (or an error message, as call_llm_for_summary returns)
+    """
+    if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+    start_time = end_time - timedelta(hours=hours)
+
+    # Only hours that lie entirely inside the window and are already over can be noted;
+    # the partial first hour and the current hour are summarized from raw messages.
+    first_full_bucket = -(-int(start_time.timestamp() * 1000) // database.SUMMARY_BUCKET_MS)
+    current_bucket = _bucket_of(end_time)
+
+    by_bucket: Dict[int, List[Dict[str, Any]]] = {}
+    head: List[Dict[str, Any]] = []
+    tail: List[Dict[str, Any]] = []
+    for msg in messages:
+        bucket = _bucket_of(msg['created_at'])
+        if bucket < first_full_bucket:
+            head.append(msg)
+        elif bucket >= current_bucket:
+            tail.append(msg)
+        else:
+            by_bucket.setdefault(bucket, []).append(msg)
+
+    if not by_bucket:
+        return await call_llm_for_summary(messages, channel_name, end_time, hours, on_delta=on_delta)
+
+    cached = await asyncio.to_thread(
+        database.get_summary_buckets, channel_id, min(by_bucket), max(by_bucket)
+    )
+    semaphore = asyncio.Semaphore(config.SUMMARY_MAP_CONCURRENCY)
+    buckets = sorted(by_bucket)
+    results = await asyncio.gather(*(
+        _bucket_notes(channel_id, channel_name, bucket, by_bucket[bucket], cached.get(bucket), semaphore)
+        for bucket in buckets
+    ))
+
+    sections = []
+    head_text = "\n".join(format_messages_for_summary(head, channel_name))
+    if head_text:
+        sections.append((f"Before {_bucket_label(first_full_bucket).split('–')[0]} UTC", head_text))
+    sections.extend((_bucket_label(bucket), text) for bucket, (text, _) in zip(buckets, results))
+
+    reused = sum(from_store for _, from_store in results)
+    logger.info(
+        f"Incremental summary for #{channel_name}: {reused}/{len(buckets)} completed hours from stored notes, "
+        f"{len(head) + len(tail)} messages summarized live"
+    )
+    return await call_llm_for_summary(tail, channel_name, end_time, hours, bucket_notes=sections, on_delta=on_delta)
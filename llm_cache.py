@@ -0,0 +1,160 @@
+"""
+Cache of LLM and Exa /answer responses for byte-identical requests.
+
+Re-running the daily summary after a crash, summarizing the same page twice or
+asking the same /ask question a minute apart used to pay for the same tokens
+again. Responses are cached under a hash of the whole request (endpoint, model,
+messages, temperature, max_tokens, response_format...) in SQLite
+(llm_response_cache), with the most recently used entries kept in memory. Each
+call site picks its own TTL; call sites whose answers should vary don't use it.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import config
+import database
+
+# Set up logging
+logger = logging.getLogger('discord_bot.llm_cache')
+
+
+def make_cache_key(endpoint: str, request: Dict[str, Any]) -> str:
+    """
+    Hash a request into a cache key.
+
+    Args:
+        endpoint: The API called (e.g. 'openrouter.chat')
+        request: Everything that determines the response: model, messages, sampling options, ...
+
+    Returns:
+        str: Hex SHA-256 of the endpoint and the canonical JSON of the request
+    """
+    payload = json.dumps({'endpoint': endpoint, 'request': request}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-level (memory LRU over SQLite) cache of JSON-serializable responses.
+
+    Methods block on SQLite, so call them via asyncio.to_thread.
+    """
+
+    def __init__(self, memory_entries: int, enabled: bool = True):
+        self.memory_entries = max(0, memory_entries)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # cache key -> (response, tokens, expires at in epoch ms)
+        self._entries: 'OrderedDict[str, Tuple[Any, int, int]]' = OrderedDict()
+        self.metrics: Dict[str, int] = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'tokens_saved': 0,
+        }
+        self._sites: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, site: str, outcome: str) -> None:
+        self.metrics[outcome] += 1
+        counters = self._sites.setdefault(site, {'hits': 0, 'misses': 0})
+        counters[outcome] += 1
+
+    def _remember(self, key: str, entry: Tuple[Any, int, int]) -> None:
+        if not self.memory_entries:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.memory_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str, site: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from make_cache_key
+            site: Name of the call site, for the per-site metrics
+
+        Returns:
+            Optional[Any]: The cached response, or None on a miss
+        """
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= now_ms:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        from_memory = entry is not None
+        if not from_memory:
+            row = database.get_cached_llm_response(key)
+            if row is not None:
+                try:
+                    entry = (json.loads(row['response']), row['tokens'], row['expires_at_ms'])
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring unreadable cached LLM response {key[:12]}")
+
+        with self._lock:
+            if entry is None:
+                self._count(site, 'misses')
+                return None
+            self._count(site, 'hits')
+            self.metrics['tokens_saved'] += entry[1]
+            if not from_memory:
+                self._remember(key, entry)
+
+        database.record_llm_response_hit(key)
+        logger.info(f"LLM response cache hit for {site} ({entry[1]} tokens saved)")
+        return entry[0]
+
+    def put(self, key: str, site: str, endpoint: str, model: Optional[str], response: Any, tokens: int, ttl_seconds: int) -> None:
+        """
+        Cache a response.
+
+        Args:
+            key: Cache key from make_cache_key
+            site: Name of the call site
+            endpoint: The API called
+            model: The model that answered, if any
+            response: The JSON-serializable response
+            tokens: Tokens the call used
+            ttl_seconds: How long the response may be served
+        """
+        expires_at_ms = int(time.time() * 1000) + ttl_seconds * 1000
+        if not database.store_llm_response(key, endpoint, model, json.dumps(response), tokens, expires_at_ms):
+            return
+        with self._lock:
+            self.metrics['stores'] += 1
+            self._remember(key, (response, tokens, expires_at_ms))
+        logger.debug(f"Cached LLM response for {site} for {ttl_seconds}s")
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory entries; SQLite is untouched."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the cache metrics.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, stores, tokens saved, hit rate, entries in memory and per-site counts
+        """
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self.metrics)
+            snapshot['memory_entries'] = len(self._entries)
+            snapshot['sites'] = {site: dict(counters) for site, counters in self._sites.items()}
+        lookups = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = round(snapshot['hits'] / lookups, 3) if lookups else 0.0
+        return snapshot
+
+
+llm_response_cache = LLMResponseCache(config.LLM_CACHE_MEMORY_ENTRIES, config.LLM_CACHE_ENABLED)
@@ -2,15 +2,25 @@ from openai import AsyncOpenAI
 from logging_config import logger
 import config  # Assuming config.py is in the same directory or accessible
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 import asyncio
+import contextlib
 import re
 from datetime import timezone
 from message_utils import generate_discord_message_link, is_discord_message_link
-from database import get_scraped_content_by_url
+from database import get_scraped_content_by_url, store_scraped_content
+from single_flight import url_summary_flight
+from micro_batch import MicroBatcher
+from url_utils import canonicalize_url
+from url_pipeline import summarize_urls
+from scraper_router import scrape_url
 from discord_formatter import DiscordFormatter
 from gif_utils import is_gif_url, is_discord_emoji_url
+from summary_chunking import chunk_texts, estimate_tokens, is_conversation_start
+from youtube_handler import extract_video_id, format_timestamp, split_transcript, timestamp_url
 import httpx  # For Exa API calls
+from http_clients import get_httpx_client
+from llm_cache import llm_response_cache, make_cache_key
 
 # Initialize OpenRouter client (OpenAI-compatible)
 openrouter_client = AsyncOpenAI(
@@ -23,6 +33,111 @@ llm_client = openrouter_client
 
 POINT_ANALYSIS_TOKEN_LIMITS = (4000, 8000)
 
+SUMMARY_SYSTEM_PROMPT = "You summarize Discord tech community conversations. Focus on extracting high-signal content: tech news, AI/coding tips, dev tools, hacks, insights. Skip social chatter and small talk. Be extremely concise - one line per bullet point. Use backticks for usernames. Preserve Discord message links as [source](url). CRITICAL: Never use markdown code blocks (```). Use plain text with bold and headers."
+
+# Output budget for each chunk's notes in map-reduce summaries
+SUMMARY_MAP_MAX_TOKENS = 1500
+
+# Output budget for the notes on each section of a video transcript
+YOUTUBE_SECTION_MAX_TOKENS = 300
+
+# How long each call site reuses the response to an identical request (see llm_cache.py).
+# Point awards are not cached.
+LLM_CACHE_TTL_URL_SUMMARY = 7 * 24 * 3600
+LLM_CACHE_TTL_CHANNEL_SUMMARY = 24 * 3600
+LLM_CACHE_TTL_DATABASE_QUERY = 10 * 60
+LLM_CACHE_TTL_EXA_ANSWER = 3600
+
+
+# Appended to a streamed response that failed partway, since what was posted can't be taken back
+STREAM_INTERRUPTED_NOTE = "\n\n*(Response interrupted, please try again.)*"
+
+# Receives each piece of a streamed response as it arrives (see discord_streaming.py)
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+
+async def _note_stream_interrupted(on_delta: DeltaCallback) -> None:
+    """Tell the reader a partly posted response stopped early; the original error is re-raised by the caller."""
+    with contextlib.suppress(Exception):
+        await on_delta(STREAM_INTERRUPTED_NOTE)
+
+
+async def _stream_chat_completion(on_delta: DeltaCallback, **request) -> Tuple[str, Optional[int]]:
+    """
+    Stream a chat completion, passing each piece of text to `on_delta`.
+
+    Args:
+        on_delta: Called with each piece of the response
+        **request: Arguments for llm_client.chat.completions.create
+
+    Returns:
+        Tuple[str, Optional[int]]: The whole response text and the tokens used, if reported
+    """
+    stream = await llm_client.chat.completions.create(
+        **request, stream=True, stream_options={'include_usage': True}
+    )
+    pieces = []
+    tokens = None
+    try:
+        async for chunk in stream:
+            usage = getattr(chunk, 'usage', None)
+            if usage is not None:
+                tokens = getattr(usage, 'total_tokens', None)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                pieces.append(delta)
+                await on_delta(delta)
+    except Exception:
+        if pieces:
+            await _note_stream_interrupted(on_delta)
+        raise
+    return ''.join(pieces), tokens
+
+
+async def _chat_completion_text(
+    site: str,
+    cache_ttl: Optional[int],
+    on_delta: Optional[DeltaCallback] = None,
+    **request
+) -> Optional[str]:
+    """
+    Run a chat completion and return its text, reusing the response to an identical earlier request.
+
+    Args:
+        site: Name of the call site, for logs and cache metrics
+        cache_ttl: Seconds the response may be reused; None always calls the model
+        on_delta: Streams the response, passing each piece of text to this callback as it
+            arrives (a cached response is passed whole)
+        **request: Arguments for llm_client.chat.completions.create
+
+    Returns:
+        Optional[str]: The response text
+    """
+    cache_key = None
+    if cache_ttl and llm_response_cache.enabled:
+        cache_key = make_cache_key('openrouter.chat', request)
+        cached = await asyncio.to_thread(llm_response_cache.get, cache_key, site)
+        if cached is not None:
+            if on_delta is not None:
+                await on_delta(cached)
+            return cached
+
+    if on_delta is not None:
+        text, tokens = await _stream_chat_completion(on_delta, **request)
+    else:
+        completion = await llm_client.chat.completions.create(**request)
+        text = completion.choices[0].message.content
+        tokens = getattr(getattr(completion, 'usage', None), 'total_tokens', None)
+
+    if cache_key and isinstance(text, str) and text.strip():
+        await asyncio.to_thread(
+            llm_response_cache.put, cache_key, site, 'openrouter.chat', request.get('model'), text,
+            tokens if isinstance(tokens, int) else 0, cache_ttl
+        )
+    return text
+
 
 def _point_analysis_response_format(max_points: int) -> Dict[str, Any]:
     """Return the strict JSON schema expected from point analysis."""
@@ -71,13 +186,65 @@ def _point_analysis_response_format(max_points: int) -> Dict[str, Any]:
     }
 
 
-async def call_exa_answer(query: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+async def _stream_exa_answer(headers: Dict[str, str], body: Dict[str, Any], on_delta: DeltaCallback) -> Tuple[str, List[Any]]:
+    """
+    Stream an Exa /answer response (server-sent events), passing each piece of the answer to `on_delta`.
+
+    Args:
+        headers: Request headers
+        body: Request body, without the stream flag
+        on_delta: Called with each piece of the answer
+
+    Returns:
+        Tuple[str, List[Any]]: The whole answer and its citations
+    """
+    client = get_httpx_client('exa')
+    pieces = []
+    citations: List[Any] = []
+    try:
+        async with client.stream('POST', f"{config.exa_base_url}/answer", headers=headers, json={**body, "stream": True}) as response:
+            if response.is_error:
+                # Read the body so the error handler can log it
+                await response.aread()
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                try:
+                    chunk = json.loads(line[len('data:'):].strip())
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(chunk, dict):
+                    continue
+                choices = chunk.get('choices') or []
+                delta = (choices[0].get('delta') or {}).get('content') if choices else None
+                if delta:
+                    pieces.append(delta)
+                    await on_delta(delta)
+                if isinstance(chunk.get('citations'), list):
+                    citations = chunk['citations']
+    except Exception:
+        if pieces:
+            await _note_stream_interrupted(on_delta)
+        raise
+    return ''.join(pieces), citations
+
+
+async def call_exa_answer(
+    query: str,
+    system_prompt: Optional[str] = None,
+    cache_ttl: Optional[int] = LLM_CACHE_TTL_EXA_ANSWER,
+    on_delta: Optional[DeltaCallback] = None
+) -> Dict[str, Any]:
     """
     Call Exa's /answer endpoint for web search queries with built-in LLM.
 
     Args:
         query: The search query
         system_prompt: Optional system prompt for the LLM
+        cache_ttl: Seconds an identical query reuses this answer; None always calls Exa
+        on_delta: Streams the answer, passing each piece of text to this callback as it
+            arrives (a cached answer is passed whole)
 
     Returns:
         Dict containing 'answer' text and 'citations' list
@@ -98,7 +265,19 @@ async def call_exa_answer(query: str, system_prompt: Optional[str] = None) -> Di
         if system_prompt:
             body["systemPrompt"] = system_prompt
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        cache_key = None
+        if cache_ttl and llm_response_cache.enabled:
+            cache_key = make_cache_key('exa.answer', body)
+            cached = await asyncio.to_thread(llm_response_cache.get, cache_key, 'exa_answer')
+            if cached is not None:
+                if on_delta is not None:
+                    await on_delta(cached.get("answer", ""))
+                return cached
+
+        if on_delta is not None:
+            answer, citations = await _stream_exa_answer(headers, body, on_delta)
+        else:
+            client = get_httpx_client('exa')
             response = await client.post(
                 f"{config.exa_base_url}/answer",
                 headers=headers,
@@ -107,14 +286,19 @@ async def call_exa_answer(query: str, system_prompt: Optional[str] = None) -> Di
             response.raise_for_status()
             result = response.json()
 
-        answer = result.get("answer", "")
-        citations = result.get("citations", [])
+            answer = result.get("answer", "")
+            citations = result.get("citations", [])
 
         logger.info(f"Exa /answer returned {len(citations)} citations")
-        return {
+        answer_result = {
             "answer": answer,
             "citations": citations
         }
+        if cache_key and answer:
+            await asyncio.to_thread(
+                llm_response_cache.put, cache_key, 'exa_answer', 'exa.answer', None, answer_result, 0, cache_ttl
+            )
+        return answer_result
 
     except httpx.TimeoutException:
         logger.error("Exa /answer request timed out")
@@ -136,7 +320,7 @@ async def get_exa_contents(urls: List[str], summary_query: Optional[str] = None)
         summary_query: Optional query for AI-generated summary
 
     Returns:
-        List of dicts containing 'url', 'text', and optionally 'summary'
+        List of dicts containing 'id' (the requested URL), 'url', 'title', 'text', and optionally 'summary'
     """
     try:
         logger.info(f"Calling Exa /contents for {len(urls)} URL(s)")
@@ -155,20 +339,21 @@ async def get_exa_contents(urls: List[str], summary_query: Optional[str] = None)
         if summary_query:
             body["summary"] = {"query": summary_query}
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{config.exa_base_url}/contents",
-                headers=headers,
-                json=body
-            )
-            response.raise_for_status()
-            result = response.json()
+        client = get_httpx_client('exa')
+        response = await client.post(
+            f"{config.exa_base_url}/contents",
+            headers=headers,
+            json=body
+        )
+        response.raise_for_status()
+        result = response.json()
 
         results = result.get("results", [])
         logger.info(f"Exa /contents returned {len(results)} result(s)")
 
         return [
             {
+                "id": r.get("id", ""),
                 "url": r.get("url", ""),
                 "title": r.get("title", ""),
                 "text": r.get("text", ""),
@@ -187,6 +372,61 @@ async def get_exa_contents(urls: List[str], summary_query: Optional[str] = None)
         logger.error(f"Error calling Exa /contents: {str(e)}", exc_info=True)
         raise
 
+
+async def _fetch_exa_contents_batch(summary_query: Optional[str], urls: List[str]) -> Dict[str, Any]:
+    """
+    Fetch a batch of URLs with one /contents call and map each requested URL to its result.
+
+    If the batched call fails, the URLs are retried one by one so a single bad URL
+    doesn't fail the rest of the batch.
+    """
+    try:
+        results = await get_exa_contents(list(urls), summary_query)
+    except Exception:
+        if len(urls) == 1:
+            raise
+        logger.warning(f"Exa /contents batch of {len(urls)} URLs failed; retrying them one by one")
+        retries = await asyncio.gather(
+            *(get_exa_contents([url], summary_query) for url in urls),
+            return_exceptions=True
+        )
+        return {
+            url: retry if isinstance(retry, BaseException) else (retry[0] if retry else None)
+            for url, retry in zip(urls, retries)
+        }
+
+    # Exa echoes the requested URL as the result id; the result url may be normalized
+    by_url: Dict[str, Dict[str, Any]] = {}
+    for r in results:
+        for key in (r.get("id"), r.get("url")):
+            if key:
+                by_url.setdefault(key, r)
+                by_url.setdefault(canonicalize_url(key), r)
+    return {url: by_url.get(url) or by_url.get(canonicalize_url(url)) for url in urls}
+
+
+# Concurrent single-URL /contents requests with the same options share one call
+exa_contents_batcher = MicroBatcher(
+    'exa_contents',
+    _fetch_exa_contents_batch,
+    window=config.EXA_BATCH_WINDOW_MS / 1000,
+    max_size=config.EXA_BATCH_MAX_SIZE
+)
+
+
+async def get_exa_content(url: str, summary_query: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get one URL's content from Exa /contents, batched with other concurrent requests.
+
+    Args:
+        url: The URL to fetch content from
+        summary_query: Optional query for AI-generated summary
+
+    Returns:
+        Dict with 'url', 'title', 'text' and 'summary', or None if Exa returned nothing for the URL
+    """
+    return await exa_contents_batcher.submit(summary_query, url)
+
 def extract_urls_from_text(text: str) -> list[str]:
     """
     Extract URLs from text using regex.
@@ -200,6 +440,41 @@ def extract_urls_from_text(text: str) -> list[str]:
     url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+(?:/[^\s]*)?(?:\?[^\s]*)?'
     return re.findall(url_pattern, text)
 
+async def scrape_and_summarize_url(url: str) -> Optional[str]:
+    """
+    Scrape a URL through the scraper router, summarize it and cache the summary.
+
+    Callers should check the scrape cache first and run this through url_summary_flight.
+
+    Args:
+        url (str): The URL to scrape
+
+    Returns:
+        Optional[str]: The summary, or None if scraping or summarization failed
+    """
+    scraped = await scrape_url(url)
+    if not scraped:
+        logger.warning(f"No content scraped for URL: {url}")
+        return None
+
+    # Summarize the scraped content (returns plain text with summary and key points);
+    # video transcripts are summarized section by section with timestamps
+    segments = (scraped.raw_data or {}).get('segments') if scraped.provider == 'youtube' else None
+    if segments:
+        summary_text = await summarize_youtube_transcript(segments, url)
+    else:
+        summary_text = await summarize_scraped_content(scraped.markdown, url)
+    if not summary_text:
+        logger.warning(f"Failed to summarize scraped content for URL: {url}")
+        return None
+
+    if (scraped.raw_data or {}).get('error'):
+        # Placeholder content (e.g. captions not generated yet) shouldn't be served for a whole TTL
+        logger.info(f"Not caching {scraped.provider} scrape with error {scraped.raw_data['error']}: {url}")
+    else:
+        await asyncio.to_thread(store_scraped_content, url, scraped.provider, summary_text, content=scraped.markdown)
+    return summary_text
+
 async def scrape_url_on_demand(url: str) -> Optional[Dict[str, Any]]:
     """
     Scrape a URL on-demand and return summarized content.
@@ -211,50 +486,19 @@ async def scrape_url_on_demand(url: str) -> Optional[Dict[str, Any]]:
         Optional[Dict[str, Any]]: Dictionary containing summary (plain text with key points), or None if failed
     """
     try:
-        # Import here to avoid circular imports
-        from youtube_handler import is_youtube_url, scrape_youtube_content
-        from firecrawl_handler import scrape_url_content
-        from apify_handler import is_twitter_url, scrape_twitter_content
-        import config
-
-        # Check if the URL is from YouTube
-        if await is_youtube_url(url):
-            logger.info(f"Scraping YouTube URL on-demand: {url}")
-            scraped_result = await scrape_youtube_content(url)
-            if not scraped_result:
-                logger.warning(f"Failed to scrape YouTube content: {url}")
-                return None
-            markdown_content = scraped_result.get('markdown', '')
-
-        # Check if the URL is from Twitter/X.com
-        elif await is_twitter_url(url):
-            logger.info(f"Scraping Twitter/X.com URL on-demand: {url}")
-            if hasattr(config, 'apify_api_token') and config.apify_api_token:
-                scraped_result = await scrape_twitter_content(url)
-                if not scraped_result:
-                    logger.warning(f"Failed to scrape Twitter content with Apify, falling back to Firecrawl: {url}")
-                    scraped_result = await scrape_url_content(url)
-                    markdown_content = scraped_result if isinstance(scraped_result, str) else ''
-                else:
-                    markdown_content = scraped_result.get('markdown', '')
-            else:
-                scraped_result = await scrape_url_content(url)
-                markdown_content = scraped_result if isinstance(scraped_result, str) else ''
-
-        else:
-            # For other URLs, use Firecrawl
-            logger.info(f"Scraping URL with Firecrawl on-demand: {url}")
-            scraped_result = await scrape_url_content(url)
-            markdown_content = scraped_result if isinstance(scraped_result, str) else ''
-
-        if not markdown_content:
-            logger.warning(f"No content scraped for URL: {url}")
-            return None
+        cached = await asyncio.to_thread(get_scraped_content_by_url, url)
+        if cached:
+            logger.info(f"Using cached {cached['provider']} scrape for URL: {url}")
+            return {
+                'summary': cached['summary'],
+                'key_points': cached['key_points']
+            }
 
-        # Summarize the scraped content (returns plain text with summary and key points)
-        summary_text = await summarize_scraped_content(markdown_content, url)
+        # Scrape and summarize, sharing the work with any concurrent request for the same URL
+        summary_text = await url_summary_flight.do(
+            canonicalize_url(url), lambda: scrape_and_summarize_url(url)
+        )
         if not summary_text:
-            logger.warning(f"Failed to summarize scraped content for URL: {url}")
             return None
 
         return {
@@ -266,7 +510,7 @@ async def scrape_url_on_demand(url: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error scraping URL on-demand {url}: {str(e)}", exc_info=True)
         return None
 
-async def call_llm_api(query, message_context=None):
+async def call_llm_api(query, message_context=None, on_delta=None):
     """
     Call the LLM API with the user's query and return the response.
     Uses Exa /answer for web search queries with built-in LLM.
@@ -274,6 +518,8 @@ async def call_llm_api(query, message_context=None):
     Args:
         query (str): The user's query text
         message_context (dict, optional): Context containing referenced and linked messages
+        on_delta (callable, optional): Streams the raw answer, then its sources, to this
+            coroutine as they arrive (see discord_streaming.py)
 
     Returns:
         str: The LLM's response or an error message
@@ -348,32 +594,25 @@ async def call_llm_api(query, message_context=None):
             all_urls = filtered_urls
 
         if all_urls:
-            scraped_content_parts = []
-            for url in all_urls:
-                try:
-                    scraped_content = await asyncio.to_thread(get_scraped_content_by_url, url)
-                    if scraped_content:
-                        logger.info(f"Found scraped content for URL: {url}")
-                        content_section = f"**Scraped Content for {url}:**\n"
-                        content_section += f"Summary: {scraped_content['summary']}\n"
-                        if scraped_content['key_points']:
-                            content_section += f"Key Points: {', '.join(scraped_content['key_points'])}\n"
-                        scraped_content_parts.append(content_section)
-                    else:
-                        # URL not found in database, try to scrape it now
-                        logger.info(f"No scraped content found for URL {url}, attempting to scrape now...")
-                        scraped_content = await scrape_url_on_demand(url)
-                        if scraped_content:
-                            logger.info(f"Successfully scraped content for URL: {url}")
-                            content_section = f"**Scraped Content for {url}:**\n"
-                            content_section += f"Summary: {scraped_content['summary']}\n"
-                            if scraped_content['key_points']:
-                                content_section += f"Key Points: {', '.join(scraped_content['key_points'])}\n"
-                            scraped_content_parts.append(content_section)
-                        else:
-                            logger.warning(f"Failed to scrape content for URL: {url}")
-                except Exception as e:
-                    logger.warning(f"Error retrieving scraped content for URL {url}: {e}")
+            async def scraped_content_section(url: str) -> Optional[str]:
+                # Served from the scrape cache when possible, otherwise scraped now
+                scraped_content = await scrape_url_on_demand(url)
+                if not scraped_content:
+                    logger.warning(f"Failed to scrape content for URL: {url}")
+                    return None
+                content_section = f"**Scraped Content for {url}:**\n"
+                content_section += f"Summary: {scraped_content['summary']}\n"
+                if scraped_content['key_points']:
+                    content_section += f"Key Points: {', '.join(scraped_content['key_points'])}\n"
+                return content_section
+
+            # Scrape concurrently; the answer can't wait for stragglers, so they are dropped
+            ready, stragglers = await summarize_urls(
+                all_urls, scraped_content_section, config.URL_SUMMARY_CONCURRENCY, config.URL_SUMMARY_DEADLINE_SECONDS
+            )
+            for task in stragglers:
+                task.cancel()
+            scraped_content_parts = [section for _, section in ready]
 
             if scraped_content_parts:
                 context_parts.extend(scraped_content_parts)
@@ -395,7 +634,7 @@ Keep tables simple with 2-3 columns max. For complex comparisons with many detai
 CRITICAL: Never wrap large parts of your response in a markdown code block (```). Only use code blocks for specific code snippets. Your response text should be plain text with inline formatting."""
 
         # Call Exa /answer endpoint
-        result = await call_exa_answer(user_content, system_prompt)
+        result = await call_exa_answer(user_content, system_prompt, on_delta=on_delta)
         message = result.get("answer", "")
         citations = result.get("citations", [])
 
@@ -405,6 +644,9 @@ CRITICAL: Never wrap large parts of your response in a markdown code block (```)
             logger.info(f"Found {len(citations)} citations from Exa")
             # Extract URLs from Exa citation objects
             formatted_citations = [c.get("url", c) if isinstance(c, dict) else c for c in citations]
+            if on_delta is not None:
+                # The answer is already posted, so its [n] markers point to a list of sources below it
+                await on_delta(_streamed_sources_section(citations))
 
         # Apply Discord formatting enhancements
         formatted_message = DiscordFormatter.format_llm_response(message, formatted_citations)
@@ -419,7 +661,144 @@ CRITICAL: Never wrap large parts of your response in a markdown code block (```)
         logger.error(f"Error calling Exa API: {str(e)}", exc_info=True)
         return "Sorry, I encountered an error while processing your request. Please try again later."
 
-async def call_llm_for_summary(messages, channel_name, date, hours=24):
+def _streamed_sources_section(citations: List[Any]) -> str:
+    """Number the sources of a streamed Exa answer, using their titles when Exa provided them."""
+    normalized = DiscordFormatter._normalize_citations(citations)
+    section = DiscordFormatter._format_sources_section(normalized)
+    if section:
+        return section
+    lines = [f"**{i}.** <{citation['url']}>" for i, citation in enumerate(normalized, 1)]
+    return "\n\n📚 **Sources:**\n" + "\n".join(lines) if lines else ""
+
+def _filter_summary_messages(messages):
+    """Drop command messages (but keep bot responses) before summarizing."""
+    return [
+        msg for msg in messages
+        if not msg.get('is_command', False) and  # Use .get for safety
+           not (msg.get('content', '').startswith('/sum-day')) and  # Explicitly filter out /sum-day commands
+           not (msg.get('content', '').startswith('/sum-hr'))  # Explicitly filter out /sum-hr commands
+    ]
+
+def _format_summary_messages(messages, channel_name):
+    """
+    Format messages as one line each (plus inline image descriptions and scraped link content) for the summary prompt.
+
+    Args:
+        messages (list): Message dictionaries, already filtered
+        channel_name (str): Name of the channel being summarized
+
+    Returns:
+        list: Formatted message texts, in order
+    """
+    formatted_messages_text = []
+    for msg in messages:
+        # Ensure created_at is a datetime object before calling strftime
+        created_at_time = msg.get('created_at')
+        if hasattr(created_at_time, 'strftime'):
+            time_str = created_at_time.strftime('%H:%M:%S')
+            # Convert to Unix timestamp for Discord timestamp formatting
+            # Database stores naive UTC datetimes, so add UTC timezone before converting
+            if created_at_time.tzinfo is None:
+                created_at_time = created_at_time.replace(tzinfo=timezone.utc)
+            unix_timestamp = int(created_at_time.timestamp())
+            # Create Discord timestamp format that shows short time in reader's timezone
+            discord_timestamp = f"<t:{unix_timestamp}:t>"  # Short time format
+        else:
+            time_str = "Unknown Time"  # Fallback if created_at is not as expected
+            discord_timestamp = ""
+
+        author_name = msg.get('author_name', 'Unknown Author')
+        # Show who is being answered so the LLM can follow conversation threads
+        reply_to_author = msg.get('reply_to_author')
+        if reply_to_author:
+            author_name = f"{author_name} (replying to {reply_to_author})"
+        content = msg.get('content', '')
+        message_id = msg.get('id', '')
+        guild_id = msg.get('guild_id', '')
+        channel_id = msg.get('channel_id', '')
+        message_channel_name = msg.get('channel_name')
+        channel_prefix = ""
+        if message_channel_name and str(message_channel_name).lower() != str(channel_name).lower():
+            channel_prefix = f"#{message_channel_name} | "
+
+        # Generate Discord message link
+        message_link = ""
+        if message_id and channel_id:
+            message_link = generate_discord_message_link(guild_id, channel_id, message_id)
+
+        # Check if this message has scraped content from a URL
+        scraped_url = msg.get('scraped_url')
+        scraped_summary = msg.get('scraped_content_summary')
+        scraped_key_points = msg.get('scraped_content_key_points')
+
+        # Check if this message has image descriptions
+        image_descriptions = msg.get('image_descriptions')
+
+        # Format the message with the basic content, Discord timestamp and clickable Discord link
+        # Include both time_str (for LLM context) and discord_timestamp (for output formatting)
+        # Only include TIMESTAMP marker when timestamp is available
+        timestamp_marker = f" [TIMESTAMP:{discord_timestamp}]" if discord_timestamp else ""
+        if message_link:
+            # Format as clickable Discord link that the LLM will understand
+            message_text = f"[{time_str}]{timestamp_marker} {channel_prefix}{author_name}: {content} [Jump to message]({message_link})"
+        else:
+            message_text = f"[{time_str}]{timestamp_marker} {channel_prefix}{author_name}: {content}"
+
+        # If there are image descriptions, add them inline to the message
+        if image_descriptions:
+            try:
+                images = json.loads(image_descriptions)
+                if images and isinstance(images, list):
+                    if len(images) == 1:
+                        message_text += f" [Image: {images[0]['description']}]"
+                    else:
+                        message_text += " [Images:"
+                        for i, img in enumerate(images, 1):
+                            message_text += f" {i}. {img['description']}"
+                        message_text += "]"
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to parse image descriptions JSON: {image_descriptions}")
+
+        # If there's scraped content, add it to the message
+        if scraped_url and scraped_summary:
+            link_content = f"\n\n[Link Content from {scraped_url}]:\n{scraped_summary}"
+            message_text += link_content
+
+            # If there are key points, add them too
+            if scraped_key_points:
+                try:
+                    key_points = json.loads(scraped_key_points)
+                    if key_points and isinstance(key_points, list):
+                        message_text += "\n\nKey points:"
+                        for point in key_points:
+                            bullet_point = f"\n- {point}"
+                            message_text += bullet_point
+                except json.JSONDecodeError:
+                    logger.warning(f"Failed to parse key points JSON: {scraped_key_points}")
+
+        formatted_messages_text.append(message_text)
+
+    return formatted_messages_text
+
+def format_messages_for_summary(messages, channel_name):
+    """
+    Filter out commands and format the rest exactly as call_llm_for_summary would.
+
+    Args:
+        messages (list): Message dictionaries
+        channel_name (str): Name of the channel being summarized
+
+    Returns:
+        list: Formatted message texts, in order
+    """
+    return _format_summary_messages(_filter_summary_messages(messages), channel_name)
+
+def format_summary(summary: str) -> str:
+    """Apply the Discord formatting used for channel summaries to raw summary text."""
+    formatted_summary = DiscordFormatter.format_llm_response(summary)
+    return DiscordFormatter._enhance_summary_sections(formatted_summary)
+
+async def call_llm_for_summary(messages, channel_name, date, hours=24, bucket_notes=None, on_delta=None):
     """
     Call the LLM API to summarize a list of messages from a channel
 
@@ -428,122 +807,61 @@ async def call_llm_for_summary(messages, channel_name, date, hours=24):
         channel_name (str): Name of the channel
         date (datetime): Date of the messages
         hours (int): Number of hours the summary covers (default: 24)
+        bucket_notes (list, optional): (label, text) pairs covering the earlier part of the window
+            in order, each either stored notes or formatted raw messages (see incremental_summary);
+            `messages` then holds only the most recent messages
+        on_delta (callable, optional): Streams the raw summary to this coroutine as it is
+            generated; format each posted message with format_summary
 
     Returns:
         str: The LLM's summary or an error message
     """
     try:
         # Filter out command messages but include bot responses
-        filtered_messages = [
-            msg for msg in messages
-            if not msg.get('is_command', False) and  # Use .get for safety
-               not (msg.get('content', '').startswith('/sum-day')) and  # Explicitly filter out /sum-day commands
-               not (msg.get('content', '').startswith('/sum-hr'))  # Explicitly filter out /sum-hr commands
-        ]
+        filtered_messages = _filter_summary_messages(messages)
 
-        if not filtered_messages:
+        if not filtered_messages and not bucket_notes:
             time_period = "24 hours" if hours == 24 else f"{hours} hours" if hours != 1 else "1 hour"
             return f"No messages found in #{channel_name} for the past {time_period}."
 
-        # Prepare the messages for summarization
-        formatted_messages_text = []
-        for msg in filtered_messages:
-            # Ensure created_at is a datetime object before calling strftime
-            created_at_time = msg.get('created_at')
-            if hasattr(created_at_time, 'strftime'):
-                time_str = created_at_time.strftime('%H:%M:%S')
-                # Convert to Unix timestamp for Discord timestamp formatting
-                # Database stores naive UTC datetimes, so add UTC timezone before converting
-                if created_at_time.tzinfo is None:
-                    created_at_time = created_at_time.replace(tzinfo=timezone.utc)
-                unix_timestamp = int(created_at_time.timestamp())
-                # Create Discord timestamp format that shows short time in reader's timezone
-                discord_timestamp = f"<t:{unix_timestamp}:t>"  # Short time format
-            else:
-                time_str = "Unknown Time"  # Fallback if created_at is not as expected
-                discord_timestamp = ""
-
-            author_name = msg.get('author_name', 'Unknown Author')
-            content = msg.get('content', '')
-            message_id = msg.get('id', '')
-            guild_id = msg.get('guild_id', '')
-            channel_id = msg.get('channel_id', '')
-            message_channel_name = msg.get('channel_name')
-            channel_prefix = ""
-            if message_channel_name and str(message_channel_name).lower() != str(channel_name).lower():
-                channel_prefix = f"#{message_channel_name} | "
-
-            # Generate Discord message link
-            message_link = ""
-            if message_id and channel_id:
-                message_link = generate_discord_message_link(guild_id, channel_id, message_id)
-
-            # Check if this message has scraped content from a URL
-            scraped_url = msg.get('scraped_url')
-            scraped_summary = msg.get('scraped_content_summary')
-            scraped_key_points = msg.get('scraped_content_key_points')
-
-            # Check if this message has image descriptions
-            image_descriptions = msg.get('image_descriptions')
-
-            # Format the message with the basic content, Discord timestamp and clickable Discord link
-            # Include both time_str (for LLM context) and discord_timestamp (for output formatting)
-            # Only include TIMESTAMP marker when timestamp is available
-            timestamp_marker = f" [TIMESTAMP:{discord_timestamp}]" if discord_timestamp else ""
-            if message_link:
-                # Format as clickable Discord link that the LLM will understand
-                message_text = f"[{time_str}]{timestamp_marker} {channel_prefix}{author_name}: {content} [Jump to message]({message_link})"
-            else:
-                message_text = f"[{time_str}]{timestamp_marker} {channel_prefix}{author_name}: {content}"
-
-            # If there are image descriptions, add them inline to the message
-            if image_descriptions:
-                try:
-                    images = json.loads(image_descriptions)
-                    if images and isinstance(images, list):
-                        if len(images) == 1:
-                            message_text += f" [Image: {images[0]['description']}]"
-                        else:
-                            message_text += " [Images:"
-                            for i, img in enumerate(images, 1):
-                                message_text += f" {i}. {img['description']}"
-                            message_text += "]"
-                except json.JSONDecodeError:
-                    logger.warning(f"Failed to parse image descriptions JSON: {image_descriptions}")
+        formatted_messages_text = _format_summary_messages(filtered_messages, channel_name)
 
-            # If there's scraped content, add it to the message
-            if scraped_url and scraped_summary:
-                link_content = f"\n\n[Link Content from {scraped_url}]:\n{scraped_summary}"
-                message_text += link_content
-
-                # If there are key points, add them too
-                if scraped_key_points:
-                    try:
-                        key_points = json.loads(scraped_key_points)
-                        if key_points and isinstance(key_points, list):
-                            message_text += "\n\nKey points:"
-                            for point in key_points:
-                                bullet_point = f"\n- {point}"
-                                message_text += bullet_point
-                    except json.JSONDecodeError:
-                        logger.warning(f"Failed to parse key points JSON: {scraped_key_points}")
-
-            formatted_messages_text.append(message_text)
+        time_period = "24 hours" if hours == 24 else f"{hours} hours" if hours != 1 else "1 hour"
+        summary_subject = "all active channels" if channel_name == "all active channels" else f"#{channel_name} channel"
 
-        # Join the messages with newlines
         messages_text = "\n".join(formatted_messages_text)
+        input_tokens = estimate_tokens(messages_text)
+        if bucket_notes:
+            # Earlier hours arrive pre-summarized, so the raw messages only get a share of the budget
+            sections = [f"### {label}\n{notes}" for label, notes in bucket_notes]
+            if estimate_tokens("\n\n".join(sections)) + input_tokens > config.SUMMARY_CHUNK_TOKENS:
+                sections = await _map_summary_chunks(
+                    chunk_texts(sections, config.SUMMARY_CHUNK_TOKENS), summary_subject, time_period, source="notes"
+                )
+            notes_text = "Earlier hours, in order (extracted notes, or the raw messages for quiet hours):\n\n" + \
+                "\n\n".join(sections)
+        else:
+            notes_text = ""
+
+        if input_tokens > config.SUMMARY_CHUNK_TOKENS:
+            # Too large for one call: summarize chunks concurrently, then reduce the notes
+            starts = [
+                is_conversation_start(msg, filtered_messages[i - 1] if i else None)
+                for i, msg in enumerate(filtered_messages)
+            ]
+            chunks = chunk_texts(formatted_messages_text, config.SUMMARY_CHUNK_TOKENS, starts)
+            logger.info(
+                f"Summary input for #{channel_name} is ~{input_tokens} tokens; "
+                f"map-reducing over {len(chunks)} chunks"
+            )
+            notes = await _map_summary_chunks(chunks, summary_subject, time_period)
+            messages_text = "Notes extracted from consecutive parts of the conversation, in order:\n\n" + \
+                "\n\n".join(f"### Part {i}\n{note}" for i, note in enumerate(notes, 1))
 
-        # Truncate input if it's too long to avoid token limits
-        # Rough estimate: 1 token ≈ 4 characters, leaving room for prompt and response
-        max_input_length = 60000  # ~15k tokens for input, allowing room for system prompt and output
-        if len(messages_text) > max_input_length:
-            original_length = len('\n'.join(formatted_messages_text))
-            messages_text = messages_text[:max_input_length] + "\n\n[Messages truncated due to length...]"
-            logger.info(f"Truncated conversation input from {original_length} to {len(messages_text)} characters")
+        if notes_text:
+            messages_text = notes_text + (f"\n\nMost recent messages:\n{messages_text}" if messages_text else "")
 
         # Create the prompt for the LLM
-        time_period = "24 hours" if hours == 24 else f"{hours} hours" if hours != 1 else "1 hour"
-        summary_subject = "all active channels" if channel_name == "all active channels" else f"#{channel_name} channel"
         prompt = f"""Summarize {summary_subject} for the past {time_period}. Extract SIGNAL from noise.
 
 PRIORITIZE (in order):
@@ -576,12 +894,13 @@ Skip sections if nothing noteworthy. No fluff. No introductions. Start directly
         logger.info(f"Calling OpenRouter model {config.llm_model} for channel summary: #{channel_name} for the past {time_period}")
 
         # Make the API request with OpenRouter (higher token limit for summaries)
-        completion = await llm_client.chat.completions.create(
+        summary = await _chat_completion_text(
+            'channel_summary', LLM_CACHE_TTL_CHANNEL_SUMMARY, on_delta,
             model=config.llm_model,
             messages=[
                 {
                     "role": "system",
-                    "content": "You summarize Discord tech community conversations. Focus on extracting high-signal content: tech news, AI/coding tips, dev tools, hacks, insights. Skip social chatter and small talk. Be extremely concise - one line per bullet point. Use backticks for usernames. Preserve Discord message links as [source](url). CRITICAL: Never use markdown code blocks (```). Use plain text with bold and headers."
+                    "content": SUMMARY_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -592,14 +911,8 @@ Skip sections if nothing noteworthy. No fluff. No introductions. Start directly
             temperature=0.5   # Lower temperature for more focused summaries
         )
 
-        # Extract the response
-        summary = completion.choices[0].message.content
-
         # Apply Discord formatting enhancements to the summary
-        formatted_summary = DiscordFormatter.format_llm_response(summary)
-
-        # Enhance specific sections in the summary
-        formatted_summary = DiscordFormatter._enhance_summary_sections(formatted_summary)
+        formatted_summary = format_summary(summary)
 
         logger.info(f"OpenRouter summary received: {formatted_summary[:50]}{'...' if len(formatted_summary) > 50 else ''}")
 
@@ -612,6 +925,106 @@ Skip sections if nothing noteworthy. No fluff. No introductions. Start directly
         logger.error(f"Error calling OpenRouter for summary: {str(e)}", exc_info=True)
         return "Sorry, I encountered an error while generating the summary. Please try again later."
 
+async def _map_summary_chunks(
+    chunks: List[List[str]],
+    summary_subject: str,
+    time_period: str,
+    source: str = "messages",
+    allow_partial: bool = True
+) -> List[str]:
+    """
+    Extract summary notes from each chunk concurrently (bounded by SUMMARY_MAP_CONCURRENCY).
+    If the combined notes are still too large for one call, they are chunked and condensed again.
+
+    Args:
+        chunks (List[List[str]]): Chunks of formatted messages, in order
+        summary_subject (str): What is being summarized, e.g. "#general channel"
+        time_period (str): Human-readable window, e.g. "24 hours"
+        source (str): What the chunks contain ("messages" or "notes")
+        allow_partial (bool): Mark failed chunks in the notes instead of raising
+
+    Returns:
+        List[str]: One block of notes per chunk, in order
+
+    Raises:
+        RuntimeError: If every chunk failed to summarize, or any chunk did and allow_partial is False
+    """
+    semaphore = asyncio.Semaphore(config.SUMMARY_MAP_CONCURRENCY)
+
+    async def extract(index: int, texts: List[str]) -> Optional[str]:
+        prompt = f"""Below is part {index} of {len(chunks)} of the {source} from {summary_subject} for the past {time_period}.
+Extract the high-signal items: tech news, launches, AI/ML developments, coding tips, dev tools, tutorials, useful links and technical discussions. Skip greetings and social chatter.
+Write one bullet per item: **Topic** - brief context - `username` TIMESTAMP [source](discord_message_link)
+Copy <t:unix:t> timestamps and Discord message links exactly as they appear. List shared links with a one-line description.
+If nothing is noteworthy, reply with "Nothing noteworthy."
+
+{chr(10).join(texts)}"""
+        async with semaphore:
+            try:
+                return await _chat_completion_text(
+                    'summary_chunk', LLM_CACHE_TTL_CHANNEL_SUMMARY,
+                    model=config.llm_model,
+                    messages=[
+                        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=SUMMARY_MAP_MAX_TOKENS,
+                    temperature=0.3
+                )
+            except Exception as e:
+                logger.error(f"Error summarizing part {index}/{len(chunks)} of {summary_subject}: {str(e)}", exc_info=True)
+                return None
+
+    results = await asyncio.gather(*(extract(i, texts) for i, texts in enumerate(chunks, 1)))
+    failed = sum(note is None for note in results)
+    if failed == len(results) or (failed and not allow_partial):
+        raise RuntimeError(f"{failed} of {len(chunks)} summary chunks failed")
+
+    # Keep failed parts visible to the final summary rather than silently dropping them
+    notes = [
+        note if note is not None else f"[Part {i} could not be summarized]"
+        for i, note in enumerate(results, 1)
+    ]
+
+    if len(notes) > 1 and estimate_tokens("\n\n".join(notes)) > config.SUMMARY_CHUNK_TOKENS:
+        logger.info(f"Condensing {len(notes)} partial summaries for {summary_subject}")
+        return await _map_summary_chunks(
+            chunk_texts(notes, config.SUMMARY_CHUNK_TOKENS), summary_subject, time_period,
+            source="notes", allow_partial=allow_partial
+        )
+    return notes
+
+async def summarize_messages_to_notes(messages, channel_name: str, period_label: str) -> Optional[str]:
+    """
+    Extract summary notes for a slice of a channel (e.g. one hour) that can be stored and later
+    combined by call_llm_for_summary(bucket_notes=...).
+
+    Args:
+        messages (list): Message dictionaries for the slice
+        channel_name (str): Name of the channel
+        period_label (str): Human-readable period the slice covers, e.g. "1 hour"
+
+    Returns:
+        Optional[str]: The notes, or None if any part failed (so nothing partial gets stored)
+    """
+    filtered_messages = _filter_summary_messages(messages)
+    if not filtered_messages:
+        return "Nothing noteworthy."
+
+    starts = [
+        is_conversation_start(msg, filtered_messages[i - 1] if i else None)
+        for i, msg in enumerate(filtered_messages)
+    ]
+    chunks = chunk_texts(
+        _format_summary_messages(filtered_messages, channel_name), config.SUMMARY_CHUNK_TOKENS, starts
+    )
+    try:
+        notes = await _map_summary_chunks(chunks, f"#{channel_name} channel", period_label, allow_partial=False)
+    except RuntimeError as e:
+        logger.warning(f"Could not extract summary notes for #{channel_name}: {e}")
+        return None
+    return "\n".join(notes)
+
 async def summarize_url_with_exa(url: str) -> Optional[str]:
     """Fetch and summarize a URL using Exa's /contents endpoint.
 
@@ -630,13 +1043,12 @@ async def summarize_url_with_exa(url: str) -> Optional[str]:
 
         # Use Exa /contents to fetch and summarize in one call
         summary_query = "Provide a concise summary (2-3 sentences) followed by 3-5 key points as bullet points."
-        results = await get_exa_contents([url], summary_query)
+        result = await get_exa_content(url, summary_query)
 
-        if not results:
+        if not result:
             logger.warning(f"No content returned from Exa for URL: {url}")
             return None
 
-        result = results[0]
         summary = result.get("summary", "")
         text = result.get("text", "")
 
@@ -685,10 +1097,10 @@ async def summarize_scraped_content(markdown_content: str, url: str, use_exa: bo
         if use_exa:
             logger.info(f"Using Exa /contents to summarize URL: {url}")
             summary_query = "Provide a concise summary (2-3 sentences) followed by 3-5 key points as bullet points."
-            results = await get_exa_contents([url], summary_query)
+            result = await get_exa_content(url, summary_query)
 
-            if results and results[0].get("summary"):
-                summary = results[0]["summary"]
+            if result and result.get("summary"):
+                summary = result["summary"]
                 formatted_response = DiscordFormatter.format_llm_response(summary)
                 logger.info(f"Exa summary: {formatted_response[:50]}...")
                 return formatted_response
@@ -714,7 +1126,8 @@ Do not include an introductory paragraph or title.
 Keep the summary brief and focused on the most important information."""
 
         # Make the API request using OpenRouter
-        completion = await llm_client.chat.completions.create(
+        response_text = await _chat_completion_text(
+            'url_summary', LLM_CACHE_TTL_URL_SUMMARY,
             model=config.llm_model,
             messages=[
                 {
@@ -729,9 +1142,6 @@ Keep the summary brief and focused on the most important information."""
             max_tokens=500,  # Enough for a concise summary with key points
             temperature=0.3   # Lower temperature for more focused and consistent summaries
         )
-
-        # Extract the response
-        response_text = completion.choices[0].message.content
         logger.info(f"OpenRouter summary received: {response_text[:50]}{'...' if len(response_text) > 50 else ''}")
 
         # Clean up the response
@@ -761,6 +1171,93 @@ Keep the summary brief and focused on the most important information."""
         logger.error(f"Error summarizing content from URL {url}: {str(e)}", exc_info=True)
         return None
 
+async def summarize_youtube_transcript(segments: List[Dict[str, Any]], url: str) -> Optional[str]:
+    """
+    Summarize a video transcript section by section, with a timestamped link per section.
+
+    The transcript is split into at most YOUTUBE_MAX_SECTIONS sections of about
+    YOUTUBE_SECTION_TOKENS tokens; the sections are summarized concurrently and the
+    notes merged into an overview, so the cost stays bounded for any video length.
+    Short transcripts are summarized in one call.
+
+    Args:
+        segments (List[Dict[str, Any]]): Transcript segments with 'text', 'start' and 'duration'
+        url (str): The video URL
+
+    Returns:
+        Optional[str]: The formatted summary, or None if summarization failed
+    """
+    video_id = extract_video_id(url)
+    sections = split_transcript(segments, config.YOUTUBE_SECTION_TOKENS, config.YOUTUBE_MAX_SECTIONS)
+    if not video_id or len(sections) <= 1:
+        return await summarize_scraped_content(' '.join(section['text'] for section in sections), url)
+
+    logger.info(f"Summarizing {len(sections)} transcript sections of {url}")
+    semaphore = asyncio.Semaphore(config.SUMMARY_MAP_CONCURRENCY)
+
+    async def summarize_section(index: int, section: Dict[str, Any]) -> Optional[str]:
+        prompt = f"""Below is part {index} of {len(sections)} of the transcript of a YouTube video ({url}), from {format_timestamp(section['start'])} to {format_timestamp(section['end'])}.
+On the first line, write a short title for this part (at most 8 words). Then write 1-3 bullet points (use - for bullets) on what is said. Plain text only.
+
+{section['text']}"""
+        async with semaphore:
+            try:
+                completion = await llm_client.chat.completions.create(
+                    model=config.llm_model,
+                    messages=[
+                        {"role": "system", "content": "You summarize video transcripts concisely. Respond with plain text only. CRITICAL: Never wrap your response in a markdown code block (```)."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=YOUTUBE_SECTION_MAX_TOKENS,
+                    temperature=0.3
+                )
+                return (completion.choices[0].message.content or '').strip() or None
+            except Exception as e:
+                logger.error(f"Error summarizing transcript part {index}/{len(sections)} of {url}: {str(e)}", exc_info=True)
+                return None
+
+    notes = await asyncio.gather(*(summarize_section(i, section) for i, section in enumerate(sections, 1)))
+    if not any(notes):
+        return None
+
+    section_notes = "\n\n".join(
+        f"[{format_timestamp(section['start'])}] {note}"
+        for section, note in zip(sections, notes) if note
+    )
+    overview = None
+    try:
+        completion = await llm_client.chat.completions.create(
+            model=config.llm_model,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that summarizes web content concisely. Create brief summaries with bullet points. Do not use JSON format. Respond with plain text only. CRITICAL: Never wrap your response in a markdown code block (```). Use plain text with inline formatting only."},
+                {"role": "user", "content": f"""Below are notes on consecutive parts of a YouTube video ({url}), each starting with its timestamp.
+
+{section_notes}
+
+Provide a concise summary of the whole video (2-3 sentences) followed by 3-5 key points as bullet points.
+Format your response as plain text with bullet points (use - for bullets).
+Do not include an introductory paragraph or title."""}
+            ],
+            max_tokens=500,
+            temperature=0.3
+        )
+        overview = (completion.choices[0].message.content or '').strip()
+    except Exception as e:
+        logger.error(f"Error merging transcript summaries for {url}: {str(e)}", exc_info=True)
+
+    section_lines = []
+    for section, note in zip(sections, notes):
+        if not note:
+            continue
+        title = note.splitlines()[0].strip().lstrip('-*#• ').strip()
+        title = re.sub(r'^(?:\*\*)?title:?(?:\*\*)?\s*', '', title, flags=re.IGNORECASE).strip('* ')
+        section_lines.append(
+            f"- [{format_timestamp(section['start'])}]({timestamp_url(video_id, section['start'])}) {title}"
+        )
+
+    summary = (f"{overview}\n\n" if overview else "") + "**Sections**\n" + "\n".join(section_lines)
+    return DiscordFormatter.format_llm_response(summary)
+
 async def analyze_messages_for_points(messages, max_points=50, engagement_metrics=None):
     """
     Call the LLM API to analyze messages and determine point awards based on community value.
@@ -1219,16 +1716,21 @@ Make sure the JSON is valid and parseable. Only award points to users who made m
 async def call_llm_with_database_context(
     query: str,
     messages: list,
-    channel_name: str = "general"
+    channel_name: str = "general",
+    on_delta: Optional[DeltaCallback] = None
 ) -> str:
     """
     Answer a question using context from database messages.
     Uses OpenRouter for LLM processing.
 
+    Pick the messages with semantic_index.retrieve_question_context, so every
+    caller gets the same hybrid keyword and semantic retrieval as /ask.
+
     Args:
         query: The user's question
         messages: List of message dicts from the database
         channel_name: Name of the channel for context
+        on_delta: Streams the raw answer to this coroutine as it is generated
 
     Returns:
         str: The LLM's response
@@ -1306,7 +1808,8 @@ Instructions:
 - If multiple people discussed the topic, summarize their different perspectives"""
 
         # Use OpenRouter for database context queries
-        completion = await llm_client.chat.completions.create(
+        response = await _chat_completion_text(
+            'database_query', LLM_CACHE_TTL_DATABASE_QUERY, on_delta,
             model=config.llm_model,
             messages=[
                 {
@@ -1322,8 +1825,6 @@ Instructions:
             temperature=0.5
         )
 
-        response = completion.choices[0].message.content
-
         formatted_response = DiscordFormatter.format_llm_response(response)
         logger.info("OpenRouter database context query answered successfully")
 
@@ -0,0 +1,124 @@
+"""
+Micro-batching of concurrent requests to APIs that accept several items per call.
+
+Exa's /contents endpoint takes a list of URLs, but the bot asks for one URL at a
+time, so a burst of 🔍 reactions or a message with several links turns into one
+round trip per URL. MicroBatcher collects the items submitted within a short
+window (or until the batch is full) into one call and routes each item's result
+back to whoever submitted it.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Set up logging
+logger = logging.getLogger('discord_bot.micro_batch')
+
+# fetch_batch(group, items) -> {item: result or exception}; items missing from the
+# mapping resolve to None
+BatchFetcher = Callable[[Hashable, Sequence[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class MicroBatcher:
+    """
+    Coalesce items submitted close together into batched calls.
+
+    Items are grouped by a key (e.g. the request options) and only items in the same
+    group share a call. A batch is sent when the window after its first item elapses or
+    when it reaches max_size, whichever comes first. Duplicate items in a batch are sent
+    once. A result that is an exception is raised only in that item's callers; if the
+    whole call fails, every caller in the batch gets the error.
+    """
+
+    def __init__(self, name: str, fetch_batch: BatchFetcher, window: float, max_size: int):
+        self.name = name
+        self.fetch_batch = fetch_batch
+        self.window = max(0.0, window)
+        self.max_size = max(1, max_size)
+        self._pending: Dict[Hashable, List[Tuple[Hashable, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+        self.metrics: Dict[str, int] = {
+            'items': 0,
+            'batches': 0,
+            'max_batch_size': 0,
+            'failed_batches': 0,
+            'failed_items': 0,
+        }
+
+    async def submit(self, group: Hashable, item: Hashable) -> Optional[Any]:
+        """
+        Queue an item for the next batch of its group and wait for its result.
+
+        Args:
+            group (Hashable): Items are only batched with items of the same group
+            item (Hashable): The item to fetch, e.g. a URL
+
+        Returns:
+            Optional[Any]: The item's result, or None if the batch returned nothing for it
+
+        Raises:
+            Exception: The item's own error, or the error of the whole batch call
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.metrics['items'] += 1
+
+        pending = self._pending.setdefault(group, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_size:
+            self._flush(group)
+        elif group not in self._timers:
+            self._timers[group] = loop.call_later(self.window, self._flush, group)
+        return await future
+
+    def _flush(self, group: Hashable) -> None:
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(group, [])
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run_batch(group, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, group: Hashable, batch: List[Tuple[Hashable, asyncio.Future]]) -> None:
+        items = list(dict.fromkeys(item for item, _ in batch))
+        self.metrics['batches'] += 1
+        self.metrics['max_batch_size'] = max(self.metrics['max_batch_size'], len(items))
+        logger.debug(f"{self.name}: sending batch of {len(items)} item(s) for {len(batch)} request(s)")
+
+        try:
+            results = await self.fetch_batch(group, items)
+        except Exception as e:
+            self.metrics['failed_batches'] += 1
+            logger.warning(f"{self.name}: batch of {len(items)} item(s) failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for item, future in batch:
+            if future.done():
+                continue  # The caller gave up waiting
+            result = results.get(item)
+            if isinstance(result, BaseException):
+                self.metrics['failed_items'] += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the batching metrics.
+
+        Returns:
+            Dict[str, Any]: Counters plus the average batch size and the round trips saved
+        """
+        snapshot: Dict[str, Any] = dict(self.metrics)
+        batches = self.metrics['batches']
+        snapshot['avg_batch_size'] = round(self.metrics['items'] / batches, 2) if batches else 0.0
+        snapshot['round_trips_saved'] = max(0, self.metrics['items'] - batches)
+        return snapshot
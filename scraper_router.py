@@ -0,0 +1,270 @@
+"""
+Scraper router for the Discord bot.
+
+Each scraping backend (YouTube transcripts, Apify for X posts, Firecrawl, Exa
+/contents) is registered as a ScraperProvider with a precompiled host matcher and a
+common async fetch(url) -> ScrapeResult contract. scrape_url() classifies a URL once,
+tries the providers specific to its site, then falls back to the general-purpose
+ones, ordered by their observed success rate and latency.
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+
+import config
+
+# Set up logging
+logger = logging.getLogger('discord_bot.scraper_router')
+
+# Weight of the newest sample in the per-provider latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+@dataclass
+class ScrapeResult:
+    """Content scraped from a URL, as markdown, plus whatever structured data the provider had."""
+    url: str
+    provider: str
+    markdown: str
+    raw_data: Optional[Dict[str, Any]] = None
+    latency_ms: float = 0.0
+
+
+@dataclass
+class ProviderStats:
+    """Running success and latency figures for one provider."""
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    avg_latency_ms: float = 0.0
+
+    def record(self, success: bool, latency_ms: float) -> None:
+        self.attempts += 1
+        if success:
+            self.successes += 1
+        else:
+            self.failures += 1
+        if self.attempts == 1:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms += LATENCY_EWMA_ALPHA * (latency_ms - self.avg_latency_ms)
+
+    @property
+    def success_rate(self) -> float:
+        """Success rate with a uniform prior, so untried providers start at 0.5 rather than 0 or 1."""
+        return (self.successes + 1) / (self.attempts + 2)
+
+    def expected_cost_ms(self) -> float:
+        """Expected time spent per successful scrape; lower is a better fallback."""
+        return max(self.avg_latency_ms, 1.0) / self.success_rate
+
+
+@dataclass
+class ScraperProvider:
+    """
+    A scraping backend.
+
+    Attributes:
+        name: Provider name, recorded with cached scrapes
+        fetch: Scrapes one URL; returns None (or raises) on failure
+        kind: The kind of URL the provider specializes in ('youtube', 'twitter'), or None
+            for a general-purpose provider that can fall back for any URL
+        hosts: Precompiled matcher for the hostnames of that kind
+        enabled: Whether the provider is usable (e.g. its API key is configured)
+    """
+    name: str
+    fetch: Callable[[str], Awaitable[Optional[ScrapeResult]]]
+    kind: Optional[str] = None
+    hosts: Optional[Pattern[str]] = None
+    enabled: Callable[[], bool] = field(default=lambda: True)
+    stats: ProviderStats = field(default_factory=ProviderStats)
+
+
+_providers: List[ScraperProvider] = []
+
+
+def register_provider(provider: ScraperProvider) -> None:
+    """
+    Add a provider to the registry, replacing any provider with the same name.
+
+    Args:
+        provider (ScraperProvider): The provider to register
+    """
+    _providers[:] = [p for p in _providers if p.name != provider.name]
+    _providers.append(provider)
+    _classify_host.cache_clear()
+
+
+def get_provider_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get per-provider scrape statistics.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: provider name -> attempts, successes, failures, success_rate, avg_latency_ms
+    """
+    return {
+        p.name: {
+            'attempts': p.stats.attempts,
+            'successes': p.stats.successes,
+            'failures': p.stats.failures,
+            'success_rate': round(p.stats.success_rate, 3),
+            'avg_latency_ms': round(p.stats.avg_latency_ms, 1),
+        }
+        for p in _providers
+    }
+
+
+@lru_cache(maxsize=1024)
+def _classify_host(host: str) -> Optional[str]:
+    for provider in _providers:
+        if provider.kind and provider.hosts is not None and provider.hosts.match(host):
+            return provider.kind
+    return None
+
+
+def classify_url(url: str) -> str:
+    """
+    Classify a URL by the provider kind that handles its host.
+
+    Args:
+        url (str): The URL to classify
+
+    Returns:
+        str: 'youtube', 'twitter', ... or 'web' for everything else
+    """
+    try:
+        host = (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return 'web'
+    return _classify_host(host) or 'web'
+
+
+def provider_chain(url: str) -> Tuple[str, List[ScraperProvider]]:
+    """
+    Classify a URL and list the enabled providers to try for it, in order.
+
+    Specialized providers for the URL's kind come first, in registration order; the
+    general-purpose fallbacks follow, cheapest expected cost first.
+
+    Args:
+        url (str): The URL to scrape
+
+    Returns:
+        Tuple[str, List[ScraperProvider]]: The URL kind and the providers to try
+    """
+    kind = classify_url(url)
+    specialized = [p for p in _providers if p.kind == kind and p.enabled()]
+    fallbacks = sorted(
+        (p for p in _providers if p.kind is None and p.enabled()),
+        key=lambda p: p.stats.expected_cost_ms()
+    )
+    return kind, specialized + fallbacks
+
+
+async def scrape_url(url: str) -> Optional[ScrapeResult]:
+    """
+    Scrape a URL with the first provider in its chain that returns content.
+
+    Args:
+        url (str): The URL to scrape
+
+    Returns:
+        Optional[ScrapeResult]: The scraped content, or None if every provider failed
+    """
+    kind, chain = provider_chain(url)
+    if not chain:
+        logger.warning(f"No scraper available for {kind} URL: {url}")
+        return None
+
+    for provider in chain:
+        start = time.perf_counter()
+        try:
+            result = await provider.fetch(url)
+        except Exception as e:
+            logger.warning(f"Scraper {provider.name} failed for {url}: {str(e)}")
+            result = None
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        success = bool(result and result.markdown)
+        provider.stats.record(success, latency_ms)
+        if success:
+            result.latency_ms = latency_ms
+            logger.info(f"Scraped {kind} URL with {provider.name} in {latency_ms:.0f}ms: {url}")
+            return result
+        logger.info(f"Scraper {provider.name} returned no content for {url}; trying next provider")
+
+    logger.warning(f"All scrapers failed for {kind} URL: {url}")
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Built-in providers. Handler modules are imported lazily to avoid import cycles
+# (llm_handler imports this module).
+# ---------------------------------------------------------------------------
+
+async def _fetch_youtube(url: str) -> Optional[ScrapeResult]:
+    from youtube_handler import scrape_youtube_content
+    scraped = await scrape_youtube_content(url)
+    if not scraped or (scraped.get('raw_data') or {}).get('error'):
+        # No transcript (often still being generated); let the page scrapers try instead
+        return None
+    return ScrapeResult(url, 'youtube', scraped.get('markdown', ''), scraped.get('raw_data'))
+
+
+async def _fetch_apify(url: str) -> Optional[ScrapeResult]:
+    from apify_handler import extract_tweet_id, scrape_twitter_content
+    if not extract_tweet_id(url):
+        # Apify's tweet scraper only handles status URLs
+        return None
+    scraped = await scrape_twitter_content(url)
+    if not scraped:
+        return None
+    return ScrapeResult(url, 'apify', scraped.get('markdown', ''), scraped.get('raw_data'))
+
+
+async def _fetch_firecrawl(url: str) -> Optional[ScrapeResult]:
+    from firecrawl_handler import scrape_url_content
+    markdown = await scrape_url_content(url)
+    if not isinstance(markdown, str):
+        return None
+    return ScrapeResult(url, 'firecrawl', markdown)
+
+
+async def _fetch_exa(url: str) -> Optional[ScrapeResult]:
+    from llm_handler import get_exa_content
+    result = await get_exa_content(url)
+    if not result or not result.get('text'):
+        return None
+    title = result.get('title')
+    markdown = f"# {title}\n\n{result['text']}" if title else result['text']
+    return ScrapeResult(url, 'exa', markdown, result)
+
+
+register_provider(ScraperProvider(
+    name='youtube',
+    fetch=_fetch_youtube,
+    kind='youtube',
+    hosts=re.compile(r'^(?:www\.|m\.|music\.)?(?:youtube\.com|youtu\.be|youtube-nocookie\.com)$'),
+))
+register_provider(ScraperProvider(
+    name='apify',
+    fetch=_fetch_apify,
+    kind='twitter',
+    hosts=re.compile(r'^(?:www\.|mobile\.)?(?:twitter\.com|x\.com)$'),
+    enabled=lambda: bool(getattr(config, 'apify_api_token', None)),
+))
+register_provider(ScraperProvider(
+    name='firecrawl',
+    fetch=_fetch_firecrawl,
+    enabled=lambda: bool(getattr(config, 'firecrawl_api_key', None)),
+))
+register_provider(ScraperProvider(
+    name='exa',
+    fetch=_fetch_exa,
+    enabled=lambda: bool(getattr(config, 'exa_api_key', None)),
+))
@@ -0,0 +1,527 @@
+"""
+Semantic retrieval index for the Discord bot.
+
+Embeds stored messages (content plus any scraped link summary) into vectors kept in
+the message_embeddings table, and combines vector similarity with the FTS keyword
+search to pick the messages sent to the LLM for /ask.
+
+Embedding uses a local sentence-transformers model when EMBEDDING_MODEL is set and
+the package is installed, otherwise a dependency-free hashing vectorizer. Search is
+brute force over the guild's newest SEARCH_MAX_MESSAGES vectors, vectorized with
+NumPy when it is available; older messages are still reachable by keyword search.
+
+New and re-scraped messages are embedded by a background indexer, woken whenever
+the ingestion queue stores messages; it works through any backlog (such as every
+message queued by the migration) one batch at a time, newest first. /ask only
+embeds a small capped batch inline so a large backlog never lands on the request.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+import math
+import re
+import threading
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+try:
+    from sentence_transformers import SentenceTransformer  # type: ignore
+except Exception:
+    SentenceTransformer = None  # type: ignore
+
+import config
+import database
+
+# Set up logging
+logger = logging.getLogger('discord_bot.semantic_index')
+
+# Dimensionality of the hashing embedder
+HASHING_DIMENSIONS = 512
+
+# Messages embedded per update_index() batch
+EMBED_BATCH_SIZE = 256
+
+# Most messages /ask embeds inline before searching; the background indexer does the rest
+ASK_CATCHUP_MESSAGES = 64
+
+# Wait after a wake-up so a burst of writes is embedded as one batch
+INDEXER_DEBOUNCE_SECONDS = 1.0
+
+# Longest the background indexer sleeps between checks for pending messages
+INDEXER_POLL_INTERVAL_SECONDS = 300.0
+
+# Most vectors semantic_search() scans per query, newest messages first
+SEARCH_MAX_MESSAGES = 10000
+
+# Keywords from a question used for full-text search
+MAX_QUESTION_KEYWORDS = 5
+
+# Fewer relevant messages than this are padded with recent ones, up to QUESTION_CONTEXT_PAD_TO
+QUESTION_CONTEXT_MIN_MESSAGES = 10
+QUESTION_CONTEXT_PAD_TO = 30
+
+# Reciprocal rank fusion constant; larger values flatten the contribution of top ranks
+RRF_K = 60
+
+# Words too common to carry meaning for the hashing embedder
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in', 'is', 'it',
+    'of', 'on', 'or', 'so', 'the', 'to', 'was', 'we', 'you', 'i', 'me', 'my', 'do', 'did',
+    'what', 'when', 'where', 'which', 'who', 'how', 'that', 'this', 'with', 'from', 'have',
+    'been', 'were', 'they', 'their', 'about', 'could', 'would', 'should', 'there', 'here',
+    'does', 'more', 'some', 'into', 'just', 'also', 'than', 'then', 'only', 'any', 'anyone',
+})
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder using signed feature hashing of unigrams and bigrams.
+    Vectors are L2-normalized, so a dot product is cosine similarity.
+    """
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = [t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One normalized vector per text
+        """
+        vectors = []
+        for text in texts:
+            counts: Dict[int, float] = {}
+            for feature in self._features(text):
+                # crc32 is stable across processes, unlike hash()
+                hashed = zlib.crc32(feature.encode('utf-8'))
+                index = hashed % self.dimensions
+                sign = 1.0 if (hashed >> 31) & 1 else -1.0
+                counts[index] = counts.get(index, 0.0) + sign
+
+            vector = [0.0] * self.dimensions
+            for index, value in counts.items():
+                # Sublinear term frequency so repeated words don't dominate
+                vector[index] = math.copysign(1.0 + math.log(abs(value)), value) if value else 0.0
+            vectors.append(_normalize(vector))
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """Embedder backed by a local sentence-transformers model, loaded on first use."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.name = f"st-{model_name}"
+        self._model = None
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One normalized vector per text
+        """
+        if self._model is None:
+            logger.info(f"Loading embedding model {self.model_name}")
+            self._model = SentenceTransformer(self.model_name, device='cpu')
+        vectors = self._model.encode(list(texts), normalize_embeddings=True)
+        return [list(map(float, vector)) for vector in vectors]
+
+
+_embedder = None
+
+
+def get_embedder():
+    """
+    Get the configured embedder, falling back to HashingEmbedder.
+
+    Returns:
+        The active embedder (has .name and .embed(texts))
+    """
+    global _embedder
+    if _embedder is None:
+        model_name = getattr(config, 'embedding_model', None)
+        if model_name and SentenceTransformer is not None:
+            _embedder = SentenceTransformerEmbedder(model_name)
+        else:
+            if model_name:
+                logger.warning("EMBEDDING_MODEL is set but sentence-transformers is not installed; using hashing embedder")
+            _embedder = HashingEmbedder()
+        logger.info(f"Semantic index using embedder {_embedder.name}")
+    return _embedder
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+def _to_blob(vector: Sequence[float]) -> bytes:
+    return array('f', vector).tobytes()
+
+
+def _from_blob(blob: bytes) -> array:
+    vector = array('f')
+    vector.frombytes(blob)
+    return vector
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    text = message.get('content') or ''
+    if message.get('scraped_content_summary'):
+        text += "\n" + message['scraped_content_summary']
+    return text
+
+
+# (database file, embedder name) pairs whose stale embeddings were already reset
+_reset_embedders = set()
+_reset_lock = threading.Lock()
+
+
+def update_index(batch_size: int = EMBED_BATCH_SIZE, max_messages: Optional[int] = None) -> int:
+    """
+    Embed pending messages (new, edited, re-scraped, or embedded by another
+    embedder), newest first. Blocking; run it in a thread from async code.
+
+    Args:
+        batch_size: Number of messages to embed per batch
+        max_messages: Stop after embedding this many messages; None embeds them all
+
+    Returns:
+        int: Number of messages embedded
+    """
+    embedder = get_embedder()
+    with _reset_lock:
+        key = (database.DB_FILE, embedder.name)
+        if key not in _reset_embedders:
+            reset = database.reset_stale_embeddings(embedder.name)
+            if reset:
+                logger.info(f"Queued {reset} messages embedded by another embedder for re-embedding")
+            _reset_embedders.add(key)
+
+    total = 0
+    while max_messages is None or total < max_messages:
+        limit = batch_size if max_messages is None else min(batch_size, max_messages - total)
+        pending = database.get_messages_pending_embedding(limit=limit)
+        if not pending:
+            break
+
+        vectors = embedder.embed([_message_text(message) for message in pending])
+        stored = database.store_message_embeddings([
+            (message['id'], embedder.name, len(vector), _to_blob(vector))
+            for message, vector in zip(pending, vectors)
+        ])
+        if not stored:
+            break
+        total += len(pending)
+
+    if total:
+        logger.info(f"Embedded {total} messages for semantic search")
+    return total
+
+
+class SemanticIndexer:
+    """
+    Background task that keeps the semantic index up to date.
+
+    Registered as a database write listener, so each flush of the ingestion queue
+    (and each scraped-data update) wakes it. It then embeds pending messages one
+    batch per thread call until none are left, and otherwise polls occasionally
+    to catch rows written outside the queue.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = EMBED_BATCH_SIZE,
+        debounce: float = INDEXER_DEBOUNCE_SECONDS,
+        poll_interval: float = INDEXER_POLL_INTERVAL_SECONDS
+    ):
+        self.batch_size = batch_size
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, int] = {'batches': 0, 'embedded': 0}
+
+    @property
+    def running(self) -> bool:
+        """Whether the indexer task is active."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the indexer task. Must be called from a running event loop."""
+        if self.running:
+            return
+        database.add_write_listener(self.notify)
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self) -> None:
+        """Wake the indexer because messages were written. Call from the event loop."""
+        self._wake.set()
+
+    async def stop(self) -> None:
+        """Stop the indexer task; pending messages stay queued in message_embeddings."""
+        database.remove_write_listener(self.notify)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                embedded = await asyncio.to_thread(update_index, self.batch_size, self.batch_size)
+            except Exception as e:
+                logger.error(f"Error updating semantic index: {str(e)}", exc_info=True)
+                embedded = 0
+            if embedded:
+                self.metrics['batches'] += 1
+                self.metrics['embedded'] += embedded
+            if embedded >= self.batch_size:
+                # Backlog left; yield to the event loop, then embed the next batch
+                await asyncio.sleep(0)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                continue
+            await asyncio.sleep(self.debounce)
+
+
+_indexer: Optional[SemanticIndexer] = None
+
+
+def start_semantic_indexer() -> SemanticIndexer:
+    """
+    Start the background semantic indexer; calling it again while it is running is a no-op.
+
+    Returns:
+        SemanticIndexer: The active indexer
+    """
+    global _indexer
+    if _indexer is None or not _indexer.running:
+        _indexer = SemanticIndexer()
+        _indexer.start()
+    return _indexer
+
+
+async def stop_semantic_indexer() -> None:
+    """Stop the background semantic indexer."""
+    global _indexer
+    if _indexer is not None:
+        await _indexer.stop()
+        _indexer = None
+
+
+def semantic_search(
+    query: str,
+    guild_id: str,
+    channel_id: Optional[str] = None,
+    hours: Optional[int] = None,
+    limit: int = 50,
+    max_messages: int = SEARCH_MAX_MESSAGES
+) -> List[Tuple[str, float]]:
+    """
+    Find the messages most similar to the query by cosine similarity, among the
+    guild's newest max_messages embedded messages.
+
+    Args:
+        query: Natural-language query
+        guild_id: The guild to search in
+        channel_id: Optional channel ID to filter by
+        hours: Optional number of hours to look back
+        limit: Maximum number of results
+        max_messages: Maximum number of stored vectors to scan
+
+    Returns:
+        List[Tuple[str, float]]: (message_id, similarity) pairs, most similar first
+    """
+    embedder = get_embedder()
+    rows = database.get_message_embeddings(
+        guild_id, embedder.name, channel_id=channel_id, hours=hours, limit=max_messages
+    )
+    if not rows:
+        return []
+
+    query_vector = embedder.embed([query])[0]
+    ids = [message_id for message_id, _ in rows]
+
+    if np is not None:
+        matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+        scores = matrix @ np.asarray(query_vector, dtype=np.float32)
+        top = np.argsort(-scores)[:limit]
+        results = [(ids[i], float(scores[i])) for i in top]
+    else:
+        scored = [
+            (message_id, sum(a * b for a, b in zip(_from_blob(blob), query_vector)))
+            for message_id, blob in rows
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        results = scored[:limit]
+
+    # Zero similarity means no shared features at all
+    return [(message_id, score) for message_id, score in results if score > 0]
+
+
+def hybrid_rank(ranked_lists: Sequence[Sequence[str]], limit: int, k: int = RRF_K) -> List[str]:
+    """
+    Merge ranked ID lists with reciprocal rank fusion.
+
+    Args:
+        ranked_lists: Lists of message IDs, each ordered best first
+        limit: Maximum number of IDs to return
+        k: RRF constant
+
+    Returns:
+        List[str]: Fused message IDs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranked in ranked_lists:
+        for rank, message_id in enumerate(ranked):
+            scores[message_id] = scores.get(message_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda message_id: scores[message_id], reverse=True)[:limit]
+
+
+async def retrieve_context_messages(
+    question: str,
+    keywords: List[str],
+    guild_id: str,
+    hours: Optional[int] = None,
+    limit: int = 40
+) -> List[Dict[str, Any]]:
+    """
+    Pick the messages most relevant to a question by fusing FTS keyword search
+    with semantic similarity.
+
+    Args:
+        question: The user's question
+        keywords: Keywords extracted from the question for full-text search
+        guild_id: The guild to search in
+        hours: Optional number of hours to look back
+        limit: Maximum number of messages to return
+
+    Returns:
+        List[Dict[str, Any]]: Relevant messages in chronological order
+    """
+    try:
+        # Make the newest messages searchable even if the background indexer lags behind
+        await asyncio.to_thread(update_index, EMBED_BATCH_SIZE, ASK_CATCHUP_MESSAGES)
+
+        keyword_task = asyncio.to_thread(
+            database.search_messages_by_keywords,
+            keywords=keywords,
+            guild_id=guild_id,
+            hours=hours,
+            limit=limit * 2
+        ) if keywords else asyncio.sleep(0, result=[])
+        semantic_task = asyncio.to_thread(
+            semantic_search, question, guild_id, hours=hours, limit=limit * 2
+        )
+        keyword_results, semantic_results = await asyncio.gather(keyword_task, semantic_task)
+
+        ranked_ids = hybrid_rank(
+            [[m['id'] for m in keyword_results], [message_id for message_id, _ in semantic_results]],
+            limit=limit
+        )
+
+        known = {m['id']: m for m in keyword_results}
+        missing = [message_id for message_id in ranked_ids if message_id not in known]
+        if missing:
+            for message in await asyncio.to_thread(database.get_messages_by_ids, missing):
+                known[message['id']] = message
+
+        messages = [known[message_id] for message_id in ranked_ids if message_id in known]
+        messages.sort(key=lambda m: m['created_at'])
+        logger.info(
+            f"Hybrid retrieval picked {len(messages)} messages "
+            f"({len(keyword_results)} keyword, {len(semantic_results)} semantic candidates)"
+        )
+        return messages
+    except Exception as e:
+        logger.error(f"Error retrieving context messages: {str(e)}", exc_info=True)
+        return []
+
+
+def extract_keywords(question: str, limit: int = MAX_QUESTION_KEYWORDS) -> List[str]:
+    """
+    Pick full-text search keywords from a question: words longer than three
+    characters that aren't stop words.
+
+    Args:
+        question: The user's question
+        limit: Maximum number of keywords
+
+    Returns:
+        List[str]: Keywords in question order
+    """
+    words = [w.strip('?.,!:;') for w in question.lower().split() if len(w) > 3]
+    return [w for w in words if w and w not in STOP_WORDS][:limit]
+
+
+async def retrieve_question_context(
+    question: str,
+    guild_id: str,
+    hours: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Pick the context messages for answering a question with
+    llm_handler.call_llm_with_database_context: hybrid retrieval over the
+    question's keywords and meaning, padded with recent messages when little matches.
+
+    Args:
+        question: The user's question
+        guild_id: The guild to search in
+        hours: Optional number of hours to look back; None searches all stored history
+
+    Returns:
+        List[Dict[str, Any]]: Context messages in chronological order
+    """
+    messages = await retrieve_context_messages(
+        question=question,
+        keywords=extract_keywords(question),
+        guild_id=guild_id,
+        hours=hours
+    )
+
+    if len(messages) < QUESTION_CONTEXT_MIN_MESSAGES:
+        recent_messages = await asyncio.to_thread(
+            database.get_recent_messages_for_context,
+            guild_id=guild_id,
+            hours=hours,  # None means no time filter, just get last N messages
+            limit=QUESTION_CONTEXT_PAD_TO - len(messages)
+        )
+        # Merge, avoiding duplicates
+        existing_ids = {m['id'] for m in messages}
+        for msg in recent_messages:
+            if msg['id'] not in existing_ids:
+                messages.append(msg)
+
+    # Sort by time (oldest first for conversation flow)
+    messages.sort(key=lambda x: x.get('created_at', datetime.min))
+    return messages
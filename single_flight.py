@@ -0,0 +1,88 @@
+"""
+Single-flight deduplication of concurrent async work.
+
+When the same link is posted in several channels, or several users react 🔍 at
+once, every handler would otherwise start its own scrape and LLM summarization.
+SingleFlight runs the work once per key and hands the result (or the exception)
+to every caller that asked while it was in flight.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+# Set up logging
+logger = logging.getLogger('discord_bot.single_flight')
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers share its outcome.
+
+    The work runs in its own task, so a caller that is cancelled (e.g. by a timeout)
+    doesn't cancel it for the others. Nothing is remembered once the call finishes;
+    caching results is left to the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.metrics: Dict[str, int] = {
+            'calls': 0,
+            'executions': 0,
+            'deduplicated': 0,
+            'failures': 0,
+        }
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await func() for key, or join the call already in flight for it.
+
+        Args:
+            key (Hashable): Identifies the work, e.g. a canonical URL
+            func (Callable[[], Awaitable[T]]): Starts the work; only called if nothing is in flight
+
+        Returns:
+            T: The shared result
+
+        Raises:
+            Exception: Whatever the shared call raised, re-raised in every caller
+        """
+        self.metrics['calls'] += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.metrics['deduplicated'] += 1
+            logger.debug(f"{self.name}: joining in-flight call for {key}")
+        else:
+            self.metrics['executions'] += 1
+            task = asyncio.create_task(self._run(key, func))
+            # Mark the outcome retrieved even if every caller has been cancelled meanwhile
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await func()
+        except Exception:
+            self.metrics['failures'] += 1
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the deduplication metrics.
+
+        Returns:
+            Dict[str, Any]: Counters, including upstream calls saved ('deduplicated'), plus the in-flight count
+        """
+        snapshot: Dict[str, Any] = dict(self.metrics)
+        snapshot['in_flight'] = len(self._in_flight)
+        return snapshot
+
+
+# Shared by every path that scrapes and/or summarizes a link, keyed by canonical URL
+url_summary_flight = SingleFlight('url_summary')
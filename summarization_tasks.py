@@ -1,4 +1,6 @@
 import asyncio
+import random
+import time
 from datetime import datetime, timedelta, timezone
 import discord
 from discord.ext import tasks
@@ -6,11 +8,15 @@ import database
 from logging_config import logger
 from llm_handler import call_llm_for_summary, analyze_messages_for_points
 from message_utils import split_long_message
+from image_cache import image_description_cache
 import config # Assuming config.py is accessible
 
 # This variable will be set by the main bot script
 discord_client = None
 
+# First retry delay for a failed channel summary; doubles on each further attempt
+SUMMARY_RETRY_BASE_DELAY_SECONDS = 2.0
+
 def set_discord_client(client_instance):
     """Sets the discord client instance for use in this module."""
     global discord_client
@@ -72,10 +78,186 @@ async def _get_guild_member(guild, author_id):
     except Exception:
         return None
 
+async def _award_daily_points(all_messages_for_points, yesterday, now, max_points_per_day):
+    """Analyze the day's messages and award points, returning the analysis result (or None)."""
+    point_awards_result = None
+    if all_messages_for_points:
+        try:
+            # Get the set of author_ids that appear in the messages being analyzed
+            # This ensures we only include engagement metrics for users who contributed messages
+            # in the analyzed content (note: their engagement metrics may include activity from
+            # all channels in the guild, but we only include users who appear in our analysis)
+            analyzed_author_ids = set(msg.get('author_id') for msg in all_messages_for_points if msg.get('author_id'))
+
+            # Calculate engagement metrics (replies received) for each user
+            # This helps identify quality contributors whose messages sparked discussions
+            engagement_metrics = {}
+            guild_ids_for_metrics = set(msg.get('guild_id') for msg in all_messages_for_points if msg.get('guild_id'))
+            for metrics_guild_id in guild_ids_for_metrics:
+                guild_metrics = database.get_user_engagement_metrics(metrics_guild_id, yesterday, now)
+                # Filter to only include users who appear in the analyzed messages
+                # This prevents surfacing engagement data for users not in the LLM input
+                for author_id, metrics in guild_metrics.items():
+                    if author_id in analyzed_author_ids:
+                        engagement_metrics[author_id] = metrics
+
+            logger.info(f"Analyzing {len(all_messages_for_points)} messages for point awards with engagement metrics for {len(engagement_metrics)} users (filtered from {len(analyzed_author_ids)} authors)")
+            point_awards_result = await analyze_messages_for_points(
+                all_messages_for_points,
+                max_points=max_points_per_day,
+                engagement_metrics=engagement_metrics
+            )
+
+            if point_awards_result and point_awards_result.get('awards'):
+                # Get guild_id and validate all messages are from the same guild
+                guild_ids = set(msg.get('guild_id') for msg in all_messages_for_points if msg.get('guild_id'))
+
+                if not guild_ids:
+                    logger.warning("No valid guild_id found in messages. Skipping point awards.")
+                elif len(guild_ids) > 1:
+                    logger.warning(f"Messages from multiple guilds detected: {guild_ids}. Point awards should be processed per-guild. Using first guild for now.")
+                    guild_id = next(iter(guild_ids))
+                else:
+                    guild_id = next(iter(guild_ids))
+
+                if guild_ids:
+                    # Check if points have already been awarded for this day
+                    existing_awards = database.get_daily_point_awards(guild_id, yesterday)
+                    if existing_awards:
+                        logger.warning(f"Points already awarded for {yesterday.strftime('%Y-%m-%d')} in guild {guild_id}. Skipping duplicate processing.")
+                    else:
+                        for award in point_awards_result['awards']:
+                            author_id = award.get('author_id')
+                            author_name = award.get('author_name')
+                            points = award.get('points', 0)
+                            reason = award.get('reason', 'Contribution to the community')
+
+                            # Award points to user
+                            success = database.award_points_to_user(author_id, author_name, guild_id, points)
+
+                            if success:
+                                # Store the daily award record
+                                database.store_daily_point_award(
+                                    author_id=author_id,
+                                    author_name=author_name,
+                                    guild_id=guild_id,
+                                    date=yesterday,
+                                    points=points,
+                                    reason=reason
+                                )
+                                logger.info(f"Awarded {points} points to {author_name} for: {reason}")
+
+                    logger.info(f"Point awarding complete. Awarded to {len(point_awards_result['awards'])} users.")
+            else:
+                logger.info("No points were awarded today.")
+        except Exception as e:
+            logger.error(f"Error awarding points: {str(e)}", exc_info=True)
+    return point_awards_result
+
+async def _generate_summary_with_retry(messages, llm_channel_name, date, semaphore):
+    """
+    Generate a summary with a per-attempt timeout, retrying failures with jittered backoff.
+
+    Returns:
+        tuple: (summary_text or None if every attempt failed, number of attempts made)
+    """
+    max_attempts = config.DAILY_SUMMARY_RETRIES + 1
+    for attempt in range(1, max_attempts + 1):
+        try:
+            async with semaphore:
+                summary_text = await asyncio.wait_for(
+                    call_llm_for_summary(messages, llm_channel_name, date),
+                    timeout=config.DAILY_SUMMARY_TIMEOUT_SECONDS
+                )
+            if not _is_summary_generation_failure(summary_text):
+                return summary_text, attempt
+            logger.warning(f"Summary generation for {llm_channel_name} failed (attempt {attempt}/{max_attempts})")
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Summary generation for {llm_channel_name} timed out after "
+                f"{config.DAILY_SUMMARY_TIMEOUT_SECONDS}s (attempt {attempt}/{max_attempts})"
+            )
+        except Exception as e:
+            logger.error(f"Error generating summary for {llm_channel_name} (attempt {attempt}/{max_attempts}): {str(e)}", exc_info=True)
+
+        if attempt < max_attempts:
+            # Exponential backoff with jitter so retries from many channels don't align
+            delay = SUMMARY_RETRY_BASE_DELAY_SECONDS * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            await asyncio.sleep(delay)
+    return None, max_attempts
+
+async def _run_channel_summary_job(job, semaphore, yesterday, points_task, max_points_per_day):
+    """
+    Generate, store and post one channel's daily summary.
+
+    Returns:
+        dict: Per-channel result with status, attempts, duration_seconds and message_count
+    """
+    started = time.monotonic()
+    result = {
+        'channel_id': job['channel_id'],
+        'channel_name': job['channel_name'],
+        'message_count': len(job['messages']),
+        'status': 'failed',
+        'attempts': 0,
+        'duration_seconds': 0.0
+    }
+    channel_name = job['channel_name']
+
+    try:
+        summary_text, result['attempts'] = await _generate_summary_with_retry(
+            job['messages'], job['llm_channel_name'], yesterday, semaphore
+        )
+        if summary_text is None:
+            logger.error(f"Skipping stored/posted daily summary for {channel_name} because summary generation failed.")
+            return result
+
+        metadata = dict(job['metadata'])
+        metadata['generation_seconds'] = round(time.monotonic() - started, 2)
+        metadata['generation_attempts'] = result['attempts']
+        success = database.store_channel_summary(
+            channel_id=job['channel_id'],
+            channel_name=channel_name,
+            date=yesterday,
+            summary_text=summary_text,
+            message_count=len(job['messages']),
+            active_users=list(set(msg['author_name'] for msg in job['messages'])),
+            guild_id=job['guild_id'],
+            guild_name=job['guild_name'],
+            metadata=metadata
+        )
+        if not success:
+            result['status'] = 'store_failed'
+            return result
+
+        result['status'] = 'stored'
+        logger.info(f"Successfully generated and stored summary for channel {channel_name}")
+
+        # If this is the general channel, append point awards to the summary
+        append_points = None
+        if job['is_general']:
+            point_awards_result = await points_task
+            if point_awards_result:
+                append_points = (point_awards_result, max_points_per_day)
+
+        await post_summary_to_reports_channel(job['channel_id'], channel_name, yesterday, summary_text, append_points)
+    except Exception as e:
+        result['status'] = 'error'
+        logger.error(f"Error generating summary for channel {channel_name}: {str(e)}", exc_info=True)
+    finally:
+        result['duration_seconds'] = time.monotonic() - started
+    return result
+
 async def run_daily_summarization_once(now: datetime | None = None):
     """Run the daily channel summarization logic a single time.
 
     This is used both by the scheduled daily task and by one-off scripts/tests.
+    Channel summaries run concurrently (DAILY_SUMMARY_CONCURRENCY) alongside the
+    point analysis.
+
+    Returns:
+        list: Per-channel result dicts (status, attempts, duration_seconds, message_count),
+        or None if the run was skipped or failed
     """
     if not discord_client:
         logger.error("Discord client not set in summarization_tasks. Aborting daily summarization.")
@@ -143,81 +325,13 @@ async def run_daily_summarization_once(now: datetime | None = None):
                     formatted_msg = _format_daily_summary_message(msg, channel_data)
                     all_messages_for_points.append(formatted_msg)
 
-        # Award points based on contributions from the past 24 hours BEFORE posting summaries
+        # Award points concurrently with the channel summaries; only the general
+        # channel's post (which appends the awards) waits for the result
         # Define max points per day (configurable)
         max_points_per_day = 50
-        point_awards_result = None
-        if all_messages_for_points:
-            try:
-                # Get the set of author_ids that appear in the messages being analyzed
-                # This ensures we only include engagement metrics for users who contributed messages
-                # in the analyzed content (note: their engagement metrics may include activity from
-                # all channels in the guild, but we only include users who appear in our analysis)
-                analyzed_author_ids = set(msg.get('author_id') for msg in all_messages_for_points if msg.get('author_id'))
-
-                # Calculate engagement metrics (replies received) for each user
-                # This helps identify quality contributors whose messages sparked discussions
-                engagement_metrics = {}
-                guild_ids_for_metrics = set(msg.get('guild_id') for msg in all_messages_for_points if msg.get('guild_id'))
-                for metrics_guild_id in guild_ids_for_metrics:
-                    guild_metrics = database.get_user_engagement_metrics(metrics_guild_id, yesterday, now)
-                    # Filter to only include users who appear in the analyzed messages
-                    # This prevents surfacing engagement data for users not in the LLM input
-                    for author_id, metrics in guild_metrics.items():
-                        if author_id in analyzed_author_ids:
-                            engagement_metrics[author_id] = metrics
-
-                logger.info(f"Analyzing {len(all_messages_for_points)} messages for point awards with engagement metrics for {len(engagement_metrics)} users (filtered from {len(analyzed_author_ids)} authors)")
-                point_awards_result = await analyze_messages_for_points(
-                    all_messages_for_points,
-                    max_points=max_points_per_day,
-                    engagement_metrics=engagement_metrics
-                )
-
-                if point_awards_result and point_awards_result.get('awards'):
-                    # Get guild_id and validate all messages are from the same guild
-                    guild_ids = set(msg.get('guild_id') for msg in all_messages_for_points if msg.get('guild_id'))
-
-                    if not guild_ids:
-                        logger.warning("No valid guild_id found in messages. Skipping point awards.")
-                    elif len(guild_ids) > 1:
-                        logger.warning(f"Messages from multiple guilds detected: {guild_ids}. Point awards should be processed per-guild. Using first guild for now.")
-                        guild_id = next(iter(guild_ids))
-                    else:
-                        guild_id = next(iter(guild_ids))
-
-                    if guild_ids:
-                        # Check if points have already been awarded for this day
-                        existing_awards = database.get_daily_point_awards(guild_id, yesterday)
-                        if existing_awards:
-                            logger.warning(f"Points already awarded for {yesterday.strftime('%Y-%m-%d')} in guild {guild_id}. Skipping duplicate processing.")
-                        else:
-                            for award in point_awards_result['awards']:
-                                author_id = award.get('author_id')
-                                author_name = award.get('author_name')
-                                points = award.get('points', 0)
-                                reason = award.get('reason', 'Contribution to the community')
-
-                                # Award points to user
-                                success = database.award_points_to_user(author_id, author_name, guild_id, points)
-
-                                if success:
-                                    # Store the daily award record
-                                    database.store_daily_point_award(
-                                        author_id=author_id,
-                                        author_name=author_name,
-                                        guild_id=guild_id,
-                                        date=yesterday,
-                                        points=points,
-                                        reason=reason
-                                    )
-                                    logger.info(f"Awarded {points} points to {author_name} for: {reason}")
-
-                        logger.info(f"Point awarding complete. Awarded to {len(point_awards_result['awards'])} users.")
-                else:
-                    logger.info("No points were awarded today.")
-            except Exception as e:
-                logger.error(f"Error awarding points: {str(e)}", exc_info=True)
+        points_task = asyncio.create_task(
+            _award_daily_points(all_messages_for_points, yesterday, now, max_points_per_day)
+        )
 
         # Now process each channel and post summaries (with point awards appended to general channel)
         general_channel_id = getattr(config, 'general_channel_id', None)
@@ -254,7 +368,8 @@ async def run_daily_summarization_once(now: datetime | None = None):
         )
 
         # If still not found, use the first active channel
-        if not general_channel_id and all_active_channels and (point_awards_result or has_human_summary_messages):
+        # (point awards only exist when there are human messages, so this also covers them)
+        if not general_channel_id and all_active_channels and has_human_summary_messages:
             general_channel_data = all_active_channels[0]
             general_channel_id = general_channel_data['channel_id']
             general_guild_id = str(general_channel_data.get('guild_id')) if general_channel_data.get('guild_id') else None
@@ -325,6 +440,8 @@ async def run_daily_summarization_once(now: datetime | None = None):
                     'message_count': 0
                 })
 
+        # Build one summary job per target channel
+        summary_jobs = []
         for channel_data in active_channels:
             channel_id = channel_data['channel_id']
             channel_name = channel_data['channel_name']
@@ -366,48 +483,48 @@ async def run_daily_summarization_once(now: datetime | None = None):
                 logger.info(f"No non-command messages found for channel {channel_name}. Skipping summarization.")
                 continue
 
-            active_users = list(set(msg['author_name'] for msg in formatted_messages))
-
-            try:
-                summary_text = await call_llm_for_summary(formatted_messages, summary_llm_channel_name, yesterday)
-                if _is_summary_generation_failure(summary_text):
-                    logger.error(f"Skipping stored/posted daily summary for {channel_name} because summary generation failed.")
-                    continue
-
-                metadata = {
-                    'start_time': yesterday.isoformat(),
-                    'end_time': now.isoformat(),
-                    'summary_type': 'automated_daily',
-                    'summary_scope': metadata_scope
-                }
-                if metadata_scope == 'all_active_channels':
-                    metadata['included_channel_ids'] = [ch['channel_id'] for ch in all_channel_summary_channels]
-                    metadata['included_channel_names'] = all_channel_names
-                    metadata['included_guild_id'] = general_guild_id
-                success = database.store_channel_summary(
-                    channel_id=channel_id,
-                    channel_name=channel_name,
-                    date=yesterday,
-                    summary_text=summary_text,
-                    message_count=len(formatted_messages),
-                    active_users=active_users,
-                    guild_id=guild_id,
-                    guild_name=guild_name,
-                    metadata=metadata
-                )
-                if success:
-                    successful_summaries += 1
-                    total_messages_processed += len(formatted_messages)
-                    logger.info(f"Successfully generated and stored summary for channel {channel_name}")
-
-                    # If this is the general channel, append point awards to the summary
-                    append_points = None
-                    if general_channel_id and str(channel_id) == str(general_channel_id) and point_awards_result:
-                        append_points = (point_awards_result, max_points_per_day)
-
-                    await post_summary_to_reports_channel(channel_id, channel_name, yesterday, summary_text, append_points)
-            except Exception as e:
-                logger.error(f"Error generating summary for channel {channel_name}: {str(e)}", exc_info=True)
+            metadata = {
+                'start_time': yesterday.isoformat(),
+                'end_time': now.isoformat(),
+                'summary_type': 'automated_daily',
+                'summary_scope': metadata_scope
+            }
+            if metadata_scope == 'all_active_channels':
+                metadata['included_channel_ids'] = [ch['channel_id'] for ch in all_channel_summary_channels]
+                metadata['included_channel_names'] = all_channel_names
+                metadata['included_guild_id'] = general_guild_id
+
+            summary_jobs.append({
+                'channel_id': channel_id,
+                'channel_name': channel_name,
+                'guild_id': guild_id,
+                'guild_name': guild_name,
+                'messages': formatted_messages,
+                'llm_channel_name': summary_llm_channel_name,
+                'metadata': metadata,
+                # The general channel's summary gets the point awards appended
+                'is_general': bool(general_channel_id and str(channel_id) == str(general_channel_id))
+            })
+
+        # Summarize all channels concurrently; each job is bounded by the LLM semaphore,
+        # its own timeout and retries, so one slow channel doesn't hold up the others
+        llm_semaphore = asyncio.Semaphore(config.DAILY_SUMMARY_CONCURRENCY)
+        results = await asyncio.gather(*(
+            _run_channel_summary_job(job, llm_semaphore, yesterday, points_task, max_points_per_day)
+            for job in summary_jobs
+        ))
+
+        # Make sure point awarding finished even if no general summary was posted
+        await points_task
+
+        for result in results:
+            logger.info(
+                f"Daily summary for {result['channel_name']}: {result['status']} "
+                f"({result['message_count']} messages, {result['attempts']} attempt(s), {result['duration_seconds']:.1f}s)"
+            )
+            if result['status'] == 'stored':
+                successful_summaries += 1
+                total_messages_processed += result['message_count']
 
         if successful_summaries > 0:
             try:
@@ -417,7 +534,14 @@ async def run_daily_summarization_once(now: datetime | None = None):
             except Exception as e:
                 logger.error(f"Error deleting old messages: {str(e)}", exc_info=True)
 
+        if config.IMAGE_CACHE_TTL_DAYS:
+            try:
+                image_description_cache.prune(now - timedelta(days=config.IMAGE_CACHE_TTL_DAYS))
+            except Exception as e:
+                logger.error(f"Error pruning image description cache: {str(e)}", exc_info=True)
+
         logger.info(f"Daily summarization complete. Generated {successful_summaries} summaries covering {total_messages_processed} messages.")
+        return results
     except Exception as e:
         logger.error(f"Error in daily channel summarization task: {str(e)}", exc_info=True)
 
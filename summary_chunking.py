@@ -0,0 +1,170 @@
+"""
+Token estimation and conversation-aware chunking for channel summaries.
+
+Long message windows are split into token-budgeted chunks for map-reduce
+summarization in llm_handler. Chunks are cut where a new conversation starts
+whenever possible, so a reply is summarized alongside the message it answers.
+"""
+
+import math
+import re
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken  # type: ignore
+except Exception:
+    tiktoken = None  # type: ignore
+
+from logging_config import logger
+
+# A gap this long between messages is treated as the start of a new conversation
+CONVERSATION_GAP = timedelta(minutes=5)
+
+# Letter runs, digit groups (BPE vocabularies merge up to 3 digits) and single other characters
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|\S")
+
+_encoding = None
+if tiktoken is not None:
+    try:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding, using heuristic token estimates: {e}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many tokens an LLM will see for a piece of text.
+
+    Uses tiktoken when it is installed. Otherwise approximates BPE tokenization:
+    short words are one token, long words cost one more token per ~7 letters,
+    digits are grouped in threes, and punctuation and non-ASCII characters are
+    counted per character (multi-byte characters cost roughly one token per 2 bytes).
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    total = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece.isascii():
+            total += (1 + len(piece) // 7) if piece.isalpha() else 1
+        else:
+            total += max(1, len(piece.encode('utf-8')) // 2)
+    return total
+
+
+def is_conversation_start(message: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> bool:
+    """
+    Decide whether a message starts a new conversation, making it a clean place to cut a chunk.
+
+    Args:
+        message (Dict[str, Any]): The message
+        previous (Optional[Dict[str, Any]]): The message before it, if any
+
+    Returns:
+        bool: True if the message isn't a reply and follows a quiet gap (or is the first message)
+    """
+    if message.get('reply_to_author') or message.get('thread_depth'):
+        return False
+    if previous is None:
+        return True
+
+    created_at = message.get('created_at')
+    previous_created_at = previous.get('created_at')
+    if hasattr(created_at, 'timestamp') and hasattr(previous_created_at, 'timestamp'):
+        return created_at.timestamp() - previous_created_at.timestamp() >= CONVERSATION_GAP.total_seconds()
+    return True
+
+
+def _split_text(text: str, max_tokens: int) -> List[str]:
+    """Split a single oversized text into pieces that each fit in max_tokens, preferring line breaks."""
+    pieces = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        if estimate_tokens(line) > max_tokens:
+            # Hard-split a single huge line by characters, proportionally to its token count
+            step = max(1, math.floor(len(line) * max_tokens / estimate_tokens(line)))
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+            continue
+        if current and estimate_tokens(current + line) > max_tokens:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_texts(
+    texts: Sequence[str],
+    max_tokens: int,
+    starts: Optional[Sequence[bool]] = None
+) -> List[List[str]]:
+    """
+    Group consecutive texts into chunks of at most max_tokens tokens without dropping any.
+
+    When a chunk fills up it is cut at its last conversation start, as long as that keeps
+    at least half of the chunk; otherwise it is cut at the budget. A single text larger
+    than the budget is split into several pieces of its own.
+
+    Args:
+        texts (Sequence[str]): Formatted messages (or notes) in order
+        max_tokens (int): Token budget per chunk
+        starts (Optional[Sequence[bool]]): Per text, whether it starts a new conversation;
+            defaults to every text being a valid cut point
+
+    Returns:
+        List[List[str]]: Chunks of texts, in order
+    """
+    if starts is None:
+        starts = [True] * len(texts)
+
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_tokens: List[int] = []
+    current_starts: List[bool] = []
+
+    def cut() -> None:
+        # Last conversation start in the back half of the chunk, else the whole chunk
+        index = next(
+            (i for i in range(len(current) - 1, len(current) // 2 - 1, -1) if i > 0 and current_starts[i]),
+            len(current)
+        )
+        chunks.append(current[:index])
+        del current[:index], current_tokens[:index], current_starts[:index]
+
+    def flush() -> None:
+        if current:
+            chunks.append(current[:])
+            current.clear()
+            current_tokens.clear()
+            current_starts.clear()
+
+    for text, start in zip(texts, starts):
+        tokens = estimate_tokens(text)
+
+        if tokens > max_tokens:
+            flush()
+            chunks.extend([piece] for piece in _split_text(text, max_tokens))
+            continue
+
+        while current and sum(current_tokens) + tokens > max_tokens:
+            cut()
+
+        current.append(text)
+        current_tokens.append(tokens)
+        current_starts.append(start)
+
+    flush()
+    return chunks
@@ -0,0 +1,90 @@
+import threading
+
+import database
+
+
+def test_same_thread_reuses_connection(temp_db):
+    first = database.get_connection()
+    with first as conn:
+        conn.execute("SELECT 1")
+    first.close()  # no-op for pooled connections
+
+    second = database.get_connection()
+    assert second is first
+    assert second.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_threads_get_separate_connections(temp_db):
+    main_conn = database.get_connection()
+    other = {}
+
+    def _worker():
+        other["conn"] = database.get_connection()
+
+    thread = threading.Thread(target=_worker)
+    thread.start()
+    thread.join()
+
+    assert other["conn"] is not main_conn
+
+
+def test_pragmas_are_applied(temp_db):
+    conn = database.get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -database.SQLITE_CACHE_SIZE_KIB
+
+
+def test_connection_reopens_when_db_file_changes(temp_db, tmp_path, monkeypatch):
+    first = database.get_connection()
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "other.db"))
+
+    second = database.get_connection()
+    assert second is not first
+
+
+def test_close_pool_reopens_connections_in_other_threads(temp_db):
+    ready = threading.Event()
+    closed = threading.Event()
+    result = {}
+
+    def _worker():
+        first = database.get_connection()
+        ready.set()
+        closed.wait()
+        second = database.get_connection()
+        result["reopened"] = second is not first
+        result["value"] = second.execute("SELECT 1").fetchone()[0]
+
+    thread = threading.Thread(target=_worker)
+    thread.start()
+    ready.wait()
+    database.close_connection_pool()
+    closed.set()
+    thread.join()
+
+    assert result == {"reopened": True, "value": 1}
+
+
+def test_db_file_change_after_close_does_not_fail(temp_db, tmp_path, monkeypatch):
+    database.get_connection()
+    database.close_connection_pool()
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "other.db"))
+
+    conn = database.get_connection()
+    assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_dead_thread_connections_are_evicted(temp_db):
+    def _worker():
+        database.get_connection()
+
+    for _ in range(database.POOL_MAX_CONNECTIONS + 2):
+        thread = threading.Thread(target=_worker)
+        thread.start()
+        thread.join()
+
+    conn = database.get_connection()
+    assert isinstance(conn, database.PooledConnection)
+    assert len(database._pooled_connections) <= 2
@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -148,13 +149,85 @@ class TestDailyGeneralSummary(unittest.IsolatedAsyncioTestCase):
             patch.object(summarization_tasks.database, "store_channel_summary", return_value=True) as mock_store,
             patch.object(summarization_tasks.database, "delete_messages_older_than", return_value=0) as mock_delete,
             patch.object(summarization_tasks, "post_summary_to_reports_channel", new=AsyncMock()) as mock_post,
+            patch.object(summarization_tasks, "SUMMARY_RETRY_BASE_DELAY_SECONDS", 0),
         ):
-            await summarization_tasks.run_daily_summarization_once(now=now)
+            results = await summarization_tasks.run_daily_summarization_once(now=now)
 
+        self.assertEqual(results[0]["status"], "failed")
+        self.assertEqual(results[0]["attempts"], summarization_tasks.config.DAILY_SUMMARY_RETRIES + 1)
         mock_store.assert_not_called()
         mock_post.assert_not_awaited()
         mock_delete.assert_not_called()
 
+    async def test_channels_are_summarized_concurrently_and_slow_channels_time_out(self):
+        now = datetime(2026, 7, 4, 0, 0, tzinfo=timezone.utc)
+        channel_ids = ["general_id", "slow_id", "a_id", "b_id"]
+        active_channels = [
+            {
+                "channel_id": channel_id,
+                "channel_name": channel_id.replace("_id", ""),
+                "guild_id": "guild_id",
+                "guild_name": "TechFren",
+                "message_count": 1,
+            }
+            for channel_id in channel_ids
+        ]
+        messages_by_channel = {
+            channel_id: {"messages": [self._message(f"{channel_id}-1", "Alice", "update")]}
+            for channel_id in channel_ids
+        }
+
+        in_flight = 0
+        max_in_flight = 0
+
+        async def summarize(messages, channel_name, date):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                await asyncio.sleep(10 if channel_name == "slow" else 0.05)
+                return f"summary for {channel_name}"
+            finally:
+                in_flight -= 1
+
+        points_started = asyncio.Event()
+
+        async def analyze(*args, **kwargs):
+            points_started.set()
+            return {"awards": [], "summary": "none"}
+
+        with (
+            patch.object(summarization_tasks.config, "summary_channel_ids", None),
+            patch.object(summarization_tasks.config, "general_channel_id", "general_id"),
+            patch.object(summarization_tasks.config, "DAILY_SUMMARY_CONCURRENCY", 3),
+            patch.object(summarization_tasks.config, "DAILY_SUMMARY_TIMEOUT_SECONDS", 0.2),
+            patch.object(summarization_tasks.config, "DAILY_SUMMARY_RETRIES", 1),
+            patch.object(summarization_tasks, "SUMMARY_RETRY_BASE_DELAY_SECONDS", 0),
+            patch.object(summarization_tasks.database, "get_active_channels", return_value=active_channels),
+            patch.object(summarization_tasks.database, "get_messages_for_time_range", return_value=messages_by_channel),
+            patch.object(summarization_tasks.database, "get_user_engagement_metrics", return_value={}),
+            patch.object(summarization_tasks, "analyze_messages_for_points", new=AsyncMock(side_effect=analyze)),
+            patch.object(summarization_tasks, "call_llm_for_summary", new=summarize),
+            patch.object(summarization_tasks.database, "store_channel_summary", return_value=True) as mock_store,
+            patch.object(summarization_tasks.database, "delete_messages_older_than", return_value=0),
+            patch.object(summarization_tasks, "post_summary_to_reports_channel", new=AsyncMock()) as mock_post,
+        ):
+            results = await summarization_tasks.run_daily_summarization_once(now=now)
+
+        self.assertTrue(points_started.is_set())
+        self.assertEqual(max_in_flight, 3)
+        statuses = {result["channel_id"]: result for result in results}
+        self.assertEqual(statuses["slow_id"]["status"], "failed")
+        self.assertEqual(statuses["slow_id"]["attempts"], 2)
+        self.assertEqual(
+            {cid for cid, result in statuses.items() if result["status"] == "stored"},
+            {"general_id", "a_id", "b_id"},
+        )
+        self.assertEqual(mock_store.call_count, 3)
+        self.assertIn("generation_seconds", mock_store.call_args.kwargs["metadata"])
+        general_post = next(call for call in mock_post.await_args_list if call.args[0] == "general_id")
+        self.assertIsNotNone(general_post.args[4])
+
     async def test_daily_role_color_charge_skips_exempt_role_members(self):
         role = MagicMock()
         role.name = "MVP"
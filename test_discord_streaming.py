@@ -0,0 +1,181 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import database
+import llm_handler
+from discord_streaming import StreamingMessageWriter
+from llm_cache import llm_response_cache
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.edits = 0
+
+    async def edit(self, content):
+        self.content = content
+        self.edits += 1
+
+
+class FakeThread:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content):
+        message = FakeMessage(content)
+        self.messages.append(message)
+        return message
+
+
+async def stream(writer, pieces):
+    for piece in pieces:
+        await writer.feed(piece)
+        # Lets the background edits run, as reading a real stream would
+        await asyncio.sleep(0)
+    return await writer.finish()
+
+
+@pytest.mark.asyncio
+async def test_first_tokens_are_posted_then_edited_at_most_once_per_interval():
+    thread = FakeThread()
+    writer = StreamingMessageWriter(thread.send, edit_interval_ms=60_000)
+
+    await writer.feed("## Answer\n")
+    await asyncio.sleep(0)
+    assert [m.content for m in thread.messages] == ["**Answer**\n\n"]
+
+    await stream(writer, ["- one\n", "- two\n", "- three"])
+
+    assert len(thread.messages) == 1
+    assert thread.messages[0].content == "**Answer**\n\n• one\n• two\n• three"
+    # Everything fed within the interval is shown by the single edit in finish
+    assert thread.messages[0].edits == 1
+    assert writer.contents == [thread.messages[0].content]
+
+
+@pytest.mark.asyncio
+async def test_long_responses_roll_over_to_new_messages_at_line_breaks():
+    thread = FakeThread()
+    writer = StreamingMessageWriter(thread.send, max_length=100, edit_interval_ms=0)
+    lines = [f"- point number {i} about something\n" for i in range(20)]
+
+    messages = await stream(writer, lines)
+
+    assert len(messages) > 1
+    assert all(len(m.content) <= 100 for m in thread.messages)
+    posted = "\n".join(m.content for m in thread.messages).splitlines()
+    assert posted == [f"• point number {i} about something" for i in range(20)]
+
+
+@pytest.mark.asyncio
+async def test_placeholder_is_replaced_and_fallback_used_when_nothing_streamed():
+    thread = FakeThread()
+    placeholder = FakeMessage("Processing your request, please wait...")
+    writer = StreamingMessageWriter(thread.send, placeholder=placeholder, max_length=50)
+
+    messages = await writer.finish(fallback="Sorry, an error occurred. " * 3)
+
+    assert messages[0] is placeholder
+    assert placeholder.content.startswith("Sorry")
+    assert len(messages) > 1
+    assert messages[1:] == thread.messages
+
+
+@pytest.fixture
+def fake_stream(monkeypatch):
+    requests = []
+
+    async def create(**request):
+        requests.append(request)
+        assert request["stream"] is True
+
+        async def chunks():
+            for piece in ("- first", " point\n", "- second point"):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+            yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=321))
+
+        return chunks()
+
+    monkeypatch.setattr(llm_handler, "llm_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    return requests
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "test.db"))
+    database.init_database()
+    monkeypatch.setattr(llm_response_cache, "enabled", True)
+    yield llm_response_cache
+    database.close_connection_pool()
+
+
+@pytest.mark.asyncio
+async def test_database_answers_stream_and_are_cached_whole(cache, fake_stream):
+    pieces = []
+
+    async def on_delta(delta):
+        pieces.append(delta)
+
+    first = await llm_handler.call_llm_with_database_context("what happened?", [], on_delta=on_delta)
+    assert pieces == ["- first", " point\n", "- second point"]
+    assert first == "• first point\n• second point"
+
+    pieces.clear()
+    second = await llm_handler.call_llm_with_database_context("what happened?", [], on_delta=on_delta)
+    assert second == first
+    assert pieces == ["- first point\n- second point"]
+    assert len(fake_stream) == 1
+
+
+@pytest.mark.asyncio
+async def test_interrupted_stream_is_marked(monkeypatch):
+    async def create(**request):
+        async def chunks():
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Half an"))], usage=None)
+            raise httpx.ReadError("connection reset")
+
+        return chunks()
+
+    monkeypatch.setattr(llm_handler, "llm_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    pieces = []
+
+    async def on_delta(delta):
+        pieces.append(delta)
+
+    response = await llm_handler.call_llm_with_database_context("what happened?", [], on_delta=on_delta)
+
+    assert response.startswith("Sorry")
+    assert pieces == ["Half an", llm_handler.STREAM_INTERRUPTED_NOTE]
+
+
+@pytest.mark.asyncio
+async def test_exa_answers_stream_over_server_sent_events(monkeypatch):
+    events = [
+        '{"choices": [{"delta": {"content": "Python 3.13 "}}]}',
+        '{"choices": [{"delta": {"content": "is out [1]."}}]}',
+        '{"citations": [{"url": "https://python.org", "title": "Python"}]}',
+    ]
+    bodies = []
+
+    def handler(request):
+        bodies.append(request.content)
+        return httpx.Response(200, text="".join(f"data: {event}\n\n" for event in events))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_handler, "get_httpx_client", lambda upstream: client)
+    pieces = []
+
+    async def on_delta(delta):
+        pieces.append(delta)
+
+    await llm_handler.call_llm_api("what's new in python?", on_delta=on_delta)
+    await client.aclose()
+
+    assert json.loads(bodies[0])["stream"] is True
+    assert pieces[:2] == ["Python 3.13 ", "is out [1]."]
+    assert "[Python](<https://python.org>)" in pieces[2]
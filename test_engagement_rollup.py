@@ -0,0 +1,143 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import database
+
+
+# Fixed hour-aligned reference time so bucket boundaries are predictable
+BASE = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _store(message_id, author_id, minutes, content="hi", reply_to=None, **kwargs):
+    database.store_message(
+        message_id=message_id,
+        author_id=author_id,
+        author_name=f"user{author_id}",
+        channel_id="chan",
+        channel_name="general",
+        content=content,
+        created_at=BASE + timedelta(minutes=minutes),
+        guild_id="guild",
+        guild_name="Guild",
+        reply_to_message_id=reply_to,
+        **kwargs,
+    )
+
+
+def _metrics(start_minutes, end_minutes):
+    return database.get_user_engagement_metrics(
+        "guild", BASE + timedelta(minutes=start_minutes), BASE + timedelta(minutes=end_minutes)
+    )
+
+
+def test_rollup_counts_messages_replies_and_mentions(temp_db):
+    _store("q", "1", 0)
+    _store("a1", "2", 5, reply_to="q")
+    _store("a2", "2", 70, reply_to="q", content="<@1> and again <@!1>")
+    _store("a3", "3", 80, reply_to="q", content="self <@3>")
+    _store("cmd", "3", 81, is_command=True)
+    _store("bot", "9", 82, is_bot=True, reply_to="q")
+
+    metrics = _metrics(0, 90)
+
+    assert metrics["1"]["message_count"] == 1
+    assert metrics["1"]["replies_received"] == 3
+    assert metrics["1"]["unique_repliers"] == 2
+    assert metrics["1"]["mentions_received"] == 2
+    assert metrics["2"]["replies_given"] == 2
+    assert metrics["2"]["mentions_given"] == 2
+    assert metrics["3"]["mentions_given"] == 0
+    assert "9" not in metrics
+
+
+def test_replies_to_messages_before_the_window_are_ignored(temp_db):
+    _store("old", "1", 0)
+    _store("reply", "2", 180, reply_to="old")
+
+    metrics = _metrics(120, 240)
+
+    assert "1" not in metrics
+    assert metrics["2"]["replies_given"] == 0
+
+
+def test_mentions_of_inactive_users_are_ignored(temp_db):
+    _store("m1", "1", 0, content="hey <@42>")
+
+    assert _metrics(0, 30)["1"]["mentions_given"] == 0
+
+
+def test_duplicate_ingest_does_not_double_count(temp_db):
+    message = {
+        "message_id": "m1", "author_id": "1", "author_name": "user1", "channel_id": "chan",
+        "channel_name": "general", "guild_id": "guild", "guild_name": "Guild",
+        "content": "hi", "created_at": BASE,
+    }
+    database._write_messages_batch([message], ignore_duplicates=True)
+    database._write_messages_batch([message], ignore_duplicates=True)
+
+    assert _metrics(0, 30)["1"]["message_count"] == 1
+
+
+def test_migration_backfills_rollups(temp_db):
+    _store("q", "1", 0)
+    _store("a", "2", 5, reply_to="q", content="<@1>")
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("DROP TRIGGER engagement_rollup_insert")
+        conn.execute("DROP TABLE engagement_rollup")
+        conn.execute("DROP TABLE engagement_reply_edges")
+        conn.execute("DROP TABLE engagement_mention_edges")
+        conn.execute("UPDATE messages SET mention_ids = NULL")
+
+    database.migrate_database()
+
+    metrics = _metrics(0, 30)
+    assert metrics["1"]["replies_received"] == 1
+    assert metrics["1"]["mentions_received"] == 1
+    assert metrics["2"]["message_count"] == 1
+
+
+def test_hour_aligned_metrics_do_not_read_messages_table(temp_db):
+    _store("m1", "1", 0)
+    conn = database.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        _metrics(0, 120)
+    finally:
+        conn.set_trace_callback(None)
+
+    assert statements
+    assert not any("FROM messages" in sql for sql in statements)
+
+
+def test_consecutive_daily_windows_do_not_double_count(temp_db):
+    # Daily runs at 12:30: the 12:00 hour is split between the two windows
+    _store("q", "1", 0)  # 12:00, first window
+    _store("a1", "2", 20, reply_to="q", content="<@1>")  # 12:20, first window
+    _store("a2", "2", 40, reply_to="q", content="<@1>")  # 12:40, second window
+    _store("late", "3", 24 * 60 + 50)  # After the second window
+
+    first = _metrics(-24 * 60 + 30, 30)
+    second = _metrics(30, 24 * 60 + 30)
+
+    assert first["1"]["message_count"] == 1
+    assert first["1"]["replies_received"] == 1
+    assert first["1"]["mentions_received"] == 1
+    assert first["2"]["message_count"] == 1
+    # The reply to q counts only once q is inside the window, so a2 earns nothing
+    assert "1" not in second
+    assert second["2"]["message_count"] == 1
+    assert second["2"]["replies_given"] == 0
+    assert "3" not in second
+
+
+def test_replies_to_parents_in_leading_partial_hour(temp_db):
+    _store("early", "1", 10)  # Before the window
+    _store("q", "1", 40)  # Inside the leading partial hour
+    _store("a1", "2", 90, reply_to="q")  # Whole hour
+    _store("a2", "2", 100, reply_to="early")  # Whole hour, parent outside the window
+
+    metrics = _metrics(30, 180)
+
+    assert metrics["1"]["replies_received"] == 1
+    assert metrics["2"]["replies_given"] == 1
@@ -0,0 +1,72 @@
+import json
+
+import httpx
+import pytest
+
+import firecrawl_handler
+
+
+def _mock_client(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(firecrawl_handler, "get_httpx_client", lambda upstream: client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_scrape_calls_rest_api(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"success": True, "data": {"markdown": "# Page"}})
+
+    _mock_client(monkeypatch, handler)
+
+    assert await firecrawl_handler.scrape_url_content("https://example.com") == "# Page"
+    assert requests[0].url.path == "/v2/scrape"
+    assert json.loads(requests[0].content)["url"] == "https://example.com"
+    assert requests[0].headers["Authorization"].startswith("Bearer ")
+
+
+@pytest.mark.asyncio
+async def test_oversized_response_is_abandoned(monkeypatch):
+    monkeypatch.setattr(firecrawl_handler.config, "FIRECRAWL_MAX_RESPONSE_BYTES", 1024)
+
+    def handler(request):
+        return httpx.Response(200, json={"data": {"markdown": "x" * 5000}})
+
+    _mock_client(monkeypatch, handler)
+
+    assert await firecrawl_handler.scrape_url_content("https://example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_error_status_fails_without_sdk_fallback(monkeypatch):
+    async def fail_sdk(url):
+        raise AssertionError("SDK should not be used")
+
+    monkeypatch.setattr(firecrawl_handler, "_scrape_via_sdk", fail_sdk)
+    _mock_client(monkeypatch, lambda request: httpx.Response(402, json={"error": "Payment required"}))
+
+    assert await firecrawl_handler.scrape_url_content("https://example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_missing_endpoint_falls_back_to_sdk(monkeypatch):
+    async def sdk(url):
+        return {"markdown": "from sdk"}
+
+    monkeypatch.setattr(firecrawl_handler, "_scrape_via_sdk", sdk)
+    _mock_client(monkeypatch, lambda request: httpx.Response(404))
+
+    assert await firecrawl_handler.scrape_url_content("https://example.com") == "from sdk"
+
+
+@pytest.mark.parametrize("response,expected", [
+    ({"markdown": "top"}, "top"),
+    ({"data": {"content": "nested"}}, "nested"),
+    ([{"markdown": "first"}], "first"),
+    ({"data": {}}, None),
+])
+def test_extract_markdown(response, expected):
+    assert firecrawl_handler.extract_markdown(response) == expected
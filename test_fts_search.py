@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database
+
+
+def _store(message_id, content, created_at=None, channel_id="chan", guild_id="guild", **kwargs):
+    database.store_message(
+        message_id=message_id,
+        author_id="1",
+        author_name="tester",
+        channel_id=channel_id,
+        channel_name="general",
+        content=content,
+        created_at=created_at or datetime.now(timezone.utc),
+        guild_id=guild_id,
+        guild_name="Guild",
+        **kwargs,
+    )
+
+
+def test_results_are_ranked_by_relevance(temp_db):
+    _store("weak", "I tried rust once, then went back to python for everything else in the project")
+    _store("strong", "rust rust rust borrow checker")
+    _store("none", "nothing relevant here")
+
+    results = database.search_messages_by_keywords(["rust"], guild_id="guild")
+
+    assert [m["id"] for m in results] == ["strong", "weak"]
+    assert results[0]["relevance"] > results[1]["relevance"]
+
+
+def test_prefix_matching_and_word_boundaries(temp_db):
+    _store("prefix", "Deploying kubernetes clusters today")
+    _store("substring", "the word cat appears inside concatenate")
+
+    assert [m["id"] for m in database.search_messages_by_keywords(["kube"])] == ["prefix"]
+    assert database.search_messages_by_keywords(["cate"]) == []
+
+
+def test_searches_scraped_summaries_and_image_descriptions(temp_db):
+    _store("link", "check this out", scraped_url="https://example.com",
+           scraped_content_summary="An article about vector databases")
+    _store("image", "look", image_descriptions='[{"description": "A screenshot of a terminal"}]')
+
+    assert [m["id"] for m in database.search_messages_by_keywords(["vector"])] == ["link"]
+    assert [m["id"] for m in database.search_messages_by_keywords(["terminal"])] == ["image"]
+
+
+@pytest.mark.asyncio
+async def test_index_follows_updates_and_deletes(temp_db):
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+    _store("m1", "plain message", created_at=old)
+
+    await database.update_message_with_scraped_data("m1", "https://example.com", "sqlite internals", "[]")
+    assert [m["id"] for m in database.search_messages_by_keywords(["internals"])] == ["m1"]
+
+    database.delete_messages_older_than(datetime.now(timezone.utc) - timedelta(days=1))
+    assert database.search_messages_by_keywords(["internals"]) == []
+
+
+def test_filters_are_applied(temp_db):
+    _store("recent", "python tips", channel_id="a")
+    _store("old", "python tips", created_at=datetime.now(timezone.utc) - timedelta(hours=48), channel_id="a")
+    _store("other-channel", "python tips", channel_id="b")
+    _store("other-guild", "python tips", guild_id="elsewhere")
+
+    results = database.search_messages_by_keywords(["python"], guild_id="guild", channel_id="a", hours=24)
+
+    assert [m["id"] for m in results] == ["recent"]
+
+
+def test_fts_syntax_in_keywords_is_neutralized(temp_db):
+    _store("m1", "NEAR the end of the day")
+
+    assert [m["id"] for m in database.search_messages_by_keywords(['near"', "AND(", "*"])] == ["m1"]
@@ -0,0 +1,82 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+import http_clients
+
+
+@pytest_asyncio.fixture
+async def server(monkeypatch):
+    monkeypatch.setattr(http_clients, "_stats", {})
+    monkeypatch.setattr(http_clients, "_httpx_clients", {})
+    monkeypatch.setattr(http_clients, "_aiohttp_sessions", {})
+    monkeypatch.setattr(http_clients, "_sdk_clients", {})
+
+    async def ok(request):
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", ok)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/"
+    await http_clients.close_http_clients()
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_httpx_client_is_shared_and_reuses_connections(server):
+    client = http_clients.get_httpx_client("exa")
+    assert http_clients.get_httpx_client("exa") is client
+
+    for _ in range(3):
+        response = await http_clients.get_httpx_client("exa").get(server)
+        assert response.text == "ok"
+
+    stats = http_clients.get_http_stats()["exa"]
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reused"] == 2
+
+
+@pytest.mark.asyncio
+async def test_aiohttp_session_is_shared_and_reuses_connections(server):
+    for _ in range(3):
+        async with http_clients.get_aiohttp_session("images").get(server) as response:
+            assert await response.text() == "ok"
+
+    stats = http_clients.get_http_stats()["images"]
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reuse_rate"] == pytest.approx(0.667)
+
+
+@pytest.mark.asyncio
+async def test_close_releases_clients_and_they_are_recreated(server):
+    client = http_clients.get_httpx_client("exa")
+    session = http_clients.get_aiohttp_session("images")
+
+    await http_clients.close_http_clients()
+
+    assert client.is_closed
+    assert session.closed
+    assert http_clients.get_httpx_client("exa") is not client
+
+
+def test_sdk_clients_are_cached_per_key(monkeypatch):
+    monkeypatch.setattr(http_clients, "_stats", {})
+    monkeypatch.setattr(http_clients, "_sdk_clients", {})
+    created = []
+
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    first = http_clients.get_sdk_client("apify", "token-a", factory)
+    assert http_clients.get_sdk_client("apify", "token-a", factory) is first
+    assert http_clients.get_sdk_client("apify", "token-b", factory) is not first
+    assert len(created) == 2
+    assert http_clients.get_http_stats()["apify"]["reused"] == 1
@@ -0,0 +1,110 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import database
+import image_analyzer
+from image_cache import ImageDescriptionCache, fingerprint_image
+
+
+def completion(content, tokens=0):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(total_tokens=tokens),
+    )
+
+
+class FakeVision:
+    """Stands in for the xAI client; batched requests are answered by `batch_reply`."""
+
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **request):
+        self.requests.append(request)
+        images = [part for part in request["messages"][0]["content"] if part["type"] == "image_url"]
+        if "response_format" in request:
+            return self.batch_reply(len(images))
+        return completion("single description", tokens=100)
+
+
+@pytest.fixture
+def vision(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "test.db"))
+    database.init_database()
+    monkeypatch.setattr(config, "IMAGE_BATCH_MAX_IMAGES", 6, raising=False)
+    monkeypatch.setattr(config, "IMAGE_BATCH_MAX_BYTES", 1_000_000, raising=False)
+    monkeypatch.setattr(image_analyzer, "image_description_cache", ImageDescriptionCache(8, 0))
+
+    async def fake_download(url):
+        return url.encode()
+
+    monkeypatch.setattr(image_analyzer, "download_image", fake_download)
+
+    def install(batch_reply):
+        fake = FakeVision(batch_reply)
+        monkeypatch.setattr(image_analyzer, "xai_client", fake)
+        return fake
+
+    yield install
+    database.close_connection_pool()
+
+
+def attachments(*names):
+    return [{"filename": name, "url": f"https://cdn.example/{name}", "content_type": "image/png"} for name in names]
+
+
+def numbered(count, skip=()):
+    images = [{"index": i, "description": f"image number {i}"} for i in range(count, 0, -1) if i not in skip]
+    return completion(json.dumps({"images": images}), tokens=600)
+
+
+@pytest.mark.asyncio
+async def test_uncached_images_share_one_structured_request(vision):
+    fake = vision(numbered)
+    image_analyzer.image_description_cache.put(fingerprint_image(b"https://cdn.example/b.png"), "cached b")
+
+    results = await image_analyzer.analyze_images(attachments("a.png", "b.png", "c.png"))
+
+    assert len(fake.requests) == 1
+    request = fake.requests[0]
+    assert request["response_format"]["json_schema"]["strict"] is True
+    assert sum(part["type"] == "image_url" for part in request["messages"][0]["content"]) == 2
+    assert [r["description"] for r in results] == ["image number 1", "cached b", "image number 2"]
+    assert set(results[0]) == {"filename", "url", "content_type", "description"}
+    assert image_analyzer.image_description_cache.get(fingerprint_image(b"https://cdn.example/c.png")) == "image number 2"
+
+
+@pytest.mark.asyncio
+async def test_images_missing_from_the_batch_are_retried_alone(vision):
+    fake = vision(lambda count: numbered(count, skip={2}))
+
+    results = await image_analyzer.analyze_images(attachments("a.png", "b.png", "c.png"))
+
+    assert [r["description"] for r in results] == ["image number 1", "single description", "image number 3"]
+    assert len(fake.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_one_request_per_image(vision):
+    fake = vision(lambda count: completion("not json"))
+
+    results = await image_analyzer.analyze_images(attachments("a.png", "b.png"))
+
+    assert [r["description"] for r in results] == ["single description"] * 2
+    assert len(fake.requests) == 3
+
+
+def test_batches_respect_count_and_byte_budgets(monkeypatch):
+    monkeypatch.setattr(config, "IMAGE_BATCH_MAX_IMAGES", 3, raising=False)
+    monkeypatch.setattr(config, "IMAGE_BATCH_MAX_BYTES", 100, raising=False)
+    images = [(None, None, b"x" * size) for size in (10, 10, 10, 10, 90, 60, 50)]
+
+    batches = image_analyzer._plan_image_batches(images)
+
+    assert [[len(image[2]) for image in batch] for batch in batches] == [[10, 10, 10], [10, 90], [60], [50]]
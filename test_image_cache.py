@@ -0,0 +1,146 @@
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import config
+import database
+import image_analyzer
+from image_cache import ImageDescriptionCache, ImageFingerprint, compute_dhash, dhash_from_pixels, fingerprint_image
+
+
+def test_dhash_sets_a_bit_where_brightness_drops():
+    rows = [[9, 8, 7, 6, 5, 4, 3, 2, 1]] + [[1, 2, 3, 4, 5, 6, 7, 8, 9]] * 7
+    assert dhash_from_pixels(rows) == 0xFF << 56
+
+
+def test_exact_hits_survive_a_restart(temp_db):
+    cache = ImageDescriptionCache(memory_entries=2, max_distance=4)
+    fingerprint = fingerprint_image(b"meme bytes")
+    assert cache.get(fingerprint) is None
+
+    cache.put(fingerprint, "a cat wearing sunglasses", tokens=850)
+    cache.clear_memory()
+
+    assert cache.get(fingerprint_image(b"meme bytes")) == "a cat wearing sunglasses"
+    metrics = cache.get_metrics()
+    assert metrics["exact_hits"] == 1
+    assert metrics["misses"] == 1
+    assert metrics["hit_rate"] == 0.5
+    assert metrics["tokens_saved"] == 850
+    assert metrics["vision_calls_saved"] == 1
+
+
+def test_near_duplicate_hashes_share_a_description(temp_db):
+    cache = ImageDescriptionCache(memory_entries=0, max_distance=4)
+    original = 0xF0F0F0F0F0F0F0F0  # High bit set: stored as a negative SQLite integer
+    cache.put(ImageFingerprint("original", original), "a screenshot of a terminal")
+    cache.clear_memory()
+
+    recompressed = ImageFingerprint("recompressed", original ^ 0b1011)
+    unrelated = ImageFingerprint("unrelated", original ^ 0xFFFF)
+
+    assert cache.get(recompressed) == "a screenshot of a terminal"
+    assert cache.get(unrelated) is None
+    assert cache.get_metrics()["perceptual_hits"] == 1
+
+
+def test_resized_copies_get_the_same_dhash():
+    Image = pytest.importorskip("PIL.Image")
+    image = Image.new("L", (64, 64))
+    image.putdata([(x * 4 + (y // 8) * 16) % 256 for y in range(64) for x in range(64)])
+
+    def encode(img, fmt, **kwargs):
+        buffer = io.BytesIO()
+        img.save(buffer, fmt, **kwargs)
+        return buffer.getvalue()
+
+    original = compute_dhash(encode(image, "PNG"))
+    resized = compute_dhash(encode(image.resize((48, 48)).convert("RGB"), "JPEG", quality=70))
+    assert original is not None and resized is not None
+    assert bin(original ^ resized).count('1') <= 4
+
+
+@pytest.mark.asyncio
+async def test_reposted_image_is_described_once(temp_db, monkeypatch):
+    calls = []
+
+    async def fake_download(url):
+        return b"same image"
+
+    async def fake_describe(image_bytes, content_type, filename):
+        calls.append(filename)
+        return "a chart of benchmark results", 900
+
+    monkeypatch.setattr(image_analyzer, "download_image", fake_download)
+    monkeypatch.setattr(image_analyzer, "_describe_image", fake_describe)
+    monkeypatch.setattr(image_analyzer, "image_description_cache", ImageDescriptionCache(8, 4))
+
+    first = await image_analyzer.analyze_image_url("https://cdn.example/1.png", "image/png", "1.png")
+    second = await image_analyzer.analyze_image_url("https://cdn.example/2.png", "image/png", "2.png")
+
+    assert calls == ["1.png"]
+    assert first["description"] == second["description"] == "a chart of benchmark results"
+    assert second["filename"] == "2.png"
+
+
+def test_prune_keeps_recently_used_entries(temp_db):
+    cache = ImageDescriptionCache(memory_entries=8, max_distance=4)
+    cache.put(ImageFingerprint("stale", 0xF0F0F0F0F0F0F0F0), "an old meme")
+    cache.put(ImageFingerprint("fresh"), "a new meme")
+    with database.get_connection() as conn:
+        conn.execute("UPDATE image_description_cache SET last_used_ms = 0 WHERE sha256 = 'stale'")
+        conn.commit()
+
+    assert cache.prune(datetime.now(timezone.utc) - timedelta(days=1)) == 1
+
+    assert cache.get(ImageFingerprint("fresh")) == "a new meme"
+    assert cache.get(ImageFingerprint("copy", 0xF0F0F0F0F0F0F0F0 ^ 1)) is None
+
+
+def test_message_retention_does_not_prune_image_descriptions(temp_db):
+    database.store_image_description("meme", None, "a cat")
+
+    database.delete_messages_older_than(datetime.now(timezone.utc) + timedelta(days=1))
+
+    assert database.get_cached_image_description("meme")["description"] == "a cat"
+
+
+def test_deleted_near_match_falls_back_to_the_next_closest(temp_db):
+    cache = ImageDescriptionCache(memory_entries=0, max_distance=4)
+    original = 0xF0F0F0F0F0F0F0F0
+    cache.put(ImageFingerprint("closest", original ^ 0b1), "deleted elsewhere")
+    cache.put(ImageFingerprint("farther", original ^ 0b111), "a screenshot of a terminal")
+    assert cache.get(ImageFingerprint("copy", original)) == "deleted elsewhere"
+
+    with database.get_connection() as conn:
+        conn.execute("DELETE FROM image_description_cache WHERE sha256 = 'closest'")
+        conn.commit()
+
+    assert cache.get(ImageFingerprint("copy", original)) == "a screenshot of a terminal"
+
+
+def _code_screenshot(lines):
+    Image = pytest.importorskip("PIL.Image")
+    ImageDraw = pytest.importorskip("PIL.ImageDraw")
+    image = Image.new("RGB", (640, 360), (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 640, 24), fill=(60, 60, 60))  # Editor tab bar
+    for row, line in enumerate(lines):
+        draw.text((16, 40 + row * 18), line, fill=(200, 200, 160))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_screenshots_with_the_same_layout_do_not_share_descriptions(temp_db):
+    first = fingerprint_image(_code_screenshot(["def add(a, b):", "    return a + b"]))
+    second = fingerprint_image(_code_screenshot(["for i in range(10):", "    print(i * i)"]))
+    # Different code, nearly identical dHash: any bit tolerance would confuse them
+    assert bin(first.dhash ^ second.dhash).count('1') <= 4
+    cache = ImageDescriptionCache(memory_entries=8, max_distance=config.IMAGE_DHASH_MAX_DISTANCE)
+
+    cache.put(first, "a Python function that adds two numbers")
+
+    assert cache.get(second) is None
+    assert cache.get(first) == "a Python function that adds two numbers"
@@ -0,0 +1,91 @@
+import io
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+import config
+import http_clients
+import image_analyzer
+
+
+@pytest_asyncio.fixture
+async def server(monkeypatch):
+    monkeypatch.setattr(http_clients, "_aiohttp_sessions", {})
+    monkeypatch.setattr(image_analyzer, "MAX_IMAGE_SIZE", 100_000)
+    monkeypatch.setattr(image_analyzer, "_transfer_stats", dict.fromkeys(image_analyzer._transfer_stats, 0))
+
+    async def small(request):
+        return web.Response(body=b"x" * 1000, content_type="image/png")
+
+    async def huge_without_length(request):
+        response = web.StreamResponse()
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        try:
+            for _ in range(50):
+                await response.write(b"x" * 64 * 1024)
+        except (ConnectionResetError, ConnectionError):
+            pass
+        return response
+
+    app = web.Application()
+    app.router.add_get("/small.png", small)
+    app.router.add_get("/huge.png", huge_without_length)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    await http_clients.close_http_clients()
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_download_is_streamed_and_aborted_past_the_cap(server):
+    base = server
+
+    assert await image_analyzer.download_image(f"{base}/small.png") == b"x" * 1000
+    assert await image_analyzer.download_image(f"{base}/huge.png") is None
+
+    stats = image_analyzer.get_image_transfer_stats()
+    assert stats["downloads"] == 1
+    assert stats["downloads_aborted"] == 1
+    assert stats["bytes_downloaded"] == 1000
+
+
+def test_large_attachments_are_fetched_resized_from_the_media_proxy(monkeypatch):
+    monkeypatch.setattr(config, "IMAGE_MAX_EDGE_PX", 1000, raising=False)
+    cdn = "https://cdn.discordapp.com/attachments/1/2/shot.png?ex=abc"
+    proxy = "https://media.discordapp.net/attachments/1/2/shot.png?ex=abc"
+
+    assert image_analyzer.get_download_url(cdn, proxy, 4000, 2000) == f"{proxy}&width=1000&height=500"
+    assert image_analyzer.get_download_url(cdn, proxy, 800, 600) == cdn
+    assert image_analyzer.get_download_url(cdn, None, 4000, 2000) == cdn
+
+    monkeypatch.setattr(config, "IMAGE_MAX_EDGE_PX", 0)
+    assert image_analyzer.get_download_url(cdn, proxy, 4000, 2000) == cdn
+
+
+def test_large_images_are_downscaled_before_upload(monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    monkeypatch.setattr(config, "IMAGE_MAX_EDGE_PX", 512, raising=False)
+    monkeypatch.setattr(config, "IMAGE_UPLOAD_QUALITY", 80, raising=False)
+
+    def png(image):
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        return buffer.getvalue()
+
+    photo = Image.effect_noise((2048, 1024), 64).convert("RGB")
+    data, content_type = image_analyzer.prepare_image_for_upload(png(photo), "image/png")
+    assert content_type == "image/jpeg"
+    assert Image.open(io.BytesIO(data)).size == (512, 256)
+
+    transparent = Image.new("RGBA", (2048, 1024), (255, 0, 0, 0))
+    data, content_type = image_analyzer.prepare_image_for_upload(png(transparent), "image/png")
+    assert content_type == "image/webp"
+
+    small = png(Image.new("RGB", (64, 64), (0, 128, 255)))
+    assert image_analyzer.prepare_image_for_upload(small, "image/png") == (small, "image/png")
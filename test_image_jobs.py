@@ -0,0 +1,136 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+
+import database
+import image_jobs
+
+ATTACHMENTS = [
+    {"filename": "a.png", "url": "https://cdn.example/a.png", "content_type": "image/png"},
+    {"filename": "b.png", "url": "https://cdn.example/b.png", "content_type": "image/png"},
+]
+
+
+@pytest_asyncio.fixture
+async def workers(temp_db):
+    yield
+    await image_jobs.stop_image_analysis()
+
+
+def store(message_id):
+    assert database.store_message(
+        message_id, "1", "user", "c1", "general", "look at this", datetime.now(timezone.utc)
+    )
+
+
+def image_descriptions(message_id):
+    with database.get_connection() as conn:
+        row = conn.execute("SELECT image_descriptions FROM messages WHERE id = ?", (message_id,)).fetchone()
+    return json.loads(row[0]) if row[0] else None
+
+
+@pytest.mark.asyncio
+async def test_images_are_analyzed_in_background_and_written_back(workers, monkeypatch):
+    running = 0
+    peak = 0
+
+    async def fake_analyze(attachments):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"filename": a["filename"], "description": f"picture {a['filename']}"} for a in attachments]
+
+    monkeypatch.setattr(image_jobs, "analyze_images", fake_analyze)
+    queue = await image_jobs.start_image_analysis(concurrency=2)
+    for message_id in ("m1", "m2", "m3"):
+        store(message_id)
+        assert await image_jobs.submit_image_analysis(message_id, ATTACHMENTS)
+    await queue.join()
+
+    assert [d["filename"] for d in image_descriptions("m1")] == ["a.png", "b.png"]
+    assert image_descriptions("m3") is not None
+    assert database.get_pending_image_analysis_jobs(image_jobs.MAX_JOB_ATTEMPTS) == []
+    assert peak == 2
+    assert image_jobs.get_image_analysis_metrics()["images_analyzed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_until_out_of_attempts(workers, monkeypatch):
+    calls = 0
+
+    async def failing_analyze(attachments):
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("vision API down")
+
+    monkeypatch.setattr(image_jobs, "analyze_images", failing_analyze)
+    monkeypatch.setattr(image_jobs, "JOB_RETRY_BASE_DELAY_SECONDS", 0.01)
+    store("m1")
+    queue = await image_jobs.start_image_analysis(concurrency=1)
+    await image_jobs.submit_image_analysis("m1", ATTACHMENTS)
+    await queue.join()
+
+    assert calls == image_jobs.MAX_JOB_ATTEMPTS
+    assert image_descriptions("m1") is None
+    assert database.get_pending_image_analysis_jobs(image_jobs.MAX_JOB_ATTEMPTS) == []
+    assert queue.get_metrics()["jobs_retried"] == image_jobs.MAX_JOB_ATTEMPTS - 1
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_retried_in_process(workers, monkeypatch):
+    calls = 0
+
+    async def flaky_analyze(attachments):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("download timed out")
+        return [{"filename": a["filename"], "description": "retried"} for a in attachments]
+
+    monkeypatch.setattr(image_jobs, "analyze_images", flaky_analyze)
+    monkeypatch.setattr(image_jobs, "JOB_RETRY_BASE_DELAY_SECONDS", 0.01)
+    store("m1")
+    queue = await image_jobs.start_image_analysis(concurrency=1)
+    await image_jobs.submit_image_analysis("m1", ATTACHMENTS[:1])
+    await queue.join()
+
+    assert image_descriptions("m1") == [{"filename": "a.png", "description": "retried"}]
+    assert database.get_pending_image_analysis_jobs(image_jobs.MAX_JOB_ATTEMPTS) == []
+
+
+@pytest.mark.asyncio
+async def test_stop_leaves_scheduled_retries_persisted(workers, monkeypatch):
+    async def failing_analyze(attachments):
+        raise RuntimeError("vision API down")
+
+    monkeypatch.setattr(image_jobs, "analyze_images", failing_analyze)
+    store("m1")
+    queue = await image_jobs.start_image_analysis(concurrency=1)
+    await image_jobs.submit_image_analysis("m1", ATTACHMENTS)
+    await queue._queue.join()  # First attempt done, retry waiting on its backoff
+    await image_jobs.stop_image_analysis()
+
+    pending = database.get_pending_image_analysis_jobs(image_jobs.MAX_JOB_ATTEMPTS)
+    assert [(job["message_id"], job["attempts"]) for job in pending] == [("m1", 1)]
+
+
+@pytest.mark.asyncio
+async def test_jobs_persisted_before_start_are_resumed(workers, monkeypatch):
+    async def fake_analyze(attachments):
+        return [{"filename": a["filename"], "description": "resumed"} for a in attachments]
+
+    monkeypatch.setattr(image_jobs, "analyze_images", fake_analyze)
+    store("m1")
+    # No workers yet: the job is only persisted
+    assert await image_jobs.submit_image_analysis("m1", ATTACHMENTS[:1])
+
+    queue = await image_jobs.start_image_analysis(concurrency=1)
+    await queue.join()
+
+    assert image_descriptions("m1") == [{"filename": "a.png", "description": "resumed"}]
+    assert queue.get_metrics()["jobs_completed"] == 1
@@ -0,0 +1,123 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import config
+import database
+import incremental_summary
+import llm_handler
+
+
+@pytest.fixture
+def temp_db(temp_db, monkeypatch):
+    monkeypatch.setattr(config, "SUMMARY_BUCKET_MIN_MESSAGES", 2)
+    return temp_db
+
+
+# Half past the hour, so the window has a partial first hour and a current hour
+NOW = datetime(2026, 3, 1, 15, 30, tzinfo=timezone.utc)
+
+
+def _store(message_id, created_at, content=None):
+    database.store_message(
+        message_id=message_id,
+        author_id="1",
+        author_name="user1",
+        channel_id="chan",
+        channel_name="general",
+        content=content or f"message {message_id}",
+        created_at=created_at,
+        guild_id="guild",
+        guild_name="Guild",
+    )
+
+
+def _seed():
+    for hour in (12, 13, 14):
+        for minute in (10, 20):
+            _store(f"h{hour}m{minute}", NOW.replace(hour=hour, minute=minute))
+    _store("live", NOW.replace(minute=5))
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def create(self, **kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(
+            content=f"- notes {len(self.prompts)}"
+        ))])
+
+
+async def _summarize(llm, hours=3):
+    messages = database.get_channel_messages_for_hours("chan", NOW, hours)
+    with patch.object(llm_handler.llm_client.chat.completions, "create", llm.create):
+        return await incremental_summary.summarize_channel_hours("chan", "general", NOW, hours, messages)
+
+
+@pytest.mark.asyncio
+async def test_completed_hours_are_noted_once_and_reused(temp_db):
+    _seed()
+
+    first = _FakeLLM()
+    await _summarize(first)
+    # Hours 13 and 14 are complete; hour 12 is only half inside the window
+    assert set(database.get_summary_buckets("chan", 0, 10 ** 12)) == {
+        incremental_summary._bucket_of(NOW.replace(hour=13)),
+        incremental_summary._bucket_of(NOW.replace(hour=14)),
+    }
+    assert len(first.prompts) == 3
+
+    second = _FakeLLM()
+    await _summarize(second)
+    assert len(second.prompts) == 1
+    final_prompt = second.prompts[0]
+    assert "message live" in final_prompt
+    assert "message h13m10" not in final_prompt
+    assert "13:00–14:00 UTC" in final_prompt
+
+
+@pytest.mark.asyncio
+async def test_late_message_invalidates_its_hour(temp_db):
+    _seed()
+    await _summarize(_FakeLLM())
+
+    _store("late", NOW.replace(hour=13, minute=59))
+    buckets = database.get_summary_buckets("chan", 0, 10 ** 12)
+    assert incremental_summary._bucket_of(NOW.replace(hour=13)) not in buckets
+    assert incremental_summary._bucket_of(NOW.replace(hour=14)) in buckets
+
+    llm = _FakeLLM()
+    await _summarize(llm)
+    # One note for the invalidated hour, then the final summary
+    assert len(llm.prompts) == 2
+    assert "message late" in llm.prompts[0]
+
+
+def test_bucket_is_not_stored_when_its_messages_changed(temp_db):
+    _store("a", NOW.replace(hour=13))
+    bucket = incremental_summary._bucket_of(NOW.replace(hour=13))
+
+    assert not database.store_summary_bucket("chan", bucket, "stale", message_count=2)
+    assert database.store_summary_bucket("chan", bucket, "fresh", message_count=1)
+    assert database.get_summary_buckets("chan", bucket, bucket)[bucket]["summary_text"] == "fresh"
+
+    database.delete_messages_older_than(NOW)
+    assert database.get_summary_buckets("chan", bucket, bucket) == {}
+
+
+@pytest.mark.asyncio
+async def test_quiet_hours_are_passed_raw(temp_db, monkeypatch):
+    monkeypatch.setattr(config, "SUMMARY_BUCKET_MIN_MESSAGES", 5)
+    _seed()
+
+    llm = _FakeLLM()
+    await _summarize(llm)
+
+    assert len(llm.prompts) == 1
+    assert "message h13m10" in llm.prompts[0]
+    assert database.get_summary_buckets("chan", 0, 10 ** 12) == {}
@@ -61,7 +61,7 @@ class TestMessageReferenceIntegration:
         captured_query = None
         captured_context = None
         
-        async def mock_llm_call(query, context=None):
+        async def mock_llm_call(query, context=None, on_delta=None):
             nonlocal captured_query, captured_context
             captured_query = query
             captured_context = context
@@ -75,7 +75,6 @@ class TestMessageReferenceIntegration:
              patch('command_handler.call_llm_api', side_effect=mock_llm_call), \
              patch('command_abstraction.ThreadManager') as mock_thread_manager_class, \
              patch('command_abstraction.MessageResponseSender') as mock_sender_class, \
-             patch('command_handler.split_long_message', return_value=["Test response"]), \
              patch('command_handler.store_bot_response_db'):
             
             # Setup mocks
@@ -146,7 +145,7 @@ class TestMessageReferenceIntegration:
         captured_query = None
         captured_context = None
         
-        async def mock_llm_call(query, context=None):
+        async def mock_llm_call(query, context=None, on_delta=None):
             nonlocal captured_query, captured_context
             captured_query = query
             captured_context = context
@@ -160,7 +159,6 @@ class TestMessageReferenceIntegration:
              patch('command_handler.call_llm_api', side_effect=mock_llm_call), \
              patch('command_abstraction.ThreadManager') as mock_thread_manager_class, \
              patch('command_abstraction.MessageResponseSender') as mock_sender_class, \
-             patch('command_handler.split_long_message', return_value=["Test response"]), \
              patch('command_handler.store_bot_response_db'):
             
             # Setup mocks
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import database
+import llm_handler
+from llm_cache import llm_response_cache, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "test.db"))
+    database.init_database()
+    monkeypatch.setattr(llm_response_cache, "enabled", True)
+    monkeypatch.setattr(llm_response_cache, "metrics", dict.fromkeys(llm_response_cache.metrics, 0))
+    monkeypatch.setattr(llm_response_cache, "_sites", {})
+    yield llm_response_cache
+    database.close_connection_pool()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    requests = []
+
+    async def create(**request):
+        requests.append(request)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"- answer {len(requests)}"))],
+            usage=SimpleNamespace(total_tokens=1200),
+        )
+
+    monkeypatch.setattr(llm_handler, "llm_client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    return requests
+
+
+def test_key_covers_every_request_option():
+    request = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.3, "max_tokens": 500}
+
+    assert make_cache_key("openrouter.chat", request) == make_cache_key("openrouter.chat", dict(reversed(request.items())))
+    assert make_cache_key("openrouter.chat", request) != make_cache_key("openrouter.chat", {**request, "temperature": 0.5})
+    assert make_cache_key("openrouter.chat", request) != make_cache_key("openrouter.chat", {**request, "model": "other"})
+    assert make_cache_key("openrouter.chat", request) != make_cache_key("exa.answer", request)
+
+
+@pytest.mark.asyncio
+async def test_identical_summaries_are_served_from_cache_across_restarts(cache, fake_llm):
+    first = await llm_handler.summarize_scraped_content("Some article text", "https://example.com/a")
+    second = await llm_handler.summarize_scraped_content("Some article text", "https://example.com/a")
+    cache.clear_memory()
+    third = await llm_handler.summarize_scraped_content("Some article text", "https://example.com/a")
+    other = await llm_handler.summarize_scraped_content("Other article text", "https://example.com/a")
+
+    assert first == second == third != other
+    assert len(fake_llm) == 2
+    metrics = cache.get_metrics()
+    assert metrics["hits"] == 2
+    assert metrics["misses"] == 2
+    assert metrics["tokens_saved"] == 2400
+    assert metrics["sites"]["url_summary"] == {"hits": 2, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_opted_out_and_expired_calls_reach_the_model(cache, fake_llm):
+    request = {"model": "m", "messages": [{"role": "user", "content": "award points"}], "temperature": 0.7}
+
+    await llm_handler._chat_completion_text("points", None, **request)
+    await llm_handler._chat_completion_text("points", None, **request)
+    assert len(fake_llm) == 2
+
+    cache.put(make_cache_key("openrouter.chat", request), "test", "openrouter.chat", "m", "stale", 10, ttl_seconds=-1)
+    assert await llm_handler._chat_completion_text("test", 60, **request) == "- answer 3"
+
+
+@pytest.mark.asyncio
+async def test_exa_answers_are_cached(cache, monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"answer": "42", "citations": [{"url": "https://example.com"}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_handler, "get_httpx_client", lambda upstream: client)
+
+    first = await llm_handler.call_exa_answer("what is the answer?")
+    second = await llm_handler.call_exa_answer("what is the answer?")
+    await client.aclose()
+
+    assert first == second == {"answer": "42", "citations": [{"url": "https://example.com"}]}
+    assert len(calls) == 1
@@ -0,0 +1,80 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+import database
+
+
+def _message(i):
+    return {
+        "message_id": f"ingest-{i}",
+        "author_id": "123",
+        "author_name": "tester",
+        "channel_id": "chan",
+        "channel_name": "general",
+        "content": f"message {i}",
+        "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "guild_id": "guild",
+        "guild_name": "Guild",
+    }
+
+
+def _count_rows(db_file):
+    with sqlite3.connect(db_file) as conn:
+        return conn.execute("SELECT COUNT(*) FROM messages WHERE id LIKE 'ingest-%'").fetchone()[0]
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_batches_writes_and_flushes(temp_db):
+    queue = database.MessageIngestQueue(batch_size=200, flush_interval=0.05)
+    queue.start()
+
+    for i in range(450):
+        await queue.put(_message(i))
+    await queue.flush()
+
+    assert _count_rows(temp_db) == 450
+    metrics = queue.get_metrics()
+    assert metrics["enqueued"] == 450
+    assert metrics["written"] == 450
+    assert metrics["queue_depth"] == 0
+    assert 3 <= metrics["batches"] < 450
+
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_skips_duplicates_without_dropping_batch(temp_db):
+    assert await database.store_messages_batch([_message(0)])
+
+    queue = database.MessageIngestQueue(batch_size=10, flush_interval=0.05)
+    queue.start()
+    for i in range(5):
+        await queue.put(_message(i))
+    await queue.stop()
+
+    assert _count_rows(temp_db) == 5
+    metrics = queue.get_metrics()
+    assert metrics["written"] == 4
+    assert metrics["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_applies_backpressure(temp_db):
+    queue = database.MessageIngestQueue(batch_size=5, flush_interval=0.01, max_queue_size=5)
+    queue.start()
+    for i in range(50):
+        await queue.put(_message(i))
+    await queue.stop()
+
+    assert _count_rows(temp_db) == 50
+    assert queue.get_metrics()["max_queue_depth"] <= 5
+
+
+@pytest.mark.asyncio
+async def test_enqueue_message_writes_directly_when_queue_not_started(temp_db):
+    await database.stop_message_ingestion()
+
+    assert await database.enqueue_message(_message(1))
+    assert _count_rows(temp_db) == 1
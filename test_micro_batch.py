@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+import llm_handler
+from micro_batch import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_items_share_one_call_and_get_their_own_results():
+    calls = []
+
+    async def fetch_batch(group, items):
+        calls.append((group, list(items)))
+        return {item: item.upper() for item in items if item != "missing"}
+
+    batcher = MicroBatcher("test", fetch_batch, window=0.01, max_size=10)
+    results = await asyncio.gather(
+        batcher.submit("q", "a"),
+        batcher.submit("q", "b"),
+        batcher.submit("q", "a"),
+        batcher.submit("q", "missing"),
+        batcher.submit("other", "c"),
+    )
+
+    assert results == ["A", "B", "A", None, "C"]
+    assert sorted(calls) == [("other", ["c"]), ("q", ["a", "b", "missing"])]
+    metrics = batcher.get_metrics()
+    assert metrics["batches"] == 2
+    assert metrics["round_trips_saved"] == 3
+    assert metrics["max_batch_size"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting_for_the_window():
+    sizes = []
+
+    async def fetch_batch(group, items):
+        sizes.append(len(items))
+        return {item: item for item in items}
+
+    batcher = MicroBatcher("test", fetch_batch, window=60, max_size=2)
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.submit(None, 1), batcher.submit(None, 2)), timeout=1
+    )
+
+    assert results == [1, 2]
+    assert sizes == [2]
+
+
+@pytest.mark.asyncio
+async def test_errors_are_delivered_per_item_and_per_batch():
+    async def fetch_batch(group, items):
+        if group == "broken":
+            raise RuntimeError("batch failed")
+        return {"good": "ok", "bad": ValueError("bad url")}
+
+    batcher = MicroBatcher("test", fetch_batch, window=0, max_size=10)
+    good, bad, broken = await asyncio.gather(
+        batcher.submit("q", "good"),
+        batcher.submit("q", "bad"),
+        batcher.submit("broken", "x"),
+        return_exceptions=True,
+    )
+
+    assert good == "ok"
+    assert isinstance(bad, ValueError)
+    assert isinstance(broken, RuntimeError)
+    assert batcher.get_metrics()["failed_items"] == 1
+    assert batcher.get_metrics()["failed_batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_exa_batch_routes_results_and_retries_individually(monkeypatch):
+    calls = []
+
+    async def fake_get_exa_contents(urls, summary_query=None):
+        calls.append(list(urls))
+        if "https://bad.example" in urls:
+            if len(urls) > 1:
+                raise RuntimeError("400 Bad Request")
+            raise RuntimeError("invalid url")
+        return [{"id": url, "url": url + "/", "title": "", "text": f"text of {url}", "summary": ""}
+                for url in reversed(urls)]
+
+    monkeypatch.setattr(llm_handler, "get_exa_contents", fake_get_exa_contents)
+
+    results = await llm_handler._fetch_exa_contents_batch(None, ["https://a.example", "https://b.example"])
+    assert results["https://a.example"]["text"] == "text of https://a.example"
+    assert results["https://b.example"]["text"] == "text of https://b.example"
+
+    results = await llm_handler._fetch_exa_contents_batch(None, ["https://a.example", "https://bad.example"])
+    assert results["https://a.example"]["text"] == "text of https://a.example"
+    assert isinstance(results["https://bad.example"], RuntimeError)
+    assert calls[1] == ["https://a.example", "https://bad.example"]
@@ -0,0 +1,169 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import database
+
+
+def _store(message_id, author_id="1", reply_to=None, created_at=None, **kwargs):
+    database.store_message(
+        message_id=message_id,
+        author_id=author_id,
+        author_name=f"user{author_id}",
+        channel_id="chan",
+        channel_name="general",
+        content=f"message {message_id}",
+        created_at=created_at or datetime.now(timezone.utc),
+        guild_id="guild",
+        guild_name="Guild",
+        reply_to_message_id=reply_to,
+        **kwargs,
+    )
+
+
+def test_replies_inherit_root_and_depth(temp_db):
+    _store("root")
+    _store("a", author_id="2", reply_to="root")
+    _store("b", author_id="3", reply_to="a")
+
+    node = database.get_thread_node("b")
+    assert (node["root_id"], node["parent_id"], node["depth"]) == ("root", "a", 2)
+    assert database.get_thread_node("root")["depth"] == 0
+    assert [n["message_id"] for n in database.get_thread_ancestors("b")] == ["a", "root"]
+    assert [n["message_id"] for n in database.get_conversation_tree("a")] == ["root", "a", "b"]
+    assert database.get_thread_participants("root") == {"1": 1, "2": 1, "3": 1}
+
+
+def test_reply_to_unstored_message_roots_at_parent(temp_db):
+    _store("reply", reply_to="missing")
+
+    node = database.get_thread_node("reply")
+    assert (node["root_id"], node["depth"]) == ("missing", 1)
+
+
+def test_reply_fan_in(temp_db):
+    _store("root")
+    _store("r1", author_id="2", reply_to="root")
+    _store("r2", author_id="2", reply_to="root")
+    _store("r3", author_id="3", reply_to="root")
+
+    fan_in = database.get_reply_fan_in("root")
+    assert fan_in["reply_count"] == 3
+    assert fan_in["unique_repliers"] == 2
+    assert fan_in["reply_ids"] == ["r1", "r2", "r3"]
+
+
+def test_chain_has_gif_propagates(temp_db):
+    _store("gif", has_gif=True)
+    _store("reply", reply_to="gif")
+    _store("plain")
+    _store("plain-reply", reply_to="plain")
+
+    assert database.get_thread_node("reply")["chain_has_gif"] is True
+    assert database.get_thread_node("plain-reply")["chain_has_gif"] is False
+
+    assert database.mark_message_has_gif("plain")
+    assert database.get_thread_node("plain-reply")["chain_has_gif"] is True
+
+
+def test_reply_to_unstored_message_has_unknown_gif_chain(temp_db):
+    _store("reply", reply_to="missing")
+
+    assert database.get_thread_node("reply")["chain_has_gif"] is None
+
+
+def test_reply_to_pre_migration_gif_has_unknown_gif_chain(temp_db):
+    # A GIF stored before has_gif existed: the column is backfilled as NULL (unknown)
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("DROP TABLE message_threads")
+        conn.execute("DROP TABLE thread_participants")
+        conn.execute("DROP TRIGGER message_threads_insert")
+        conn.execute("DROP TRIGGER message_threads_delete")
+    _store("old-gif")
+    _store("old-reply", reply_to="old-gif")
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("UPDATE messages SET has_gif = NULL")
+
+    database.migrate_database()
+    _store("new-reply", author_id="2", reply_to="old-gif")
+    _store("deeper-reply", author_id="3", reply_to="new-reply")
+
+    # Unknown, so the bot falls back to walking the chain on Discord instead of trusting a negative
+    assert database.get_thread_node("old-gif")["chain_has_gif"] is None
+    assert database.get_thread_node("old-reply")["chain_has_gif"] is None
+    assert database.get_thread_node("new-reply")["chain_has_gif"] is None
+    assert database.get_thread_node("deeper-reply")["chain_has_gif"] is None
+
+    assert database.mark_message_has_gif("old-gif")
+    assert database.get_thread_node("deeper-reply")["chain_has_gif"] is True
+
+
+def test_migration_rebuilds_non_nullable_gif_chain(temp_db):
+    _store("root")
+    _store("reply", author_id="2", reply_to="root")
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("DROP TABLE message_threads")
+        conn.execute(database.CREATE_MESSAGE_THREADS_TABLE.replace(
+            "chain_has_gif INTEGER", "chain_has_gif INTEGER NOT NULL DEFAULT 0"
+        ))
+        conn.execute("UPDATE messages SET has_gif = NULL WHERE id = 'root'")
+
+    database.migrate_database()
+
+    assert database.get_thread_node("reply")["chain_has_gif"] is None
+    assert database.get_thread_participants("root") == {"1": 1, "2": 1}
+
+
+def test_delete_removes_nodes_and_participants(temp_db):
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+    _store("root", created_at=old)
+    _store("reply", author_id="2", reply_to="root")
+
+    database.delete_messages_older_than(datetime.now(timezone.utc) - timedelta(days=1))
+
+    assert database.get_thread_node("root") is None
+    assert database.get_thread_participants("root") == {"2": 1}
+
+
+def test_migration_backfills_reply_graph(temp_db):
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("DROP TABLE message_threads")
+        conn.execute("DROP TABLE thread_participants")
+        conn.execute("DROP TRIGGER message_threads_insert")
+        conn.execute("DROP TRIGGER message_threads_delete")
+    now = datetime.now(timezone.utc)
+    _store("root", created_at=now - timedelta(minutes=2))
+    _store("reply", author_id="2", reply_to="root", created_at=now - timedelta(minutes=1))
+
+    database.migrate_database()
+
+    node = database.get_thread_node("reply")
+    assert (node["root_id"], node["depth"]) == ("root", 1)
+    assert database.get_thread_participants("root") == {"1": 1, "2": 1}
+
+
+def test_engagement_metrics_use_reply_graph(temp_db):
+    now = datetime.now(timezone.utc)
+    _store("q", author_id="1", created_at=now - timedelta(minutes=3))
+    _store("a1", author_id="2", reply_to="q", created_at=now - timedelta(minutes=2))
+    _store("a2", author_id="3", reply_to="q", created_at=now - timedelta(minutes=1))
+    _store("self", author_id="1", reply_to="q", created_at=now)
+
+    metrics = database.get_user_engagement_metrics("guild", now - timedelta(hours=1), now + timedelta(minutes=1))
+
+    assert metrics["1"]["replies_received"] == 2
+    assert metrics["1"]["unique_repliers"] == 2
+    assert metrics["1"]["message_count"] == 2
+    assert metrics["2"]["replies_given"] == 1
+
+
+def test_summary_messages_include_reply_author(temp_db):
+    now = datetime.now(timezone.utc)
+    _store("q", author_id="1", created_at=now - timedelta(minutes=2))
+    _store("a", author_id="2", reply_to="q", created_at=now - timedelta(minutes=1))
+
+    messages = database.get_channel_messages_for_hours("chan", now, 1)
+
+    assert [(m["id"], m["reply_to_author"], m["thread_depth"]) for m in messages] == [
+        ("q", None, 0),
+        ("a", "user1", 1),
+    ]
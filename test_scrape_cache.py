@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database
+from url_utils import canonicalize_url
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("HTTPS://Example.COM/Path/?utm_source=x&b=2&a=1#frag", "https://example.com/Path?a=1&b=2"),
+    ("https://www.example.com:443/?ref=hn", "https://example.com/"),
+    ("https://twitter.com/someone/status/123?s=20&si=abc", "https://x.com/i/status/123"),
+    ("https://x.com/other/status/123", "https://x.com/i/status/123"),
+    ("https://youtu.be/dQw4w9WgXcQ?si=share", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
+    ("https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=42", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
+    ("https://www.youtube.com/shorts/dQw4w9WgXcQ", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_cache_is_shared_across_url_spellings(temp_db):
+    assert database.store_scraped_content(
+        "https://twitter.com/a/status/42?utm_source=share", "apify", "tweet summary", content="raw tweet"
+    )
+
+    cached = database.get_scraped_content_by_url("https://x.com/b/status/42")
+
+    assert cached["summary"] == "tweet summary"
+    assert cached["provider"] == "apify"
+    assert cached["content_hash"]
+
+
+def test_expired_entries_are_not_served_and_get_pruned(temp_db, monkeypatch):
+    monkeypatch.setattr(database, "SCRAPE_CACHE_DEFAULT_TTL_SECONDS", -1)
+    database.store_scraped_content("https://example.com/page", "firecrawl", "old summary")
+
+    assert database.get_scraped_content_by_url("https://example.com/page") is None
+
+    database.delete_messages_older_than(datetime.now(timezone.utc) - timedelta(days=1))
+    with sqlite3.connect(temp_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM scraped_content").fetchone()[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_message_retention_and_is_backfilled(temp_db):
+    database.store_message(
+        message_id="m1", author_id="1", author_name="user1", channel_id="chan", channel_name="general",
+        content="look https://youtu.be/dQw4w9WgXcQ", created_at=datetime.now(timezone.utc),
+        guild_id="guild", guild_name="Guild",
+    )
+    await database.update_message_with_scraped_data("m1", "https://youtu.be/dQw4w9WgXcQ", "video summary", "[]")
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("DROP TABLE scraped_content")
+
+    database.migrate_database()
+    database.delete_messages_older_than(datetime.now(timezone.utc) + timedelta(minutes=1))
+
+    cached = database.get_scraped_content_by_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    assert cached["summary"] == "video summary"
+    assert cached["provider"] == "youtube"
+
+
+@pytest.mark.asyncio
+async def test_scrapes_with_errors_are_not_cached(temp_db, monkeypatch):
+    import llm_handler
+    from scraper_router import ScrapeResult
+
+    url = "https://example.com/video"
+
+    async def fake_scrape(scrape_url):
+        return ScrapeResult(scrape_url, "youtube", "Transcript Unavailable", {"error": "transcript_unavailable"})
+
+    async def fake_summarize(markdown, scrape_url):
+        return "captions are still being generated"
+
+    monkeypatch.setattr(llm_handler, "scrape_url", fake_scrape)
+    monkeypatch.setattr(llm_handler, "summarize_scraped_content", fake_summarize)
+
+    assert await llm_handler.scrape_and_summarize_url(url) == "captions are still being generated"
+    assert database.get_scraped_content_by_url(url) is None
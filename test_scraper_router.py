@@ -0,0 +1,104 @@
+import pytest
+
+import scraper_router
+from scraper_router import ScrapeResult, ScraperProvider
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Replace the registry with fakes for the duration of a test."""
+    monkeypatch.setattr(scraper_router, "_providers", [])
+    scraper_router._classify_host.cache_clear()
+    calls = []
+
+    def make(name, outcome, kind=None, hosts=None, enabled=True):
+        async def fetch(url):
+            calls.append(name)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return ScrapeResult(url, name, outcome) if outcome else None
+
+        provider = ScraperProvider(
+            name=name, fetch=fetch, kind=kind,
+            hosts=scraper_router.re.compile(hosts) if hosts else None,
+            enabled=lambda: enabled,
+        )
+        scraper_router.register_provider(provider)
+        return provider
+
+    yield make, calls
+    scraper_router._classify_host.cache_clear()
+
+
+def test_default_registry_classifies_urls():
+    assert scraper_router.classify_url("https://youtu.be/dQw4w9WgXcQ") == "youtube"
+    assert scraper_router.classify_url("https://mobile.twitter.com/a/status/1") == "twitter"
+    assert scraper_router.classify_url("https://example.com/x.com") == "web"
+
+
+@pytest.mark.asyncio
+async def test_specialized_provider_is_tried_before_fallbacks(providers):
+    make, calls = providers
+    make("tube", "transcript", kind="youtube", hosts=r"^youtube\.com$")
+    make("generic", "page")
+
+    result = await scraper_router.scrape_url("https://youtube.com/watch?v=x")
+
+    assert (result.provider, result.markdown) == ("tube", "transcript")
+    assert calls == ["tube"]
+
+
+@pytest.mark.asyncio
+async def test_failures_fall_back_and_are_recorded(providers):
+    make, calls = providers
+    make("tube", RuntimeError("quota"), kind="youtube", hosts=r"^youtube\.com$")
+    make("empty", None)
+    make("generic", "page")
+    make("disabled", "never", enabled=False)
+
+    result = await scraper_router.scrape_url("https://youtube.com/watch?v=x")
+
+    assert result.provider == "generic"
+    assert "disabled" not in calls
+    stats = scraper_router.get_provider_stats()
+    assert stats["tube"]["failures"] == 1
+    assert stats["generic"]["successes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fallbacks_are_ordered_by_observed_cost(providers):
+    make, calls = providers
+    flaky = make("flaky", None)
+    reliable = make("reliable", "page")
+    for _ in range(5):
+        flaky.stats.record(False, 100)
+        reliable.stats.record(True, 100)
+
+    _, chain = scraper_router.provider_chain("https://example.com")
+    assert [p.name for p in chain] == ["reliable", "flaky"]
+
+    await scraper_router.scrape_url("https://example.com")
+    assert calls == ["reliable"]
+
+
+@pytest.mark.asyncio
+async def test_youtube_without_transcript_falls_back(providers, monkeypatch):
+    import youtube_handler
+
+    async def no_transcript(url):
+        return {
+            "markdown": "# YouTube Video - Transcript Unavailable",
+            "raw_data": {"transcript": None, "metadata": {}, "error": "transcript_unavailable"},
+        }
+
+    monkeypatch.setattr(youtube_handler, "scrape_youtube_content", no_transcript)
+    make, calls = providers
+    scraper_router.register_provider(ScraperProvider(
+        name="youtube", fetch=scraper_router._fetch_youtube, kind="youtube",
+        hosts=scraper_router.re.compile(r"^youtube\.com$"),
+    ))
+    make("generic", "video page")
+
+    result = await scraper_router.scrape_url("https://youtube.com/watch?v=x")
+
+    assert (result.provider, result.markdown) == ("generic", "video page")
@@ -0,0 +1,173 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database
+import semantic_index
+
+
+@pytest.fixture
+def temp_db(temp_db, monkeypatch):
+    monkeypatch.setattr(semantic_index, "_embedder", semantic_index.HashingEmbedder())
+    return temp_db
+
+
+def _store(message_id, content, created_at=None, is_bot=False, **kwargs):
+    database.store_message(
+        message_id=message_id,
+        author_id="1",
+        author_name="tester",
+        channel_id="chan",
+        channel_name="general",
+        content=content,
+        created_at=created_at or datetime.now(timezone.utc),
+        guild_id="guild",
+        guild_name="Guild",
+        is_bot=is_bot,
+        **kwargs,
+    )
+
+
+def test_hashing_embedder_is_normalized_and_deterministic():
+    embedder = semantic_index.HashingEmbedder(dimensions=64)
+    first, second = embedder.embed(["Rust borrow checker", "Rust borrow checker"])
+
+    assert first == second
+    assert sum(v * v for v in first) == pytest.approx(1.0)
+
+
+def test_update_index_embeds_pending_messages_only_once(temp_db):
+    _store("m1", "docker compose networking")
+    _store("m2", "kubernetes ingress controllers")
+    _store("bot", "bot replies are not indexed", is_bot=True)
+
+    assert semantic_index.update_index() == 2
+    assert semantic_index.update_index() == 0
+
+
+def _pending(db_file):
+    with sqlite3.connect(db_file) as conn:
+        return [row[0] for row in conn.execute("SELECT message_id FROM message_embeddings WHERE vector IS NULL")]
+
+
+def test_update_index_caps_messages_newest_first(temp_db):
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        _store(f"m{i}", f"message number {i}", created_at=now - timedelta(minutes=i))
+
+    assert semantic_index.update_index(batch_size=2, max_messages=3) == 3
+    assert sorted(_pending(temp_db)) == ["m3", "m4"]
+
+
+def test_update_index_reembeds_other_embedders_vectors(temp_db, monkeypatch):
+    _store("m1", "docker compose networking")
+    semantic_index.update_index()
+
+    monkeypatch.setattr(semantic_index, "_embedder", semantic_index.HashingEmbedder(dimensions=64))
+
+    assert semantic_index.update_index() == 1
+    assert [mid for mid, _ in semantic_index.semantic_search("docker networking", "guild")] == ["m1"]
+
+
+@pytest.mark.asyncio
+async def test_background_indexer_embeds_ingested_messages(temp_db):
+    _store("backlog", "stored before the indexer started")
+    indexer = semantic_index.SemanticIndexer(batch_size=10, debounce=0, poll_interval=60)
+    queue = database.MessageIngestQueue(batch_size=10, flush_interval=0.01)
+    indexer.start()
+    queue.start()
+    try:
+        await queue.put({
+            "message_id": "live",
+            "author_id": "1",
+            "author_name": "tester",
+            "channel_id": "chan",
+            "channel_name": "general",
+            "content": "kubernetes ingress controllers",
+            "created_at": datetime.now(timezone.utc),
+            "guild_id": "guild",
+            "guild_name": "Guild",
+        })
+        await queue.flush()
+        for _ in range(100):
+            if not _pending(temp_db) and indexer.metrics["embedded"] == 2:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await queue.stop()
+        await indexer.stop()
+
+    assert _pending(temp_db) == []
+    assert indexer.metrics["embedded"] == 2
+    assert indexer.notify not in database._write_listeners
+
+
+@pytest.mark.asyncio
+async def test_rescraped_message_is_reembedded(temp_db):
+    _store("m1", "check this link")
+    semantic_index.update_index()
+
+    await database.update_message_with_scraped_data("m1", "https://example.com", "postgres vacuum tuning", "[]")
+
+    assert semantic_index.update_index() == 1
+    assert [mid for mid, _ in semantic_index.semantic_search("postgres vacuum", "guild")] == ["m1"]
+
+
+def test_semantic_search_ranks_similar_messages_first(temp_db):
+    _store("docker", "docker compose networking between containers")
+    _store("cooking", "best way to cook pasta")
+    semantic_index.update_index()
+
+    results = semantic_index.semantic_search("container networking with docker", "guild")
+
+    assert results[0][0] == "docker"
+    assert "cooking" not in [mid for mid, _ in results]
+
+
+def test_semantic_search_scans_only_the_newest_messages(temp_db):
+    now = datetime.now(timezone.utc)
+    _store("old", "docker compose networking", created_at=now - timedelta(days=30))
+    _store("new", "docker swarm networking", created_at=now)
+    semantic_index.update_index()
+
+    results = semantic_index.semantic_search("docker networking", "guild", max_messages=1)
+
+    assert [mid for mid, _ in results] == ["new"]
+
+
+def test_hybrid_rank_prefers_items_in_both_lists():
+    fused = semantic_index.hybrid_rank([["a", "b", "c"], ["c", "d"]], limit=3)
+
+    assert fused[0] == "c"
+    assert len(fused) == 3
+
+
+@pytest.mark.asyncio
+async def test_retrieve_context_messages_returns_chronological_relevant_messages(temp_db):
+    now = datetime.now(timezone.utc)
+    _store("newer", "python asyncio event loop tips", created_at=now)
+    _store("older", "asyncio tasks and python coroutines", created_at=now - timedelta(hours=2))
+    _store("noise", "what's for lunch", created_at=now - timedelta(hours=1))
+
+    messages = await semantic_index.retrieve_context_messages(
+        "how does the python asyncio event loop work?", ["python", "asyncio"], "guild", limit=5
+    )
+
+    assert [m["id"] for m in messages] == ["older", "newer"]
+
+
+def test_extract_keywords_drops_short_and_stop_words():
+    assert semantic_index.extract_keywords("What does anyone know about Docker networking?") == ["know", "docker", "networking"]
+
+
+@pytest.mark.asyncio
+async def test_retrieve_question_context_pads_with_recent_messages(temp_db):
+    now = datetime.now(timezone.utc)
+    _store("match", "python asyncio event loop tips", created_at=now - timedelta(hours=1))
+    _store("recent", "what's for lunch", created_at=now)
+
+    messages = await semantic_index.retrieve_question_context("python asyncio?", "guild")
+
+    assert [m["id"] for m in messages] == ["match", "recent"]
@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import llm_handler
+from single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.get_metrics() == {
+        "calls": 5, "executions": 1, "deduplicated": 4, "failures": 0, "in_flight": 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_failures_fan_out_and_are_not_remembered():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.get_metrics()["failures"] == 1
+    # The next call starts fresh
+    assert await flight.do("key", AsyncMock(return_value="ok")) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_on_demand_scrapes_are_deduplicated_across_url_spellings():
+    scrape = AsyncMock()
+
+    async def slow_scrape(url):
+        await asyncio.sleep(0.01)
+        return "summary"
+
+    scrape.side_effect = slow_scrape
+    with patch.object(llm_handler, "get_scraped_content_by_url", return_value=None), \
+            patch.object(llm_handler, "scrape_and_summarize_url", scrape):
+        results = await asyncio.gather(
+            llm_handler.scrape_url_on_demand("https://example.com/post?utm_source=a"),
+            llm_handler.scrape_url_on_demand("https://EXAMPLE.com/post?utm_source=b"),
+        )
+
+    assert [r["summary"] for r in results] == ["summary", "summary"]
+    assert scrape.await_count == 1
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import config
+import llm_handler
+from summary_chunking import chunk_texts, estimate_tokens, is_conversation_start
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_estimate_tokens_counts_words_and_symbols():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hello world") == 2
+    assert estimate_tokens("internationalization") > 1
+    assert estimate_tokens("https://example.com/a") > 4
+
+
+def test_chunk_texts_respects_budget_and_keeps_everything():
+    texts = [f"message number {i} " * 5 for i in range(40)]
+
+    chunks = chunk_texts(texts, max_tokens=100)
+
+    assert [t for chunk in chunks for t in chunk] == texts
+    assert all(estimate_tokens("".join(chunk)) <= 100 for chunk in chunks)
+
+
+def test_chunk_texts_cuts_at_conversation_start():
+    texts = ["word " * 10] * 6
+    starts = [True, False, False, True, False, False]
+
+    chunks = chunk_texts(texts, max_tokens=55, starts=starts)
+
+    assert [len(chunk) for chunk in chunks] == [3, 3]
+
+
+def test_oversized_text_is_split_not_dropped():
+    text = "\n".join(f"line {i} with some words" for i in range(200))
+
+    chunks = chunk_texts(["short", text], max_tokens=50)
+
+    assert chunks[0] == ["short"]
+    assert "".join(piece for chunk in chunks[1:] for piece in chunk) == text
+
+
+def test_conversation_start_requires_gap_and_no_reply():
+    now = datetime.now(timezone.utc)
+    first = {"created_at": now}
+
+    assert is_conversation_start({"created_at": now + timedelta(minutes=10)}, first)
+    assert not is_conversation_start({"created_at": now + timedelta(minutes=1)}, first)
+    assert not is_conversation_start(
+        {"created_at": now + timedelta(minutes=10), "reply_to_author": "someone"}, first
+    )
+
+
+@pytest.mark.asyncio
+async def test_large_summary_is_map_reduced_without_truncation(monkeypatch):
+    monkeypatch.setattr(config, "SUMMARY_CHUNK_TOKENS", 4000)
+    monkeypatch.setattr(config, "SUMMARY_MAP_CONCURRENCY", 2)
+    start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    messages = [
+        {
+            "id": str(i),
+            "author_name": f"user{i % 7}",
+            "content": f"marker-{i} " + "discussion about compilers " * 20,
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(300)
+    ]
+
+    prompts = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, max_in_flight
+        prompt = kwargs["messages"][1]["content"]
+        prompts.append(prompt)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _completion(f"- notes for call {len(prompts)}")
+
+    with patch.object(llm_handler.llm_client.chat.completions, "create", create):
+        summary = await llm_handler.call_llm_for_summary(messages, "general", start)
+
+    map_prompts, final_prompt = prompts[:-1], prompts[-1]
+    assert len(map_prompts) > 1
+    assert max_in_flight == 2
+    # Every message reached exactly one map call
+    for i in range(300):
+        assert sum(f"marker-{i} " in prompt for prompt in map_prompts) == 1
+    assert "truncated" not in final_prompt
+    assert "### Part 1" in final_prompt
+    assert summary
+
+
+@pytest.mark.asyncio
+async def test_small_summary_uses_a_single_call():
+    messages = [{"id": "1", "author_name": "a", "content": "hello", "created_at": datetime.now(timezone.utc)}]
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return _completion("## Highlights")
+
+    with patch.object(llm_handler.llm_client.chat.completions, "create", create):
+        await llm_handler.call_llm_for_summary(messages, "general", datetime.now(timezone.utc))
+
+    assert len(calls) == 1
@@ -0,0 +1,88 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database
+
+
+def _store(message_id, created_at, channel_id="chan", content="hello world"):
+    database.store_message(
+        message_id=message_id,
+        author_id="1",
+        author_name="tester",
+        channel_id=channel_id,
+        channel_name="general",
+        content=content,
+        created_at=created_at,
+        guild_id="guild",
+        guild_name="Guild",
+    )
+
+
+def _query_plans(fn, *args, **kwargs):
+    """Run fn, capturing the SELECTs it executes, and return their query plans."""
+    conn = database.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        fn(*args, **kwargs)
+    finally:
+        conn.set_trace_callback(None)
+
+    plans = {}
+    for sql in statements:
+        if sql.lstrip().upper().startswith("SELECT") and "FROM messages" in sql:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            plans[sql] = " | ".join(row["detail"] for row in rows)
+    assert plans, "no SELECT statements were captured"
+    return plans
+
+
+def test_created_at_ms_populated_on_insert(temp_db):
+    created_at = datetime(2026, 1, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+    _store("m1", created_at)
+
+    with sqlite3.connect(temp_db) as conn:
+        value = conn.execute("SELECT created_at_ms FROM messages WHERE id = 'm1'").fetchone()[0]
+    assert value == int(created_at.timestamp() * 1000)
+
+
+def test_migration_backfills_created_at_ms(temp_db):
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute(
+            "INSERT INTO messages (id, author_id, author_name, channel_id, channel_name, content, "
+            "created_at, is_bot, is_command) VALUES ('legacy', '1', 'x', 'chan', 'general', 'old', "
+            "'2026-01-01T12:00:00+00:00', 0, 0)"
+        )
+    database.migrate_database()
+
+    with sqlite3.connect(temp_db) as conn:
+        value = conn.execute("SELECT created_at_ms FROM messages WHERE id = 'legacy'").fetchone()[0]
+    assert value == int(datetime(2026, 1, 1, 12, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def test_channel_hours_query_filters_by_window(temp_db):
+    now = datetime.now(timezone.utc)
+    _store("recent", now - timedelta(hours=1))
+    _store("old", now - timedelta(hours=30))
+    _store("other-channel", now - timedelta(hours=1), channel_id="other")
+
+    messages = database.get_channel_messages_for_hours("chan", now, 24)
+
+    assert [m["id"] for m in messages] == ["recent"]
+
+
+@pytest.mark.parametrize("fn, args, kwargs, index", [
+    (database.get_channel_messages_for_hours, ("chan", datetime.now(timezone.utc), 24), {}, "idx_channel_created_at_ms"),
+    (database.get_recent_messages_for_context, ("guild",), {"hours": 24}, "idx_guild_created_at_ms"),
+    (database._search_messages_by_keywords_like, (["hello"],), {"guild_id": "guild", "hours": 24}, "created_at_ms"),
+])
+def test_time_window_queries_use_created_at_ms_index(temp_db, fn, args, kwargs, index):
+    _store("m1", datetime.now(timezone.utc))
+
+    plans = _query_plans(fn, *args, **kwargs)
+
+    for sql, plan in plans.items():
+        assert index in plan, f"{plan} for {sql}"
+        assert "SCAN messages" not in plan, plan
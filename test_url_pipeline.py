@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from url_pipeline import collect_stragglers, summarize_urls
+
+DELAYS = {"a": 0.03, "b": 0.01, "c": 0.5, "d": 0.02, "bad": 0.0}
+
+
+async def _worker(url):
+    await asyncio.sleep(DELAYS[url])
+    if url == "bad":
+        raise RuntimeError("boom")
+    return f"summary {url}"
+
+
+@pytest.mark.asyncio
+async def test_results_keep_url_order_and_stragglers_are_returned():
+    ready, stragglers = await summarize_urls(["a", "b", "bad", "c", "d"], _worker, concurrency=5, deadline=0.2)
+
+    assert ready == [("a", "summary a"), ("b", "summary b"), ("d", "summary d")]
+    assert len(stragglers) == 1
+
+    late = []
+
+    async def on_result(url, result):
+        late.append((url, result))
+
+    await collect_stragglers(stragglers, on_result, timeout=1)
+    assert late == [("c", "summary c")]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def worker(url):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return url
+
+    ready, _ = await summarize_urls([str(i) for i in range(8)], worker, concurrency=3, deadline=1)
+
+    assert [url for url, _ in ready] == [str(i) for i in range(8)]
+    assert max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_waits_past_deadline_for_first_success():
+    ready, stragglers = await summarize_urls(["c", "a"], _worker, concurrency=2, deadline=0.001)
+
+    assert ready == [("a", "summary a")]
+    assert len(stragglers) == 1
+    await collect_stragglers(stragglers, None, timeout=0)
+    await asyncio.sleep(0)
+    assert stragglers[0].cancelled()
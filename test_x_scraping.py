@@ -27,6 +27,13 @@ from apify_handler import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('test_x_scraping')
 
+@pytest.fixture(autouse=True)
+def clear_tweet_cache():
+    """Tweets are cached per ID; don't let one test's mock data leak into the next."""
+    apify_handler._tweet_cache.clear()
+    yield
+    apify_handler._tweet_cache.clear()
+
 class TestExtractTweetId:
     """Test the extract_tweet_id function."""
 
@@ -233,11 +240,12 @@ class TestFetchTweet:
 
     @pytest.mark.asyncio
     @patch('apify_handler.config')
-    @patch('apify_handler.ApifyClient')
+    @patch('apify_handler.ApifyClientAsync')
     async def test_fetch_tweet_success(self, mock_apify_client, mock_config):
         """Test successful tweet fetching."""
         # Mock config
         mock_config.apify_api_token = "test_token"
+        mock_config.APIFY_RUN_TIMEOUT_SECONDS = 60
 
         # Mock Apify client and response
         mock_client_instance = MagicMock()
@@ -248,8 +256,8 @@ class TestFetchTweet:
         mock_client_instance.actor.return_value = mock_actor
 
         # Mock run result
-        mock_run = {"defaultDatasetId": "test_dataset_id"}
-        mock_actor.call.return_value = mock_run
+        mock_run = {"id": "test_run_id", "status": "SUCCEEDED", "defaultDatasetId": "test_dataset_id"}
+        mock_actor.start = AsyncMock(return_value=mock_run)
 
         # Mock dataset items
         mock_dataset = MagicMock()
@@ -265,7 +273,7 @@ class TestFetchTweet:
                 'id_str': '1234567890'
             }
         ]
-        mock_dataset.list_items.return_value = mock_dataset_items
+        mock_dataset.list_items = AsyncMock(return_value=mock_dataset_items)
 
         # Test the function
         url = "https://x.com/testuser/status/1234567890"
@@ -299,6 +307,7 @@ class TestFetchTweet:
         """Test fetch_tweet with invalid URL (no tweet ID)."""
         # Mock config
         mock_config.apify_api_token = "test_token"
+        mock_config.APIFY_RUN_TIMEOUT_SECONDS = 60
 
         url = "https://x.com/testuser"  # No status/tweet ID
         result = await fetch_tweet(url)
@@ -307,11 +316,12 @@ class TestFetchTweet:
 
     @pytest.mark.asyncio
     @patch('apify_handler.config')
-    @patch('apify_handler.ApifyClient')
+    @patch('apify_handler.ApifyClientAsync')
     async def test_fetch_tweet_no_data(self, mock_apify_client, mock_config):
         """Test fetch_tweet when no data is returned."""
         # Mock config
         mock_config.apify_api_token = "test_token"
+        mock_config.APIFY_RUN_TIMEOUT_SECONDS = 60
 
         # Mock Apify client
         mock_client_instance = MagicMock()
@@ -320,14 +330,14 @@ class TestFetchTweet:
         # Mock empty dataset
         mock_actor = MagicMock()
         mock_client_instance.actor.return_value = mock_actor
-        mock_run = {"defaultDatasetId": "test_dataset_id"}
-        mock_actor.call.return_value = mock_run
+        mock_run = {"id": "test_run_id", "status": "SUCCEEDED", "defaultDatasetId": "test_dataset_id"}
+        mock_actor.start = AsyncMock(return_value=mock_run)
 
         mock_dataset = MagicMock()
         mock_client_instance.dataset.return_value = mock_dataset
         mock_dataset_items = MagicMock()
         mock_dataset_items.items = []  # Empty result
-        mock_dataset.list_items.return_value = mock_dataset_items
+        mock_dataset.list_items = AsyncMock(return_value=mock_dataset_items)
 
         url = "https://x.com/testuser/status/1234567890"
         result = await fetch_tweet(url)
@@ -339,11 +349,12 @@ class TestFetchTweetReplies:
 
     @pytest.mark.asyncio
     @patch('apify_handler.config')
-    @patch('apify_handler.ApifyClient')
+    @patch('apify_handler.ApifyClientAsync')
     async def test_fetch_tweet_replies_success(self, mock_apify_client, mock_config):
         """Test successful tweet replies fetching."""
         # Mock config
         mock_config.apify_api_token = "test_token"
+        mock_config.APIFY_RUN_TIMEOUT_SECONDS = 60
 
         # Mock Apify client
         mock_client_instance = MagicMock()
@@ -353,8 +364,8 @@ class TestFetchTweetReplies:
         mock_actor = MagicMock()
         mock_client_instance.actor.return_value = mock_actor
 
-        mock_run = {"defaultDatasetId": "test_dataset_id"}
-        mock_actor.call.return_value = mock_run
+        mock_run = {"id": "test_run_id", "status": "SUCCEEDED", "defaultDatasetId": "test_dataset_id"}
+        mock_actor.start = AsyncMock(return_value=mock_run)
 
         # Mock dataset with replies
         mock_dataset = MagicMock()
@@ -370,7 +381,7 @@ class TestFetchTweetReplies:
                 'user': {'name': 'Reply User 2', 'screen_name': 'reply2'}
             }
         ]
-        mock_dataset.list_items.return_value = mock_dataset_items
+        mock_dataset.list_items = AsyncMock(return_value=mock_dataset_items)
 
         url = "https://x.com/testuser/status/1234567890"
         result = await fetch_tweet_replies(url)
@@ -478,6 +489,76 @@ class TestScrapeTwitterContent:
         assert 'Tweet without replies' in result['markdown']
         assert result['raw_data']['replies'] == []
 
+class TestApifyRuns:
+    """Test batched, polled actor runs and the per-tweet cache."""
+
+    @staticmethod
+    def _client(items, statuses=("SUCCEEDED",)):
+        client = MagicMock()
+        client.actor.return_value.start = AsyncMock(
+            return_value={"id": "run", "status": statuses[0], "defaultDatasetId": "ds"}
+        )
+        client.run.return_value.get = AsyncMock(side_effect=[
+            {"id": "run", "status": status, "defaultDatasetId": "ds"} for status in statuses[1:]
+        ])
+        client.run.return_value.abort = AsyncMock()
+        client.dataset.return_value.list_items = AsyncMock(return_value=MagicMock(items=items))
+        return client
+
+    @pytest.mark.asyncio
+    @patch('apify_handler.config')
+    @patch('apify_handler.ApifyClientAsync')
+    async def test_concurrent_tweets_share_one_run(self, mock_apify_client, mock_config):
+        mock_config.apify_api_token = "batch_token"
+        mock_config.APIFY_RUN_TIMEOUT_SECONDS = 60
+        client = self._client([{'id_str': '2', 'text': 'second'}, {'id_str': '1', 'text': 'first'}])
+        mock_apify_client.return_value = client
+
+        first, second = await asyncio.gather(
+            fetch_tweet("https://x.com/a/status/1"),
+            fetch_tweet("https://twitter.com/b/status/2"),
+        )
+
+        assert first['text'] == 'first'
+        assert second['text'] == 'second'
+        client.actor.return_value.start.assert_awaited_once()
+        run_input = client.actor.return_value.start.call_args.kwargs['run_input']
+        assert [u['url'] for u in run_input['startUrls']] == [
+            "https://x.com/a/status/1", "https://twitter.com/b/status/2"
+        ]
+
+        # Served from the per-tweet cache without another run
+        assert (await fetch_tweet("https://x.com/someone/status/1"))['text'] == 'first'
+        client.actor.return_value.start.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch('apify_handler.RUN_POLL_INTERVAL_SECONDS', 0)
+    @patch('apify_handler.config')
+    @patch('apify_handler.ApifyClientAsync')
+    async def test_run_is_polled_until_it_finishes(self, mock_apify_client, mock_config):
+        mock_config.apify_api_token = "poll_token"
+        mock_config.APIFY_RUN_TIMEOUT_SECONDS = 60
+        client = self._client([{'replyText': 'hi'}], statuses=("READY", "RUNNING", "SUCCEEDED"))
+        mock_apify_client.return_value = client
+
+        replies = await fetch_tweet_replies("https://x.com/a/status/5")
+
+        assert replies == [{'replyText': 'hi'}]
+        assert client.run.return_value.get.await_count == 2
+
+    @pytest.mark.asyncio
+    @patch('apify_handler.RUN_POLL_INTERVAL_SECONDS', 0)
+    @patch('apify_handler.config')
+    @patch('apify_handler.ApifyClientAsync')
+    async def test_slow_run_is_aborted(self, mock_apify_client, mock_config):
+        mock_config.apify_api_token = "slow_token"
+        mock_config.APIFY_RUN_TIMEOUT_SECONDS = 0
+        client = self._client([], statuses=("RUNNING",))
+        mock_apify_client.return_value = client
+
+        assert await fetch_tweet_replies("https://x.com/a/status/6") is None
+        client.run.return_value.abort.assert_awaited_once()
+
 # Integration test class
 class TestXScrapingIntegration:
     """Integration tests for X scraping workflow."""
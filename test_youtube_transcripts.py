@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm_handler
+import youtube_handler
+from summary_chunking import estimate_tokens
+
+
+def _segments(count, words=20):
+    return [
+        {"text": " ".join(f"word{i}" for _ in range(words)), "start": i * 10.0, "duration": 10.0}
+        for i in range(count)
+    ]
+
+
+def test_split_transcript_keeps_order_and_timestamps():
+    segments = _segments(40)
+    sections = youtube_handler.split_transcript(segments, section_tokens=200, max_sections=50)
+
+    assert len(sections) > 1
+    assert sections[0]["start"] == 0.0
+    assert sections[-1]["end"] == 400.0
+    assert all(a["end"] <= b["start"] + 10.0 for a, b in zip(sections, sections[1:]))
+    assert "word39" in sections[-1]["text"]
+
+
+def test_split_transcript_is_bounded_for_long_videos():
+    segments = _segments(5000)
+    sections = youtube_handler.split_transcript(segments, section_tokens=300, max_sections=6)
+
+    assert len(sections) == 6
+    assert all(estimate_tokens(section["text"]) <= 300 + 50 for section in sections)
+    # The sampled sections still cover the whole video
+    assert sections[-1]["end"] == 50000.0
+
+
+def test_timestamps():
+    assert youtube_handler.format_timestamp(75) == "1:15"
+    assert youtube_handler.format_timestamp(3725) == "1:02:05"
+    assert youtube_handler.timestamp_url("dQw4w9WgXcQ", 75.6) == "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=75s"
+
+
+@pytest.mark.asyncio
+async def test_transcripts_are_cached_per_video(monkeypatch):
+    calls = []
+
+    def fetch(video_id):
+        calls.append(video_id)
+        return [{"text": "hello\nthere", "start": 0, "duration": 2}]
+
+    monkeypatch.setattr(youtube_handler, "_fetch_transcript_segments", fetch)
+    monkeypatch.setattr(youtube_handler, "_transcript_cache", youtube_handler.OrderedDict())
+
+    first = await youtube_handler.get_transcript_segments("abcdefghijk")
+    second = await youtube_handler.get_transcript_segments("abcdefghijk")
+
+    assert first == second == [{"text": "hello there", "start": 0.0, "duration": 2.0}]
+    assert calls == ["abcdefghijk"]
+
+
+@pytest.mark.asyncio
+async def test_long_transcript_summary_links_each_section(monkeypatch):
+    monkeypatch.setattr(llm_handler.config, "YOUTUBE_SECTION_TOKENS", 200)
+    monkeypatch.setattr(llm_handler.config, "YOUTUBE_MAX_SECTIONS", 3)
+    prompts = []
+
+    async def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        prompts.append(prompt)
+        if prompt.startswith("Below is part"):
+            part = prompt.split()[3]
+            content = f"Title: Part {part} topic\n- detail"
+        else:
+            content = "Overall summary.\n- key point"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    monkeypatch.setattr(llm_handler.llm_client.chat.completions, "create", create)
+
+    summary = await llm_handler.summarize_youtube_transcript(
+        _segments(300), "https://youtu.be/dQw4w9WgXcQ"
+    )
+
+    assert len(prompts) == 4
+    assert "Overall summary." in summary
+    assert "watch?v=dQw4w9WgXcQ&t=0s" in summary
+    assert "Part 3 topic" in summary
+    assert "Title:" not in summary
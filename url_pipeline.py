@@ -0,0 +1,101 @@
+"""
+Concurrent processing of the URLs in a message.
+
+Link and X post summaries (and the scraped context for /ask) used to be fetched
+one URL after another, so a message with four links took four times as long.
+summarize_urls() runs them concurrently with bounded fan-out and returns what is
+ready by a deadline, in the order the URLs appeared; the stragglers are handed
+back as tasks so the caller can append them later or drop them.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+# Set up logging
+logger = logging.getLogger('discord_bot.url_pipeline')
+
+UrlResult = Tuple[str, Optional[Any]]
+
+
+async def _run_one(url: str, worker: Callable[[str], Awaitable[Any]], semaphore: asyncio.Semaphore) -> UrlResult:
+    """Run worker(url) under the semaphore; failures are logged and reported as a None result."""
+    async with semaphore:
+        try:
+            return url, await worker(url)
+        except Exception as e:
+            logger.error(f"Error processing URL {url}: {str(e)}", exc_info=True)
+            return url, None
+
+
+async def summarize_urls(
+    urls: Sequence[str],
+    worker: Callable[[str], Awaitable[Any]],
+    concurrency: int,
+    deadline: float
+) -> Tuple[List[Tuple[str, Any]], List["asyncio.Task[UrlResult]"]]:
+    """
+    Run worker(url) for every URL concurrently and collect what finishes by the deadline.
+
+    If nothing has succeeded by the deadline, waits for the first success instead, so a
+    message is never left with nothing just because every URL is slow.
+
+    Args:
+        urls (Sequence[str]): URLs in the order they appear in the message
+        worker (Callable[[str], Awaitable[Any]]): Produces the result for one URL; a falsy result
+            or an exception counts as a failure
+        concurrency (int): Maximum URLs processed at once
+        deadline (float): Seconds to wait before returning with whatever is ready
+
+    Returns:
+        Tuple[List[Tuple[str, Any]], List[asyncio.Task]]: (url, result) pairs that succeeded in
+        time, in URL order, and the still-running tasks (also in URL order), each resolving to
+        (url, result or None)
+    """
+    if not urls:
+        return [], []
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [asyncio.create_task(_run_one(url, worker, semaphore)) for url in urls]
+
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    while pending and not any(task.result()[1] for task in done):
+        newly_done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        done |= newly_done
+
+    ready = [task.result() for task in tasks if task in done and task.result()[1]]
+    stragglers = [task for task in tasks if task in pending]
+    if stragglers:
+        logger.info(f"{len(ready)} of {len(urls)} URLs ready after {deadline}s; {len(stragglers)} still running")
+    return ready, stragglers
+
+
+async def collect_stragglers(
+    stragglers: Sequence["asyncio.Task[UrlResult]"],
+    on_result: Callable[[str, Any], Awaitable[None]],
+    timeout: float
+) -> None:
+    """
+    Hand each straggler's result to on_result, in URL order, as long as it arrives within timeout.
+    Stragglers still running after that are cancelled (shared single-flight work is not affected).
+
+    Args:
+        stragglers (Sequence[asyncio.Task]): Tasks returned by summarize_urls
+        on_result (Callable[[str, Any], Awaitable[None]]): Called with (url, result) for each success
+        timeout (float): Seconds to keep waiting; 0 drops the stragglers immediately
+    """
+    if stragglers and timeout > 0:
+        await asyncio.wait(stragglers, timeout=timeout)
+
+    for task in stragglers:
+        if not task.done():
+            task.cancel()
+            logger.info("Dropping URL result that missed the straggler timeout")
+            continue
+        url, result = task.result()
+        if not result:
+            continue
+        try:
+            await on_result(url, result)
+        except Exception as e:
+            logger.error(f"Error delivering late result for URL {url}: {str(e)}", exc_info=True)
@@ -0,0 +1,85 @@
+"""URL canonicalization shared by the scrape cache and link handlers.
+
+Different spellings of the same link (tracking parameters, host case, x.com vs
+twitter.com, youtu.be vs youtube.com) canonicalize to one string so a page is
+scraped and summarized once no matter how it was shared.
+"""
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = frozenset({"si", "ref", "ref_src", "ref_url", "fbclid", "gclid", "igshid", "feature"})
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+TWITTER_HOSTS = frozenset({
+    "x.com", "twitter.com", "mobile.twitter.com", "mobile.x.com",
+    "fxtwitter.com", "vxtwitter.com", "fixupx.com",
+})
+YOUTUBE_HOSTS = frozenset({"youtube.com", "m.youtube.com", "music.youtube.com", "youtu.be", "youtube-nocookie.com"})
+
+TWEET_PATH_PATTERN = re.compile(r"^/(?:[^/]+|i(?:/web)?)/status(?:es)?/(\d+)")
+YOUTUBE_PATH_PATTERN = re.compile(r"^/(?:shorts|embed|v|live)/([A-Za-z0-9_-]{11})")
+YOUTUBE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Return the canonical form of a URL for cache lookups.
+
+    - scheme and host are lowercased, ``www.``, default ports and fragments dropped
+    - tracking parameters (utm_*, si, ref, ...) are removed and the rest sorted
+    - tweets become ``https://x.com/i/status/<id>`` whatever the host or username
+    - YouTube videos become ``https://www.youtube.com/watch?v=<id>``
+
+    Unparseable input is returned stripped but otherwise unchanged.
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url
+    if not host:
+        return url
+
+    if host.startswith("www."):
+        host = host[4:]
+    scheme = (parts.scheme or "https").lower()
+    path = parts.path or "/"
+
+    if host in TWITTER_HOSTS:
+        match = TWEET_PATH_PATTERN.match(path)
+        if match:
+            return f"https://x.com/i/status/{match.group(1)}"
+        host = "x.com"
+
+    query = parse_qsl(parts.query, keep_blank_values=True)
+
+    if host in YOUTUBE_HOSTS:
+        video_id = None
+        if host == "youtu.be":
+            candidate = path.strip("/").split("/")[0]
+            video_id = candidate if YOUTUBE_ID_PATTERN.match(candidate) else None
+        else:
+            match = YOUTUBE_PATH_PATTERN.match(path)
+            if match:
+                video_id = match.group(1)
+            elif path.rstrip("/") == "/watch":
+                video_id = next((v for k, v in query if k == "v" and YOUTUBE_ID_PATTERN.match(v)), None)
+        if video_id:
+            return f"https://www.youtube.com/watch?v={video_id}"
+
+    netloc = host
+    if port and not (scheme == "http" and port == 80) and not (scheme == "https" and port == 443):
+        netloc = f"{host}:{port}"
+    if path != "/":
+        path = path.rstrip("/")
+
+    query = sorted((k, v) for k, v in query if not _is_tracking_param(k))
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
@@ -1,18 +1,36 @@
 """
 YouTube handler module for the Discord bot.
 Handles extracting transcripts and summarizing YouTube videos.
+
+Transcripts are fetched on a dedicated thread pool, cached per video ID, and kept
+as timed segments so long videos can be split into sections and summarized with
+per-section timestamps.
 """
 
 import asyncio
 import logging
+import math
 import re
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
+
+from summary_chunking import estimate_tokens
 
 # Set up logging
 logger = logging.getLogger('discord_bot.youtube_handler')
 
+TRANSCRIPT_LANGUAGES = ['en', 'en-US', 'en-GB']
+
+# Transcript fetches are blocking HTTP calls; keep them off the default executor
+TRANSCRIPT_FETCH_WORKERS = 2
+_transcript_executor = ThreadPoolExecutor(max_workers=TRANSCRIPT_FETCH_WORKERS, thread_name_prefix='youtube')
+
+# Recently fetched transcripts (video ID -> segments), most recently used last
+TRANSCRIPT_CACHE_MAX_ENTRIES = 32
+_transcript_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
 def extract_video_id(url: str) -> Optional[str]:
     """
     Extract the video ID from a YouTube URL.
@@ -43,6 +61,58 @@ def extract_video_id(url: str) -> Optional[str]:
         logger.error(f"Error extracting video ID from URL {url}: {str(e)}", exc_info=True)
         return None
 
+def _fetch_transcript_segments(video_id: str) -> List[Dict[str, Any]]:
+    """Fetch a transcript with whichever youtube-transcript-api interface is installed."""
+    if hasattr(YouTubeTranscriptApi, 'get_transcript'):
+        # youtube-transcript-api < 1.0
+        return YouTubeTranscriptApi.get_transcript(video_id, languages=TRANSCRIPT_LANGUAGES)
+    return YouTubeTranscriptApi().fetch(video_id, languages=TRANSCRIPT_LANGUAGES).to_raw_data()
+
+async def get_transcript_segments(video_id: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the timed transcript segments for a YouTube video, cached per video ID.
+
+    Args:
+        video_id (str): The YouTube video ID
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: Segments with 'text', 'start' and 'duration' (seconds),
+        or None if unavailable
+    """
+    cached = _transcript_cache.get(video_id)
+    if cached is not None:
+        _transcript_cache.move_to_end(video_id)
+        logger.info(f"Using cached transcript for video ID: {video_id}")
+        return cached
+
+    try:
+        logger.info(f"Getting transcript for video ID: {video_id}")
+        loop = asyncio.get_running_loop()
+        raw_segments = await loop.run_in_executor(_transcript_executor, _fetch_transcript_segments, video_id)
+    except Exception as e:
+        logger.warning(f"Could not get transcript for video ID {video_id}: {str(e)}")
+        return None
+
+    segments = [
+        {
+            'text': str(entry.get('text', '')).replace('\n', ' ').strip(),
+            'start': float(entry.get('start', 0.0)),
+            'duration': float(entry.get('duration', 0.0))
+        }
+        for entry in raw_segments
+    ]
+    segments = [segment for segment in segments if segment['text']]
+    if not segments:
+        logger.warning(f"Empty transcript for video ID {video_id}")
+        return None
+
+    _transcript_cache[video_id] = segments
+    while len(_transcript_cache) > TRANSCRIPT_CACHE_MAX_ENTRIES:
+        _transcript_cache.popitem(last=False)
+
+    logger.info(f"Successfully retrieved transcript for video ID: {video_id} ({len(segments)} segments)")
+    return segments
+
 async def get_video_transcript(video_id: str) -> Optional[str]:
     """
     Get the transcript for a YouTube video.
@@ -53,26 +123,94 @@ async def get_video_transcript(video_id: str) -> Optional[str]:
     Returns:
         Optional[str]: The transcript text or None if unavailable
     """
-    try:
-        logger.info(f"Getting transcript for video ID: {video_id}")
-        
-        # Use asyncio.to_thread to run the blocking call in a thread
-        transcript_list = await asyncio.to_thread(
-            YouTubeTranscriptApi.get_transcript,
-            video_id,
-            languages=['en', 'en-US', 'en-GB']
-        )
-        
-        # Format the transcript as plain text
-        # Each entry in transcript_list is a dict with 'text', 'start', 'duration' keys
-        transcript_text = ' '.join([entry['text'] for entry in transcript_list])
-        
-        logger.info(f"Successfully retrieved transcript for video ID: {video_id}")
-        return transcript_text
-        
-    except Exception as e:
-        logger.warning(f"Could not get transcript for video ID {video_id}: {str(e)}")
+    segments = await get_transcript_segments(video_id)
+    if not segments:
         return None
+    return ' '.join(segment['text'] for segment in segments)
+
+def format_timestamp(seconds: float) -> str:
+    """
+    Format an offset into a video as m:ss or h:mm:ss.
+
+    Args:
+        seconds (float): Offset in seconds
+
+    Returns:
+        str: The formatted timestamp
+    """
+    total = int(seconds)
+    hours, remainder = divmod(total, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+def timestamp_url(video_id: str, seconds: float) -> str:
+    """
+    Build a link that opens a video at an offset.
+
+    Args:
+        video_id (str): The YouTube video ID
+        seconds (float): Offset in seconds
+
+    Returns:
+        str: The watch URL with a &t= offset
+    """
+    return f"https://www.youtube.com/watch?v={video_id}&t={int(seconds)}s"
+
+def split_transcript(
+    segments: List[Dict[str, Any]],
+    section_tokens: int,
+    max_sections: int
+) -> List[Dict[str, Any]]:
+    """
+    Split transcript segments into consecutive, time-stamped sections.
+
+    Sections hold about section_tokens tokens each. A transcript longer than
+    max_sections such sections is split into max_sections equal parts, each
+    thinned to evenly spaced segments, so the text summarized stays bounded
+    however long the video is.
+
+    Args:
+        segments (List[Dict[str, Any]]): Segments from get_transcript_segments
+        section_tokens (int): Token budget per section
+        max_sections (int): Maximum number of sections
+
+    Returns:
+        List[Dict[str, Any]]: Sections with 'start', 'end' (seconds) and 'text'
+    """
+    if not segments:
+        return []
+
+    costs = [estimate_tokens(segment['text']) + 1 for segment in segments]
+    total = sum(costs)
+    section_count = max(1, min(max_sections, math.ceil(total / max(1, section_tokens))))
+    target = total / section_count
+
+    # Cut at segment boundaries once each section has its share of the tokens
+    groups: List[List[int]] = [[]]
+    running = 0
+    for index, cost in enumerate(costs):
+        if groups[-1] and running + cost > target * len(groups) and len(groups) < section_count:
+            groups.append([])
+        groups[-1].append(index)
+        running += cost
+
+    sections = []
+    for group in groups:
+        first, last = segments[group[0]], segments[group[-1]]
+        group_cost = sum(costs[i] for i in group)
+        if total > section_count * section_tokens and group_cost > section_tokens:
+            # Keep evenly spaced segments so the whole stretch of the video is represented
+            keep = max(1, int(len(group) * section_tokens / group_cost))
+            step = len(group) / keep
+            group = [group[int(k * step)] for k in range(keep)]
+        sections.append({
+            'start': first['start'],
+            'end': last['start'] + last['duration'],
+            'text': ' '.join(segments[i]['text'] for i in group)
+        })
+    return sections
 
 async def get_video_metadata(video_id: str) -> Dict[str, Any]:
     """
@@ -113,8 +251,8 @@ async def scrape_youtube_content(url: str) -> Optional[Dict[str, Any]]:
             return None
         
         # Get video transcript
-        transcript = await get_video_transcript(video_id)
-        if not transcript:
+        segments = await get_transcript_segments(video_id)
+        if not segments:
             logger.warning(f"Could not get transcript for video: {url}")
             # Return a structured error response instead of None
             metadata = await get_video_metadata(video_id)
@@ -131,15 +269,15 @@ async def scrape_youtube_content(url: str) -> Optional[Dict[str, Any]]:
         # Get basic metadata
         metadata = await get_video_metadata(video_id)
         
-        # Limit transcript length to prevent token overload (approximately 7000 characters)
-        if len(transcript) > 7000:
-            transcript = transcript[:7000] + "... [transcript truncated]"
+        # The full transcript is kept; long videos are summarized section by section
+        transcript = ' '.join(segment['text'] for segment in segments)
         
         # Format as markdown
         markdown_content = format_as_markdown(transcript, metadata)
         
         scraped_content = {
             'transcript': transcript,
+            'segments': segments,
             'metadata': metadata
         }
         